@@ -26,7 +26,8 @@ from collections import defaultdict, Counter
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from modules.module_a_core.query_analyzer import QueryAnalyzer, MODEL_HEAVY, MODEL_CODE, MODEL_FAST
+from modules.module_a_core.query_analyzer import QueryAnalyzer
+from modules.module_a_core.routing_engine import MODEL_HEAVY, MODEL_CODE, MODEL_FAST
 
 # Configure logging with rotation
 from logging.handlers import RotatingFileHandler
@@ -135,6 +136,8 @@ class AdvancedOvernightOptimizer:
     def set_router_params(self, **kwargs):
         """Set router parameters (placeholder for actual implementation)."""
         self.current_params.update(kwargs)
+        # Memoized routing decisions were made with the old parameters
+        self.analyzer.memo.invalidate()
         logger.info(f"🔧 Updated router params: {kwargs}")
     
     def mutate_query(self, query: str) -> str:
@@ -118,6 +118,13 @@ class ConfidenceCalculator:
         uncertainty_penalty = min(0.4, uncertainty_count * 0.1)
         score -= uncertainty_penalty
         
+        # A single caveat is fine, hedging in most sentences is not an answer
+        sentences = [s for s in re.split(r'[.!?\n]+', response_lower) if s.strip()]
+        if sentences:
+            hedged = sum(1 for sentence in sentences
+                         if any(keyword in sentence for keyword in self.uncertainty_keywords))
+            score -= 0.4 * hedged / len(sentences)
+        
         # Reward confidence indicators (but not too much)
         confidence_bonus = min(0.2, confidence_count * 0.05)
         score += confidence_bonus
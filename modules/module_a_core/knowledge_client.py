@@ -8,6 +8,7 @@ import asyncio
 from typing import List, Dict, Any, Optional
 import httpx
 from dataclasses import dataclass
+from shared.http import create_client
 
 logger = logging.getLogger(__name__)
 
@@ -38,9 +39,9 @@ class KnowledgeClient:
         self._available = None
     
     async def _get_client(self) -> httpx.AsyncClient:
-        """Get or create HTTP client."""
+        """Get or create HTTP client (on the shared connection pool)."""
         if self._client is None:
-            self._client = httpx.AsyncClient(timeout=self.timeout)
+            self._client = create_client(timeout=self.timeout)
         return self._client
     
     async def health_check(self) -> bool:
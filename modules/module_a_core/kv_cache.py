@@ -0,0 +1,186 @@
+"""
+Per-session KV-cache reuse for Module A.
+Keeps the context token array Ollama returns so follow-up turns only prefill the new tokens.
+"""
+
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SessionPrompt:
+    """Session-aware generation request."""
+    session_id: str
+    turn_query: str  # Prompt for this turn without the conversation history
+
+
+@dataclass
+class _CachedContext:
+    model: str
+    tokens: List[int]
+
+
+class SessionKVCache:
+    """
+    Context tokens of the last turn per session.
+    
+    Ollama's /api/generate returns the token sequence of prompt and answer
+    as 'context'. Passing it back with the next prompt lets the runner reuse
+    its KV cache for that prefix, so a follow-up turn only prefills the new
+    question instead of the whole text transcript. The tokens belong to one
+    model: a turn routed to another model misses, is answered from the text
+    transcript and replaces the entry. Any turn that does not yield tokens
+    invalidates the entry, so a cached prefix never skips a turn.
+    """
+    
+    def __init__(self, max_sessions: int = 256, max_tokens: int = 4096):
+        """
+        Initialize KV cache.
+        
+        Args:
+            max_sessions: Sessions kept before the least recently used is evicted
+            max_tokens: Longer contexts are dropped and rebuilt from the transcript
+                (should stay below the model's num_ctx)
+        """
+        self.max_sessions = max_sessions
+        self.max_tokens = max_tokens
+        self._entries: "OrderedDict[str, _CachedContext]" = OrderedDict()
+        
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.model_switches = 0
+        self.oversized = 0
+        self.evictions = 0
+    
+    def get(self, session_id: str, model: str) -> Optional[List[int]]:
+        """
+        Get the context tokens to continue a session on a model.
+        
+        Args:
+            session_id: Session identifier
+            model: Model that will answer the turn
+        
+        Returns:
+            Token array, or None if the turn needs the full transcript
+        """
+        entry = self._entries.get(session_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        if entry.model != model:
+            # Tokens of another model are meaningless here
+            self.misses += 1
+            self.model_switches += 1
+            logger.debug(f"Session {session_id} switched from {entry.model} to {model}, rebuilding prompt")
+            del self._entries[session_id]
+            return None
+        
+        self._entries.move_to_end(session_id)
+        self.hits += 1
+        return entry.tokens
+    
+    def has_context(self, session_id: str, model: str) -> bool:
+        """
+        Check whether the next turn of a session on a model would reuse cached tokens.
+        
+        Unlike get(), this neither counts a lookup nor drops the entry.
+        
+        Args:
+            session_id: Session identifier
+            model: Model that will answer the turn
+        
+        Returns:
+            True if prepare() would continue from cached context tokens
+        """
+        entry = self._entries.get(session_id)
+        return entry is not None and entry.model == model
+    
+    def put(self, session_id: str, model: str, tokens: Optional[List[int]]):
+        """
+        Store the context returned for a session's latest turn.
+        
+        Args:
+            session_id: Session identifier
+            model: Model that answered the turn
+            tokens: Context tokens from Ollama (None or empty invalidates)
+        """
+        if not tokens:
+            self.invalidate(session_id)
+            return
+        
+        if len(tokens) > self.max_tokens:
+            self.oversized += 1
+            logger.debug(f"Session {session_id} context has {len(tokens)} tokens, falling back to transcript")
+            self.invalidate(session_id)
+            return
+        
+        self._entries[session_id] = _CachedContext(model=model, tokens=list(tokens))
+        self._entries.move_to_end(session_id)
+        
+        while len(self._entries) > self.max_sessions:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, session_id: str):
+        """Forget a session's cached context."""
+        self._entries.pop(session_id, None)
+    
+    def prepare(self, session: Optional[SessionPrompt], model: str, query: str) -> Tuple[str, Optional[List[int]]]:
+        """
+        Pick the prompt for a turn.
+        
+        Args:
+            session: Session of the request (None disables reuse)
+            model: Model that will answer the turn
+            query: Full prompt including the conversation transcript
+        
+        Returns:
+            Tuple of (prompt, context tokens); the turn-only prompt is used
+            when cached tokens continue the session
+        """
+        if session is None:
+            return query, None
+        
+        tokens = self.get(session.session_id, model)
+        if tokens is None:
+            return query, None
+        return session.turn_query, tokens
+    
+    def record(self, session: Optional[SessionPrompt], model: str, result: Dict[str, Any]):
+        """
+        Take the context tokens out of a generation result and remember them.
+        
+        Args:
+            session: Session of the request
+            model: Model that produced the result
+            result: Generation result (its 'context_tokens' entry is removed)
+        """
+        tokens = result.pop('context_tokens', None)
+        if session is not None:
+            self.put(session.session_id, model, tokens)
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Dictionary with hit/miss counters and cached sessions
+        """
+        lookups = self.hits + self.misses
+        return {
+            "sessions": len(self._entries),
+            "max_sessions": self.max_sessions,
+            "max_tokens": self.max_tokens,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "model_switches": self.model_switches,
+            "oversized": self.oversized,
+            "evictions": self.evictions
+        }
@@ -3,19 +3,29 @@ Module A: Core Intelligence Engine
 Provides local AI inference using Ollama with Llama 3.1 8B model.
 """
 
+import json
 import time
+import asyncio
 import logging
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Dict, Any, List, Tuple
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from shared.models import HealthStatus, Query, Response, ErrorResponse
 from shared.config import ConfigManager, get_module_url
+from shared.http import get_http_pool
+from shared.health import get_health_registry
 from .ollama_client import OllamaClient, QueryProcessor
 from .confidence import ConfidenceCalculator
 from .knowledge_client import KnowledgeClient, ContextIntegrator
 from .model_router import ModelRouter, ModelType
+from .vram_monitor import VRAMMonitor, create_vram_backend
+from .kv_cache import SessionPrompt
+from .scheduler import Priority, AdmissionRejected
 from .session_manager import get_session_manager
+from .session_store import create_session_store
+from .prompt_composer import PromptComposer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -43,20 +53,49 @@ config_manager = ConfigManager()
 config = config_manager.load_config()
 ollama_config = config.ollama
 
+# VRAM sampling and non-interactive model switch policy
+vram_monitor = VRAMMonitor(
+    warning_threshold=0.8,
+    backend=create_vram_backend(config.features.get('vram_backend', 'auto')),
+    sample_interval=config.features.get('vram_sample_interval', 2.0),
+    switch_policy=config.features.get('vram_switch_policy', 'fallback'),
+    queue_timeout=config.features.get('vram_queue_timeout', 30.0)
+)
+
+# Context window per request and the share of it the composed prompt may use
+num_ctx = config.features.get('num_ctx', 4096)
+prompt_token_budget = min(
+    config.features.get('prompt_token_budget', 1500),
+    num_ctx - config.features.get('response_token_reserve', 1024)
+)
+
 # Initialize intelligent model router
 model_router = ModelRouter(
     ollama_host=ollama_config.get('host', 'localhost'),
-    ollama_port=ollama_config.get('port', 11434)
+    ollama_port=ollama_config.get('port', 11434),
+    speculative_confidence_threshold=config.features.get('speculative_confidence_threshold', 0.8),
+    session_kv_max_tokens=min(config.features.get('session_kv_max_tokens', 4096), num_ctx),
+    vram_monitor=vram_monitor,
+    num_ctx=num_ctx
 )
 
 # Initialize session manager (Grok's session management implementation)
 session_manager = get_session_manager()
+session_manager.use_store(create_session_store(
+    backend=config.features.get('session_store', 'memory'),
+    ttl=config.features.get('session_timeout', 3600),
+    max_sessions=config.features.get('session_max_sessions', 10000),
+    max_bytes=config.features.get('session_max_bytes', 64 * 1024 * 1024),
+    path=config.features.get('session_store_path', 'data/module_a_sessions.db'),
+    redis_url=config.features.get('session_redis_url', 'redis://localhost:6379/0')
+))
 
 # Legacy components for backward compatibility
 ollama_client = OllamaClient(
     host=ollama_config.get('host', 'localhost'),
     port=ollama_config.get('port', 11434),
-    model=ollama_config.get('model', 'llama3.1:8b')
+    model=ollama_config.get('model', 'llama3.1:8b'),
+    num_ctx=num_ctx
 )
 query_processor = QueryProcessor()
 confidence_calculator = ConfidenceCalculator()
@@ -68,6 +107,15 @@ knowledge_client = KnowledgeClient(
 )
 context_integrator = ContextIntegrator(knowledge_client)
 
+# Dependency health, probed in the background once the app has started
+health_registry = get_health_registry()
+health_registry.configure(config.health)
+health_registry.register("ollama", lambda: ollama_client.is_available())
+health_registry.register_http("rag", f"{knowledge_client.base_url}/health", require_ok=True)
+# Session history and composed prompt share one budget and one calibrated token estimate
+session_manager.set_context_budget(prompt_token_budget)
+prompt_composer = PromptComposer(token_budget=prompt_token_budget, estimator=session_manager.token_estimator)
+
 
 class InferRequest(BaseModel):
     """Request model for inference endpoint."""
@@ -76,6 +124,8 @@ class InferRequest(BaseModel):
     enable_context_search: Optional[bool] = True
     context_threshold: Optional[float] = 0.6
     session_id: Optional[str] = None  # Session ID for conversation context tracking
+    speculative: Optional[bool] = None  # Draft with the FAST model while a slower routed model runs (default from config)
+    priority: Optional[str] = "interactive"  # Scheduling class: interactive, background or batch
 
 
 class InferResponse(BaseModel):
@@ -94,6 +144,15 @@ class InferResponse(BaseModel):
     session_id: str  # Session ID for conversation tracking
     context_turns_used: int = 0  # Number of previous conversation turns used in context
     context_enhanced: bool = False  # Whether query was enhanced with conversation context
+    speculative: Optional[dict] = None  # Draft/routed model outcome of speculative generation
+    queue_wait_time: Optional[float] = None  # Seconds spent waiting for a model slot (included in processing_time)
+
+
+class InferBatchRequest(BaseModel):
+    """Request model for batch inference endpoint."""
+    queries: List[InferRequest]  # Per-query priority is ignored, the batch priority applies
+    max_concurrency: Optional[int] = None  # Parallel generations per model (default from config)
+    priority: Optional[str] = "batch"
 
 
 class ContextInferRequest(BaseModel):
@@ -103,6 +162,7 @@ class ContextInferRequest(BaseModel):
     threshold: Optional[float] = 0.6
     max_context_length: Optional[int] = 2000
     session_id: Optional[str] = None
+    priority: Optional[str] = "interactive"
 
 
 class ContextInferResponse(BaseModel):
@@ -121,13 +181,29 @@ class ContextInferResponse(BaseModel):
     session_id: str
     context_turns_used: int = 0
     context_enhanced: bool = False
+    queue_wait_time: Optional[float] = None
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Preload the FAST model and start background model management and health probing."""
+    await model_router.start()
+    health_registry.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background model management and health probing, close pooled connections."""
+    await model_router.stop()
+    await health_registry.stop()
+    await get_http_pool().aclose()
 
 
 @app.get("/health", response_model=HealthStatus)
 async def health_check():
-    """Health check endpoint with Ollama availability."""
+    """Health check endpoint with Ollama availability (cached by the health registry)."""
     try:
-        ollama_available = await ollama_client.is_available()
+        ollama_available = await health_registry.check("ollama")
         if ollama_available:
             return HealthStatus(status="ok", version="1.0.0")
         else:
@@ -137,6 +213,274 @@ async def health_check():
         return HealthStatus(status="error", version="1.0.0")
 
 
+async def _session_context_stage(session_id: str, processed_query: str) -> Tuple[str, int]:
+    """Assemble conversation context; returns (context, turns used)."""
+    try:
+        # The session store may hit SQLite or Redis, keep it off the event loop
+        return await asyncio.to_thread(session_manager.get_context_with_turns, session_id)
+    except Exception as e:
+        logger.warning(f"Session context enhancement failed, continuing: {e}")
+        return "", 0
+
+
+async def _rag_context_stage(processed_query: str, threshold: float) -> Dict[str, Any]:
+    """Retrieve knowledge base context from Module B."""
+    try:
+        context_config = {
+            "top_k": 3,
+            "threshold": threshold,
+            "max_context_length": 2000,
+            "enable_context": True
+        }
+        return await context_integrator.enhance_query_with_context(processed_query, context_config)
+    except Exception as e:
+        logger.warning(f"Context enhancement failed, continuing without context: {e}")
+        return {"context": "", "sources": [], "context_used": False}
+
+
+async def _no_rag_context() -> Dict[str, Any]:
+    """Stand-in for the RAG stage when knowledge base search is skipped."""
+    return {"context": "", "sources": [], "context_used": False}
+
+
+async def _analysis_stage(processed_query: str):
+    """Run query analysis for routing; None lets the router analyze on its own."""
+    try:
+        # CPU-bound pattern matching, run it next to the RAG round trip instead of blocking it
+        return await asyncio.to_thread(model_router.query_analyzer.analyze_query, processed_query)
+    except Exception as e:
+        logger.warning(f"Query analysis failed, router will retry: {e}")
+        return None
+
+
+async def _timed(stage_timings: Dict[str, float], name: str, coro):
+    """Await a stage and record its duration."""
+    stage_start = time.time()
+    try:
+        return await coro
+    finally:
+        stage_timings[name] = round(time.time() - stage_start, 4)
+
+
+async def _prepare_routed_query(request: InferRequest) -> Dict[str, Any]:
+    """
+    Validate the request and assemble the final prompt for routed inference.
+    
+    Resolves (or creates) the session, then runs knowledge base retrieval,
+    conversation context assembly and query analysis concurrently and merges
+    the context into one prompt with the PromptComposer. Shared by /infer
+    and /infer_stream.
+    
+    Raises:
+        HTTPException: If query validation fails
+    """
+    # Validate query
+    if not query_processor.validate_query(request.query):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid query: must be 3-2000 characters"
+        )
+    
+    # Preprocess query
+    processed_query = query_processor.preprocess_query(request.query)
+    
+    # Session management - handle session ID
+    current_session_id = request.session_id
+    if not current_session_id:
+        # Create new session if none provided
+        current_session_id = session_manager.create_session()
+        logger.info(f"Created new session: {current_session_id}")
+    else:
+        # Verify existing session or create if not found
+        session = session_manager.get_session(current_session_id)
+        if not session:
+            current_session_id = session_manager.create_session()
+            logger.info(f"Session {request.session_id} not found, created new: {current_session_id}")
+    
+    # Independent stages run concurrently; the RAG request is started first
+    # so analysis and session lookup overlap with the HTTP round trip
+    stage_timings: Dict[str, float] = {}
+    stages_start = time.time()
+    
+    # Search the knowledge base only if enabled and no explicit context provided
+    if request.enable_context_search and not request.context:
+        rag_stage = _timed(stage_timings, "rag", _rag_context_stage(processed_query, request.context_threshold))
+    else:
+        rag_stage = _no_rag_context()
+    
+    rag_result, (session_context, context_turns_used), analysis = await asyncio.gather(
+        rag_stage,
+        _timed(stage_timings, "session", _session_context_stage(current_session_id, processed_query)),
+        _timed(stage_timings, "analysis", _analysis_stage(processed_query))
+    )
+    stage_timings["total"] = round(time.time() - stages_start, 4)
+    
+    rag_context = rag_result.get("context", "") if rag_result.get("context_used") else ""
+    composed = prompt_composer.compose(
+        processed_query,
+        session_context=session_context,
+        rag_context=rag_context,
+        explicit_context=request.context
+    )
+    sources = rag_result.get("sources", []) if "rag" in composed.sections else []
+    
+    context_used = any(section in composed.sections for section in ("rag", "explicit"))
+    context_enhanced = "session" in composed.sections
+    if not context_enhanced:
+        context_turns_used = 0
+    
+    if context_enhanced:
+        logger.info(f"Enhanced query with session context from {context_turns_used} conversation turns")
+    if "rag" in composed.sections:
+        logger.info(f"Enhanced query with context from {len(sources)} sources")
+    # Same prompt without the transcript, for turns that continue from cached context tokens
+    turn_prompt = prompt_composer.compose(
+        processed_query,
+        rag_context=rag_context,
+        explicit_context=request.context
+    ).prompt
+    
+    if composed.truncated_sections or composed.dropped_sections:
+        logger.info(
+            f"Prompt budget: truncated {composed.truncated_sections}, dropped {composed.dropped_sections} "
+            f"(~{composed.estimated_tokens} tokens)"
+        )
+    logger.debug(f"Context stage timings: {stage_timings}")
+    
+    return {
+        "processed_query": processed_query,
+        "final_query": composed.prompt,
+        "turn_query": turn_prompt,
+        "session_id": current_session_id,
+        "context_used": context_used,
+        "sources": sources,
+        "context_turns_used": context_turns_used,
+        "context_enhanced": context_enhanced,
+        "analysis": analysis,
+        "stage_timings": stage_timings
+    }
+
+
+def _use_speculative(request: InferRequest) -> bool:
+    """Whether the request runs in speculative mode (request flag overrides config)."""
+    if request.speculative is not None:
+        return request.speculative
+    return bool(config.features.get('speculative_routing', False))
+
+
+def _request_priority(priority: Optional[str]) -> Priority:
+    """Parse the request's priority class (400 on unknown values)."""
+    try:
+        return Priority[(priority or "interactive").upper()]
+    except KeyError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid priority: must be one of {', '.join(p.name.lower() for p in Priority)}"
+        )
+
+
+def _admission_rejected(error: AdmissionRejected) -> HTTPException:
+    """Build the 429 response for a request rejected by the scheduler."""
+    logger.warning(f"Admission rejected: {error}")
+    return HTTPException(
+        status_code=429,
+        detail=f"Modell ausgelastet, bitte in {error.retry_after}s erneut versuchen",
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
+def _session_prompt(prepared: Dict[str, Any]) -> Optional[SessionPrompt]:
+    """Session-aware generation request, unless disabled in config."""
+    if not config.features.get('session_kv_cache', True):
+        return None
+    return SessionPrompt(session_id=prepared["session_id"], turn_query=prepared["turn_query"])
+
+
+def _build_routing_info(routing_result) -> Dict[str, Any]:
+    """Convert a RoutingResult into the JSON-friendly routing_info dict."""
+    return {
+        "selected_model": routing_result.selected_model.value,
+        "reasoning": routing_result.reasoning,
+        "complexity_score": routing_result.analysis.complexity_score,
+        "detected_keywords": routing_result.analysis.detected_keywords[:5],  # Limit for response size
+        "vram_check_passed": routing_result.vram_check_passed,
+        "user_confirmed": routing_result.user_confirmed
+    }
+
+
+def _confidence_status(confidence: float) -> str:
+    """Map a confidence score to the response status label."""
+    if confidence >= 0.8:
+        return "high_confidence"
+    elif confidence >= 0.5:
+        return "medium_confidence"
+    else:
+        return "low_confidence_escalate"
+
+
+async def _record_conversation_turn(prepared: Dict[str, Any], generation_result: Dict[str, Any],
+                                    routing_info: Optional[Dict[str, Any]]):
+    """Log a completed conversation turn to the session and calibrate the token estimate."""
+    try:
+        # Turns continuing from cached context tokens only sent the turn prompt
+        sent_prompt = prepared["turn_query"] if generation_result.get('kv_cache_hit') else prepared["final_query"]
+        if not generation_result.get('coalesced'):
+            session_manager.token_estimator.calibrate(sent_prompt, generation_result.get('prompt_tokens') or 0)
+        
+        routing_decision = routing_info.get('reasoning', 'No routing info') if routing_info else 'No routing info'
+        complexity_score = routing_info.get('complexity_score', 0.0) if routing_info else 0.0
+        
+        # Persisting the turn may hit SQLite or Redis, keep it off the event loop
+        await asyncio.to_thread(
+            session_manager.add_conversation_turn,
+            session_id=prepared["session_id"],
+            query=prepared["processed_query"],
+            response=generation_result['response'],
+            model_used=generation_result['model_used'],
+            complexity_score=complexity_score,
+            routing_decision=routing_decision,
+            response_tokens=generation_result.get('response_tokens')
+        )
+        logger.info(f"Added conversation turn to session {prepared['session_id']}")
+    except Exception as e:
+        logger.warning(f"Failed to log conversation turn to session: {e}")
+
+
+def _log_routed_response(prepared: Dict[str, Any], generation_result: Dict[str, Any],
+                         confidence: float, processing_time: float, vram_usage: float,
+                         routing_info: Optional[Dict[str, Any]]):
+    """Write the response section of a routed query to the chat log."""
+    chat_logger.info(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] RESPONSE")
+    chat_logger.info(f"Model Response: \"{generation_result['response'][:200]}{'...' if len(generation_result['response']) > 200 else ''}\"")
+    chat_logger.info(f"Model Used: {generation_result['model_used']}")
+    chat_logger.info(f"Confidence Score: {confidence:.3f}")
+    chat_logger.info(f"Processing Time: {processing_time:.2f}s")
+    chat_logger.info(f"Context Used: {prepared['context_used'] or prepared['context_enhanced']}")
+    if prepared['context_enhanced']:
+        chat_logger.info(f"Session Context: {prepared['context_turns_used']} conversation turns used")
+    chat_logger.info(f"VRAM Usage: {vram_usage:.1%}")
+    if routing_info:
+        chat_logger.info(f"Routing: {routing_info['selected_model']} model, complexity {routing_info['complexity_score']:.2f}")
+    chat_logger.info("Success: true")
+    chat_logger.info(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] QUERY END")
+    chat_logger.info("=" * 80)
+
+
+def _log_query_error(error: Exception, processing_time: float):
+    """Write the error section of a failed query to the chat log."""
+    chat_logger.info(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] ERROR")
+    chat_logger.info(f"Error: {str(error)}")
+    chat_logger.info(f"Processing Time: {processing_time:.2f}s")
+    chat_logger.info("Success: false")
+    chat_logger.info(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] QUERY END")
+    chat_logger.info("=" * 80)
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a single Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
 @app.post("/infer", response_model=InferResponse)
 async def infer(request: InferRequest):
     """
@@ -157,88 +501,22 @@ async def infer(request: InferRequest):
     # Log query start
     chat_logger.info(f"\n[{timestamp}] QUERY START (Intelligent Routing)")
     chat_logger.info(f"User Query: \"{request.query}\"")
-    chat_logger.info(f"Module: A (Core Intelligence with Model Router)")
+    chat_logger.info("Module: A (Core Intelligence with Model Router)")
     chat_logger.info(f"Context Search Enabled: {request.enable_context_search}")
     
     try:
-        # Validate query
-        if not query_processor.validate_query(request.query):
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid query: must be 3-2000 characters"
-            )
-        
-        # Preprocess query
-        processed_query = query_processor.preprocess_query(request.query)
-        
-        # Session management - handle session ID
-        current_session_id = request.session_id
-        if not current_session_id:
-            # Create new session if none provided
-            current_session_id = session_manager.create_session()
-            logger.info(f"Created new session: {current_session_id}")
-        else:
-            # Verify existing session or create if not found
-            session = session_manager.get_session(current_session_id)
-            if not session:
-                current_session_id = session_manager.create_session()
-                logger.info(f"Session {request.session_id} not found, created new: {current_session_id}")
-        
-        # Initialize response tracking
-        context_used = False
-        sources = []
-        final_query = processed_query
-        context_turns_used = 0
-        context_enhanced = False
-        
-        # Try to enhance with session context first (before RAG context)
-        try:
-            session_context = session_manager.get_context_for_query(current_session_id, processed_query)
-            if session_context:
-                # Enhance query with conversation context
-                final_query = session_manager.enhance_query_with_context(current_session_id, processed_query)
-                context_enhanced = True
-                # Count conversation turns used
-                session = session_manager.get_session(current_session_id)
-                if session:
-                    context_turns_used = min(len(session.turns), 5)  # Max 5 turns as per design
-                logger.info(f"Enhanced query with session context from {context_turns_used} conversation turns")
-        except Exception as e:
-            logger.warning(f"Session context enhancement failed, continuing: {e}")
-        
-        # Enhance with context if enabled and no explicit context provided
-        if request.enable_context_search and not request.context:
-            try:
-                context_config = {
-                    "top_k": 3,
-                    "threshold": request.context_threshold,
-                    "max_context_length": 2000,
-                    "enable_context": True
-                }
-                
-                enhancement_result = await context_integrator.enhance_query_with_context(
-                    processed_query, 
-                    context_config
-                )
-                
-                if enhancement_result["context_used"]:
-                    final_query = enhancement_result["enhanced_query"]
-                    sources = enhancement_result["sources"]
-                    context_used = True
-                    logger.info(f"Enhanced query with context from {len(sources)} sources")
-                
-            except Exception as e:
-                logger.warning(f"Context enhancement failed, continuing without context: {e}")
-        
-        # Use explicit context if provided
-        elif request.context:
-            final_query = f"{processed_query}\n\nContext: {request.context}"
-            context_used = True
+        priority = _request_priority(request.priority)
+        prepared = await _prepare_routed_query(request)
+        processed_query = prepared["processed_query"]
         
         # Generate response using intelligent model routing
         generation_result = await model_router.generate_response(
-            final_query, 
-            context=None  # Context already integrated into query
+            prepared["final_query"], 
+            context=None,  # Context already integrated into query
+            analysis=prepared["analysis"],
+            speculative=_use_speculative(request),
+            priority=priority,
+            session=_session_prompt(prepared)
         )
         
         processing_time = time.time() - start_time
@@ -259,12 +537,7 @@ async def infer(request: InferRequest):
         )
         
         # Determine status based on confidence
-        if confidence >= 0.8:
-            status = "high_confidence"
-        elif confidence >= 0.5:
-            status = "medium_confidence"
-        else:
-            status = "low_confidence_escalate"
+        status = _confidence_status(confidence)
         
         # Get VRAM usage for monitoring
         vram_usage = model_router.vram_monitor.get_usage_percentage()
@@ -272,50 +545,15 @@ async def infer(request: InferRequest):
         # Prepare routing info for response
         routing_info = None
         if 'routing_info' in generation_result:
-            routing_result = generation_result['routing_info']
-            routing_info = {
-                "selected_model": routing_result.selected_model.value,
-                "reasoning": routing_result.reasoning,
-                "complexity_score": routing_result.analysis.complexity_score,
-                "detected_keywords": routing_result.analysis.detected_keywords[:5],  # Limit for response size
-                "vram_check_passed": routing_result.vram_check_passed,
-                "user_confirmed": routing_result.user_confirmed
-            }
+            routing_info = _build_routing_info(generation_result['routing_info'])
         
         # Log successful response
-        chat_logger.info(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] RESPONSE")
-        chat_logger.info(f"Model Response: \"{generation_result['response'][:200]}{'...' if len(generation_result['response']) > 200 else ''}\"")
-        chat_logger.info(f"Model Used: {generation_result['model_used']}")
-        chat_logger.info(f"Confidence Score: {confidence:.3f}")
-        chat_logger.info(f"Processing Time: {processing_time:.2f}s")
-        chat_logger.info(f"Context Used: {context_used or context_enhanced}")
-        if context_enhanced:
-            chat_logger.info(f"Session Context: {context_turns_used} conversation turns used")
-        chat_logger.info(f"VRAM Usage: {vram_usage:.1%}")
-        if routing_info:
-            chat_logger.info(f"Routing: {routing_info['selected_model']} model, complexity {routing_info['complexity_score']:.2f}")
-        chat_logger.info(f"Success: true")
-        chat_logger.info(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] QUERY END")
-        chat_logger.info("=" * 80)
+        _log_routed_response(prepared, generation_result, confidence, processing_time, vram_usage, routing_info)
         
         logger.info(f"Query processed with intelligent routing: model={generation_result['model_used']}, confidence={confidence:.3f}, time={processing_time:.2f}s")
         
         # Log conversation turn to session
-        try:
-            routing_decision = routing_info.get('reasoning', 'No routing info') if routing_info else 'No routing info'
-            complexity_score = routing_info.get('complexity_score', 0.0) if routing_info else 0.0
-            
-            session_manager.add_conversation_turn(
-                session_id=current_session_id,
-                query=processed_query,
-                response=generation_result['response'],
-                model_used=generation_result['model_used'],
-                complexity_score=complexity_score,
-                routing_decision=routing_decision
-            )
-            logger.info(f"Added conversation turn to session {current_session_id}")
-        except Exception as e:
-            logger.warning(f"Failed to log conversation turn to session: {e}")
+        await _record_conversation_turn(prepared, generation_result, routing_info)
         
         return InferResponse(
             response=generation_result['response'],
@@ -323,27 +561,27 @@ async def infer(request: InferRequest):
             status=status,
             processing_time=processing_time,
             model_used=generation_result['model_used'],
-            context_used=context_used,
-            sources=sources if sources else None,
+            context_used=prepared["context_used"],
+            sources=prepared["sources"] if prepared["sources"] else None,
             routing_info=routing_info,
             vram_usage_percent=vram_usage,
-            session_id=current_session_id,
-            context_turns_used=context_turns_used,
-            context_enhanced=context_enhanced
+            session_id=prepared["session_id"],
+            context_turns_used=prepared["context_turns_used"],
+            context_enhanced=prepared["context_enhanced"],
+            speculative=generation_result.get('speculative'),
+            queue_wait_time=generation_result.get('queue_wait')
         )
         
     except HTTPException:
         raise
+    except AdmissionRejected as e:
+        _log_query_error(e, time.time() - start_time)
+        raise _admission_rejected(e)
     except Exception as e:
         processing_time = time.time() - start_time
         
         # Log error
-        chat_logger.info(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] ERROR")
-        chat_logger.info(f"Error: {str(e)}")
-        chat_logger.info(f"Processing Time: {processing_time:.2f}s")
-        chat_logger.info(f"Success: false")
-        chat_logger.info(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] QUERY END")
-        chat_logger.info("=" * 80)
+        _log_query_error(e, processing_time)
         
         logger.error(f"Intelligent inference failed: {e}")
         raise HTTPException(
@@ -352,6 +590,340 @@ async def infer(request: InferRequest):
         )
 
 
+@app.post("/infer_stream")
+async def infer_stream(request: InferRequest):
+    """
+    Streaming variant of /infer using Server-Sent Events.
+    
+    Emits a 'routing' event as soon as the model is selected, one 'token'
+    event per generated chunk, and a final 'done' event carrying the same
+    fields as InferResponse (confidence and session bookkeeping are computed
+    once generation has finished). Failures during generation are reported
+    as an 'error' event.
+    
+    Raises:
+        HTTPException: If query validation fails, or 429 if the routed
+            model's queue is full
+    """
+    start_time = time.time()
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
+    # Log query start
+    chat_logger.info(f"\n[{timestamp}] QUERY START (Streaming)")
+    chat_logger.info(f"User Query: \"{request.query}\"")
+    chat_logger.info("Module: A (Core Intelligence with Model Router)")
+    chat_logger.info(f"Context Search Enabled: {request.enable_context_search}")
+    
+    priority = _request_priority(request.priority)
+    prepared = await _prepare_routed_query(request)
+    
+    # Reject before the stream starts so clients get a proper 429 + Retry-After
+    try:
+        target_model = model_router.select_model(prepared["processed_query"], prepared["analysis"])
+        model_router.scheduler.check_admission(target_model, priority)
+    except AdmissionRejected as e:
+        _log_query_error(e, time.time() - start_time)
+        raise _admission_rejected(e)
+    except Exception as e:
+        # Routing runs again in the stream, which reports its own errors
+        logger.warning(f"Admission pre-check skipped, model selection failed: {e}")
+    
+    async def event_stream():
+        routing_info = None
+        first_token_time = None
+        
+        try:
+            async for event in model_router.generate_response_stream(
+                prepared["final_query"],
+                context=None,  # Context already integrated into query
+                analysis=prepared["analysis"],
+                speculative=_use_speculative(request),
+                priority=priority,
+                session=_session_prompt(prepared)
+            ):
+                if event['type'] == 'routing':
+                    routing_info = _build_routing_info(event['routing_info'])
+                    yield _sse_event("routing", {
+                        "routing_info": routing_info,
+                        "model_used": event['routing_info'].model_name,
+                        "session_id": prepared["session_id"]
+                    })
+                
+                elif event['type'] == 'token':
+                    if first_token_time is None:
+                        first_token_time = time.time() - start_time
+                    token_data = {"token": event['token']}
+                    if event.get('draft'):
+                        token_data["draft"] = True
+                    yield _sse_event("token", token_data)
+                
+                elif event['type'] == 'replace':
+                    # The routed model's answer supersedes the streamed draft
+                    yield _sse_event("replace", {
+                        "response": event['response'],
+                        "model_used": event['model_used']
+                    })
+                
+                elif event['type'] == 'done':
+                    generation_result = event['result']
+                    processing_time = time.time() - start_time
+                    
+                    if not generation_result.get('success', True):
+                        _log_query_error(RuntimeError(generation_result['response']), processing_time)
+                        yield _sse_event("error", {
+                            "detail": generation_result.get('response', 'Model generation failed'),
+                            "session_id": prepared["session_id"]
+                        })
+                        return
+                    
+                    confidence = confidence_calculator.calculate_confidence(
+                        response=generation_result['response'],
+                        query=prepared["processed_query"],
+                        processing_time=processing_time,
+                        metadata=generation_result
+                    )
+                    vram_usage = model_router.vram_monitor.get_usage_percentage()
+                    
+                    _log_routed_response(prepared, generation_result, confidence, processing_time, vram_usage, routing_info)
+                    if first_token_time is not None:
+                        chat_logger.info(f"Time To First Token: {first_token_time:.2f}s")
+                    await _record_conversation_turn(prepared, generation_result, routing_info)
+                    
+                    final_response = InferResponse(
+                        response=generation_result['response'],
+                        confidence=confidence,
+                        status=_confidence_status(confidence),
+                        processing_time=processing_time,
+                        model_used=generation_result['model_used'],
+                        context_used=prepared["context_used"],
+                        sources=prepared["sources"] if prepared["sources"] else None,
+                        routing_info=routing_info,
+                        vram_usage_percent=vram_usage,
+                        session_id=prepared["session_id"],
+                        context_turns_used=prepared["context_turns_used"],
+                        context_enhanced=prepared["context_enhanced"],
+                        speculative=generation_result.get('speculative'),
+                        queue_wait_time=generation_result.get('queue_wait')
+                    )
+                    done_data = final_response.model_dump()
+                    done_data["time_to_first_token"] = first_token_time
+                    yield _sse_event("done", done_data)
+        
+        except AdmissionRejected as e:
+            _log_query_error(e, time.time() - start_time)
+            yield _sse_event("error", {
+                "detail": f"Modell ausgelastet, bitte in {e.retry_after}s erneut versuchen",
+                "retry_after": e.retry_after,
+                "session_id": prepared["session_id"]
+            })
+        except Exception as e:
+            processing_time = time.time() - start_time
+            _log_query_error(e, processing_time)
+            logger.error(f"Streaming inference failed: {e}")
+            yield _sse_event("error", {
+                "detail": f"Internal server error: {str(e)}",
+                "session_id": prepared["session_id"]
+            })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+MAX_BATCH_SIZE = 200
+MAX_BATCH_CONCURRENCY = 16
+BATCH_ADMISSION_RETRIES = 3
+
+
+def _ndjson_line(data: Dict[str, Any]) -> str:
+    """Format a single NDJSON record."""
+    return json.dumps(data, ensure_ascii=False) + "\n"
+
+
+async def _run_batch_item(index: int, prepared: Dict[str, Any], priority: Priority,
+                          semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+    """
+    Generate the answer for one prepared batch query.
+    
+    Returns:
+        NDJSON record: the InferResponse fields plus 'index', or 'index',
+        'error' and 'status_code' if the query failed
+    """
+    async with semaphore:
+        start_time = time.time()
+        try:
+            for attempt in range(BATCH_ADMISSION_RETRIES + 1):
+                try:
+                    generation_result = await model_router.generate_response(
+                        prepared["final_query"],
+                        context=None,  # Context already integrated into query
+                        analysis=prepared["analysis"],
+                        priority=priority,
+                        session=_session_prompt(prepared)
+                    )
+                    break
+                except AdmissionRejected as e:
+                    # Batch work waits for the model instead of failing the item
+                    if attempt == BATCH_ADMISSION_RETRIES:
+                        raise
+                    await asyncio.sleep(e.retry_after)
+            
+            # Count the shared preparation stages towards each query
+            processing_time = time.time() - start_time + prepared["stage_timings"].get("total", 0.0)
+            
+            if not generation_result.get('success', True):
+                return {"index": index, "error": generation_result.get('response', 'Model generation failed'),
+                        "status_code": 503, "session_id": prepared["session_id"]}
+            
+            confidence = confidence_calculator.calculate_confidence(
+                response=generation_result['response'],
+                query=prepared["processed_query"],
+                processing_time=processing_time,
+                metadata=generation_result
+            )
+            routing_info = None
+            if 'routing_info' in generation_result:
+                routing_info = _build_routing_info(generation_result['routing_info'])
+            await _record_conversation_turn(prepared, generation_result, routing_info)
+            
+            response = InferResponse(
+                response=generation_result['response'],
+                confidence=confidence,
+                status=_confidence_status(confidence),
+                processing_time=processing_time,
+                model_used=generation_result['model_used'],
+                context_used=prepared["context_used"],
+                sources=prepared["sources"] if prepared["sources"] else None,
+                routing_info=routing_info,
+                vram_usage_percent=model_router.vram_monitor.get_usage_percentage(),
+                session_id=prepared["session_id"],
+                context_turns_used=prepared["context_turns_used"],
+                context_enhanced=prepared["context_enhanced"],
+                queue_wait_time=generation_result.get('queue_wait')
+            )
+            return {"index": index, **response.model_dump()}
+        
+        except AdmissionRejected as e:
+            return {"index": index, "error": f"Modell ausgelastet, bitte in {e.retry_after}s erneut versuchen",
+                    "status_code": 429, "retry_after": e.retry_after, "session_id": prepared["session_id"]}
+        except Exception as e:
+            logger.error(f"Batch query {index} failed: {e}")
+            return {"index": index, "error": f"Internal server error: {str(e)}",
+                    "status_code": 500, "session_id": prepared["session_id"]}
+
+
+async def _prepare_batch_item(index: int, item: InferRequest,
+                              semaphore: asyncio.Semaphore) -> Tuple[int, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Prepare one batch query; returns (index, prepared query, error record)."""
+    async with semaphore:
+        try:
+            return index, await _prepare_routed_query(item), None
+        except HTTPException as e:
+            return index, None, {"index": index, "error": e.detail, "status_code": e.status_code}
+        except Exception as e:
+            logger.error(f"Batch query {index} preparation failed: {e}")
+            return index, None, {"index": index, "error": f"Internal server error: {str(e)}", "status_code": 500}
+
+
+@app.post("/infer_batch")
+async def infer_batch(request: InferBatchRequest):
+    """
+    Run many queries through routed inference and stream results as NDJSON.
+    
+    All queries are prepared (context retrieval, analysis) concurrently and
+    grouped by the model they route to. The groups run one after another so
+    each model is loaded once, with up to max_concurrency generations in
+    flight within a group. Every query produces one line as soon as it
+    finishes: the InferResponse fields plus its 'index' in the batch, or
+    'index', 'error' and 'status_code'. A final line with "done": true
+    summarizes the batch.
+    
+    Args:
+        request: InferBatchRequest with the queries
+        
+    Returns:
+        StreamingResponse with application/x-ndjson records
+        
+    Raises:
+        HTTPException: If the batch is empty, too large or has an invalid priority
+    """
+    if not request.queries or len(request.queries) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid batch: must contain 1-{MAX_BATCH_SIZE} queries"
+        )
+    priority = _request_priority(request.priority)
+    max_concurrency = request.max_concurrency or config.features.get('batch_max_concurrency', 4)
+    max_concurrency = max(1, min(int(max_concurrency), MAX_BATCH_CONCURRENCY))
+    
+    chat_logger.info(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] BATCH START")
+    chat_logger.info(f"Queries: {len(request.queries)}, Max Concurrency: {max_concurrency}")
+    
+    async def batch_stream():
+        start_time = time.time()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        succeeded = 0
+        failed = 0
+        model_order = []
+        tasks = []
+        
+        try:
+            prepared_items = await asyncio.gather(
+                *(_prepare_batch_item(index, item, semaphore) for index, item in enumerate(request.queries))
+            )
+            ready = {}
+            for index, prepared, error in prepared_items:
+                if error is not None:
+                    failed += 1
+                    yield _ndjson_line(error)
+                else:
+                    ready[index] = prepared
+            
+            indices = list(ready)
+            plan = model_router.plan_batch(
+                [ready[index]["processed_query"] for index in indices],
+                [ready[index]["analysis"] for index in indices]
+            )
+            
+            for model_type, positions in plan:
+                model_order.append(model_type.value)
+                tasks = [
+                    asyncio.create_task(_run_batch_item(indices[position], ready[indices[position]], priority, semaphore))
+                    for position in positions
+                ]
+                for next_done in asyncio.as_completed(tasks):
+                    record = await next_done
+                    if "error" in record:
+                        failed += 1
+                    else:
+                        succeeded += 1
+                    yield _ndjson_line(record)
+            
+            processing_time = time.time() - start_time
+            chat_logger.info(f"Batch Done: {succeeded} succeeded, {failed} failed, models {model_order}, {processing_time:.2f}s")
+            chat_logger.info("=" * 80)
+            yield _ndjson_line({
+                "done": True,
+                "total": len(request.queries),
+                "succeeded": succeeded,
+                "failed": failed,
+                "model_order": model_order,
+                "processing_time": processing_time
+            })
+        finally:
+            # Client went away: do not keep generating for nobody
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(
+        batch_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/infer_single_model", response_model=InferResponse)
 async def infer_single_model(request: InferRequest):
     """
@@ -372,10 +944,12 @@ async def infer_single_model(request: InferRequest):
     # Log query start
     chat_logger.info(f"\n[{timestamp}] QUERY START")
     chat_logger.info(f"User Query: \"{request.query}\"")
-    chat_logger.info(f"Module: A (Core Intelligence)")
+    chat_logger.info("Module: A (Core Intelligence)")
     chat_logger.info(f"Context Search Enabled: {request.enable_context_search}")
     
     try:
+        priority = _request_priority(request.priority)
+        
         # Validate query
         if not query_processor.validate_query(request.query):
             raise HTTPException(
@@ -421,17 +995,18 @@ async def infer_single_model(request: InferRequest):
             context_used = True
         
         # Check Ollama availability
-        if not await ollama_client.is_available():
+        if not await health_registry.check("ollama"):
             raise HTTPException(
                 status_code=503,
                 detail="LLM service unavailable - Ollama not accessible"
             )
         
-        # Generate response
-        generation_result = await ollama_client.generate_response(
-            final_query, 
-            None  # Context already integrated into query
-        )
+        # Generate response (the legacy model shares the FAST model's slots)
+        async with model_router.scheduler.slot(ModelType.FAST, priority) as ticket:
+            generation_result = await ollama_client.generate_response(
+                final_query, 
+                None  # Context already integrated into query
+            )
         
         processing_time = time.time() - start_time
         
@@ -457,7 +1032,7 @@ async def infer_single_model(request: InferRequest):
         chat_logger.info(f"Confidence Score: {confidence:.3f}")
         chat_logger.info(f"Processing Time: {processing_time:.2f}s")
         chat_logger.info(f"Context Used: {context_used}")
-        chat_logger.info(f"Success: true")
+        chat_logger.info("Success: true")
         chat_logger.info(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] QUERY END")
         chat_logger.info("=" * 80)
         
@@ -470,11 +1045,14 @@ async def infer_single_model(request: InferRequest):
             processing_time=processing_time,
             model_used=generation_result['model_used'],
             context_used=context_used,
-            sources=sources if sources else None
+            sources=sources if sources else None,
+            queue_wait_time=ticket.queue_wait
         )
         
     except HTTPException:
         raise
+    except AdmissionRejected as e:
+        raise _admission_rejected(e)
     except Exception as e:
         processing_time = time.time() - start_time
         
@@ -482,7 +1060,7 @@ async def infer_single_model(request: InferRequest):
         chat_logger.info(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] ERROR")
         chat_logger.info(f"Error: {str(e)}")
         chat_logger.info(f"Processing Time: {processing_time:.2f}s")
-        chat_logger.info(f"Success: false")
+        chat_logger.info("Success: false")
         chat_logger.info(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] QUERY END")
         chat_logger.info("=" * 80)
         
@@ -513,10 +1091,12 @@ async def infer_with_context(request: ContextInferRequest):
     # Log query start
     chat_logger.info(f"\n[{timestamp}] QUERY START")
     chat_logger.info(f"User Query: \"{request.query}\"")
-    chat_logger.info(f"Module: A (Core Intelligence)")
-    chat_logger.info(f"Endpoint: /infer_with_context")
+    chat_logger.info("Module: A (Core Intelligence)")
+    chat_logger.info("Endpoint: /infer_with_context")
     
     try:
+        priority = _request_priority(request.priority)
+        
         # Validate query
         if not query_processor.validate_query(request.query):
             raise HTTPException(
@@ -546,17 +1126,18 @@ async def infer_with_context(request: ContextInferRequest):
         snippets_count = len(enhancement_result["context_snippets"])
         
         # Check Ollama availability
-        if not await ollama_client.is_available():
+        if not await health_registry.check("ollama"):
             raise HTTPException(
                 status_code=503,
                 detail="LLM service unavailable - Ollama not accessible"
             )
         
-        # Generate response
-        generation_result = await ollama_client.generate_response(
-            final_query, 
-            None  # Context already integrated into query
-        )
+        # Generate response (the legacy model shares the FAST model's slots)
+        async with model_router.scheduler.slot(ModelType.FAST, priority) as ticket:
+            generation_result = await ollama_client.generate_response(
+                final_query, 
+                None  # Context already integrated into query
+            )
         
         processing_time = time.time() - start_time
         
@@ -592,7 +1173,7 @@ async def infer_with_context(request: ContextInferRequest):
         chat_logger.info(f"Processing Time: {processing_time:.2f}s")
         chat_logger.info(f"Context Used: {context_used}")
         chat_logger.info(f"Context Snippets: {snippets_count}")
-        chat_logger.info(f"Success: true")
+        chat_logger.info("Success: true")
         chat_logger.info(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] QUERY END")
         chat_logger.info("=" * 80)
         
@@ -607,11 +1188,14 @@ async def infer_with_context(request: ContextInferRequest):
             context_used=context_used,
             sources=sources,
             context_snippets_count=snippets_count,
-            attribution=attribution
+            attribution=attribution,
+            queue_wait_time=ticket.queue_wait
         )
         
     except HTTPException:
         raise
+    except AdmissionRejected as e:
+        raise _admission_rejected(e)
     except Exception as e:
         processing_time = time.time() - start_time
         
@@ -619,7 +1203,7 @@ async def infer_with_context(request: ContextInferRequest):
         chat_logger.info(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] ERROR")
         chat_logger.info(f"Error: {str(e)}")
         chat_logger.info(f"Processing Time: {processing_time:.2f}s")
-        chat_logger.info(f"Success: false")
+        chat_logger.info("Success: false")
         chat_logger.info(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] QUERY END")
         chat_logger.info("=" * 80)
         
@@ -642,6 +1226,22 @@ async def get_router_status():
             "version": "2.0.0",
             "router_health": router_health,
             "current_model_info": model_info,
+            "model_residency": model_router.residency.get_status(),
+            "coalescing": model_router.coalescer.get_statistics(),
+            "routing_memo": model_router.query_analyzer.memo.get_statistics(),
+            "session_kv_cache": {
+                "enabled": bool(config.features.get('session_kv_cache', True)),
+                **model_router.kv_cache.get_statistics()
+            },
+            "scheduler": model_router.scheduler.get_statistics(),
+            "session_store": session_manager.get_store_statistics(),
+            "http_pools": get_http_pool().get_metrics(),
+            "health": health_registry.get_status(),
+            "speculative": {
+                "enabled_by_default": bool(config.features.get('speculative_routing', False)),
+                "confidence_threshold": model_router.speculative_confidence_threshold,
+                **model_router.speculative_stats
+            },
             "features": {
                 "intelligent_routing": True,
                 "vram_monitoring": model_router.vram_monitor.pynvml_available,
@@ -659,12 +1259,30 @@ async def get_router_status():
         }
 
 
+@app.get("/vram_history")
+async def get_vram_history(device_id: int = 0, seconds: Optional[float] = None):
+    """
+    Get sampled VRAM usage history and trend of a GPU.
+    
+    Args:
+        device_id: GPU device ID
+        seconds: Only include samples from the last N seconds
+        
+    Returns:
+        Samples (oldest first) with min/max/average usage and the change in
+        used VRAM per minute
+    """
+    trend = vram_monitor.get_trend(device_id, seconds)
+    trend["available"] = vram_monitor.pynvml_available
+    return trend
+
+
 @app.get("/status")
 async def get_status():
     """Get detailed module status information."""
     try:
-        ollama_available = await ollama_client.is_available()
-        knowledge_available = await knowledge_client.health_check()
+        ollama_available = await health_registry.check("ollama")
+        knowledge_available = await health_registry.check("rag")
         
         overall_status = "operational"
         if not ollama_available:
@@ -687,7 +1305,7 @@ async def get_status():
                 "base_url": knowledge_client.base_url,
                 "timeout": knowledge_client.timeout
             },
-            "endpoints": ["/health", "/infer", "/infer_single_model", "/infer_with_context", "/status", "/router_status"],
+            "endpoints": ["/health", "/infer", "/infer_stream", "/infer_batch", "/infer_single_model", "/infer_with_context", "/status", "/router_status", "/vram_history"],
             "features": {
                 "context_enhancement": True,
                 "automatic_context_search": True,
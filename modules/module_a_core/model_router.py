@@ -6,15 +6,20 @@ Routes queries to appropriate models based on complexity and content.
 import asyncio
 import logging
 import time
-import re
-import unicodedata
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any, AsyncIterator, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
 from .query_analyzer import QueryAnalyzer, QueryAnalysis
-from .vram_monitor import VRAMMonitor
+from .routing_engine import select_model
+from .vram_monitor import VRAMMonitor, SwitchDecision
 from .ollama_client import OllamaClient
+from .residency_manager import ModelResidencyManager
+from .confidence import ConfidenceCalculator
+from .request_coalescer import RequestCoalescer, normalize_prompt
+from .scheduler import ModelScheduler, SchedulerLimits, Priority
+from .kv_cache import SessionKVCache, SessionPrompt
+from .routing_memo import get_routing_memo
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +39,8 @@ class ModelConfig:
     timeout: int
     idle_unload_seconds: int
     description: str
+    max_concurrency: int = 1  # Parallel generations admitted by the scheduler
+    max_background: int = 1  # Of those, slots background/batch work may use
 
 
 @dataclass
@@ -43,23 +50,41 @@ class RoutingResult:
     model_name: str
     reasoning: str
     vram_check_passed: bool
-    user_confirmed: bool
+    user_confirmed: bool  # False if the VRAM switch policy rejected the request
     analysis: QueryAnalysis
 
 
 class ModelRouter:
     """Intelligent router for selecting appropriate AI models."""
     
-    def __init__(self, ollama_host: str = "localhost", ollama_port: int = 11434):
+    def __init__(self, ollama_host: str = "localhost", ollama_port: int = 11434,
+                 speculative_confidence_threshold: float = 0.8, session_kv_max_tokens: int = 4096,
+                 vram_monitor: Optional[VRAMMonitor] = None, num_ctx: Optional[int] = None):
         """
         Initialize the model router.
         
         Args:
             ollama_host: Ollama server host
             ollama_port: Ollama server port
+            speculative_confidence_threshold: Draft confidence at which speculative
+                generation keeps the FAST answer and cancels the routed model
+            session_kv_max_tokens: Longest per-session context token array kept
+                for KV-cache reuse
+            vram_monitor: VRAM monitor with backend and switch policy (default: NVML, fallback)
+            num_ctx: Context window requested from Ollama (model default if None)
         """
         self.query_analyzer = QueryAnalyzer()
-        self.vram_monitor = VRAMMonitor(warning_threshold=0.8)
+        self.vram_monitor = vram_monitor if vram_monitor is not None else VRAMMonitor(warning_threshold=0.8)
+        self.confidence_calculator = ConfidenceCalculator()
+        self.speculative_confidence_threshold = speculative_confidence_threshold
+        self.coalescer = RequestCoalescer()
+        self.kv_cache = SessionKVCache(max_tokens=session_kv_max_tokens)
+        self.speculative_stats = {
+            "runs": 0,
+            "draft_accepted": 0,
+            "routed_used": 0,
+            "routed_failed": 0
+        }
         
         # Model configurations
         self.models = {
@@ -68,21 +93,27 @@ class ModelRouter:
                 vram_mb=2000,  # ~2GB
                 timeout=30,
                 idle_unload_seconds=0,  # Keep loaded
-                description="Fast general-purpose model"
+                description="Fast general-purpose model",
+                max_concurrency=4,
+                max_background=2  # Two slots always stay free for interactive queries
             ),
             ModelType.CODE: ModelConfig(
                 name="qwen3-coder-30b-local", 
                 vram_mb=18000,  # ~18GB (actual size from metadata)
                 timeout=30,  # Reduced timeout per Grok's recommendation
                 idle_unload_seconds=600,  # 10 minutes
-                description="Specialized code and Linux model (Qwen3-Coder 30B)"
+                description="Specialized code and Linux model (Qwen3-Coder 30B)",
+                max_concurrency=2,
+                max_background=1
             ),
             ModelType.HEAVY: ModelConfig(
                 name="llama3.1:70b",
                 vram_mb=42000,  # ~42GB
                 timeout=300,  # 5 minutes for complex math problems
                 idle_unload_seconds=300,  # 5 minutes
-                description="Heavy model for extreme complexity"
+                description="Heavy model for extreme complexity",
+                max_concurrency=1,
+                max_background=1
             )
         }
         
@@ -92,21 +123,57 @@ class ModelRouter:
             self.ollama_clients[model_type] = OllamaClient(
                 host=ollama_host,
                 port=ollama_port,
-                model=config.name
+                model=config.name,
+                num_ctx=num_ctx
             )
         
+        # Admission control: bounded concurrency and queues per model
+        self.scheduler = ModelScheduler({
+            model_type: SchedulerLimits(max_concurrency=config.max_concurrency, max_background=config.max_background)
+            for model_type, config in self.models.items()
+        })
+        
+        # Residency manager: pins FAST, unloads idle CODE/HEAVY models
+        self.residency = ModelResidencyManager(
+            self.ollama_clients[ModelType.FAST].client,
+            {config.name: config.idle_unload_seconds for config in self.models.values()}
+        )
+        for model_type, config in self.models.items():
+            self.ollama_clients[model_type].keep_alive = self.residency.keep_alive_for(config.name)
+        
         # Current active model
         self.current_model = ModelType.FAST
         self.last_activity = {}
         
-        # Start cleanup task
-        asyncio.create_task(self._cleanup_idle_models())
+        # Background cleanup task, started by start()
+        self._cleanup_task: Optional[asyncio.Task] = None
+    
+    async def start(self):
+        """Start VRAM sampling, preload the FAST model and start the idle unload task."""
+        self.vram_monitor.start()
+        await self.residency.refresh()
+        self.residency.warm(self.models[ModelType.FAST].name)
+        
+        if self._cleanup_task is None:
+            self._cleanup_task = asyncio.create_task(self._cleanup_idle_models())
+    
+    async def stop(self):
+        """Stop the idle unload task and VRAM sampling."""
+        if self._cleanup_task is not None:
+            self._cleanup_task.cancel()
+            try:
+                await self._cleanup_task
+            except asyncio.CancelledError:
+                pass
+            self._cleanup_task = None
+        self.vram_monitor.stop()
     
     async def route_query(
         self, 
         query: str, 
         force_model: Optional[ModelType] = None,
-        skip_vram_check: bool = False
+        skip_vram_check: bool = False,
+        analysis: Optional[QueryAnalysis] = None
     ) -> RoutingResult:
         """
         Route a query to the appropriate model.
@@ -115,12 +182,14 @@ class ModelRouter:
             query: The user query to process
             force_model: Force a specific model (optional)
             skip_vram_check: Skip VRAM checking (for testing)
+            analysis: Precomputed analysis of the query (optional)
             
         Returns:
             RoutingResult with routing decision and metadata
         """
-        # Analyze the query
-        analysis = self.query_analyzer.analyze_query(query)
+        # Analyze the query unless the caller already did
+        if analysis is None:
+            analysis = self.query_analyzer.analyze_query(query)
         
         # Determine target model
         if force_model:
@@ -134,19 +203,32 @@ class ModelRouter:
         vram_check_passed = True
         user_confirmed = True
         
-        if not skip_vram_check and self._needs_vram_check(target_model):
+        # An already loaded model needs no additional VRAM
+        target_resident = self.residency.is_resident(self.models[target_model].name)
+        if target_resident:
+            reasoning += " (model resident)"
+        
+        if not skip_vram_check and not target_resident and self._needs_vram_check(target_model):
             config = self.models[target_model]
-            vram_check_passed = self.vram_monitor.check_before_model_switch(
-                target_model=config.name,
-                estimated_vram_mb=config.vram_mb,
-                show_gui=True
-            )
-            user_confirmed = vram_check_passed
+            # Reads the sampled snapshot; never blocks on NVML or asks the user
+            decision = self.vram_monitor.evaluate_model_switch(config.name, config.vram_mb)
+            
+            if decision == SwitchDecision.QUEUE:
+                # Idle models are the cheapest VRAM to free
+                await self.residency.unload_idle()
+                decision = await self.vram_monitor.wait_for_vram(config.name, config.vram_mb)
+                if decision == SwitchDecision.ALLOW:
+                    reasoning += " (waited for VRAM)"
+            
+            vram_check_passed = decision == SwitchDecision.ALLOW
+            user_confirmed = decision != SwitchDecision.REJECT
             
-            if not vram_check_passed:
+            if decision == SwitchDecision.FALLBACK:
                 # Fall back to current model or fast model
                 target_model = self.current_model if self.current_model != target_model else ModelType.FAST
                 reasoning += f" -> Fallback to {target_model.value} (VRAM check failed)"
+            elif decision == SwitchDecision.REJECT:
+                reasoning += " -> Rejected (insufficient VRAM)"
         
         # Update current model and activity tracking
         self.current_model = target_model
@@ -164,143 +246,49 @@ class ModelRouter:
             analysis=analysis
         )
     
+    def select_model(self, query: str, analysis: Optional[QueryAnalysis] = None) -> ModelType:
+        """
+        Pick the model a query would be routed to, without VRAM checks or generation.
+        
+        Args:
+            query: The user query
+            analysis: Precomputed analysis of the query (analyzed here if None)
+            
+        Returns:
+            ModelType the router would select
+        """
+        if analysis is None:
+            analysis = self.query_analyzer.analyze_query(query)
+        return self._select_model_from_analysis(analysis)
+    
     def _select_model_from_analysis(self, analysis: QueryAnalysis) -> ModelType:
         """
         Intelligent hybrid routing using ChatGPT's logic with QueryAnalyzer results.
         Interprets QueryAnalyzer output more intelligently based on 96k test results.
-        """
-        import re
-        import unicodedata
         
+        Pattern matching runs on the precompiled families in routing_engine,
+        one scan per priority level instead of one re.search per pattern.
+        """
         # Get the original query for pattern matching
         query = getattr(analysis, 'original_query', '')
         if not query:
             # Fallback to basic logic if no query available
             return self._basic_routing_fallback(analysis)
         
-        query_lower = query.lower()
-        qn = self._normalize_text(query)
-        
-        # === PRIORITY 1: HEAVY MODEL PATTERNS (Mathematical/Optimization) ===
-        # Mathematical queries MUST go to Heavy model - HIGHEST PRIORITY
-        heavy_patterns = [
-            # Pure Mathematical Patterns (HIGH PRIORITY)
-            r'x\s*[\+\-\*\/=<>]',                             # "x + y", "x = 5"
-            r'[\+\-\*\/=<>]\s*x',                             # "+ x", "= x"
-            r'x\s+[\+\-]\s+y',                               # "x + y", "x - y"
-            r'gleichung\w*',                                  # "gleichung", "gleichungssystem"
-            r'(löse|solve).*[xy].*=',                        # "löse x = 5"
-            r'berechne.*[xy].*[=<>]',                        # "berechne x = y"
-            r'ganze\s+zahlen.*[xyz]',                        # "ganze zahlen x, y, z"
-            r'werte\s+haben\s+[xyz]',                        # "welche werte haben x, y"
-            r'bedingung\w*.*erfüll\w*',                      # "bedingungen erfüllen"
-            r'mathe\w*.*problem',                            # "mathematisches problem"
-            
-            # System Optimization Patterns
-            r'mathematisch.*optimal',                          # "mathematisch optimal"
-            r'(bestimme|berechne|finde|löse).*optimal',       # "bestimme/berechne optimal"
-            r'optimierungsaufgabe',                           # "optimierungsaufgabe"
-            r'fibonacci.*zahlen',                             # "fibonacci zahlen"
-            r'optimal.*anzahl.*worker',                       # "optimale anzahl worker"
-            r'optimal.*größe.*puffer',                        # "optimale größe puffer"
-            r'memory.*allocation.*optimal',                   # "memory allocation optimal"
-            r'cpu.*intensive.*optimal',                       # "cpu intensive optimal"
-            r'berechne.*fibonacci.*für',                      # "berechne fibonacci für"
-            r'mathematisch.*bestimm',                         # "mathematisch bestimm"
-        ]
-        
-        for pattern in heavy_patterns:
-            if re.search(pattern, query_lower):
-                return ModelType.HEAVY
-        
-        # === PRIORITY 2: FAST MODEL PATTERNS (Basic Commands) ===
-        # These should ALWAYS go to Fast model regardless of other factors
-        fast_patterns = [
-            r'welcher\s+befehl\s+(zeigt|macht|gibt|listet)',  # "welcher befehl zeigt/macht"
-            r'was\s+macht\s+(der|das)\s+\w+\s+befehl',        # "was macht der X befehl"
-            r'wie\s+kann\s+ich\s+.*\s+(anzeigen|zeigen)\s*\??', # "wie kann ich X anzeigen?"
-            r'was\s+ist\s+der\s+unterschied\s+zwischen\s+\w+\s+und\s+\w+', # "unterschied zwischen X und Y"
-            r'^(ls|ll|pwd|cd|df|du|ps|top|htop|free|uname)\s*\??$', # basic commands alone
-        ]
-        
-        for pattern in fast_patterns:
-            if re.search(pattern, query_lower):
-                return ModelType.FAST
-        
-        # === PRIORITY 3: INTERMEDIATE PATTERNS (Complex Explanations) ===
-        # Complex explanation requests should go to Code model
-        intermediate_patterns = [
-            r'erkläre\s+mir\s+(die\s+)?unterschiede?\s+zwischen', # "erkläre mir unterschiede zwischen"
-            r'was\s+sind\s+(die\s+)?best\s+practices?\s+für',     # "was sind best practices für"
-            r'wie\s+funktioniert\s+.*\s+(system|prozess|mechanismus)', # "wie funktioniert X system"
-            r'vor.*und.*nachteile\s+von',                         # "vor und nachteile von"
-            r'unterschiede?\s+zwischen.*dateisystem',              # "unterschiede zwischen dateisystemen"
-            r'security.*hardening',                               # "security hardening"
-            r'performance.*optimierung',                          # "performance optimierung"
-        ]
-        
-        for pattern in intermediate_patterns:
-            if re.search(pattern, query_lower):
-                return ModelType.CODE
-        
-        # === PRIORITY 4: USE CHATGPT'S ROUTE_MODEL IF AVAILABLE ===
-        # If QueryAnalyzer has ChatGPT's route_model, use it with confidence
-        if hasattr(analysis, 'route_model') and analysis.route_model:
-            chatgpt_model = analysis.route_model.lower()
-            if chatgpt_model == 'heavy':
-                return ModelType.HEAVY
-            elif chatgpt_model == 'code':
-                return ModelType.CODE
-            elif chatgpt_model == 'fast':
-                return ModelType.FAST
-        
-        # === PRIORITY 5: INTELLIGENT COMPLEXITY INTERPRETATION ===
-        # Interpret complexity score more intelligently based on content
-        
-        # High complexity + mathematical content = Heavy
-        if analysis.complexity_score > 0.5:
-            math_indicators = ['berechne', 'löse', 'optimal', 'mathematisch', 'fibonacci', 'gleichung']
-            if any(indicator in query_lower for indicator in math_indicators):
-                return ModelType.HEAVY
-        
-        # Medium complexity + technical content = Code  
-        if analysis.complexity_score > 0.3:
-            tech_indicators = ['erkläre', 'unterschied', 'funktioniert', 'erstelle', 'entwickle', 'implementiere']
-            if any(indicator in query_lower for indicator in tech_indicators):
-                return ModelType.CODE
-        
-        # === PRIORITY 6: KEYWORD-BASED ROUTING ===
-        # Use detected keywords more intelligently
-        
-        # Linux/Code keywords but simple query = might be basic command
-        if analysis.needs_code_model:
-            # Check if it's really a basic command despite having keywords
-            simple_command_indicators = [
-                len(query.split()) <= 8,  # Short queries
-                any(word in query_lower for word in ['welcher', 'was macht', 'wie zeige']),
-                re.search(r'befehl.*\?$', query_lower),  # ends with "befehl?"
-            ]
-            
-            if sum(simple_command_indicators) >= 2:
-                return ModelType.FAST
-            else:
-                return ModelType.CODE
-        
-        # === PRIORITY 7: FALLBACK LOGIC ===
-        # Final fallback based on complexity and length
-        
-        if analysis.complexity_score > 0.7:
-            return ModelType.HEAVY
-        elif analysis.complexity_score > 0.4 or len(query.split()) > 10:
-            return ModelType.CODE
-        else:
-            return ModelType.FAST
-    
-    def _normalize_text(self, text: str) -> str:
-        """Normalize text for pattern matching (ChatGPT's method)."""
-        text = text.casefold()
-        text = unicodedata.normalize("NFKD", text)
-        return "".join(c for c in text if not unicodedata.combining(c))
+        memo = get_routing_memo()
+        cached = memo.get_model(query)
+        if cached is not None:
+            return cached
+        
+        generation = memo.generation
+        selected = ModelType(select_model(
+            query,
+            getattr(analysis, 'route_model', None),
+            analysis.complexity_score,
+            analysis.needs_code_model
+        ))
+        memo.put_model(query, selected, generation)
+        return selected
     
     def _basic_routing_fallback(self, analysis: QueryAnalysis) -> ModelType:
         """Fallback to basic routing if no query text available."""
@@ -319,11 +307,48 @@ class ModelRouter:
         # Only check if switching to a more demanding model
         return target_vram > current_vram
     
+    def plan_batch(
+        self,
+        queries: List[str],
+        analyses: Optional[List[Optional[QueryAnalysis]]] = None
+    ) -> List[Tuple[ModelType, List[int]]]:
+        """
+        Group batch queries by the model they will be routed to.
+        
+        Running one group after the other loads each model once instead of
+        swapping models between adjacent queries. Resident models come
+        first, the rest in ascending VRAM order so the largest model is
+        loaded last and stays resident.
+        
+        Args:
+            queries: Query texts in batch order
+            analyses: Precomputed analyses (None entries are analyzed here)
+            
+        Returns:
+            List of (model type, query indices in batch order)
+        """
+        groups: Dict[ModelType, List[int]] = {}
+        for index, query in enumerate(queries):
+            analysis = analyses[index] if analyses else None
+            if analysis is None:
+                analysis = self.query_analyzer.analyze_query(query)
+            groups.setdefault(self._select_model_from_analysis(analysis), []).append(index)
+        
+        def group_order(model_type: ModelType):
+            resident = self.residency.is_resident(self.models[model_type].name)
+            return (not resident, self.models[model_type].vram_mb)
+        
+        return [(model_type, groups[model_type]) for model_type in sorted(groups, key=group_order)]
+    
     async def generate_response(
         self, 
         query: str, 
         context: Optional[str] = None,
-        force_model: Optional[ModelType] = None
+        force_model: Optional[ModelType] = None,
+        analysis: Optional[QueryAnalysis] = None,
+        speculative: bool = False,
+        priority: Priority = Priority.INTERACTIVE,
+        session: Optional[SessionPrompt] = None
     ) -> Dict[str, Any]:
         """
         Generate response using routed model.
@@ -332,81 +357,439 @@ class ModelRouter:
             query: The user query
             context: Optional context to include
             force_model: Force a specific model
+            analysis: Precomputed analysis used for routing (optional)
+            speculative: Draft with the FAST model while a slower routed model runs
+            priority: Scheduling priority of the request
+            session: Continue the session from cached context tokens where possible
             
         Returns:
-            Dictionary with response and metadata
+            Dictionary with response and metadata ('queue_wait' holds the
+            seconds spent waiting for a generation slot)
+            
+        Raises:
+            AdmissionRejected: If the routed model's queue is full
         """
         # Route the query
-        routing_result = await self.route_query(query, force_model)
+        routing_result = await self.route_query(query, force_model, analysis=analysis)
         
         if not routing_result.user_confirmed:
             return {
-                'response': "Anfrage abgebrochen: VRAM-Warnung vom Benutzer bestätigt.",
+                'response': "Anfrage abgebrochen: nicht genügend VRAM für das gewählte Modell.",
                 'model_used': routing_result.model_name,
                 'routing_info': routing_result,
                 'success': False
             }
         
+        # Identical concurrent requests for the same model share one generation.
+        # The session only separates requests that continue from its cached
+        # context tokens; otherwise the composed prompt fully describes the work.
+        model = self.ollama_clients[routing_result.selected_model].model
+        reuses_context = session is not None and self.kv_cache.has_context(session.session_id, model)
+        key = (
+            routing_result.model_name, normalize_prompt(query), normalize_prompt(context or ""),
+            speculative, priority, session.session_id if reuses_context else None
+        )
+        shared_result, coalesced = await self.coalescer.run(
+            key, lambda: self._generate_for_route(query, context, routing_result, speculative, priority, session)
+        )
+        
+        if not coalesced:
+            return shared_result
+        
+        # Followers get their own copy carrying their own routing decision
+        result = dict(shared_result)
+        result['routing_info'] = routing_result
+        result['coalesced'] = True
+        return result
+    
+    async def _generate_for_route(
+        self,
+        query: str,
+        context: Optional[str],
+        routing_result: RoutingResult,
+        speculative: bool,
+        priority: Priority = Priority.INTERACTIVE,
+        session: Optional[SessionPrompt] = None
+    ) -> Dict[str, Any]:
+        """Generate with the routed model, falling back to FAST on failure."""
+        if speculative and routing_result.selected_model != ModelType.FAST:
+            # Either model may answer, the next turn starts from the transcript
+            if session:
+                self.kv_cache.invalidate(session.session_id)
+            return await self._generate_speculative(query, context, routing_result, priority)
+        
         # Get the appropriate Ollama client
         client = self.ollama_clients[routing_result.selected_model]
         
-        # Generate response
-        try:
-            result = await client.generate_response(query, context)
-            result['routing_info'] = routing_result
-            result['success'] = True
-            
-            # Log successful generation
-            logger.info(f"Response generated using {routing_result.selected_model.value} model")
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Failed to generate response with {routing_result.selected_model.value} model: {e}")
-            
-            # Try fallback to fast model if not already using it
-            if routing_result.selected_model != ModelType.FAST:
-                logger.info("Attempting fallback to fast model")
+        # Generate response (admission control raises AdmissionRejected when the queue is full)
+        async with self.scheduler.slot(routing_result.selected_model, priority) as ticket:
+            try:
+                # Load a cold model once, even if several queries arrive at the same time
+                await self.residency.ensure_loaded(routing_result.model_name)
+                
+                prompt, kv_context = self.kv_cache.prepare(session, client.model, query)
+                result = await client.generate_response(prompt, context, kv_context=kv_context)
+                self.residency.touch(client.model)
+                self.kv_cache.record(session, client.model, result)
+                result['kv_cache_hit'] = kv_context is not None
+                result['routing_info'] = routing_result
+                result['success'] = True
+                result['queue_wait'] = ticket.queue_wait
+                
+                # Log successful generation
+                logger.info(f"Response generated using {routing_result.selected_model.value} model")
+                
+                return result
+                
+            except Exception as e:
+                error = e
+                logger.error(f"Failed to generate response with {routing_result.selected_model.value} model: {e}")
+        
+        queue_wait = ticket.queue_wait
+        
+        # Try fallback to fast model if not already using it
+        if routing_result.selected_model != ModelType.FAST:
+            logger.info("Attempting fallback to fast model")
+            try:
+                fallback_client = self.ollama_clients[ModelType.FAST]
+                async with self.scheduler.slot(ModelType.FAST, priority) as fallback_ticket:
+                    queue_wait += fallback_ticket.queue_wait
+                    prompt, kv_context = self.kv_cache.prepare(session, fallback_client.model, query)
+                    result = await fallback_client.generate_response(prompt, context, kv_context=kv_context)
+                self.residency.touch(fallback_client.model)
+                self.kv_cache.record(session, fallback_client.model, result)
+                result['kv_cache_hit'] = kv_context is not None
+                result['routing_info'] = routing_result
+                result['success'] = True
+                result['fallback_used'] = True
+                result['queue_wait'] = queue_wait
+                return result
+            except Exception as fallback_error:
+                logger.error(f"Fallback to fast model also failed: {fallback_error}")
+        
+        # Return error response
+        return {
+            'response': f"Fehler bei der Antwortgenerierung: {str(error)}",
+            'model_used': routing_result.model_name,
+            'routing_info': routing_result,
+            'success': False,
+            'error': str(error),
+            'queue_wait': queue_wait
+        }
+
+    async def generate_response_stream(
+        self,
+        query: str,
+        context: Optional[str] = None,
+        force_model: Optional[ModelType] = None,
+        analysis: Optional[QueryAnalysis] = None,
+        speculative: bool = False,
+        priority: Priority = Priority.INTERACTIVE,
+        session: Optional[SessionPrompt] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a response from the routed model.
+
+        Yields a 'routing' event first, then one 'token' event per generated
+        chunk and finally a 'done' event whose 'result' has the same shape
+        as the dictionary returned by generate_response. In speculative mode
+        the tokens come from the FAST draft (marked 'draft': True) and a
+        'replace' event carries the routed model's answer if it supersedes
+        the draft.
+
+        Args:
+            query: The user query
+            context: Optional context to include
+            force_model: Force a specific model
+            analysis: Precomputed analysis used for routing (optional)
+            speculative: Stream a FAST draft while a slower routed model runs
+            priority: Scheduling priority of the request
+            session: Continue the session from cached context tokens where possible
+
+        Raises:
+            AdmissionRejected: If the routed model's queue is full
+        """
+        routing_result = await self.route_query(query, force_model, analysis=analysis)
+        yield {'type': 'routing', 'routing_info': routing_result}
+
+        if not routing_result.user_confirmed:
+            yield {
+                'type': 'done',
+                'result': {
+                    'response': "Anfrage abgebrochen: nicht genügend VRAM für das gewählte Modell.",
+                    'model_used': routing_result.model_name,
+                    'routing_info': routing_result,
+                    'success': False
+                }
+            }
+            return
+
+        if speculative and routing_result.selected_model != ModelType.FAST:
+            if session:
+                self.kv_cache.invalidate(session.session_id)
+            async for event in self._generate_speculative_stream(query, context, routing_result, priority):
+                yield event
+            return
+
+        candidates = [routing_result.selected_model]
+        if routing_result.selected_model != ModelType.FAST:
+            candidates.append(ModelType.FAST)
+
+        last_error = None
+        queue_wait = 0.0
+        for model_type in candidates:
+            client = self.ollama_clients[model_type]
+            tokens_sent = False
+            async with self.scheduler.slot(model_type, priority) as ticket:
+                queue_wait += ticket.queue_wait
                 try:
-                    fallback_client = self.ollama_clients[ModelType.FAST]
-                    result = await fallback_client.generate_response(query, context)
-                    result['routing_info'] = routing_result
-                    result['success'] = True
-                    result['fallback_used'] = True
-                    return result
-                except Exception as fallback_error:
-                    logger.error(f"Fallback to fast model also failed: {fallback_error}")
-            
-            # Return error response
-            return {
-                'response': f"Fehler bei der Antwortgenerierung: {str(e)}",
+                    if model_type == routing_result.selected_model:
+                        await self.residency.ensure_loaded(routing_result.model_name)
+
+                    prompt, kv_context = self.kv_cache.prepare(session, client.model, query)
+                    async for chunk in client.generate_response_stream(prompt, context, kv_context=kv_context):
+                        if not chunk['done']:
+                            tokens_sent = True
+                            yield {'type': 'token', 'token': chunk['token']}
+                            continue
+
+                        self.residency.touch(client.model)
+                        result = {key: value for key, value in chunk.items() if key not in ('token', 'done')}
+                        self.kv_cache.record(session, client.model, result)
+                        result['kv_cache_hit'] = kv_context is not None
+                        result['routing_info'] = routing_result
+                        result['success'] = True
+                        result['queue_wait'] = queue_wait
+                        if model_type != routing_result.selected_model:
+                            result['fallback_used'] = True
+
+                        logger.info(f"Streamed response generated using {model_type.value} model")
+                        yield {'type': 'done', 'result': result}
+                        return
+                except Exception as e:
+                    last_error = e
+                    logger.error(f"Failed to stream response with {model_type.value} model: {e}")
+            # Tokens already reached the client, a fallback would mix two answers
+            if tokens_sent:
+                break
+            if model_type != ModelType.FAST:
+                logger.info("Attempting fallback to fast model")
+
+        yield {
+            'type': 'done',
+            'result': {
+                'response': f"Fehler bei der Antwortgenerierung: {str(last_error)}",
                 'model_used': routing_result.model_name,
                 'routing_info': routing_result,
                 'success': False,
-                'error': str(e)
+                'error': str(last_error),
+                'queue_wait': queue_wait
             }
-    
+        }
+
+    async def _generate_routed(self, query: str, context: Optional[str], routing_result: RoutingResult,
+                               priority: Priority = Priority.INTERACTIVE) -> Dict[str, Any]:
+        """Generate with the routed model (loading it first if cold)."""
+        client = self.ollama_clients[routing_result.selected_model]
+        async with self.scheduler.slot(routing_result.selected_model, priority) as ticket:
+            await self.residency.ensure_loaded(routing_result.model_name)
+            result = await client.generate_response(query, context)
+        self.residency.touch(client.model)
+        result['queue_wait'] = ticket.queue_wait
+        return result
+
+    async def _generate_draft(self, query: str, context: Optional[str],
+                              priority: Priority = Priority.INTERACTIVE) -> Dict[str, Any]:
+        """Generate a FAST draft answer."""
+        client = self.ollama_clients[ModelType.FAST]
+        async with self.scheduler.slot(ModelType.FAST, priority) as ticket:
+            result = await client.generate_response(query, context)
+        self.residency.touch(client.model)
+        result['queue_wait'] = ticket.queue_wait
+        return result
+
+    def _score_draft(self, draft: Dict[str, Any], query: str, elapsed: float) -> float:
+        """Confidence of a FAST draft answer."""
+        return self.confidence_calculator.calculate_confidence(
+            response=draft['response'],
+            query=query,
+            processing_time=elapsed,
+            metadata=draft
+        )
+
+    def _finish_speculative(
+        self,
+        result: Dict[str, Any],
+        routing_result: RoutingResult,
+        draft: Optional[Dict[str, Any]],
+        draft_confidence: Optional[float],
+        draft_accepted: bool
+    ) -> Dict[str, Any]:
+        """Attach routing and speculative metadata to the chosen result."""
+        result.pop('context_tokens', None)
+        result['routing_info'] = routing_result
+        result['success'] = True
+        result['speculative'] = {
+            'draft_model': self.models[ModelType.FAST].name,
+            'routed_model': routing_result.model_name,
+            'draft_confidence': draft_confidence,
+            'draft_accepted': draft_accepted,
+            'confidence_threshold': self.speculative_confidence_threshold
+        }
+        if draft is not None and not draft_accepted:
+            result['speculative']['draft_response'] = draft['response']
+
+        if draft_accepted:
+            self.speculative_stats["draft_accepted"] += 1
+        elif result['model_used'] == routing_result.model_name:
+            self.speculative_stats["routed_used"] += 1
+        return result
+
+    async def _generate_speculative(self, query: str, context: Optional[str], routing_result: RoutingResult,
+                                    priority: Priority = Priority.INTERACTIVE) -> Dict[str, Any]:
+        """
+        Run the FAST model and the routed model concurrently.
+
+        The FAST draft is returned if its confidence clears the threshold (the
+        routed generation is cancelled); otherwise the routed answer replaces
+        it. If the routed model fails, the draft is used as fallback.
+        """
+        self.speculative_stats["runs"] += 1
+        start = time.time()
+
+        routed_task = asyncio.create_task(self._generate_routed(query, context, routing_result, priority))
+        draft_task = asyncio.create_task(self._generate_draft(query, context, priority))
+
+        draft = None
+        draft_confidence = None
+        try:
+            done, _ = await asyncio.wait({routed_task, draft_task}, return_when=asyncio.FIRST_COMPLETED)
+
+            # The routed model won the race outright
+            if routed_task in done and routed_task.exception() is None:
+                draft_task.cancel()
+                logger.info(f"Speculative: {routing_result.model_name} finished before the draft")
+                return self._finish_speculative(routed_task.result(), routing_result, None, None, False)
+
+            try:
+                draft = await draft_task
+                draft_confidence = self._score_draft(draft, query, time.time() - start)
+            except Exception as e:
+                logger.warning(f"Speculative draft failed: {e}")
+
+            if draft is not None and draft_confidence >= self.speculative_confidence_threshold:
+                routed_task.cancel()
+                logger.info(
+                    f"Speculative: draft accepted (confidence {draft_confidence:.2f} >= "
+                    f"{self.speculative_confidence_threshold:.2f}), cancelled {routing_result.model_name}"
+                )
+                return self._finish_speculative(draft, routing_result, draft, draft_confidence, True)
+
+            try:
+                result = await routed_task
+            except Exception as e:
+                self.speculative_stats["routed_failed"] += 1
+                logger.error(f"Speculative: {routing_result.model_name} failed: {e}")
+                if draft is None:
+                    return {
+                        'response': f"Fehler bei der Antwortgenerierung: {str(e)}",
+                        'model_used': routing_result.model_name,
+                        'routing_info': routing_result,
+                        'success': False,
+                        'error': str(e)
+                    }
+                result = self._finish_speculative(draft, routing_result, None, draft_confidence, False)
+                result['fallback_used'] = True
+                return result
+
+            logger.info(f"Speculative: {routing_result.model_name} answer replaces draft (confidence {draft_confidence})")
+            return self._finish_speculative(result, routing_result, draft, draft_confidence, False)
+
+        finally:
+            for task in (routed_task, draft_task):
+                if not task.done():
+                    task.cancel()
+
+    async def _generate_speculative_stream(
+        self,
+        query: str,
+        context: Optional[str],
+        routing_result: RoutingResult,
+        priority: Priority = Priority.INTERACTIVE
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Streaming variant of _generate_speculative (draft tokens, then 'replace' if superseded)."""
+        self.speculative_stats["runs"] += 1
+        fast_client = self.ollama_clients[ModelType.FAST]
+        start = time.time()
+
+        routed_task = asyncio.create_task(self._generate_routed(query, context, routing_result, priority))
+
+        draft = None
+        draft_confidence = None
+        try:
+            try:
+                async with self.scheduler.slot(ModelType.FAST, priority) as ticket:
+                    async for chunk in fast_client.generate_response_stream(query, context):
+                        if not chunk['done']:
+                            yield {'type': 'token', 'token': chunk['token'], 'draft': True}
+                            continue
+                        draft = {key: value for key, value in chunk.items() if key not in ('token', 'done')}
+                        draft['queue_wait'] = ticket.queue_wait
+                self.residency.touch(fast_client.model)
+            except Exception as e:
+                logger.warning(f"Speculative draft stream failed: {e}")
+
+            if draft is not None:
+                draft_confidence = self._score_draft(draft, query, time.time() - start)
+
+            if draft is not None and draft_confidence >= self.speculative_confidence_threshold:
+                routed_task.cancel()
+                logger.info(f"Speculative stream: draft accepted (confidence {draft_confidence:.2f}), cancelled {routing_result.model_name}")
+                yield {'type': 'done', 'result': self._finish_speculative(draft, routing_result, draft, draft_confidence, True)}
+                return
+
+            try:
+                result = await routed_task
+            except Exception as e:
+                self.speculative_stats["routed_failed"] += 1
+                logger.error(f"Speculative stream: {routing_result.model_name} failed: {e}")
+                if draft is None:
+                    yield {
+                        'type': 'done',
+                        'result': {
+                            'response': f"Fehler bei der Antwortgenerierung: {str(e)}",
+                            'model_used': routing_result.model_name,
+                            'routing_info': routing_result,
+                            'success': False,
+                            'error': str(e)
+                        }
+                    }
+                    return
+                result = self._finish_speculative(draft, routing_result, None, draft_confidence, False)
+                result['fallback_used'] = True
+                yield {'type': 'done', 'result': result}
+                return
+
+            yield {'type': 'replace', 'response': result['response'], 'model_used': result['model_used']}
+            yield {'type': 'done', 'result': self._finish_speculative(result, routing_result, draft, draft_confidence, False)}
+
+        finally:
+            if not routed_task.done():
+                routed_task.cancel()
+
     async def _cleanup_idle_models(self):
         """Background task to unload idle models."""
         while True:
             try:
-                current_time = time.time()
-                
-                for model_type, config in self.models.items():
-                    if config.idle_unload_seconds <= 0:
-                        continue  # Don't unload this model
-                    
-                    last_used = self.last_activity.get(model_type, 0)
-                    idle_time = current_time - last_used
-                    
-                    if idle_time > config.idle_unload_seconds:
-                        # TODO: Implement model unloading via Ollama API
-                        # This would require Ollama API support for model management
-                        logger.debug(f"Model {config.name} idle for {idle_time:.0f}s (threshold: {config.idle_unload_seconds}s)")
+                # Pick up models Ollama loaded or expired on its own
+                await self.residency.refresh()
+                await self.residency.unload_idle()
                 
                 # Check every minute
                 await asyncio.sleep(60)
                 
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.error(f"Error in model cleanup task: {e}")
                 await asyncio.sleep(60)
@@ -433,7 +816,8 @@ class ModelRouter:
                 model_type.value: {
                     "name": config.name,
                     "description": config.description,
-                    "vram_mb": config.vram_mb
+                    "vram_mb": config.vram_mb,
+                    "resident": self.residency.is_resident(config.name)
                 }
                 for model_type, config in self.models.items()
             }
@@ -444,7 +828,9 @@ class ModelRouter:
         health_status = {
             "router_status": "ok",
             "vram_monitoring": self.vram_monitor.pynvml_available,
-            "models": {}
+            "vram_sampler": self.vram_monitor.get_statistics(),
+            "models": {},
+            "residency": self.residency.get_status()
         }
         
         for model_type, client in self.ollama_clients.items():
@@ -5,7 +5,7 @@ Handles connection management and query processing with Llama 3.1 8B model.
 
 import asyncio
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, Union, List
 import ollama
 from ollama import AsyncClient
 from shared.models import Query, Response
@@ -17,10 +17,13 @@ logger = logging.getLogger(__name__)
 class OllamaClient:
     """Client for Ollama API with connection management and error handling."""
     
-    def __init__(self, host: str = "localhost", port: int = 11434, model: str = "llama3.1:8b"):
+    def __init__(self, host: str = "localhost", port: int = 11434, model: str = "llama3.1:8b",
+                 keep_alive: Optional[Union[float, str]] = None, num_ctx: Optional[int] = None):
         self.host = host
         self.port = port
         self.model = model
+        self.keep_alive = keep_alive  # None keeps Ollama's default residency
+        self.num_ctx = num_ctx  # None keeps the model's default context window
         self.base_url = f"http://{host}:{port}"
         self.client = AsyncClient(host=self.base_url)
         
@@ -54,31 +57,32 @@ class OllamaClient:
             logger.error(f"Ollama availability check failed: {e}")
             return False
     
-    async def generate_response(self, query: str, context: Optional[str] = None) -> Dict[str, Any]:
+    async def generate_response(self, query: str, context: Optional[str] = None,
+                                kv_context: Optional[List[int]] = None) -> Dict[str, Any]:
         """
         Generate response using Ollama with Llama 3.1 8B model.
         
         Args:
             query: User query string
             context: Optional context information
+            kv_context: Context tokens of a previous turn to continue from
             
         Returns:
-            Dict with response, confidence, and metadata
+            Dict with response, confidence, and metadata ('context_tokens'
+            holds the token array to continue the conversation)
         """
         try:
             # Prepare prompt with context if provided
-            prompt = self._prepare_prompt(query, context)
+            prompt = self._prepare_prompt(query, context, include_system=kv_context is None)
             
             # Generate response using Ollama with timeout protection
             response = await asyncio.wait_for(
                 self.client.generate(
                     model=self.model,
                     prompt=prompt,
-                    options={
-                        'temperature': 0.7,
-                        'top_p': 0.9,
-                        'max_tokens': 1000,
-                    }
+                    context=kv_context,
+                    keep_alive=self.keep_alive,
+                    options=self._generation_options()
                 ),
                 timeout=300.0  # 5 minutes timeout for heavy models
             )
@@ -91,6 +95,7 @@ class OllamaClient:
                 'prompt_tokens': response.get('prompt_eval_count', 0),
                 'response_tokens': response.get('eval_count', 0),
                 'total_duration': response.get('total_duration', 0),
+                'context_tokens': response.get('context'),
             }
             
         except asyncio.TimeoutError:
@@ -99,18 +104,116 @@ class OllamaClient:
         except Exception as e:
             logger.error(f"Ollama generation failed: {e}")
             raise RuntimeError(f"LLM generation failed: {str(e)}")
+
+    async def generate_response_stream(
+        self,
+        query: str,
+        context: Optional[str] = None,
+        token_timeout: float = 300.0,
+        kv_context: Optional[List[int]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream response tokens from Ollama as they are generated.
+
+        Args:
+            query: User query string
+            context: Optional context information
+            token_timeout: Maximum seconds to wait for the next chunk
+            kv_context: Context tokens of a previous turn to continue from
+
+        Yields:
+            Dicts with 'token' and 'done'. The final chunk (done=True) carries
+            the full response text and the same metadata as generate_response.
+        """
+        prompt = self._prepare_prompt(query, context, include_system=kv_context is None)
+        parts = []
+
+        try:
+            stream = await asyncio.wait_for(
+                self.client.generate(
+                    model=self.model,
+                    prompt=prompt,
+                    context=kv_context,
+                    stream=True,
+                    keep_alive=self.keep_alive,
+                    options=self._generation_options()
+                ),
+                timeout=token_timeout
+            )
+            iterator = stream.__aiter__()
+
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(iterator.__anext__(), timeout=token_timeout)
+                except StopAsyncIteration:
+                    break
+
+                token = chunk.get('response', '')
+                if token:
+                    parts.append(token)
+                    yield {'token': token, 'done': False}
+
+                if chunk.get('done'):
+                    yield {
+                        'token': '',
+                        'done': True,
+                        'response': ''.join(parts).strip(),
+                        'model_used': self.model,
+                        'prompt_tokens': chunk.get('prompt_eval_count', 0),
+                        'response_tokens': chunk.get('eval_count', 0),
+                        'total_duration': chunk.get('total_duration', 0),
+                        'context_tokens': chunk.get('context'),
+                    }
+                    return
+
+            # Stream ended without a final 'done' chunk
+            yield {
+                'token': '',
+                'done': True,
+                'response': ''.join(parts).strip(),
+                'model_used': self.model,
+                'prompt_tokens': 0,
+                'response_tokens': len(parts),
+                'total_duration': 0,
+            }
+
+        except asyncio.TimeoutError:
+            logger.error("Ollama streaming generation timed out")
+            raise RuntimeError("LLM generation timed out - please try again")
+        except Exception as e:
+            logger.error(f"Ollama streaming generation failed: {e}")
+            raise RuntimeError(f"LLM generation failed: {str(e)}")
+
+    def _generation_options(self) -> Dict[str, Any]:
+        """Sampling options, plus the context window if one is configured."""
+        options = {
+            'temperature': 0.7,
+            'top_p': 0.9,
+            'max_tokens': 1000,
+        }
+        if self.num_ctx:
+            options['num_ctx'] = self.num_ctx
+        return options
     
-    def _prepare_prompt(self, query: str, context: Optional[str] = None) -> str:
-        """Prepare prompt with system instructions and context."""
+    def _prepare_prompt(self, query: str, context: Optional[str] = None, include_system: bool = True) -> str:
+        """
+        Prepare prompt with system instructions and context.
+        
+        The system instructions are left out when continuing from cached
+        context tokens, which already contain them.
+        """
         system_prompt = """You are a helpful Linux system administrator assistant. 
 Provide clear, accurate, and practical answers to Linux administration questions.
 Focus on commonly used commands and best practices.
 If you're not certain about something, indicate your uncertainty."""
         
         if context:
-            prompt = f"{system_prompt}\n\nContext: {context}\n\nQuestion: {query}\n\nAnswer:"
+            prompt = f"Context: {context}\n\nQuestion: {query}\n\nAnswer:"
         else:
-            prompt = f"{system_prompt}\n\nQuestion: {query}\n\nAnswer:"
+            prompt = f"Question: {query}\n\nAnswer:"
+        
+        if include_system:
+            prompt = f"{system_prompt}\n\n{prompt}"
             
         return prompt
 
@@ -0,0 +1,252 @@
+"""
+Prompt composer for Module A.
+Merges the user query with conversation and knowledge base context under a token budget.
+"""
+
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRUNCATION_MARKER = "[Context truncated due to length]"
+
+# Llama/Qwen tokenizers produce roughly 1.3 tokens per whitespace word for
+# English prose and more for German or code; calibrated at runtime
+DEFAULT_TOKENS_PER_WORD = 1.3
+
+RAG_INSTRUCTION = (
+    "You are a helpful Linux system administrator assistant. Use the following relevant "
+    "documentation to provide accurate and detailed responses."
+)
+RAG_CLOSING = (
+    "Please provide a comprehensive response based on the documentation above. If the "
+    "documentation doesn't fully cover the query, supplement with your general knowledge but "
+    "clearly indicate what comes from the provided documentation versus general knowledge."
+)
+
+
+class TokenEstimator:
+    """
+    Model token estimate from whitespace words.
+    
+    The ratio starts at DEFAULT_TOKENS_PER_WORD and is calibrated from the
+    prompt_eval_count Ollama reports for prompts that were actually sent,
+    so the session context and the prompt composer budget with the model's
+    own tokenizer. One estimator is shared by both.
+    """
+    
+    def __init__(self, tokens_per_word: float = DEFAULT_TOKENS_PER_WORD):
+        """
+        Initialize token estimator.
+        
+        Args:
+            tokens_per_word: Initial tokens per whitespace word
+        """
+        self.tokens_per_word = tokens_per_word
+        self.calibrations = 0
+    
+    def count(self, text: str) -> int:
+        """Estimated model tokens of a text."""
+        return self.count_words(len(text.split()))
+    
+    def count_words(self, words: int) -> int:
+        """Estimated model tokens of a number of whitespace words."""
+        return math.ceil(words * self.tokens_per_word)
+    
+    def words_for(self, tokens: int) -> int:
+        """Whitespace words that fit into a number of model tokens."""
+        return int(tokens / self.tokens_per_word)
+    
+    def calibrate(self, text: str, token_count: int):
+        """
+        Update the ratio from a prompt with known token count.
+        
+        Args:
+            text: Prompt sent to the model
+            token_count: Tokens Ollama evaluated for it (prompt_eval_count)
+        """
+        words = len(text.split())
+        if words < 5 or token_count <= 0:
+            return  # Too short to say anything about the tokenizer
+        observed = token_count / words
+        if observed < 1.0:
+            # Every word is at least one token: Ollama served part of the
+            # prompt from its prompt cache and only counted the rest
+            return
+        # Moving average, a single code block should not swing the estimate
+        self.tokens_per_word = 0.7 * self.tokens_per_word + 0.3 * observed
+        self.calibrations += 1
+
+
+def estimate_tokens(text: str, estimator: Optional[TokenEstimator] = None) -> int:
+    """Estimated model tokens of a text (default ratio without an estimator)."""
+    return (estimator or TokenEstimator()).count(text)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, estimator: Optional[TokenEstimator] = None) -> str:
+    """
+    Cut text down to roughly max_tokens, keeping whole lines where possible.
+    
+    Args:
+        text: Text to truncate
+        max_tokens: Token budget for the text
+        estimator: Token estimator (default ratio if None)
+    
+    Returns:
+        The text itself if it fits, otherwise a shortened copy ending in the
+        truncation marker (empty if nothing fits)
+    """
+    estimator = estimator or TokenEstimator()
+    if estimator.count(text) <= max_tokens:
+        return text
+    
+    # The marker counts against the budget as well
+    max_tokens -= estimator.count(TRUNCATION_MARKER)
+    if max_tokens <= 0:
+        return ""
+    
+    kept_lines = []
+    used = 0
+    for line in text.splitlines():
+        line_tokens = estimator.count(line)
+        if used + line_tokens <= max_tokens:
+            kept_lines.append(line)
+            used += line_tokens
+            continue
+        
+        # Partial last line
+        remaining = estimator.words_for(max_tokens - used)
+        if remaining > 0:
+            kept_lines.append(" ".join(line.split()[:remaining]))
+        break
+    
+    return "\n".join(kept_lines).rstrip() + f"\n{TRUNCATION_MARKER}"
+
+
+@dataclass
+class ComposedPrompt:
+    """Result of composing a prompt."""
+    prompt: str
+    sections: List[str] = field(default_factory=list)  # context sections that made it into the prompt
+    truncated_sections: List[str] = field(default_factory=list)
+    dropped_sections: List[str] = field(default_factory=list)
+    estimated_tokens: int = 0
+
+
+class PromptComposer:
+    """
+    Deterministic prompt assembly.
+    
+    Sections always appear in the same order: instruction, documentation
+    (knowledge base or explicit context), conversation history, query.
+    The query is never cut. Documentation gets doc_share of the remaining
+    budget when both context sections are present, the history gets the rest,
+    and budget one section does not need flows to the other. With a single
+    context section the prompt matches the format the original single-source
+    enhancers produced.
+    """
+    
+    def __init__(self, token_budget: int = 1500, doc_share: float = 0.6,
+                 estimator: Optional[TokenEstimator] = None):
+        """
+        Initialize prompt composer.
+        
+        Args:
+            token_budget: Maximum estimated tokens of the composed prompt
+            doc_share: Fraction of the context budget reserved for documentation
+            estimator: Token estimator shared with the session context (default ratio if None)
+        """
+        self.token_budget = token_budget
+        self.doc_share = doc_share
+        self.estimator = estimator or TokenEstimator()
+    
+    def compose(
+        self,
+        query: str,
+        session_context: str = "",
+        rag_context: str = "",
+        explicit_context: Optional[str] = None
+    ) -> ComposedPrompt:
+        """
+        Build the final prompt.
+        
+        Args:
+            query: Preprocessed user query
+            session_context: Conversation history from the SessionManager
+            rag_context: Formatted knowledge base snippets
+            explicit_context: Context supplied with the request (replaces rag_context)
+        
+        Returns:
+            ComposedPrompt with the prompt text and section bookkeeping
+        """
+        if explicit_context:
+            doc_name, doc_text = "explicit", explicit_context.strip()
+        else:
+            doc_name, doc_text = "rag", (rag_context or "").strip()
+        history_text = (session_context or "").strip()
+        
+        result = ComposedPrompt(prompt=query)
+        
+        # Fixed overhead: the query plus the template around the sections
+        skeleton = self._render(query, doc_name, "x" if doc_text else "", "x" if history_text else "")
+        available = max(self.token_budget - self.estimator.count(skeleton), 0)
+        
+        if doc_text and history_text:
+            doc_budget = int(available * self.doc_share)
+            history_budget = available - doc_budget
+            # Hand budget the other section does not need across
+            history_needed = self.estimator.count(history_text)
+            doc_needed = self.estimator.count(doc_text)
+            if history_needed < history_budget:
+                doc_budget += history_budget - history_needed
+                history_budget = history_needed
+            elif doc_needed < doc_budget:
+                history_budget += doc_budget - doc_needed
+                doc_budget = doc_needed
+        else:
+            doc_budget = available if doc_text else 0
+            history_budget = available if history_text else 0
+        
+        doc_text = self._fit(result, doc_name, doc_text, doc_budget)
+        history_text = self._fit(result, "session", history_text, history_budget)
+        
+        result.prompt = self._render(query, doc_name, doc_text, history_text)
+        result.estimated_tokens = self.estimator.count(result.prompt)
+        return result
+    
+    def _fit(self, result: ComposedPrompt, name: str, text: str, budget: int) -> str:
+        """Truncate one section to its budget and record what happened to it."""
+        if not text:
+            return ""
+        
+        fitted = truncate_to_tokens(text, budget, self.estimator)
+        if not fitted.replace(TRUNCATION_MARKER, "").strip():
+            result.dropped_sections.append(name)
+            logger.debug(f"Dropped {name} context: no token budget left")
+            return ""
+        
+        if fitted != text:
+            result.truncated_sections.append(name)
+        result.sections.append(name)
+        return fitted
+    
+    @staticmethod
+    def _render(query: str, doc_name: str, doc_text: str, history_text: str) -> str:
+        """Render the prompt template for the sections that are present."""
+        if doc_text and doc_name == "rag":
+            parts = [RAG_INSTRUCTION, f"RELEVANT DOCUMENTATION:\n{doc_text}"]
+            if history_text:
+                parts.append(f"Context from previous conversation:\n{history_text}")
+            parts.extend([f"USER QUERY: {query}", RAG_CLOSING])
+            return "\n\n".join(parts)
+        
+        if history_text:
+            prompt = f"Context from previous conversation:\n{history_text}\n\nCurrent query: {query}"
+        else:
+            prompt = query
+        
+        if doc_text:
+            prompt = f"{prompt}\n\nContext: {doc_text}"
+        return prompt
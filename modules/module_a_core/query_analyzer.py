@@ -5,59 +5,27 @@ Detects Linux/code-related queries and determines complexity.
 
 import re
 import logging
-import unicodedata
 from typing import Dict, List, Optional
 from dataclasses import dataclass
 
-logger = logging.getLogger(__name__)
-
-# ChatGPT's Model Constants
-MODEL_HEAVY = 'heavy'
-MODEL_CODE = 'code'
-MODEL_FAST = 'fast'
-
-def _normalize(s: str) -> str:
-    """ChatGPT's Unicode normalization function."""
-    s = s.casefold()
-    s = unicodedata.normalize("NFKD", s)
-    return "".join(c for c in s if not unicodedata.combining(c))
+try:
+    from .routing_engine import (
+        MODEL_CODE, MODEL_FAST, MATH_KEYWORDS, NUMBERED_CONDITIONS,
+        COMPLEX_PATTERNS, MATH_SYMBOLS, normalize_query, route_query
+    )
+    from .routing_memo import RoutingMemo, get_routing_memo
+except ImportError:
+    # Standalone scripts put modules/module_a_core on sys.path directly
+    from routing_engine import (
+        MODEL_CODE, MODEL_FAST, MATH_KEYWORDS, NUMBERED_CONDITIONS,
+        COMPLEX_PATTERNS, MATH_SYMBOLS, normalize_query, route_query
+    )
+    from routing_memo import RoutingMemo, get_routing_memo
 
-# ChatGPT's Pattern Definitions
-_MATH_VERBS = r"(bestimme|berechne|minimiere|maximiere|optimiere|finde|löse)"
-
-_MATH_PATS = [
-    # Pure Mathematical Patterns (PRIORITY)
-    re.compile(r"\b(gleichung\w*|equation\w*)\b"),  # "gleichung", "gleichungssystem"
-    re.compile(r"\b(x\s*\+\s*y|x\s*\-\s*y|x\s*\*\s*y|x\s*\/\s*y)\b"),  # mathematical expressions
-    re.compile(r"\b(x\d*|y\d*|z\d*)\s*[=<>]\s*\d+\b"),  # variables with numbers
-    re.compile(r"\b\d+\s*[=<>]\s*\d+\b"),  # number equations
-    re.compile(r"\b(ganze\s+zahlen|integer\w*|natürliche\s+zahlen)\b"),  # number types
-    re.compile(r"\b(bedingung\w*|condition\w*|erfüll\w*)\b"),  # conditions
-    re.compile(r"\b(mathe|mathematik|mathematics|rechnen|calculation)\b"),  # math keywords
-    re.compile(r"\b(werte\s+haben|values\s+are|lösung\w*|solution\w*)\b"),  # solution keywords
-    
-    # System Optimization Patterns
-    re.compile(rf"\bmathematisch\w*\b.{{0,40}}\boptimal\w*\b"),
-    re.compile(rf"\b{_MATH_VERBS}\b[^\.]{{0,80}}\b(optimal\w*|minimum|maxim\w*|argmin|argmax)\b"),
-    re.compile(rf"\b(puffer(?:grö|gro)ss?e|block(?:grö|gro)ss?e)\b.{{0,40}}\b(operation\w*|i/?o)\b"),
-    re.compile(rf"\b{_MATH_VERBS}\b.{{0,40}}\b(gleichung\w*|system)\b"),  # "löse gleichungssystem"
-    re.compile(r"\boptimierungsaufgabe\b"),
-    re.compile(r"\bfibonacci\b"),
-    
-    # Performance Optimization
-    re.compile(r"\boptimale?\s+(anzahl|größe|batch[-\s]?größe|timeouts?|cache[-\s]?größe|connections?)\b"),
-    re.compile(r"\b(worker[-\s]?threads?|connection\s+pool|batch[-\s]?size)\b.*\b(optimal\w*|anzahl|größe)\b"),
-    re.compile(r"\b(berechne|bestimme).*\b(anzahl|größe|wert\w*)\b.*\b(connection\w*|pool|thread\w*|cache|puffer|buffer)\b"),
-]
-
-_TECH_PATS = [
-    re.compile(r"\b(i/?o|io)[\s/\-–—]*operation\w*"),
-    re.compile(r"\b(buffer|puffer|blocksize|durchsatz|throughput|syscall\w*)\b"),
-]
+logger = logging.getLogger(__name__)
 
-_FAST_PATS = [
-    re.compile(r'welcher\s+befehl\s+(zeigt|macht|gibt|listet)')
-]
+# Kept for callers of the former module-level helper
+_normalize = normalize_query
 
 @dataclass
 class QueryAnalysis:
@@ -75,9 +43,16 @@ class QueryAnalysis:
 class QueryAnalyzer:
     """Analyzes queries to determine appropriate model routing."""
     
-    def __init__(self):
-        """Initialize the query analyzer with keyword sets."""
+    def __init__(self, memo: Optional[RoutingMemo] = None):
+        """
+        Initialize the query analyzer with keyword sets.
+        
+        Args:
+            memo: Routing memo for repeated queries (default: the shared
+                process-wide memo)
+        """
         self.debug = {}  # ChatGPT's debug tracking
+        self.memo = memo if memo is not None else get_routing_memo()
         self.linux_keywords = [
             # Basic commands
             "befehl", "command", "kommando", "cmd",
@@ -176,128 +151,14 @@ class QueryAnalyzer:
         """
         OPTIMIZED routing function with enhanced mathematical detection.
         Returns MODEL_HEAVY, MODEL_CODE, or MODEL_FAST.
-        """
-        q = query
-        qn = _normalize(query)
-        
-        # Reset debug info
-        self.debug = {}
-        
-        # 0) FAST MODEL - Basic commands (HIGHEST PRIORITY)
-        for p in _FAST_PATS:
-            if p.search(qn):
-                self.debug['route_reason'] = 'fast_basic_command'
-                return MODEL_FAST
-        
-        # Enhanced basic command detection
-        basic_command_patterns = [
-            r'welcher\s+befehl\s+(zeigt|macht|gibt|listet)',
-            r'was\s+macht\s+(der|das)\s+\w+\s+befehl',
-            r'welches\s+kommando\s+(zeigt|macht)',
-            r'wie\s+(liste|zeige)\s+ich.*\b(dateien|ordner|prozesse)\b',
-            r'^(ls|ll|pwd|cd|df|du|ps|top|htop|free|uname)(\s|$)',
-            r'^(cat|less|more|head|tail|grep|find|which)(\s|$)',
-        ]
-        
-        for pattern in basic_command_patterns:
-            if re.search(pattern, qn):
-                self.debug['route_reason'] = 'fast_basic_linux_command'
-                return MODEL_FAST
-        
-        # Don't route mathematical queries to FAST just because they're short
-        has_math_content = re.search(r"\b(berechne|fibonacci|gleichung|löse|mathematisch|optimal|x\s*[=+\-]|zahlen|integral|eigenwerte|matrix|polynom|faktorisiere|zeige|mod|fläche|derangements|dreieck|projektplanung|cpm|kreisgeometrie|kombinatorik|dezimalzahlen|quersumme|fourier|analyse|poisson|summationsformel|schwartz|theta|lineare|algebra|charakterisiere|diagonaliserbar|spektralsatz|transportproblem|kostenmatrix|nordwestecke|modi|codierungstheorie|generator|paritaetsmatrix)\b|[∫∑π≡∞²³⁴]", qn)
         
-        if token_count < 5 and not (linux_kw or code_kw or has_math_content):
-            self.debug['route_reason'] = 'fast_short'
-            return MODEL_FAST
-        
-        # 1) PROGRAMMING DETECTION - Check for programming context BEFORE math
-        programming_indicators = re.search(r"\b(implementiere|schreibe|erstelle|programmiere|python|javascript|java|c\+\+|rust|go|php|ruby|function|funktion|class|klasse|script|code|coding|entwickle)\b", qn)
-        
-        # Mathematical programming tasks should go to CODE model
-        if programming_indicators:
-            # Check if it's mathematical programming (CODE model)
-            math_programming = re.search(r"\b(fibonacci|primzahl|algorithmus|parser|berechnung|mathematisch).*\b(funktion|function|script|implementiere|programmiere|code)\b", qn) or \
-                              re.search(r"\b(implementiere|programmiere|schreibe).*\b(fibonacci|primzahl|algorithmus|parser|berechnung|mathematisch)\b", qn)
-            
-            # Check if it's pure mathematical theory (should go to HEAVY despite "zeige" or "gib")
-            pure_math_theory = re.search(r"\b(fourier.*analyse|codierungstheorie|zahlentheorie|topologie|geometrie|maßtheorie|spektralgraphen|variationsrechnung).*\b(zeige|gib|beweise)\b", qn)
-            
-            if math_programming and not pure_math_theory:
-                self.debug['route_reason'] = 'code_mathematical_programming'
-                return MODEL_CODE
-            
-            # Don't route pure mathematical theory to CODE just because of "zeige" or "gib"
-            if pure_math_theory:
-                pass  # Continue to mathematical detection
-            else:
-                # General programming tasks
-                self.debug['route_reason'] = 'code_programming_task'
-                return MODEL_CODE
-        
-        # 2) PURE MATHEMATICAL PROBLEMS - Only for non-programming math
-        math_indicators = re.search(r"\b(bestimme|berechne|minimiere|maximiere|optimiere|finde|löse|mathematisch|optimal|fibonacci|gleichung|mathe|rechnen|werte\s+haben|ganze\s+zahlen|zeige|integral|eigenwerte|matrix|derangements|fourierreihe|polynom|faktorisiere|binom|mod|fläche|dreiecks?|einheitskreis|anzahl.*derangements|beweise|satz|lemma|theorem|spektral|martingal|laplace|topologie|geometrie|kombinatorik|zahlentheorie|variationsrechnung|maßtheorie|funktionalgleichung|informationstheorie|codierungstheorie|graphentheorie|konvexe|dualität|isoperimetrisch|carathéodory|erdős|ramsey|hamming|young|tableaux|kongruenz|tsp|bayes|portfolio|nash|brachistochrone|zykloide|projektplanung|cpm|kreisgeometrie|dezimalzahlen|quersumme|fourier|analyse|poisson|summationsformel|schwartz|theta|lineare|algebra|charakterisiere|diagonaliserbar|spektralsatz|transportproblem|kostenmatrix|nordwestecke|modi|generator|paritaetsmatrix)\b", qn)
-        pure_math = re.search(r"(x\s*[\+\-\*\/=<>]|[\+\-\*\/=<>]\s*x|x\s+[\+\-]\s+y|gleichung|mathe|rechnen|bedingung\w*|erfüll\w*|zahlen.*x.*y.*z|x.*y.*=.*\d+|∫|∑|π|≡|∞|²|³|⁴|x\^?\d+|sin\(|cos\(|ln\(|martingal|fourier|derangements|fläche.*dreieck|gleichseitig|zeige.*dass|beweise.*satz|summe.*über|integral.*von|wahrscheinlichkeit.*posterior|eigenwerte.*matrix|spektral.*graph|laplace.*matrix|nash.*gleichgewicht|ramsey.*zahl|hamming.*code|young.*tableaux|kongruenz.*mod|tsp.*minimum|bayes.*update|portfolio.*varianz|isoperimetrische.*ungleichung|projektplanung.*cpm|kreisgeometrie.*kreis|kombinatorik.*dezimalzahlen|fourier.*analyse|poisson.*summationsformel|lineare.*algebra|charakterisiere.*diagonaliserbar|transportproblem.*kostenmatrix|codierungstheorie.*hamming)", qn)
-        
-        # System optimization with mathematical context (HEAVY model)
-        system_math_optimization = re.search(r"\b(puffergröße|blockgröße|cache|buffer|thread|worker|connection|pool|batch).*\b(optimal|mathematisch|berechne|bestimme)\b", qn) or \
-                                  re.search(r"\b(optimal|mathematisch|berechne|bestimme).*\b(puffergröße|blockgröße|cache|buffer|thread|worker|connection|pool|batch)\b", qn)
-        
-        # Check for non-mathematical optimization (should go to CODE)
-        non_math_optimization = re.search(r"\b(optimiere|optimize).*\b(performance|datenbankperformance|database|web|api|code|system)\b", qn) and not system_math_optimization
-        
-        # Route to HEAVY model for pure mathematical problems or system optimization
-        if (pure_math or system_math_optimization or (math_indicators and complexity_score >= 0.4 and not programming_indicators)) and not non_math_optimization:
-            self.debug['route_reason'] = 'heavy_math_detection_enhanced'
-            self.debug['math_indicators'] = bool(math_indicators)
-            self.debug['pure_math'] = bool(pure_math)
-            self.debug['system_optimization'] = bool(system_math_optimization)
-            return MODEL_HEAVY
-        
-        # 1) Scores berechnen
-        heavy_score = 0.0
-        tech_score = 0.0
-        
-        hits_h = []
-        for p in _MATH_PATS:
-            if p.search(q) or p.search(qn):
-                heavy_score += 1
-                hits_h.append(p.pattern)
-        
-        if re.search(rf"\b{_MATH_VERBS}\b.{{0,60}}\b(optimal\w*|minimum|maxim\w*|argmin|argmax)\b", qn):
-            heavy_score += 0.5
-        
-        if complexity_score >= 0.8:
-            heavy_score += 1
-        
-        hits_t = []
-        for p in _TECH_PATS:
-            if p.search(q) or p.search(qn):
-                tech_score += 1
-                hits_t.append(p.pattern)
-        
-        if linux_kw or code_kw:
-            tech_score += 1
-        
-        self.debug['heavy_hits'] = hits_h
-        self.debug['tech_hits'] = hits_t
-        self.debug['scores'] = {'heavy': heavy_score, 'tech': tech_score, 'complexity': complexity_score}
-        
-        # 2) Balanced routing decision
-        if heavy_score >= 1.5 and heavy_score >= tech_score + 0.5:
-            self.debug['route_reason'] = f'heavy_win_balanced H:{heavy_score} T:{tech_score}'
-            return MODEL_HEAVY
-        
-        if tech_score > 0:
-            self.debug['route_reason'] = f'code_tech T:{tech_score}'
-            return MODEL_CODE
-        
-        if complexity_score >= 0.5:
-            self.debug['route_reason'] = 'code_complexity_fallback'
-            return MODEL_CODE
-        
-        self.debug['route_reason'] = 'fast_default'
-        return MODEL_FAST
+        The decision cascade lives in routing_engine.route_query, which
+        matches each pattern family with a single precompiled regex.
+        """
+        route_model, self.debug = route_query(
+            query, token_count, linux_kw, code_kw, complexity_score
+        )
+        return route_model
     
     def analyze_query(self, query: str) -> QueryAnalysis:
         """
@@ -309,6 +170,18 @@ class QueryAnalyzer:
         Returns:
             QueryAnalysis with routing decision and metadata
         """
+        cached = self.memo.get_analysis(query)
+        if cached is not None:
+            self.debug = dict(cached.debug_info or {})
+            return cached
+        
+        generation = self.memo.generation
+        analysis = self._analyze(query)
+        self.memo.put_analysis(query, analysis, generation)
+        return analysis
+    
+    def _analyze(self, query: str) -> QueryAnalysis:
+        """Analyze a query without consulting the memo."""
         query_lower = query.lower()
         
         # Count tokens (simple word-based approximation)
@@ -397,17 +270,8 @@ class QueryAnalyzer:
         score += math_complexity
         
         # Special patterns that indicate complexity
-        complex_patterns = [
-            r'wie\s+kann\s+ich.*und.*auch',  # "wie kann ich X und auch Y"
-            r'erstelle.*mit.*für',           # "erstelle X mit Y für Z"
-            r'schritt.*schritt',             # step by step requests
-            r'erkläre.*warum.*und.*wie',     # explain why and how
-            r'unterschied.*zwischen.*und'    # difference between X and Y
-        ]
-        
-        for pattern in complex_patterns:
-            if re.search(pattern, query.lower()):
-                score += 0.1
+        for _ in COMPLEX_PATTERNS.hits(query.lower()):
+            score += 0.1
         
         return min(score, 1.0)
     
@@ -419,67 +283,8 @@ class QueryAnalyzer:
         score = 0.0
         query_lower = query.lower()
         
-        # Enhanced mathematical symbols and notation (Grok's recommendations + Advanced patterns)
-        math_symbols = [
-            r'x\^?2|y\^?2|z\^?2',           # squared variables
-            r'x²|y²|z²',                     # unicode squared symbols
-            r'∈|∀|∃|∑|∏|∫',                 # mathematical set/logic symbols
-            r'[xyz]\s*[+\-=]\s*[xyz]',      # variable equations
-            r'[xyz]\s*[<>]\s*[xyz]',        # variable inequalities
-            r'\+.*\+.*=',                    # multiple addition equations
-            r'=.*\+.*\+',                    # equations with multiple terms
-            r'bedingungen?\s+erfüllen',      # "conditions fulfill"
-            r'gleichung(en|ssystem)?',       # equation/equation system
-            r'system\s+von\s+gleichungen',   # system of equations
-            # Grok's additional mathematical patterns
-            r'löse.*gleichung',              # "solve equation"
-            r'berechne.*fibonacci',          # "calculate fibonacci"
-            r'bestimme.*optimal',            # "determine optimal"
-            r'mathematisch.*optimal',        # "mathematically optimal"
-            r'algorithmus.*komplexität',     # "algorithm complexity"
-            r'matrix.*multiplikation',       # "matrix multiplication"
-            r'differential.*gleichung',      # "differential equation"
-            r'integral.*berechnung',         # "integral calculation"
-            r'wahrscheinlichkeit.*verteilung', # "probability distribution"
-            r'statistik.*analyse',           # "statistical analysis"
-            r'puffer.*größe',                # "buffer size"
-            r'optimal.*größe',               # "optimal size"
-            r'mathematisch.*puffer',         # "mathematical buffer"
-            
-            # Advanced mathematical patterns for complex problems
-            r'zeige.*dass.*summe',           # "zeige dass summe"
-            r'beweise.*satz',                # "beweise satz"
-            r'eigenwerte.*matrix',           # "eigenwerte matrix"
-            r'laplace.*matrix',              # "laplace matrix"
-            r'spektral.*graph',              # "spektral graph"
-            r'martingal.*ist',               # "martingal ist"
-            r'fourier.*reihe',               # "fourier reihe"
-            r'ito.*lemma',                   # "ito lemma"
-            r'brownsche.*bewegung',          # "brownsche bewegung"
-            r'wahrscheinlichkeits.*theorie', # "wahrscheinlichkeits theorie"
-            r'zahlentheorie.*anzahl',        # "zahlentheorie anzahl"
-            r'kombinatorik.*anzahl',         # "kombinatorik anzahl"
-            r'topologie.*zeige',             # "topologie zeige"
-            r'geometrie.*beweise',           # "geometrie beweise"
-            r'optimierung.*loese',           # "optimierung loese"
-            r'variationsrechnung.*loese',    # "variationsrechnung loese"
-            r'tsp.*minimum',                 # "tsp minimum"
-            r'bayes.*update',                # "bayes update"
-            r'portfolio.*varianz',           # "portfolio varianz"
-            r'nash.*gleichgewicht',          # "nash gleichgewicht"
-            r'ramsey.*zahl',                 # "ramsey zahl"
-            r'hamming.*code',                # "hamming code"
-            r'young.*tableaux',              # "young tableaux"
-            r'derangements.*von',            # "derangements von"
-            r'kongruenz.*mod',               # "kongruenz mod"
-            r'binom.*gleich',                # "binom gleich"
-            r'isoperimetrische.*ungleichung', # "isoperimetrische ungleichung"
-        ]
-        
-        math_symbol_count = 0
-        for pattern in math_symbols:
-            if re.search(pattern, query_lower):
-                math_symbol_count += 1
+        # Enhanced mathematical symbols and notation (see routing_engine.MATH_SYMBOLS)
+        math_symbol_count = MATH_SYMBOLS.count(query_lower)
         
         # Enhanced mathematical complexity scoring (Grok's recommendations)
         if math_symbol_count >= 3:
@@ -489,42 +294,12 @@ class QueryAnalyzer:
         elif math_symbol_count >= 1:
             score += 0.3  # Medium mathematical complexity (increased)
         
-        # Enhanced mathematical keywords (Grok's expanded list + Advanced terms)
-        math_keywords = [
-            'löse', 'solve', 'berechne', 'calculate', 'finde', 'find',
-            'bestimme', 'determine', 'werte', 'values', 'zahlen', 'numbers',
-            'ganze zahlen', 'integers', 'tripel', 'triple', 'paar', 'pair',
-            # Grok's additional mathematical keywords
-            'fibonacci', 'primzahl', 'prime', 'faktor', 'factor',
-            'matrix', 'vektor', 'vector', 'integral', 'differential',
-            'wahrscheinlichkeit', 'probability', 'statistik', 'statistics',
-            'algorithmus', 'algorithm', 'komplexität', 'complexity',
-            'optimierung', 'optimization', 'minimum', 'maximum',
-            
-            # Advanced mathematical terms for complex problems
-            'zeige', 'beweise', 'beweis', 'satz', 'theorem', 'lemma',
-            'eigenwerte', 'eigenvalues', 'spektral', 'spectral',
-            'martingal', 'martingale', 'fourier', 'laplace',
-            'topologie', 'topology', 'geometrie', 'geometry',
-            'kombinatorik', 'combinatorics', 'zahlentheorie', 'number theory',
-            'variationsrechnung', 'calculus of variations',
-            'maßtheorie', 'measure theory', 'funktionalgleichung',
-            'informationstheorie', 'information theory',
-            'codierungstheorie', 'coding theory', 'graphentheorie', 'graph theory',
-            'konvexe', 'convex', 'dualität', 'duality',
-            'isoperimetrisch', 'isoperimetric', 'carathéodory',
-            'erdős', 'ramsey', 'hamming', 'young', 'tableaux',
-            'derangements', 'kongruenz', 'congruence', 'binom', 'binomial',
-            'tsp', 'bayes', 'portfolio', 'nash', 'gleichgewicht',
-            'brachistochrone', 'zykloide', 'cycloid'
-        ]
-        
-        math_keyword_count = sum(1 for kw in math_keywords if kw in query_lower)
+        math_keyword_count = sum(1 for kw in MATH_KEYWORDS if kw in query_lower)
         if math_keyword_count >= 2:
             score += 0.1
         
         # Numbered conditions (indicates systematic problem)
-        numbered_conditions = len(re.findall(r'\d+\.\s+[xyz]', query_lower))
+        numbered_conditions = len(NUMBERED_CONDITIONS.findall(query_lower))
         if numbered_conditions >= 2:
             score += 0.2  # Multiple numbered mathematical conditions
         
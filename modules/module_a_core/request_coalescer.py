@@ -0,0 +1,102 @@
+"""
+Single-flight request coalescing for Module A.
+Concurrent identical generations share one model call.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Any, Callable, Awaitable, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize a prompt for coalescing (case and whitespace insensitive)."""
+    return " ".join(prompt.split()).casefold()
+
+
+class RequestCoalescer:
+    """
+    Runs at most one generation per key at a time.
+    
+    The first caller for a key (the leader) starts the work in its own
+    task; callers arriving while it is in flight await the same task. The
+    task is shielded, so a disconnecting caller does not cancel the
+    generation for everyone else. Waiters are reference-counted: when the
+    last one is cancelled, nobody needs the result any more, so the task
+    is cancelled and its key dropped. Keys are forgotten as soon as the
+    work finishes; this is not a response cache.
+    """
+    
+    def __init__(self):
+        """Initialize request coalescer."""
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        
+        # Statistics
+        self.leaders = 0
+        self.coalesced = 0
+        self.max_waiters = 0
+        self.abandoned = 0
+        self._waiters: Dict[Hashable, int] = {}
+    
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run factory() once for all concurrent callers with the same key.
+        
+        Args:
+            key: Identity of the work (e.g. model and normalized prompt)
+            factory: Creates the coroutine doing the work
+        
+        Returns:
+            Tuple of (result, shared) where shared is True for callers that
+            joined an in-flight execution
+        """
+        task = self._in_flight.get(key)
+        shared = task is not None
+        
+        if task is None:
+            task = asyncio.create_task(factory())
+            self._in_flight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda _: self._forget(key, task))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+            logger.info(f"Coalesced request onto in-flight generation ({self._waiters[key] + 1} waiters)")
+        
+        self._waiters[key] += 1
+        self.max_waiters = max(self.max_waiters, self._waiters[key])
+        try:
+            return await asyncio.shield(task), shared
+        finally:
+            if self._in_flight.get(key) is task:
+                self._waiters[key] -= 1
+                if self._waiters[key] == 0 and not task.done():
+                    # Every caller gave up on this generation
+                    task.cancel()
+                    self._forget(key, task)
+                    self.abandoned += 1
+                    logger.info("Cancelled coalesced generation, all waiters left")
+    
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        """Drop a finished or abandoned key (unless a newer task replaced it)."""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+            self._waiters.pop(key, None)
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get coalescing statistics.
+        
+        Returns:
+            Dictionary with leader/coalesced counters and in-flight keys
+        """
+        total = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._in_flight),
+            "executions": self.leaders,
+            "coalesced_requests": self.coalesced,
+            "coalescing_rate": self.coalesced / total if total else 0.0,
+            "max_waiters": self.max_waiters,
+            "abandoned": self.abandoned
+        }
@@ -0,0 +1,256 @@
+"""
+Model residency manager for the model router.
+Loads, pins and unloads Ollama models via the keep_alive parameter.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional, Any, List, Union
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ResidentModel:
+    """A model currently loaded by Ollama."""
+    name: str
+    loaded_at: float
+    last_used: float
+    size_vram_mb: Optional[int] = None
+
+
+class ModelResidencyManager:
+    """
+    Tracks which models Ollama holds in memory and controls their lifetime.
+    
+    Models with idle_unload_seconds <= 0 are pinned (keep_alive=-1). All
+    other models are loaded with keep_alive set to their idle timeout and are
+    unloaded explicitly (keep_alive=0) once they have been idle that long.
+    Concurrent loads of the same model share one request, so a burst of
+    queries for a cold model triggers a single cold load.
+    """
+    
+    def __init__(self, client, idle_unload_seconds: Dict[str, int], load_timeout: float = 600.0):
+        """
+        Initialize residency manager.
+        
+        Args:
+            client: ollama.AsyncClient (or compatible) used for load/unload/ps
+            idle_unload_seconds: Idle timeout per model name (<= 0 pins the model)
+            load_timeout: Maximum seconds to wait for a model load
+        """
+        self.client = client
+        self.idle_unload_seconds = dict(idle_unload_seconds)
+        self.load_timeout = load_timeout
+        
+        self._resident: Dict[str, ResidentModel] = {}
+        self._loading: Dict[str, asyncio.Task] = {}
+        
+        # Statistics
+        self.cold_loads = 0
+        self.failed_loads = 0
+        self.unloads = 0
+        self.last_load_seconds: Dict[str, float] = {}
+    
+    def is_pinned(self, name: str) -> bool:
+        """True if the model should never be unloaded."""
+        idle = self.idle_unload_seconds.get(name)
+        return idle is not None and idle <= 0
+    
+    def keep_alive_for(self, name: str) -> Optional[Union[int, str]]:
+        """keep_alive value to send with requests for a model (None: Ollama default)."""
+        idle = self.idle_unload_seconds.get(name)
+        if idle is None:
+            return None
+        if idle <= 0:
+            return -1
+        return f"{idle}s"
+    
+    def is_resident(self, name: str) -> bool:
+        """True if the model is known to be loaded."""
+        return name in self._resident
+    
+    def resident_models(self) -> List[str]:
+        """Names of all loaded models."""
+        return list(self._resident)
+    
+    def touch(self, name: str):
+        """
+        Record use of a model.
+        
+        A successful generation implies Ollama has the model loaded, so an
+        unknown model becomes resident here as well.
+        """
+        now = time.time()
+        resident = self._resident.get(name)
+        if resident is None:
+            self._resident[name] = ResidentModel(name=name, loaded_at=now, last_used=now)
+        else:
+            resident.last_used = now
+    
+    async def ensure_loaded(self, name: str) -> bool:
+        """
+        Load a model unless it is already resident.
+        
+        Args:
+            name: Ollama model name
+        
+        Returns:
+            True if the model is resident afterwards
+        """
+        if self.is_resident(name):
+            self.touch(name)
+            return True
+        
+        task = self._loading.get(name)
+        if task is None:
+            task = asyncio.create_task(self._load(name))
+            self._loading[name] = task
+            task.add_done_callback(lambda _: self._loading.pop(name, None))
+        
+        return await asyncio.shield(task)
+    
+    def warm(self, name: str) -> Optional[asyncio.Task]:
+        """
+        Start loading a model in the background.
+        
+        Args:
+            name: Ollama model name
+        
+        Returns:
+            The load task, or None if the model is already resident
+        """
+        if self.is_resident(name):
+            return None
+        return asyncio.ensure_future(self.ensure_loaded(name))
+    
+    async def _load(self, name: str) -> bool:
+        """Issue an empty generate request so Ollama loads the model."""
+        start = time.time()
+        try:
+            await asyncio.wait_for(
+                self.client.generate(model=name, prompt="", keep_alive=self.keep_alive_for(name)),
+                timeout=self.load_timeout
+            )
+        except Exception as e:
+            self.failed_loads += 1
+            logger.warning(f"Failed to load model {name}: {e}")
+            return False
+        
+        elapsed = time.time() - start
+        self.cold_loads += 1
+        self.last_load_seconds[name] = round(elapsed, 3)
+        self.touch(name)
+        logger.info(f"Model {name} loaded in {elapsed:.2f}s (keep_alive={self.keep_alive_for(name)})")
+        return True
+    
+    async def unload(self, name: str) -> bool:
+        """
+        Ask Ollama to unload a model immediately.
+        
+        Args:
+            name: Ollama model name
+        
+        Returns:
+            True if the unload request succeeded
+        """
+        try:
+            await self.client.generate(model=name, prompt="", keep_alive=0)
+        except Exception as e:
+            logger.warning(f"Failed to unload model {name}: {e}")
+            return False
+        
+        self._resident.pop(name, None)
+        self.unloads += 1
+        logger.info(f"Model {name} unloaded")
+        return True
+    
+    async def unload_idle(self, now: Optional[float] = None) -> List[str]:
+        """
+        Unload every unpinned model idle longer than its timeout.
+        
+        Args:
+            now: Reference time (defaults to time.time())
+        
+        Returns:
+            Names of the models that were unloaded
+        """
+        now = now if now is not None else time.time()
+        unloaded = []
+        
+        for name, resident in list(self._resident.items()):
+            # Pinned and unmanaged models are left alone
+            if name not in self.idle_unload_seconds or self.is_pinned(name) or name in self._loading:
+                continue
+            
+            idle_time = now - resident.last_used
+            if idle_time > self.idle_unload_seconds[name]:
+                logger.info(f"Model {name} idle for {idle_time:.0f}s (threshold: {self.idle_unload_seconds[name]}s)")
+                if await self.unload(name):
+                    unloaded.append(name)
+        
+        return unloaded
+    
+    async def refresh(self):
+        """Synchronize residency state with Ollama's list of running models."""
+        try:
+            running = await self.client.ps()
+        except Exception as e:
+            logger.debug(f"Could not query running models: {e}")
+            return
+        
+        now = time.time()
+        running_models = {}
+        for model in running.get('models', []):
+            name = model.get('name') or model.get('model')
+            if name:
+                running_models[self._configured_name(name)] = model
+        
+        # Models Ollama expired on its own
+        for name in list(self._resident):
+            if name not in running_models:
+                logger.debug(f"Model {name} no longer resident")
+                del self._resident[name]
+        
+        for name, model in running_models.items():
+            resident = self._resident.get(name)
+            if resident is None:
+                resident = ResidentModel(name=name, loaded_at=now, last_used=now)
+                self._resident[name] = resident
+            size_vram = model.get('size_vram')
+            if size_vram is not None:
+                resident.size_vram_mb = int(size_vram) // (1024 * 1024)
+    
+    def _configured_name(self, name: str) -> str:
+        """Map a name reported by Ollama ('model:latest') to the configured name."""
+        canonical = name if ":" in name else f"{name}:latest"
+        for configured in self.idle_unload_seconds:
+            if (configured if ":" in configured else f"{configured}:latest") == canonical:
+                return configured
+        return name
+    
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get residency state and load statistics.
+        
+        Returns:
+            Dictionary with resident models and counters
+        """
+        now = time.time()
+        resident = {}
+        for name, model in self._resident.items():
+            info = asdict(model)
+            info["idle_seconds"] = round(now - model.last_used, 1)
+            info["pinned"] = self.is_pinned(name)
+            resident[name] = info
+        
+        return {
+            "resident_models": resident,
+            "loading": list(self._loading),
+            "cold_loads": self.cold_loads,
+            "failed_loads": self.failed_loads,
+            "unloads": self.unloads,
+            "last_load_seconds": dict(self.last_load_seconds)
+        }
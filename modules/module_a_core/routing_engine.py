@@ -0,0 +1,492 @@
+"""
+Precompiled routing engine for QueryAnalyzer and ModelRouter.
+
+All routing pattern families are compiled once at import. Each family is
+merged into a single alternation so that "does any pattern of this family
+match?" costs one regex scan instead of one re.search per pattern. Per-pattern
+hit lists (needed for debug output and scoring) are only computed after the
+merged regex reports a match.
+
+Families are deliberately not folded into one named-group master regex. A
+plain alternation reports only the leftmost match, so overlapping families
+need one optional lookahead each, which disables the literal-prefix search of
+the merged family regexes: on the golden queries the eleven route_query
+families took 54µs per query that way versus 35µs as separate searches, and
+the cascade below usually stops after the first few families anyway.
+Measured against the former inline cascades (golden queries, analysis memo
+disabled): QueryAnalyzer.analyze_query 146-166µs -> 106-111µs and
+ModelRouter model selection 31µs -> 10.5µs, i.e. about 177µs -> 117-122µs
+per routed query.
+
+The decision logic mirrors the former inline cascades in
+QueryAnalyzer._route_query_chatgpt and ModelRouter._select_model_from_analysis
+exactly; tests/data/routing_golden.json pins that behaviour.
+"""
+
+import re
+import unicodedata
+from typing import Dict, List, Sequence, Tuple
+
+# ChatGPT's Model Constants
+MODEL_HEAVY = 'heavy'
+MODEL_CODE = 'code'
+MODEL_FAST = 'fast'
+
+
+def normalize_query(s: str) -> str:
+    """ChatGPT's Unicode normalization (casefold, strip combining marks)."""
+    s = s.casefold()
+    s = unicodedata.normalize("NFKD", s)
+    return "".join(c for c in s if not unicodedata.combining(c))
+
+
+class PatternFamily:
+    """A named group of regex patterns compiled into one master regex."""
+
+    def __init__(self, name: str, patterns: Sequence[str]):
+        self.name = name
+        self.patterns = list(patterns)
+        self._compiled = [re.compile(p) for p in self.patterns]
+        self._master = re.compile("|".join(f"(?:{p})" for p in self.patterns))
+
+    def search(self, text: str) -> bool:
+        """True if any pattern of the family matches somewhere in text."""
+        return self._master.search(text) is not None
+
+    def hits(self, *texts: str) -> List[str]:
+        """Patterns (in declaration order) matching at least one of texts."""
+        if not any(self._master.search(text) for text in texts):
+            return []
+        return [
+            compiled.pattern for compiled in self._compiled
+            if any(compiled.search(text) for text in texts)
+        ]
+
+    def count(self, text: str) -> int:
+        """Number of distinct patterns matching text."""
+        return len(self.hits(text))
+
+
+# === QueryAnalyzer families (matched against the normalized query) ===
+
+_MATH_VERBS = r"(bestimme|berechne|minimiere|maximiere|optimiere|finde|löse)"
+
+MATH_PATS = PatternFamily("math", [
+    # Pure Mathematical Patterns (PRIORITY)
+    r"\b(gleichung\w*|equation\w*)\b",  # "gleichung", "gleichungssystem"
+    r"\b(x\s*\+\s*y|x\s*\-\s*y|x\s*\*\s*y|x\s*\/\s*y)\b",  # mathematical expressions
+    r"\b(x\d*|y\d*|z\d*)\s*[=<>]\s*\d+\b",  # variables with numbers
+    r"\b\d+\s*[=<>]\s*\d+\b",  # number equations
+    r"\b(ganze\s+zahlen|integer\w*|natürliche\s+zahlen)\b",  # number types
+    r"\b(bedingung\w*|condition\w*|erfüll\w*)\b",  # conditions
+    r"\b(mathe|mathematik|mathematics|rechnen|calculation)\b",  # math keywords
+    r"\b(werte\s+haben|values\s+are|lösung\w*|solution\w*)\b",  # solution keywords
+
+    # System Optimization Patterns
+    r"\bmathematisch\w*\b.{0,40}\boptimal\w*\b",
+    rf"\b{_MATH_VERBS}\b[^\.]{{0,80}}\b(optimal\w*|minimum|maxim\w*|argmin|argmax)\b",
+    r"\b(puffer(?:grö|gro)ss?e|block(?:grö|gro)ss?e)\b.{0,40}\b(operation\w*|i/?o)\b",
+    rf"\b{_MATH_VERBS}\b.{{0,40}}\b(gleichung\w*|system)\b",  # "löse gleichungssystem"
+    r"\boptimierungsaufgabe\b",
+    r"\bfibonacci\b",
+
+    # Performance Optimization
+    r"\boptimale?\s+(anzahl|größe|batch[-\s]?größe|timeouts?|cache[-\s]?größe|connections?)\b",
+    r"\b(worker[-\s]?threads?|connection\s+pool|batch[-\s]?size)\b.*\b(optimal\w*|anzahl|größe)\b",
+    r"\b(berechne|bestimme).*\b(anzahl|größe|wert\w*)\b.*\b(connection\w*|pool|thread\w*|cache|puffer|buffer)\b",
+])
+
+TECH_PATS = PatternFamily("tech", [
+    r"\b(i/?o|io)[\s/\-–—]*operation\w*",
+    r"\b(buffer|puffer|blocksize|durchsatz|throughput|syscall\w*)\b",
+])
+
+FAST_PATS = PatternFamily("fast_basic_command", [
+    r'welcher\s+befehl\s+(zeigt|macht|gibt|listet)',
+])
+
+# The first basic command pattern duplicates FAST_PATS and is therefore
+# always decided there; it is kept so the family reads like the original list.
+BASIC_COMMAND_PATS = PatternFamily("fast_basic_linux_command", [
+    r'welcher\s+befehl\s+(zeigt|macht|gibt|listet)',
+    r'was\s+macht\s+(der|das)\s+\w+\s+befehl',
+    r'welches\s+kommando\s+(zeigt|macht)',
+    r'wie\s+(liste|zeige)\s+ich.*\b(dateien|ordner|prozesse)\b',
+    r'^(ls|ll|pwd|cd|df|du|ps|top|htop|free|uname)(\s|$)',
+    r'^(cat|less|more|head|tail|grep|find|which)(\s|$)',
+])
+
+MATH_CONTENT = PatternFamily("math_content", [
+    r"\b(berechne|fibonacci|gleichung|löse|mathematisch|optimal|x\s*[=+\-]|zahlen|integral|eigenwerte|matrix|polynom|faktorisiere|zeige|mod|fläche|derangements|dreieck|projektplanung|cpm|kreisgeometrie|kombinatorik|dezimalzahlen|quersumme|fourier|analyse|poisson|summationsformel|schwartz|theta|lineare|algebra|charakterisiere|diagonaliserbar|spektralsatz|transportproblem|kostenmatrix|nordwestecke|modi|codierungstheorie|generator|paritaetsmatrix)\b|[∫∑π≡∞²³⁴]",
+])
+
+PROGRAMMING = PatternFamily("programming", [
+    r"\b(implementiere|schreibe|erstelle|programmiere|python|javascript|java|c\+\+|rust|go|php|ruby|function|funktion|class|klasse|script|code|coding|entwickle)\b",
+])
+
+MATH_PROGRAMMING = PatternFamily("math_programming", [
+    r"\b(fibonacci|primzahl|algorithmus|parser|berechnung|mathematisch).*\b(funktion|function|script|implementiere|programmiere|code)\b",
+    r"\b(implementiere|programmiere|schreibe).*\b(fibonacci|primzahl|algorithmus|parser|berechnung|mathematisch)\b",
+])
+
+PURE_MATH_THEORY = PatternFamily("pure_math_theory", [
+    r"\b(fourier.*analyse|codierungstheorie|zahlentheorie|topologie|geometrie|maßtheorie|spektralgraphen|variationsrechnung).*\b(zeige|gib|beweise)\b",
+])
+
+MATH_INDICATORS = PatternFamily("math_indicators", [
+    r"\b(bestimme|berechne|minimiere|maximiere|optimiere|finde|löse|mathematisch|optimal|fibonacci|gleichung|mathe|rechnen|werte\s+haben|ganze\s+zahlen|zeige|integral|eigenwerte|matrix|derangements|fourierreihe|polynom|faktorisiere|binom|mod|fläche|dreiecks?|einheitskreis|anzahl.*derangements|beweise|satz|lemma|theorem|spektral|martingal|laplace|topologie|geometrie|kombinatorik|zahlentheorie|variationsrechnung|maßtheorie|funktionalgleichung|informationstheorie|codierungstheorie|graphentheorie|konvexe|dualität|isoperimetrisch|carathéodory|erdős|ramsey|hamming|young|tableaux|kongruenz|tsp|bayes|portfolio|nash|brachistochrone|zykloide|projektplanung|cpm|kreisgeometrie|dezimalzahlen|quersumme|fourier|analyse|poisson|summationsformel|schwartz|theta|lineare|algebra|charakterisiere|diagonaliserbar|spektralsatz|transportproblem|kostenmatrix|nordwestecke|modi|generator|paritaetsmatrix)\b",
+])
+
+PURE_MATH = PatternFamily("pure_math", [
+    r"(x\s*[\+\-\*\/=<>]|[\+\-\*\/=<>]\s*x|x\s+[\+\-]\s+y|gleichung|mathe|rechnen|bedingung\w*|erfüll\w*|zahlen.*x.*y.*z|x.*y.*=.*\d+|∫|∑|π|≡|∞|²|³|⁴|x\^?\d+|sin\(|cos\(|ln\(|martingal|fourier|derangements|fläche.*dreieck|gleichseitig|zeige.*dass|beweise.*satz|summe.*über|integral.*von|wahrscheinlichkeit.*posterior|eigenwerte.*matrix|spektral.*graph|laplace.*matrix|nash.*gleichgewicht|ramsey.*zahl|hamming.*code|young.*tableaux|kongruenz.*mod|tsp.*minimum|bayes.*update|portfolio.*varianz|isoperimetrische.*ungleichung|projektplanung.*cpm|kreisgeometrie.*kreis|kombinatorik.*dezimalzahlen|fourier.*analyse|poisson.*summationsformel|lineare.*algebra|charakterisiere.*diagonaliserbar|transportproblem.*kostenmatrix|codierungstheorie.*hamming)",
+])
+
+SYSTEM_MATH_OPTIMIZATION = PatternFamily("system_math_optimization", [
+    r"\b(puffergröße|blockgröße|cache|buffer|thread|worker|connection|pool|batch).*\b(optimal|mathematisch|berechne|bestimme)\b",
+    r"\b(optimal|mathematisch|berechne|bestimme).*\b(puffergröße|blockgröße|cache|buffer|thread|worker|connection|pool|batch)\b",
+])
+
+NON_MATH_OPTIMIZATION = PatternFamily("non_math_optimization", [
+    r"\b(optimiere|optimize).*\b(performance|datenbankperformance|database|web|api|code|system)\b",
+])
+
+MATH_VERB_OPTIMAL = PatternFamily("math_verb_optimal", [
+    rf"\b{_MATH_VERBS}\b.{{0,60}}\b(optimal\w*|minimum|maxim\w*|argmin|argmax)\b",
+])
+
+# === Complexity scoring families (matched against query.lower()) ===
+
+COMPLEX_PATTERNS = PatternFamily("complex", [
+    r'wie\s+kann\s+ich.*und.*auch',  # "wie kann ich X und auch Y"
+    r'erstelle.*mit.*für',           # "erstelle X mit Y für Z"
+    r'schritt.*schritt',             # step by step requests
+    r'erkläre.*warum.*und.*wie',     # explain why and how
+    r'unterschied.*zwischen.*und'    # difference between X and Y
+])
+
+# Enhanced mathematical symbols and notation (Grok's recommendations + Advanced patterns)
+MATH_SYMBOLS = PatternFamily("math_symbols", [
+    r'x\^?2|y\^?2|z\^?2',           # squared variables
+    r'x²|y²|z²',                     # unicode squared symbols
+    r'∈|∀|∃|∑|∏|∫',                 # mathematical set/logic symbols
+    r'[xyz]\s*[+\-=]\s*[xyz]',      # variable equations
+    r'[xyz]\s*[<>]\s*[xyz]',        # variable inequalities
+    r'\+.*\+.*=',                    # multiple addition equations
+    r'=.*\+.*\+',                    # equations with multiple terms
+    r'bedingungen?\s+erfüllen',      # "conditions fulfill"
+    r'gleichung(en|ssystem)?',       # equation/equation system
+    r'system\s+von\s+gleichungen',   # system of equations
+    # Grok's additional mathematical patterns
+    r'löse.*gleichung',              # "solve equation"
+    r'berechne.*fibonacci',          # "calculate fibonacci"
+    r'bestimme.*optimal',            # "determine optimal"
+    r'mathematisch.*optimal',        # "mathematically optimal"
+    r'algorithmus.*komplexität',     # "algorithm complexity"
+    r'matrix.*multiplikation',       # "matrix multiplication"
+    r'differential.*gleichung',      # "differential equation"
+    r'integral.*berechnung',         # "integral calculation"
+    r'wahrscheinlichkeit.*verteilung', # "probability distribution"
+    r'statistik.*analyse',           # "statistical analysis"
+    r'puffer.*größe',                # "buffer size"
+    r'optimal.*größe',               # "optimal size"
+    r'mathematisch.*puffer',         # "mathematical buffer"
+
+    # Advanced mathematical patterns for complex problems
+    r'zeige.*dass.*summe',           # "zeige dass summe"
+    r'beweise.*satz',                # "beweise satz"
+    r'eigenwerte.*matrix',           # "eigenwerte matrix"
+    r'laplace.*matrix',              # "laplace matrix"
+    r'spektral.*graph',              # "spektral graph"
+    r'martingal.*ist',               # "martingal ist"
+    r'fourier.*reihe',               # "fourier reihe"
+    r'ito.*lemma',                   # "ito lemma"
+    r'brownsche.*bewegung',          # "brownsche bewegung"
+    r'wahrscheinlichkeits.*theorie', # "wahrscheinlichkeits theorie"
+    r'zahlentheorie.*anzahl',        # "zahlentheorie anzahl"
+    r'kombinatorik.*anzahl',         # "kombinatorik anzahl"
+    r'topologie.*zeige',             # "topologie zeige"
+    r'geometrie.*beweise',           # "geometrie beweise"
+    r'optimierung.*loese',           # "optimierung loese"
+    r'variationsrechnung.*loese',    # "variationsrechnung loese"
+    r'tsp.*minimum',                 # "tsp minimum"
+    r'bayes.*update',                # "bayes update"
+    r'portfolio.*varianz',           # "portfolio varianz"
+    r'nash.*gleichgewicht',          # "nash gleichgewicht"
+    r'ramsey.*zahl',                 # "ramsey zahl"
+    r'hamming.*code',                # "hamming code"
+    r'young.*tableaux',              # "young tableaux"
+    r'derangements.*von',            # "derangements von"
+    r'kongruenz.*mod',               # "kongruenz mod"
+    r'binom.*gleich',                # "binom gleich"
+    r'isoperimetrische.*ungleichung', # "isoperimetrische ungleichung"
+])
+
+NUMBERED_CONDITIONS = re.compile(r'\d+\.\s+[xyz]')
+
+# Enhanced mathematical keywords (Grok's expanded list + Advanced terms)
+MATH_KEYWORDS = (
+    'löse', 'solve', 'berechne', 'calculate', 'finde', 'find',
+    'bestimme', 'determine', 'werte', 'values', 'zahlen', 'numbers',
+    'ganze zahlen', 'integers', 'tripel', 'triple', 'paar', 'pair',
+    # Grok's additional mathematical keywords
+    'fibonacci', 'primzahl', 'prime', 'faktor', 'factor',
+    'matrix', 'vektor', 'vector', 'integral', 'differential',
+    'wahrscheinlichkeit', 'probability', 'statistik', 'statistics',
+    'algorithmus', 'algorithm', 'komplexität', 'complexity',
+    'optimierung', 'optimization', 'minimum', 'maximum',
+
+    # Advanced mathematical terms for complex problems
+    'zeige', 'beweise', 'beweis', 'satz', 'theorem', 'lemma',
+    'eigenwerte', 'eigenvalues', 'spektral', 'spectral',
+    'martingal', 'martingale', 'fourier', 'laplace',
+    'topologie', 'topology', 'geometrie', 'geometry',
+    'kombinatorik', 'combinatorics', 'zahlentheorie', 'number theory',
+    'variationsrechnung', 'calculus of variations',
+    'maßtheorie', 'measure theory', 'funktionalgleichung',
+    'informationstheorie', 'information theory',
+    'codierungstheorie', 'coding theory', 'graphentheorie', 'graph theory',
+    'konvexe', 'convex', 'dualität', 'duality',
+    'isoperimetrisch', 'isoperimetric', 'carathéodory',
+    'erdős', 'ramsey', 'hamming', 'young', 'tableaux',
+    'derangements', 'kongruenz', 'congruence', 'binom', 'binomial',
+    'tsp', 'bayes', 'portfolio', 'nash', 'gleichgewicht',
+    'brachistochrone', 'zykloide', 'cycloid'
+)
+
+# === ModelRouter families (matched against query.lower()) ===
+
+# Mathematical queries MUST go to Heavy model - HIGHEST PRIORITY
+ROUTER_HEAVY = PatternFamily("router_heavy", [
+    # Pure Mathematical Patterns (HIGH PRIORITY)
+    r'x\s*[\+\-\*\/=<>]',                             # "x + y", "x = 5"
+    r'[\+\-\*\/=<>]\s*x',                             # "+ x", "= x"
+    r'x\s+[\+\-]\s+y',                               # "x + y", "x - y"
+    r'gleichung\w*',                                  # "gleichung", "gleichungssystem"
+    r'(löse|solve).*[xy].*=',                        # "löse x = 5"
+    r'berechne.*[xy].*[=<>]',                        # "berechne x = y"
+    r'ganze\s+zahlen.*[xyz]',                        # "ganze zahlen x, y, z"
+    r'werte\s+haben\s+[xyz]',                        # "welche werte haben x, y"
+    r'bedingung\w*.*erfüll\w*',                      # "bedingungen erfüllen"
+    r'mathe\w*.*problem',                            # "mathematisches problem"
+
+    # System Optimization Patterns
+    r'mathematisch.*optimal',                          # "mathematisch optimal"
+    r'(bestimme|berechne|finde|löse).*optimal',       # "bestimme/berechne optimal"
+    r'optimierungsaufgabe',                           # "optimierungsaufgabe"
+    r'fibonacci.*zahlen',                             # "fibonacci zahlen"
+    r'optimal.*anzahl.*worker',                       # "optimale anzahl worker"
+    r'optimal.*größe.*puffer',                        # "optimale größe puffer"
+    r'memory.*allocation.*optimal',                   # "memory allocation optimal"
+    r'cpu.*intensive.*optimal',                       # "cpu intensive optimal"
+    r'berechne.*fibonacci.*für',                      # "berechne fibonacci für"
+    r'mathematisch.*bestimm',                         # "mathematisch bestimm"
+])
+
+# These should ALWAYS go to Fast model regardless of other factors
+ROUTER_FAST = PatternFamily("router_fast", [
+    r'welcher\s+befehl\s+(zeigt|macht|gibt|listet)',  # "welcher befehl zeigt/macht"
+    r'was\s+macht\s+(der|das)\s+\w+\s+befehl',        # "was macht der X befehl"
+    r'wie\s+kann\s+ich\s+.*\s+(anzeigen|zeigen)\s*\??', # "wie kann ich X anzeigen?"
+    r'was\s+ist\s+der\s+unterschied\s+zwischen\s+\w+\s+und\s+\w+', # "unterschied zwischen X und Y"
+    r'^(ls|ll|pwd|cd|df|du|ps|top|htop|free|uname)\s*\??$', # basic commands alone
+])
+
+# Complex explanation requests should go to Code model
+ROUTER_INTERMEDIATE = PatternFamily("router_intermediate", [
+    r'erkläre\s+mir\s+(die\s+)?unterschiede?\s+zwischen', # "erkläre mir unterschiede zwischen"
+    r'was\s+sind\s+(die\s+)?best\s+practices?\s+für',     # "was sind best practices für"
+    r'wie\s+funktioniert\s+.*\s+(system|prozess|mechanismus)', # "wie funktioniert X system"
+    r'vor.*und.*nachteile\s+von',                         # "vor und nachteile von"
+    r'unterschiede?\s+zwischen.*dateisystem',              # "unterschiede zwischen dateisystemen"
+    r'security.*hardening',                               # "security hardening"
+    r'performance.*optimierung',                          # "performance optimierung"
+])
+
+ROUTER_BEFEHL_QUESTION = re.compile(r'befehl.*\?$')  # ends with "befehl?"
+
+_ROUTER_MATH_INDICATORS = ('berechne', 'löse', 'optimal', 'mathematisch', 'fibonacci', 'gleichung')
+_ROUTER_TECH_INDICATORS = ('erkläre', 'unterschied', 'funktioniert', 'erstelle', 'entwickle', 'implementiere')
+_ROUTER_SIMPLE_WORDS = ('welcher', 'was macht', 'wie zeige')
+
+
+def route_query(
+    query: str,
+    token_count: int,
+    linux_kw: bool,
+    code_kw: bool,
+    complexity_score: float,
+    normalized: str = None
+) -> Tuple[str, Dict]:
+    """
+    ChatGPT's 3-class router with enhanced mathematical detection.
+
+    Args:
+        query: Original query text
+        token_count: Word count of the query
+        linux_kw: Whether Linux keywords were detected
+        code_kw: Whether code keywords were detected
+        complexity_score: Complexity score from QueryAnalyzer
+        normalized: Precomputed normalize_query(query), if available
+
+    Returns:
+        Tuple of (MODEL_HEAVY/MODEL_CODE/MODEL_FAST, debug info)
+    """
+    q = query
+    qn = normalized if normalized is not None else normalize_query(query)
+    debug = {}
+
+    # 0) FAST MODEL - Basic commands (HIGHEST PRIORITY)
+    if FAST_PATS.search(qn):
+        debug['route_reason'] = 'fast_basic_command'
+        return MODEL_FAST, debug
+
+    # Enhanced basic command detection
+    if BASIC_COMMAND_PATS.search(qn):
+        debug['route_reason'] = 'fast_basic_linux_command'
+        return MODEL_FAST, debug
+
+    # Don't route mathematical queries to FAST just because they're short
+    if token_count < 5 and not (linux_kw or code_kw or MATH_CONTENT.search(qn)):
+        debug['route_reason'] = 'fast_short'
+        return MODEL_FAST, debug
+
+    # 1) PROGRAMMING DETECTION - Check for programming context BEFORE math
+    programming_indicators = PROGRAMMING.search(qn)
+
+    # Mathematical programming tasks should go to CODE model
+    if programming_indicators:
+        # Pure mathematical theory should go to HEAVY despite "zeige" or "gib"
+        pure_math_theory = PURE_MATH_THEORY.search(qn)
+
+        if not pure_math_theory:
+            if MATH_PROGRAMMING.search(qn):
+                debug['route_reason'] = 'code_mathematical_programming'
+            else:
+                # General programming tasks
+                debug['route_reason'] = 'code_programming_task'
+            return MODEL_CODE, debug
+
+    # 2) PURE MATHEMATICAL PROBLEMS - Only for non-programming math
+    math_indicators = MATH_INDICATORS.search(qn)
+    pure_math = PURE_MATH.search(qn)
+
+    # System optimization with mathematical context (HEAVY model)
+    system_math_optimization = SYSTEM_MATH_OPTIMIZATION.search(qn)
+
+    # Check for non-mathematical optimization (should go to CODE)
+    non_math_optimization = not system_math_optimization and NON_MATH_OPTIMIZATION.search(qn)
+
+    # Route to HEAVY model for pure mathematical problems or system optimization
+    if (pure_math or system_math_optimization or (math_indicators and complexity_score >= 0.4 and not programming_indicators)) and not non_math_optimization:
+        debug['route_reason'] = 'heavy_math_detection_enhanced'
+        debug['math_indicators'] = bool(math_indicators)
+        debug['pure_math'] = bool(pure_math)
+        debug['system_optimization'] = bool(system_math_optimization)
+        return MODEL_HEAVY, debug
+
+    # 3) Scores berechnen
+    hits_h = MATH_PATS.hits(q, qn)
+    heavy_score = float(len(hits_h))
+
+    if MATH_VERB_OPTIMAL.search(qn):
+        heavy_score += 0.5
+
+    if complexity_score >= 0.8:
+        heavy_score += 1
+
+    hits_t = TECH_PATS.hits(q, qn)
+    tech_score = float(len(hits_t))
+
+    if linux_kw or code_kw:
+        tech_score += 1
+
+    debug['heavy_hits'] = hits_h
+    debug['tech_hits'] = hits_t
+    debug['scores'] = {'heavy': heavy_score, 'tech': tech_score, 'complexity': complexity_score}
+
+    # 4) Balanced routing decision
+    if heavy_score >= 1.5 and heavy_score >= tech_score + 0.5:
+        debug['route_reason'] = f'heavy_win_balanced H:{heavy_score} T:{tech_score}'
+        return MODEL_HEAVY, debug
+
+    if tech_score > 0:
+        debug['route_reason'] = f'code_tech T:{tech_score}'
+        return MODEL_CODE, debug
+
+    if complexity_score >= 0.5:
+        debug['route_reason'] = 'code_complexity_fallback'
+        return MODEL_CODE, debug
+
+    debug['route_reason'] = 'fast_default'
+    return MODEL_FAST, debug
+
+
+def select_model(
+    query: str,
+    route_model: str,
+    complexity_score: float,
+    needs_code_model: bool
+) -> str:
+    """
+    ModelRouter's hybrid routing on top of a QueryAnalysis.
+
+    Args:
+        query: Original query text (QueryAnalysis.original_query)
+        route_model: QueryAnalysis.route_model
+        complexity_score: QueryAnalysis.complexity_score
+        needs_code_model: QueryAnalysis.needs_code_model
+
+    Returns:
+        MODEL_HEAVY, MODEL_CODE or MODEL_FAST
+    """
+    query_lower = query.lower()
+
+    # === PRIORITY 1: HEAVY MODEL PATTERNS (Mathematical/Optimization) ===
+    if ROUTER_HEAVY.search(query_lower):
+        return MODEL_HEAVY
+
+    # === PRIORITY 2: FAST MODEL PATTERNS (Basic Commands) ===
+    if ROUTER_FAST.search(query_lower):
+        return MODEL_FAST
+
+    # === PRIORITY 3: INTERMEDIATE PATTERNS (Complex Explanations) ===
+    if ROUTER_INTERMEDIATE.search(query_lower):
+        return MODEL_CODE
+
+    # === PRIORITY 4: USE CHATGPT'S ROUTE_MODEL IF AVAILABLE ===
+    if route_model:
+        chatgpt_model = route_model.lower()
+        if chatgpt_model in (MODEL_HEAVY, MODEL_CODE, MODEL_FAST):
+            return chatgpt_model
+
+    # === PRIORITY 5: INTELLIGENT COMPLEXITY INTERPRETATION ===
+    # High complexity + mathematical content = Heavy
+    if complexity_score > 0.5:
+        if any(indicator in query_lower for indicator in _ROUTER_MATH_INDICATORS):
+            return MODEL_HEAVY
+
+    # Medium complexity + technical content = Code
+    if complexity_score > 0.3:
+        if any(indicator in query_lower for indicator in _ROUTER_TECH_INDICATORS):
+            return MODEL_CODE
+
+    # === PRIORITY 6: KEYWORD-BASED ROUTING ===
+    # Linux/Code keywords but simple query = might be basic command
+    if needs_code_model:
+        simple_command_indicators = [
+            len(query.split()) <= 8,  # Short queries
+            any(word in query_lower for word in _ROUTER_SIMPLE_WORDS),
+            ROUTER_BEFEHL_QUESTION.search(query_lower),
+        ]
+
+        if sum(bool(indicator) for indicator in simple_command_indicators) >= 2:
+            return MODEL_FAST
+        return MODEL_CODE
+
+    # === PRIORITY 7: FALLBACK LOGIC ===
+    if complexity_score > 0.7:
+        return MODEL_HEAVY
+    elif complexity_score > 0.4 or len(query.split()) > 10:
+        return MODEL_CODE
+    else:
+        return MODEL_FAST
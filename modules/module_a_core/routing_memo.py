@@ -0,0 +1,147 @@
+"""
+Routing decision memo for Module A.
+Caches QueryAnalysis results and the selected model per query text.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _MemoEntry:
+    analysis: Any  # QueryAnalysis
+    model: Any = None  # ModelType chosen by ModelRouter, once known
+
+
+class RoutingMemo:
+    """
+    Bounded LRU memo for routing decisions.
+    
+    Query analysis and model selection are pure functions of the query
+    text, so repeated queries (UI example buttons, optimizer cycles, test
+    suites) can reuse earlier results. The key is the exact query text:
+    the analyzer looks at case and whitespace (token counts, lower() vs
+    casefold), so a looser normalization could change routing outcomes.
+    invalidate() drops everything when routing parameters change; results
+    computed before an invalidation are not stored afterwards.
+    Thread-safe, the optimizer analyzes from a thread pool.
+    """
+    
+    def __init__(self, max_entries: int = 2048):
+        """
+        Initialize routing memo.
+        
+        Args:
+            max_entries: Queries kept before the least recently used is evicted
+        """
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries: "OrderedDict[str, _MemoEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.model_hits = 0
+        self.model_misses = 0
+        self.invalidations = 0
+    
+    def get_analysis(self, query: str):
+        """
+        Get the memoized analysis of a query.
+        
+        Returns:
+            Copy of the stored QueryAnalysis, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(query)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(query)
+            self.hits += 1
+            return replace(entry.analysis)
+    
+    def put_analysis(self, query: str, analysis, generation: int):
+        """
+        Store the analysis of a query.
+        
+        Args:
+            query: Query text
+            analysis: QueryAnalysis computed for it
+            generation: Value of self.generation when the analysis started
+        """
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[query] = _MemoEntry(analysis=replace(analysis))
+            self._entries.move_to_end(query)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def get_model(self, query: str):
+        """Get the memoized model selection for a query (None on a miss)."""
+        with self._lock:
+            entry = self._entries.get(query)
+            if entry is None or entry.model is None:
+                self.model_misses += 1
+                return None
+            self.model_hits += 1
+            return entry.model
+    
+    def put_model(self, query: str, model, generation: int):
+        """
+        Attach the selected model to a memoized query.
+        
+        Args:
+            query: Query text
+            model: Selected ModelType
+            generation: Value of self.generation when the selection started
+        """
+        with self._lock:
+            entry = self._entries.get(query)
+            if entry is not None and generation == self.generation:
+                entry.model = model
+    
+    def invalidate(self):
+        """Drop all memoized decisions (routing parameters changed)."""
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+            self.invalidations += 1
+        logger.info("Routing memo invalidated")
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get memo statistics.
+        
+        Returns:
+            Dictionary with hit/miss counters and size
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "model_hits": self.model_hits,
+                "model_misses": self.model_misses,
+                "invalidations": self.invalidations,
+                "generation": self.generation
+            }
+
+
+# Global routing memo shared by all analyzers in the process
+routing_memo = RoutingMemo()
+
+
+def get_routing_memo() -> RoutingMemo:
+    """Get the global routing memo instance."""
+    return routing_memo
@@ -0,0 +1,255 @@
+"""
+Admission control and priority scheduling for Ollama generations.
+Bounds concurrency and queue depth per model so background traffic cannot starve interactive queries.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Dict, Any, Hashable, List, Tuple, AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Request priority classes (lower value is served first)."""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+    BATCH = 2
+
+
+class AdmissionRejected(Exception):
+    """Raised when a model's queue is full; the caller should retry later."""
+    
+    def __init__(self, model: Hashable, queue_depth: int, retry_after: int):
+        self.model = model
+        self.queue_depth = queue_depth
+        self.retry_after = retry_after
+        super().__init__(f"Queue for {getattr(model, 'value', model)} full ({queue_depth} waiting), retry after {retry_after}s")
+
+
+@dataclass
+class SchedulerLimits:
+    """Concurrency and queue limits for one model."""
+    max_concurrency: int = 1
+    max_background: int = 1  # concurrent slots non-interactive work may occupy
+    max_queue: int = 16  # waiting interactive requests before rejecting
+    max_background_queue: int = 8  # waiting background/batch requests before rejecting
+
+
+@dataclass
+class AdmissionTicket:
+    """A granted generation slot."""
+    model: Hashable
+    priority: Priority
+    queue_wait: float = 0.0
+    granted_at: float = field(default_factory=time.time)
+
+
+class _ModelQueue:
+    """Slot accounting and waiters for one model."""
+    
+    def __init__(self, limits: SchedulerLimits):
+        self.limits = limits
+        self.active = 0
+        self.active_background = 0
+        self.waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self.waiting = {priority: 0 for priority in Priority}
+        self.avg_service_seconds = 5.0
+        
+        # Statistics
+        self.admitted = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+    
+    def can_run(self, priority: Priority) -> bool:
+        if self.active >= self.limits.max_concurrency:
+            return False
+        return priority == Priority.INTERACTIVE or self.active_background < self.limits.max_background
+    
+    def queued(self, interactive: bool) -> int:
+        if interactive:
+            return self.waiting[Priority.INTERACTIVE]
+        return self.waiting[Priority.BACKGROUND] + self.waiting[Priority.BATCH]
+
+
+class ModelScheduler:
+    """
+    Per-model admission control with priority classes.
+    
+    Each model has a bounded number of concurrent generations. Background
+    and batch work may only occupy max_background of them, so interactive
+    queries always find a free slot on models with spare capacity. Waiting
+    requests are served strictly by priority, then FIFO. When a queue is
+    full the request is rejected with a Retry-After estimate derived from
+    the observed service time instead of piling up behind the GPU.
+    """
+    
+    def __init__(self, limits: Dict[Hashable, SchedulerLimits]):
+        """
+        Initialize scheduler.
+        
+        Args:
+            limits: Limits per model key (e.g. ModelType)
+        """
+        self._queues = {model: _ModelQueue(model_limits) for model, model_limits in limits.items()}
+        self._sequence = itertools.count()
+    
+    def retry_after(self, model: Hashable) -> int:
+        """Seconds until a queued request for the model would likely be served."""
+        queue = self._queues[model]
+        depth = queue.queued(True) + queue.queued(False)
+        return max(1, math.ceil(queue.avg_service_seconds * (depth + 1) / queue.limits.max_concurrency))
+    
+    def check_admission(self, model: Hashable, priority: Priority = Priority.INTERACTIVE):
+        """
+        Raise AdmissionRejected if a request would be rejected right now.
+        
+        Args:
+            model: Model key
+            priority: Request priority
+        """
+        queue = self._queues[model]
+        if queue.can_run(priority):
+            return
+        
+        interactive = priority == Priority.INTERACTIVE
+        depth = queue.queued(interactive)
+        limit = queue.limits.max_queue if interactive else queue.limits.max_background_queue
+        if depth >= limit:
+            queue.rejected += 1
+            raise AdmissionRejected(model, depth, self.retry_after(model))
+    
+    @asynccontextmanager
+    async def slot(self, model: Hashable, priority: Priority = Priority.INTERACTIVE) -> AsyncIterator[AdmissionTicket]:
+        """
+        Hold a generation slot for the duration of the block.
+        
+        Args:
+            model: Model key
+            priority: Request priority
+        
+        Yields:
+            AdmissionTicket with the time spent queueing
+        
+        Raises:
+            AdmissionRejected: If the model's queue is full
+        """
+        ticket = await self.acquire(model, priority)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+    
+    async def acquire(self, model: Hashable, priority: Priority = Priority.INTERACTIVE) -> AdmissionTicket:
+        """
+        Wait for a generation slot (prefer slot()).
+        
+        Raises:
+            AdmissionRejected: If the model's queue is full
+        """
+        queue = self._queues[model]
+        start = time.time()
+        
+        # Run immediately only if nobody of equal or higher priority is waiting
+        ahead = sum(count for waiting_priority, count in queue.waiting.items() if waiting_priority <= priority)
+        if ahead == 0 and queue.can_run(priority):
+            return self._grant(queue, model, priority, start)
+        
+        self.check_admission(model, priority)
+        
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(queue.waiters, (int(priority), next(self._sequence), future))
+        queue.waiting[priority] += 1
+        
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just before the cancellation arrived: hand the slot on
+                self._release_slot(queue, priority)
+            else:
+                future.cancel()
+                queue.waiting[priority] -= 1
+            raise
+        
+        return self._grant(queue, model, priority, start, counted=True)
+    
+    def _grant(self, queue: _ModelQueue, model: Hashable, priority: Priority, start: float,
+               counted: bool = False) -> AdmissionTicket:
+        """Book a slot (already reserved by _dispatch when counted is True)."""
+        if not counted:
+            queue.active += 1
+            if priority != Priority.INTERACTIVE:
+                queue.active_background += 1
+        
+        wait = time.time() - start
+        queue.admitted += 1
+        queue.total_wait += wait
+        queue.max_wait = max(queue.max_wait, wait)
+        if wait > 0.5:
+            logger.info(f"Admitted {priority.name.lower()} request for {getattr(model, 'value', model)} after {wait:.2f}s in queue")
+        return AdmissionTicket(model=model, priority=priority, queue_wait=wait)
+    
+    def release(self, ticket: AdmissionTicket):
+        """Return a slot and wake the next waiter."""
+        queue = self._queues[ticket.model]
+        service_time = time.time() - ticket.granted_at
+        queue.avg_service_seconds = 0.8 * queue.avg_service_seconds + 0.2 * service_time
+        self._release_slot(queue, ticket.priority)
+    
+    def _release_slot(self, queue: _ModelQueue, priority: Priority):
+        queue.active -= 1
+        if priority != Priority.INTERACTIVE:
+            queue.active_background -= 1
+        self._dispatch(queue)
+    
+    def _dispatch(self, queue: _ModelQueue):
+        """Grant slots to waiters in priority order while capacity allows."""
+        while queue.waiters:
+            priority_value, _, future = queue.waiters[0]
+            if future.done():
+                heapq.heappop(queue.waiters)
+                continue
+            
+            priority = Priority(priority_value)
+            if not queue.can_run(priority):
+                # Waiters behind this one have equal or lower priority
+                break
+            
+            heapq.heappop(queue.waiters)
+            queue.waiting[priority] -= 1
+            queue.active += 1
+            if priority != Priority.INTERACTIVE:
+                queue.active_background += 1
+            future.set_result(None)
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get per-model scheduler statistics.
+        
+        Returns:
+            Dictionary keyed by model with active/queued counts and wait times
+        """
+        stats = {}
+        for model, queue in self._queues.items():
+            stats[getattr(model, 'value', str(model))] = {
+                "active": queue.active,
+                "active_background": queue.active_background,
+                "queued": {priority.name.lower(): count for priority, count in queue.waiting.items()},
+                "max_concurrency": queue.limits.max_concurrency,
+                "max_background": queue.limits.max_background,
+                "admitted": queue.admitted,
+                "rejected": queue.rejected,
+                "avg_queue_wait": queue.total_wait / queue.admitted if queue.admitted else 0.0,
+                "max_queue_wait": queue.max_wait,
+                "avg_service_seconds": round(queue.avg_service_seconds, 3)
+            }
+        return stats
@@ -0,0 +1,127 @@
+"""
+Rolling conversation context for Module A sessions.
+Keeps the rendered history of a session within a token budget, updated once per turn.
+"""
+
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional
+
+from .prompt_composer import DEFAULT_TOKENS_PER_WORD, TokenEstimator
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _ContextTurn:
+    text: str
+    words: int
+
+
+class RollingContext:
+    """
+    Rendered conversation history of one session.
+
+    Each turn is rendered and counted once when it is added; the oldest
+    turns are evicted to stay within max_turns and token_budget. text is
+    cached until the next change, so assembling the context for a request
+    is O(1).
+
+    Turns are counted in whitespace words and priced with the TokenEstimator
+    the PromptComposer uses, calibrated from Ollama's prompt_eval_count, so
+    both agree on the size of the history. The latest turn is always kept:
+    if it alone exceeds the budget, the PromptComposer cuts it to fit the
+    prompt instead of truncating it here against a second budget.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 2000,
+        max_turns: int = 5,
+        response_preview_chars: int = 200,
+        tokens_per_word: float = DEFAULT_TOKENS_PER_WORD,
+        estimator: Optional[TokenEstimator] = None
+    ):
+        """
+        Initialize rolling context.
+
+        Args:
+            token_budget: Maximum model tokens for the whole context
+            max_turns: Most recent turns kept
+            response_preview_chars: Responses are shortened to this many characters
+            tokens_per_word: Initial tokens per whitespace word (without an estimator)
+            estimator: Shared, calibrated token estimator
+        """
+        self.token_budget = token_budget
+        self.max_turns = max_turns
+        self.response_preview_chars = response_preview_chars
+        self.estimator = estimator or TokenEstimator(tokens_per_word)
+        self.version = None  # Last turn of the session this context reflects
+
+        self._turns: Deque[_ContextTurn] = deque()
+        self._turn_words = 0
+        self._topics_line = ""
+        self._topics_words = 0
+        self._text: Optional[str] = None
+
+    @property
+    def turn_count(self) -> int:
+        """Number of turns in the context."""
+        return len(self._turns)
+
+    @property
+    def tokens(self) -> int:
+        """Model tokens of the context at the current calibration."""
+        return self.estimator.count_words(self._topics_words + self._turn_words)
+
+    @property
+    def tokens_per_word(self) -> float:
+        """Current tokens per whitespace word."""
+        return self.estimator.tokens_per_word
+
+    @property
+    def text(self) -> str:
+        """Rendered context (cached)."""
+        if self._text is None:
+            parts = [self._topics_line] if self._topics_line else []
+            parts.extend(turn.text for turn in self._turns)
+            self._text = "\n".join(parts)
+        return self._text
+
+    def count_tokens(self, text: str) -> int:
+        """Model tokens of a text at the calibrated ratio."""
+        return self.estimator.count(text)
+
+    def set_topics(self, topics: List[str]):
+        """Set the detected conversation topics (last three are shown)."""
+        line = f"Conversation topics: {', '.join(topics[-3:])}" if topics else ""
+        if line != self._topics_line:
+            self._topics_line = line
+            self._topics_words = len(line.split())
+            self._text = None
+            self._evict()
+
+    def add_turn(self, query: str, response: str):
+        """
+        Append a conversation turn.
+
+        Args:
+            query: User query
+            response: Model response
+        """
+        preview = response
+        if len(preview) > self.response_preview_chars:
+            preview = preview[:self.response_preview_chars] + "..."
+        text = f"Previous Q: {query}\nPrevious A: {preview}"
+
+        turn = _ContextTurn(text=text, words=len(text.split()))
+        self._turns.append(turn)
+        self._turn_words += turn.words
+        self._text = None
+        self._evict()
+
+    def _evict(self):
+        while len(self._turns) > 1 and (len(self._turns) > self.max_turns or self.tokens > self.token_budget):
+            self._turn_words -= self._turns.popleft().words
+            self._text = None
@@ -7,9 +7,13 @@ import json
 import logging
 import time
 import uuid
-from typing import Dict, List, Optional, Any
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
+from .session_store import SessionStore, create_session_store
+from .session_context import RollingContext
+from .prompt_composer import TokenEstimator
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +26,7 @@ class ConversationTurn:
     model_used: str
     complexity_score: float
     routing_decision: str
+    response_tokens: int = 0  # eval_count reported by Ollama (0 if unknown)
 
 @dataclass
 class SessionContext:
@@ -64,22 +69,64 @@ class SessionManager:
     Implements Grok's recommendations for context-aware routing.
     """
     
-    def __init__(self, storage_backend: str = "memory", max_context_length: int = 2000):
+    def __init__(
+        self,
+        storage_backend: str = "memory",
+        max_context_length: int = 2000,
+        store: Optional[SessionStore] = None,
+        session_timeout: float = 3600
+    ):
         """
         Initialize session manager.
         
         Args:
-            storage_backend: "memory", "file", or "redis" (Grok's recommendation)
+            storage_backend: "memory", "sqlite" ("file") or "redis" (Grok's recommendation)
             max_context_length: Maximum tokens in context (Grok's token limit management)
+            store: Session store to use instead of creating one for storage_backend
+            session_timeout: Seconds of inactivity before a session expires
         """
-        self.storage_backend = storage_backend
         self.max_context_length = max_context_length
-        self.sessions: Dict[str, SessionContext] = {}
-        self.session_timeout = 3600  # 1 hour timeout
+        self.token_estimator = TokenEstimator()  # Shared with the PromptComposer
+        self.store = store if store is not None else create_session_store(storage_backend, ttl=session_timeout)
+        self.storage_backend = self.store.backend_name
+        
+        # Rolling contexts of recently active sessions in this process
+        self.max_cached_contexts = 1024
+        self._contexts: "OrderedDict[str, RollingContext]" = OrderedDict()
         
-        logger.info(f"SessionManager initialized with {storage_backend} backend, "
+        logger.info(f"SessionManager initialized with {self.storage_backend} backend, "
                    f"max_context_length={max_context_length}")
     
+    @property
+    def session_timeout(self) -> float:
+        """Seconds of inactivity before a session expires (1 hour by default)."""
+        return self.store.ttl
+    
+    def use_store(self, store: SessionStore):
+        """
+        Switch to another session store (configured at startup).
+        
+        Sessions of the previous store are not migrated.
+        
+        Args:
+            store: New session store
+        """
+        previous = self.store
+        self.store = store
+        self.storage_backend = store.backend_name
+        previous.close()
+        logger.info(f"SessionManager now uses {store.backend_name} backend")
+    
+    def set_context_budget(self, max_context_length: int):
+        """
+        Set the token budget of conversation contexts (the prompt budget, configured at startup).
+        
+        Args:
+            max_context_length: Maximum tokens in context
+        """
+        self.max_context_length = max_context_length
+        self._contexts.clear()
+    
     def create_session(self, user_id: Optional[str] = None) -> str:
         """
         Create a new session.
@@ -102,25 +149,22 @@ class SessionManager:
             topic_context=[]
         )
         
-        self.sessions[session_id] = session
+        self.store.put(session)
         logger.info(f"Created new session: {session_id}")
         return session_id
     
     def get_session(self, session_id: str) -> Optional[SessionContext]:
-        """Get session by ID, checking for timeout."""
-        if session_id not in self.sessions:
-            return None
-        
-        session = self.sessions[session_id]
-        current_time = time.time()
-        
-        # Check if session has timed out
-        if current_time - session.last_activity > self.session_timeout:
-            logger.info(f"Session {session_id} timed out, removing")
-            del self.sessions[session_id]
-            return None
+        """
+        Get session by ID, checking for timeout.
         
-        return session
+        Persistent stores return a fresh copy, call save_session() after
+        modifying it.
+        """
+        return self.store.get(session_id)
+    
+    def save_session(self, session: SessionContext):
+        """Write a modified session back to the store."""
+        self.store.put(session)
     
     def add_conversation_turn(
         self,
@@ -129,7 +173,8 @@ class SessionManager:
         response: str,
         model_used: str,
         complexity_score: float,
-        routing_decision: str
+        routing_decision: str,
+        response_tokens: Optional[int] = None
     ) -> bool:
         """
         Add a conversation turn to the session.
@@ -141,6 +186,7 @@ class SessionManager:
             model_used: Which model was used
             complexity_score: Query complexity score
             routing_decision: Routing decision reasoning
+            response_tokens: Tokens Ollama generated for the response, if known
             
         Returns:
             bool: Success status
@@ -150,13 +196,19 @@ class SessionManager:
             logger.warning(f"Session {session_id} not found")
             return False
         
+        # Rolling context is only extended if it reflects the session as loaded
+        rolling = self._contexts.get(session_id)
+        if rolling is not None and rolling.version != self._context_version(session):
+            rolling = None
+        
         turn = ConversationTurn(
             timestamp=time.time(),
             query=query,
             response=response,
             model_used=model_used,
             complexity_score=complexity_score,
-            routing_decision=routing_decision
+            routing_decision=routing_decision,
+            response_tokens=response_tokens or 0
         )
         
         session.turns.append(turn)
@@ -168,6 +220,15 @@ class SessionManager:
         # Trim context if too long (Grok's token limit management)
         self._trim_context_if_needed(session)
         
+        self.store.put(session)
+        
+        if rolling is not None:
+            rolling.add_turn(turn.query, turn.response)
+            rolling.set_topics(session.topic_context)
+            rolling.version = self._context_version(session)
+        else:
+            self._contexts.pop(session_id, None)
+        
         logger.info(f"Added turn to session {session_id}, total turns: {len(session.turns)}")
         return True
     
@@ -183,37 +244,54 @@ class SessionManager:
         Returns:
             str: Formatted context string
         """
-        session = self.get_session(session_id)
-        if not session or not session.turns:
-            return ""
-        
-        # Get recent turns (last 3-5 turns for context)
-        recent_turns = session.turns[-5:]
-        
-        # Build context string
-        context_parts = []
-        
-        # Add topic context if relevant
-        if session.topic_context:
-            context_parts.append(f"Conversation topics: {', '.join(session.topic_context[-3:])}")
-        
-        # Add recent conversation history
-        for turn in recent_turns:
-            # Truncate long responses for context
-            response_preview = turn.response[:200] + "..." if len(turn.response) > 200 else turn.response
-            context_parts.append(f"Previous Q: {turn.query}")
-            context_parts.append(f"Previous A: {response_preview}")
+        return self.get_context_with_turns(session_id)[0]
+    
+    def get_context_with_turns(self, session_id: str) -> Tuple[str, int]:
+        """
+        Get the session context and how many turns it covers.
         
-        context = "\n".join(context_parts)
+        The context is kept up to date by add_conversation_turn() and only
+        rebuilt when this process has not seen the latest turn (restart,
+        another worker, eviction from the context cache).
         
-        # Ensure context doesn't exceed token limit
-        if len(context.split()) > self.max_context_length:
-            # Truncate to fit within limit
-            words = context.split()
-            context = " ".join(words[:self.max_context_length])
-            context += "\n[Context truncated due to length]"
+        Args:
+            session_id: Session identifier
+            
+        Returns:
+            Tuple of (formatted context string, conversation turns included)
+        """
+        session = self.get_session(session_id)
+        if not session or not session.turns:
+            return "", 0
         
-        return context
+        rolling = self._rolling_context(session)
+        return rolling.text, rolling.turn_count
+    
+    def _rolling_context(self, session: SessionContext) -> RollingContext:
+        """Get the cached rolling context of a session, rebuilding it if stale."""
+        version = self._context_version(session)
+        rolling = self._contexts.get(session.session_id)
+        if rolling is not None and rolling.version == version:
+            self._contexts.move_to_end(session.session_id)
+            return rolling
+        
+        # Last 5 turns at most, within max_context_length model tokens
+        rolling = RollingContext(token_budget=self.max_context_length, max_turns=5, estimator=self.token_estimator)
+        for turn in session.turns[-rolling.max_turns:]:
+            rolling.add_turn(turn.query, turn.response)
+        rolling.set_topics(session.topic_context)
+        rolling.version = version
+        
+        self._contexts[session.session_id] = rolling
+        self._contexts.move_to_end(session.session_id)
+        while len(self._contexts) > self.max_cached_contexts:
+            self._contexts.popitem(last=False)
+        return rolling
+    
+    @staticmethod
+    def _context_version(session: SessionContext) -> Tuple[int, float]:
+        """Identify the latest turn of a session."""
+        return len(session.turns), session.turns[-1].timestamp if session.turns else 0.0
     
     def enhance_query_with_context(self, session_id: str, query: str) -> str:
         """
@@ -309,19 +387,17 @@ Current query: {query}"""
         }
     
     def cleanup_expired_sessions(self):
-        """Remove expired sessions."""
-        current_time = time.time()
-        expired_sessions = []
-        
-        for session_id, session in self.sessions.items():
-            if current_time - session.last_activity > self.session_timeout:
-                expired_sessions.append(session_id)
+        """Remove expired sessions (the store only visits expired ones)."""
+        expired_sessions = self.store.expire()
         
         for session_id in expired_sessions:
-            del self.sessions[session_id]
             logger.info(f"Cleaned up expired session: {session_id}")
         
         return len(expired_sessions)
+    
+    def get_store_statistics(self) -> Dict[str, Any]:
+        """Get session store statistics for monitoring."""
+        return self.store.get_statistics()
 
 
 # Global session manager instance
@@ -0,0 +1,472 @@
+"""
+Session stores for the Module A SessionManager.
+Bounded in-memory store plus persistent SQLite and Redis backends.
+"""
+
+import heapq
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .session_manager import SessionContext
+
+logger = logging.getLogger(__name__)
+
+# Relative database paths are resolved here, not against the working directory
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _session_size(session) -> int:
+    """Approximate memory footprint of a session (bytes of its JSON form)."""
+    return len(json.dumps(session.to_dict(), ensure_ascii=False))
+
+
+def _load_session(data):
+    """Deserialize a stored session (str or bytes JSON)."""
+    from .session_manager import SessionContext  # session_manager imports this module
+    
+    if isinstance(data, bytes):
+        data = data.decode("utf-8")
+    return SessionContext.from_dict(json.loads(data))
+
+
+class SessionStore:
+    """
+    Interface of a session store.
+    
+    Sessions expire `ttl` seconds after their last activity. get() never
+    returns an expired session, expire() removes expired sessions without
+    scanning live ones.
+    """
+    
+    backend_name = "none"
+    persistent = False
+    
+    def __init__(self, ttl: float = 3600):
+        self.ttl = ttl
+        
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+    
+    def get(self, session_id: str) -> Optional["SessionContext"]:
+        """Get a live session by ID (None if unknown or expired)."""
+        raise NotImplementedError
+    
+    def put(self, session: "SessionContext"):
+        """Insert or update a session and refresh its expiry."""
+        raise NotImplementedError
+    
+    def delete(self, session_id: str) -> bool:
+        """Remove a session, returns whether it existed."""
+        raise NotImplementedError
+    
+    def expire(self, now: Optional[float] = None) -> List[str]:
+        """Remove expired sessions, returns their IDs."""
+        raise NotImplementedError
+    
+    def __len__(self) -> int:
+        raise NotImplementedError
+    
+    def close(self):
+        """Release backend resources."""
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get store statistics.
+        
+        Returns:
+            Dictionary with backend, size and hit/expiry/eviction counters
+        """
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend_name,
+            "persistent": self.persistent,
+            "sessions": len(self),
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expired": self.expired,
+            "evictions": self.evictions
+        }
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Bounded in-process session store.
+    
+    Sessions live in an LRU-ordered dict bounded by session count and by
+    the approximate size of their JSON form. Expiry uses a min-heap of
+    (expires_at, session_id); touching a session pushes a new heap entry
+    and the stale one is skipped when popped, so expire() only looks at
+    sessions that actually expired. Sessions are lost on restart and are
+    not shared between uvicorn workers.
+    """
+    
+    backend_name = "memory"
+    
+    def __init__(self, ttl: float = 3600, max_sessions: int = 10000, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize memory session store.
+        
+        Args:
+            ttl: Seconds of inactivity before a session expires
+            max_sessions: Sessions kept before the least recently used is evicted
+            max_bytes: Total approximate session size before evicting
+        """
+        super().__init__(ttl)
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self._sessions: "OrderedDict[str, Tuple[SessionContext, int, float]]" = OrderedDict()
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+    
+    def get(self, session_id: str) -> Optional["SessionContext"]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            session, _, expires_at = entry
+            if expires_at <= time.time():
+                self._remove(session_id)
+                self.expired += 1
+                self.misses += 1
+                logger.info(f"Session {session_id} timed out, removing")
+                return None
+            self._sessions.move_to_end(session_id)
+            self.hits += 1
+            return session
+    
+    def put(self, session: "SessionContext"):
+        now = time.time()
+        size = _session_size(session)
+        expires_at = session.last_activity + self.ttl
+        
+        with self._lock:
+            self._expire_locked(now)
+            
+            previous = self._sessions.pop(session.session_id, None)
+            if previous is not None:
+                self._total_bytes -= previous[1]
+            self._sessions[session.session_id] = (session, size, expires_at)
+            self._total_bytes += size
+            heapq.heappush(self._expiry_heap, (expires_at, session.session_id))
+            
+            # Evict least recently used sessions, never the one just stored
+            while len(self._sessions) > 1 and (
+                len(self._sessions) > self.max_sessions or self._total_bytes > self.max_bytes
+            ):
+                evicted_id = next(iter(self._sessions))
+                self._remove(evicted_id)
+                self.evictions += 1
+                logger.info(f"Evicted session {evicted_id} (store limit reached)")
+            
+            # Touched sessions leave stale heap entries behind, rebuild when they dominate
+            if len(self._expiry_heap) > 2 * len(self._sessions) + 64:
+                self._expiry_heap = [(expires, sid) for sid, (_, _, expires) in self._sessions.items()]
+                heapq.heapify(self._expiry_heap)
+    
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._remove(session_id)
+    
+    def expire(self, now: Optional[float] = None) -> List[str]:
+        with self._lock:
+            return self._expire_locked(now if now is not None else time.time())
+    
+    def _expire_locked(self, now: float) -> List[str]:
+        expired_ids = []
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, session_id = heapq.heappop(self._expiry_heap)
+            entry = self._sessions.get(session_id)
+            if entry is None or entry[2] != expires_at:
+                continue  # Stale heap entry: session was touched or removed since
+            self._remove(session_id)
+            expired_ids.append(session_id)
+        
+        self.expired += len(expired_ids)
+        return expired_ids
+    
+    def _remove(self, session_id: str) -> bool:
+        entry = self._sessions.pop(session_id, None)
+        if entry is None:
+            return False
+        self._total_bytes -= entry[1]
+        return True
+    
+    def __len__(self) -> int:
+        return len(self._sessions)
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        stats = super().get_statistics()
+        stats.update({
+            "max_sessions": self.max_sessions,
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes
+        })
+        return stats
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Persistent session store backed by SQLite.
+    
+    Sessions survive restarts and are shared by all uvicorn workers using
+    the same database file (WAL mode, one connection per store). Expiry
+    deletes through an index on expires_at. The count and size bounds are
+    enforced every trim_interval puts rather than on each one, so a put
+    does not scan the table; in between, the store may exceed them by up
+    to trim_interval sessions per worker. Two workers updating the same
+    session at the same time keep the last write.
+    """
+    
+    backend_name = "sqlite"
+    persistent = True
+    
+    def __init__(self, path: str = "data/module_a_sessions.db", ttl: float = 3600, max_sessions: int = 10000,
+                 max_bytes: int = 64 * 1024 * 1024, trim_interval: int = 32):
+        """
+        Initialize SQLite session store.
+        
+        Args:
+            path: Database file relative to the project root (":memory:" for a private in-memory database)
+            ttl: Seconds of inactivity before a session expires
+            max_sessions: Sessions kept before the least recently active is evicted
+            max_bytes: Total size of the stored session JSON before evicting
+            trim_interval: Puts between two enforcements of the bounds
+        """
+        super().__init__(ttl)
+        if path != ":memory:" and not Path(path).is_absolute():
+            path = str(PROJECT_ROOT / path)
+        self.path = path
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.trim_interval = max(1, trim_interval)
+        self._puts_since_trim = 0
+        self._lock = threading.Lock()
+        
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10.0)
+        with self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " session_id TEXT PRIMARY KEY,"
+                " data TEXT NOT NULL,"
+                " last_activity REAL NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_last_activity ON sessions (last_activity)")
+        
+        logger.info(f"SQLite session store at {path}")
+    
+    def get(self, session_id: str) -> Optional["SessionContext"]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, expires_at FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if row[1] <= time.time():
+                with self._conn:
+                    self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+                self.expired += 1
+                self.misses += 1
+                logger.info(f"Session {session_id} timed out, removing")
+                return None
+            self.hits += 1
+        return _load_session(row[0])
+    
+    def put(self, session: "SessionContext"):
+        data = json.dumps(session.to_dict(), ensure_ascii=False)
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sessions (session_id, data, last_activity, expires_at) VALUES (?, ?, ?, ?)",
+                    (session.session_id, data, session.last_activity, session.last_activity + self.ttl)
+                )
+            self._puts_since_trim += 1
+            if self._puts_since_trim >= self.trim_interval:
+                self._puts_since_trim = 0
+                self._expire_locked(time.time())
+                self._trim_locked(session.session_id)
+    
+    def _trim_locked(self, keep_id: str):
+        """Evict the least recently active sessions beyond max_sessions and max_bytes."""
+        count, total_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(data AS BLOB))), 0) FROM sessions"
+        ).fetchone()
+        overflow = count - self.max_sessions
+        excess_bytes = total_bytes - self.max_bytes
+        if overflow <= 0 and excess_bytes <= 0:
+            return
+        
+        victims = []
+        for session_id, size in self._conn.execute(
+            "SELECT session_id, LENGTH(CAST(data AS BLOB)) FROM sessions WHERE session_id != ? ORDER BY last_activity",
+            (keep_id,)
+        ):
+            if len(victims) >= overflow and excess_bytes <= 0:
+                break
+            victims.append(session_id)
+            excess_bytes -= size
+        
+        with self._conn:
+            self._conn.executemany("DELETE FROM sessions WHERE session_id = ?", [(v,) for v in victims])
+        self.evictions += len(victims)
+        logger.info(f"Evicted {len(victims)} sessions (store limit reached)")
+    
+    def delete(self, session_id: str) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            return cursor.rowcount > 0
+    
+    def expire(self, now: Optional[float] = None) -> List[str]:
+        with self._lock:
+            return self._expire_locked(now if now is not None else time.time())
+    
+    def _expire_locked(self, now: float) -> List[str]:
+        with self._conn:
+            expired_ids = [
+                row[0] for row in self._conn.execute(
+                    "SELECT session_id FROM sessions WHERE expires_at <= ?", (now,)
+                )
+            ]
+            if expired_ids:
+                self._conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+        
+        self.expired += len(expired_ids)
+        return expired_ids
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        stats = super().get_statistics()
+        stats.update({
+            "path": self.path,
+            "max_sessions": self.max_sessions,
+            "max_bytes": self.max_bytes,
+            "trim_interval": self.trim_interval
+        })
+        return stats
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Persistent session store backed by Redis.
+    
+    Each session is one JSON string under `prefix + session_id`, written
+    with SET EX so Redis expires it; bound the total size with the server's
+    maxmemory/allkeys-lru policy. Works with any client exposing get,
+    set(ex=...), delete and scan_iter (redis-py or a compatible stand-in).
+    """
+    
+    backend_name = "redis"
+    persistent = True
+    
+    def __init__(self, client, ttl: float = 3600, prefix: str = "superhelfer:session:"):
+        """
+        Initialize Redis session store.
+        
+        Args:
+            client: Redis client
+            ttl: Seconds of inactivity before a session expires
+            prefix: Key prefix for session entries
+        """
+        super().__init__(ttl)
+        self.client = client
+        self.prefix = prefix
+    
+    def get(self, session_id: str) -> Optional["SessionContext"]:
+        data = self.client.get(self.prefix + session_id)
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return _load_session(data)
+    
+    def put(self, session: "SessionContext"):
+        remaining = session.last_activity + self.ttl - time.time()
+        if remaining <= 0:
+            self.client.delete(self.prefix + session.session_id)
+            return
+        self.client.set(
+            self.prefix + session.session_id,
+            json.dumps(session.to_dict(), ensure_ascii=False),
+            ex=max(1, int(remaining + 0.5))
+        )
+    
+    def delete(self, session_id: str) -> bool:
+        return bool(self.client.delete(self.prefix + session_id))
+    
+    def expire(self, now: Optional[float] = None) -> List[str]:
+        return []  # Redis expires keys itself
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + "*"))
+
+
+def create_session_store(
+    backend: str = "memory",
+    ttl: float = 3600,
+    max_sessions: int = 10000,
+    max_bytes: int = 64 * 1024 * 1024,
+    path: str = "data/module_a_sessions.db",
+    redis_url: str = "redis://localhost:6379/0"
+) -> SessionStore:
+    """
+    Create a session store.
+    
+    Args:
+        backend: "memory", "sqlite" (or "file") or "redis"
+        ttl: Seconds of inactivity before a session expires
+        max_sessions: Session count bound (memory and sqlite)
+        max_bytes: Size bound (memory and sqlite)
+        path: SQLite database file
+        redis_url: Redis connection URL
+    
+    Returns:
+        SessionStore instance, the memory store if the backend is unavailable
+        (redis not installed or not reachable at startup)
+    """
+    if backend in ("sqlite", "file"):
+        return SQLiteSessionStore(path=path, ttl=ttl, max_sessions=max_sessions, max_bytes=max_bytes)
+    
+    if backend == "redis":
+        try:
+            import redis
+        except ImportError:
+            redis = None
+            logger.warning("redis not available - using in-memory session store")
+        if redis is not None:
+            client = redis.Redis.from_url(redis_url, socket_connect_timeout=2.0)
+            try:
+                client.ping()
+                return RedisSessionStore(client, ttl=ttl)
+            except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+                logger.warning(f"Redis at {redis_url} not reachable ({e}) - using in-memory session store")
+    elif backend != "memory":
+        raise ValueError(f"Unknown session store backend: {backend}")
+    
+    return MemorySessionStore(ttl=ttl, max_sessions=max_sessions, max_bytes=max_bytes)
@@ -1,13 +1,16 @@
 """
 VRAM Monitor for intelligent model switching.
-Monitors GPU memory usage and provides user warnings.
+Samples GPU memory usage in the background and decides model switches without user interaction.
 """
 
+import asyncio
 import logging
-import tkinter as tk
-from tkinter import messagebox
-from typing import Dict, Optional, Tuple
-from dataclasses import dataclass
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Deque, Dict, List, Optional, Any
 
 logger = logging.getLogger(__name__)
 
@@ -21,44 +24,69 @@ class VRAMInfo:
     device_name: str
 
 
-class VRAMMonitor:
-    """Monitors VRAM usage and provides warnings for model switching."""
+@dataclass(frozen=True)
+class VRAMSample:
+    """One history entry of a device."""
+    timestamp: float
+    used_mb: int
+    usage_percent: float
+
+
+@dataclass(frozen=True)
+class VRAMSnapshot:
+    """VRAM state of all devices at one point in time."""
+    timestamp: float
+    devices: Dict[int, VRAMInfo] = field(default_factory=dict)
+
+
+class SwitchDecision(Enum):
+    """Outcome of a model-switch admission check."""
+    ALLOW = "allow"
+    QUEUE = "queue"  # wait for VRAM to be freed, then fall back
+    FALLBACK = "fallback"  # use a smaller model instead
+    REJECT = "reject"  # abort the request
+
+
+class VRAMBackend:
+    """Source of VRAM readings."""
     
-    def __init__(self, warning_threshold: float = 0.8):
-        """
-        Initialize VRAM monitor.
-        
-        Args:
-            warning_threshold: VRAM usage percentage to trigger warnings (0.0-1.0)
-        """
-        self.warning_threshold = warning_threshold
-        self.pynvml_available = False
-        self.device_count = 0
+    name = "none"
+    available = False
+    
+    def device_count(self) -> int:
+        return 0
+    
+    def read(self, device_id: int) -> Optional[VRAMInfo]:
+        return None
+
+
+class NVMLBackend(VRAMBackend):
+    """Reads VRAM usage through pynvml."""
+    
+    name = "nvml"
+    
+    def __init__(self):
+        self.available = False
+        self._device_count = 0
         
         # Try to initialize pynvml
         try:
             import pynvml
             pynvml.nvmlInit()
             self.pynvml = pynvml
-            self.device_count = pynvml.nvmlDeviceGetCount()
-            self.pynvml_available = True
-            logger.info(f"VRAM monitoring initialized: {self.device_count} GPU(s) detected")
+            self._device_count = pynvml.nvmlDeviceGetCount()
+            self.available = True
+            logger.info(f"VRAM monitoring initialized: {self._device_count} GPU(s) detected")
         except ImportError:
             logger.warning("pynvml not available - install with: pip install pynvml")
         except Exception as e:
             logger.warning(f"Failed to initialize VRAM monitoring: {e}")
     
-    def get_vram_info(self, device_id: int = 0) -> Optional[VRAMInfo]:
-        """
-        Get VRAM information for specified device.
-        
-        Args:
-            device_id: GPU device ID (default: 0)
-            
-        Returns:
-            VRAMInfo object or None if monitoring unavailable
-        """
-        if not self.pynvml_available or device_id >= self.device_count:
+    def device_count(self) -> int:
+        return self._device_count
+    
+    def read(self, device_id: int) -> Optional[VRAMInfo]:
+        if not self.available or device_id >= self._device_count:
             return None
         
         try:
@@ -75,21 +103,199 @@ class VRAMMonitor:
             except (UnicodeDecodeError, AttributeError):
                 device_name = "Unknown GPU"
             
-            total_mb = memory_info.total // (1024 * 1024)
-            used_mb = memory_info.used // (1024 * 1024)
-            free_mb = memory_info.free // (1024 * 1024)
-            usage_percent = memory_info.used / memory_info.total
-            
             return VRAMInfo(
-                total_mb=total_mb,
-                used_mb=used_mb,
-                free_mb=free_mb,
-                usage_percent=usage_percent,
+                total_mb=memory_info.total // (1024 * 1024),
+                used_mb=memory_info.used // (1024 * 1024),
+                free_mb=memory_info.free // (1024 * 1024),
+                usage_percent=memory_info.used / memory_info.total,
                 device_name=device_name
             )
         except Exception as e:
             logger.error(f"Failed to get VRAM info for device {device_id}: {e}")
             return None
+
+
+class FakeVRAMBackend(VRAMBackend):
+    """Single simulated GPU for machines without NVIDIA hardware and for tests."""
+    
+    name = "fake"
+    available = True
+    
+    def __init__(self, total_mb: int = 24576, used_mb: int = 0, device_name: str = "Fake GPU"):
+        self.total_mb = total_mb
+        self.used_mb = used_mb
+        self.device_name = device_name
+    
+    def device_count(self) -> int:
+        return 1
+    
+    def read(self, device_id: int) -> Optional[VRAMInfo]:
+        if device_id != 0:
+            return None
+        used_mb = min(self.used_mb, self.total_mb)
+        return VRAMInfo(
+            total_mb=self.total_mb,
+            used_mb=used_mb,
+            free_mb=self.total_mb - used_mb,
+            usage_percent=used_mb / self.total_mb if self.total_mb else 0.0,
+            device_name=self.device_name
+        )
+
+
+def create_vram_backend(name: str = "auto") -> VRAMBackend:
+    """
+    Create a VRAM backend by name.
+    
+    Args:
+        name: "nvml", "fake" or "auto" (NVML if usable, otherwise no monitoring)
+    
+    Returns:
+        VRAMBackend instance
+    """
+    if name == "fake":
+        return FakeVRAMBackend()
+    backend = NVMLBackend()
+    if name == "nvml" or backend.available:
+        return backend
+    return VRAMBackend()
+
+
+class VRAMMonitor:
+    """
+    Monitors VRAM usage and decides model switches.
+    
+    A daemon thread samples the backend every sample_interval seconds into
+    an immutable snapshot (replaced atomically, so readers never lock) and
+    a bounded per-device history. Request paths read the snapshot instead
+    of calling NVML. Without a running sampler, reads older than two
+    intervals trigger a synchronous sample.
+    
+    Switches to a model that does not fit into free VRAM are resolved by
+    switch_policy: "fallback" routes to a smaller model, "queue" waits up
+    to queue_timeout seconds for VRAM to be freed first, "reject" aborts
+    the request.
+    """
+    
+    def __init__(
+        self,
+        warning_threshold: float = 0.8,
+        backend: Optional[VRAMBackend] = None,
+        sample_interval: float = 2.0,
+        history_size: int = 300,
+        switch_policy: str = "fallback",
+        queue_timeout: float = 30.0
+    ):
+        """
+        Initialize VRAM monitor.
+        
+        Args:
+            warning_threshold: VRAM usage percentage to trigger warnings (0.0-1.0)
+            backend: VRAM source (default: NVML if available)
+            sample_interval: Seconds between background samples
+            history_size: Samples kept per device
+            switch_policy: "fallback", "queue" or "reject" for models that do not fit
+            queue_timeout: Seconds the "queue" policy waits for free VRAM
+        """
+        if switch_policy not in ("fallback", "queue", "reject"):
+            raise ValueError(f"Unknown VRAM switch policy: {switch_policy}")
+        
+        self.warning_threshold = warning_threshold
+        self.backend = backend if backend is not None else create_vram_backend()
+        self.sample_interval = sample_interval
+        self.history_size = history_size
+        self.switch_policy = switch_policy
+        self.queue_timeout = queue_timeout
+        
+        self._snapshot = VRAMSnapshot(timestamp=0.0)
+        self._history: Dict[int, Deque[VRAMSample]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        
+        # Statistics
+        self.samples_taken = 0
+        self.decisions = {decision.value: 0 for decision in SwitchDecision}
+    
+    @property
+    def pynvml_available(self) -> bool:
+        """Whether VRAM readings are available (name kept for callers)."""
+        return self.backend.available
+    
+    @property
+    def device_count(self) -> int:
+        return self.backend.device_count()
+    
+    def start(self):
+        """Start the background sampler thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if not self.backend.available:
+            logger.info("VRAM sampler not started: no VRAM backend available")
+            return
+        
+        self.sample()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="vram-sampler", daemon=True)
+        self._thread.start()
+        logger.info(f"VRAM sampler started ({self.backend.name}, every {self.sample_interval}s)")
+    
+    def stop(self):
+        """Stop the background sampler thread."""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout=self.sample_interval + 1)
+        self._thread = None
+    
+    def _run(self):
+        while not self._stop_event.wait(self.sample_interval):
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"VRAM sampling failed: {e}")
+    
+    def sample(self) -> VRAMSnapshot:
+        """
+        Read all devices once and publish a new snapshot.
+        
+        Returns:
+            The new snapshot
+        """
+        now = time.time()
+        devices = {}
+        for device_id in range(self.backend.device_count()):
+            info = self.backend.read(device_id)
+            if info is None:
+                continue
+            devices[device_id] = info
+            history = self._history.get(device_id)
+            if history is None:
+                history = self._history[device_id] = deque(maxlen=self.history_size)
+            history.append(VRAMSample(timestamp=now, used_mb=info.used_mb, usage_percent=info.usage_percent))
+        
+        self._snapshot = VRAMSnapshot(timestamp=now, devices=devices)
+        self.samples_taken += 1
+        return self._snapshot
+    
+    def get_snapshot(self) -> VRAMSnapshot:
+        """Latest snapshot (sampled on demand if stale and no sampler runs)."""
+        snapshot = self._snapshot
+        if time.time() - snapshot.timestamp > 2 * self.sample_interval and self.backend.available:
+            snapshot = self.sample()
+        return snapshot
+    
+    def get_vram_info(self, device_id: int = 0) -> Optional[VRAMInfo]:
+        """
+        Get VRAM information for specified device.
+        
+        Args:
+            device_id: GPU device ID (default: 0)
+        
+        Returns:
+            VRAMInfo object or None if monitoring unavailable
+        """
+        if not self.backend.available:
+            return None
+        return self.get_snapshot().devices.get(device_id)
     
     def get_usage_percentage(self, device_id: int = 0) -> float:
         """
@@ -97,151 +303,184 @@ class VRAMMonitor:
         
         Args:
             device_id: GPU device ID (default: 0)
-            
+        
         Returns:
             Usage percentage or 0.0 if monitoring unavailable
         """
         vram_info = self.get_vram_info(device_id)
         return vram_info.usage_percent if vram_info else 0.0
     
-    def check_before_model_switch(
-        self, 
-        target_model: str, 
-        estimated_vram_mb: int,
-        device_id: int = 0,
-        show_gui: bool = True
-    ) -> bool:
+    def evaluate_model_switch(self, target_model: str, estimated_vram_mb: int, device_id: int = 0) -> SwitchDecision:
         """
-        Check VRAM usage before switching to a larger model.
+        Decide whether a model can be loaded with the current VRAM usage.
         
         Args:
             target_model: Name of the target model
             estimated_vram_mb: Estimated VRAM usage in MB
             device_id: GPU device ID (default: 0)
-            show_gui: Whether to show GUI warning dialog
-            
+        
         Returns:
-            True if user confirms or usage is below threshold, False otherwise
+            ALLOW if the model fits, otherwise the decision of the switch policy
         """
         vram_info = self.get_vram_info(device_id)
         
         if not vram_info:
             logger.warning("VRAM monitoring unavailable - proceeding without check")
-            return True
+            return self._decide(SwitchDecision.ALLOW)
         
         # Check if current usage is above threshold
         if vram_info.usage_percent <= self.warning_threshold:
             logger.info(f"VRAM usage OK: {vram_info.usage_percent:.1%} < {self.warning_threshold:.1%}")
-            return True
+            return self._decide(SwitchDecision.ALLOW)
         
-        # Check if there's enough free VRAM for the new model
-        if vram_info.free_mb < estimated_vram_mb:
-            logger.warning(f"Insufficient VRAM: need {estimated_vram_mb}MB, have {vram_info.free_mb}MB free")
-            
-            if show_gui:
-                return self._show_insufficient_vram_dialog(
-                    target_model, estimated_vram_mb, vram_info
-                )
-            else:
-                return False
-        
-        # Usage is high but might be manageable
-        logger.warning(f"High VRAM usage: {vram_info.usage_percent:.1%}")
-        
-        if show_gui:
-            return self._show_high_usage_dialog(target_model, vram_info)
-        else:
-            return False
+        # Usage is high but the model still fits
+        if vram_info.free_mb >= estimated_vram_mb:
+            logger.warning(f"High VRAM usage: {vram_info.usage_percent:.1%}, {target_model} still fits")
+            return self._decide(SwitchDecision.ALLOW)
+        
+        logger.warning(
+            f"Insufficient VRAM for {target_model}: need {estimated_vram_mb}MB, "
+            f"have {vram_info.free_mb}MB free -> {self.switch_policy}"
+        )
+        return self._decide(SwitchDecision(self.switch_policy))
     
-    def _show_high_usage_dialog(self, target_model: str, vram_info: VRAMInfo) -> bool:
-        """Show dialog for high VRAM usage warning."""
-        try:
-            # Create hidden root window
-            root = tk.Tk()
-            root.withdraw()
-            
-            message = (
-                f"VRAM-Warnung\n\n"
-                f"GPU: {vram_info.device_name}\n"
-                f"Aktuelle VRAM-Nutzung: {vram_info.usage_percent:.1%}\n"
-                f"Verwendet: {vram_info.used_mb:,} MB\n"
-                f"Verfügbar: {vram_info.free_mb:,} MB\n\n"
-                f"Wechsel zu '{target_model}' könnte andere Anwendungen beeinträchtigen.\n\n"
-                f"Trotzdem fortfahren?"
-            )
-            
-            result = messagebox.askokcancel(
-                "VRAM-Warnung",
-                message,
-                icon='warning'
-            )
-            
-            root.destroy()
-            
-            if result:
-                logger.info(f"User confirmed model switch to {target_model}")
-            else:
-                logger.info(f"User cancelled model switch to {target_model}")
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Failed to show VRAM warning dialog: {e}")
-            # Default to allowing the switch if dialog fails
-            return True
-    
-    def _show_insufficient_vram_dialog(
-        self, 
-        target_model: str, 
-        estimated_vram_mb: int, 
-        vram_info: VRAMInfo
+    async def wait_for_vram(self, target_model: str, estimated_vram_mb: int, device_id: int = 0,
+                            timeout: Optional[float] = None) -> SwitchDecision:
+        """
+        Wait (without blocking the event loop) until the model fits.
+        
+        Args:
+            target_model: Name of the target model
+            estimated_vram_mb: Estimated VRAM usage in MB
+            device_id: GPU device ID (default: 0)
+            timeout: Maximum seconds to wait (default: queue_timeout)
+        
+        Returns:
+            ALLOW if enough VRAM was freed in time, FALLBACK otherwise
+        """
+        deadline = time.time() + (self.queue_timeout if timeout is None else timeout)
+        while time.time() < deadline:
+            await asyncio.sleep(min(self.sample_interval, max(0.0, deadline - time.time())))
+            vram_info = self.get_vram_info(device_id)
+            if vram_info is None or vram_info.free_mb >= estimated_vram_mb:
+                logger.info(f"VRAM freed for {target_model}")
+                return self._decide(SwitchDecision.ALLOW)
+        
+        logger.warning(f"Timed out waiting for VRAM for {target_model}, falling back")
+        return self._decide(SwitchDecision.FALLBACK)
+    
+    def _decide(self, decision: SwitchDecision) -> SwitchDecision:
+        self.decisions[decision.value] += 1
+        return decision
+    
+    def check_before_model_switch(
+        self,
+        target_model: str,
+        estimated_vram_mb: int,
+        device_id: int = 0,
+        show_gui: bool = False
     ) -> bool:
-        """Show dialog for insufficient VRAM error."""
-        try:
-            # Create hidden root window
-            root = tk.Tk()
-            root.withdraw()
-            
-            message = (
-                f"Unzureichender VRAM\n\n"
-                f"GPU: {vram_info.device_name}\n"
-                f"Benötigt für '{target_model}': {estimated_vram_mb:,} MB\n"
-                f"Verfügbar: {vram_info.free_mb:,} MB\n"
-                f"Fehlend: {estimated_vram_mb - vram_info.free_mb:,} MB\n\n"
-                f"Bitte schließen Sie andere GPU-intensive Anwendungen und versuchen Sie es erneut.\n\n"
-                f"Trotzdem versuchen? (Kann zu Fehlern führen)"
-            )
-            
-            result = messagebox.askokcancel(
-                "Unzureichender VRAM",
-                message,
-                icon='error'
-            )
-            
-            root.destroy()
-            
-            if result:
-                logger.warning(f"User forced model switch to {target_model} despite insufficient VRAM")
-            else:
-                logger.info(f"User cancelled model switch due to insufficient VRAM")
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Failed to show insufficient VRAM dialog: {e}")
-            # Default to denying the switch if dialog fails
-            return False
+        """
+        Check VRAM usage before switching to a larger model.
+        
+        Args:
+            target_model: Name of the target model
+            estimated_vram_mb: Estimated VRAM usage in MB
+            device_id: GPU device ID (default: 0)
+            show_gui: Ignored, confirmation dialogs were replaced by the switch policy
+        
+        Returns:
+            True if the model fits, False otherwise
+        """
+        return self.evaluate_model_switch(target_model, estimated_vram_mb, device_id) == SwitchDecision.ALLOW
     
-    def get_all_devices_info(self) -> Dict[int, VRAMInfo]:
-        """Get VRAM info for all available devices."""
-        devices = {}
+    def get_history(self, device_id: int = 0, seconds: Optional[float] = None) -> List[VRAMSample]:
+        """
+        Get sampled history of a device.
         
-        for device_id in range(self.device_count):
-            vram_info = self.get_vram_info(device_id)
-            if vram_info:
-                devices[device_id] = vram_info
+        Args:
+            device_id: GPU device ID (default: 0)
+            seconds: Only samples from the last N seconds (default: all)
+        
+        Returns:
+            Samples, oldest first
+        """
+        samples = list(self._history.get(device_id, ()))
+        if seconds is not None:
+            cutoff = time.time() - seconds
+            samples = [sample for sample in samples if sample.timestamp >= cutoff]
+        return samples
+    
+    def get_trend(self, device_id: int = 0, seconds: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Summarize the usage history of a device.
+        
+        Args:
+            device_id: GPU device ID (default: 0)
+            seconds: Only samples from the last N seconds (default: all)
+        
+        Returns:
+            Dictionary with samples, min/max/average usage and the change
+            in used VRAM per minute (least squares slope)
+        """
+        samples = self.get_history(device_id, seconds)
+        trend = {
+            "device_id": device_id,
+            "backend": self.backend.name,
+            "sample_interval": self.sample_interval,
+            "samples": [
+                {"timestamp": sample.timestamp, "used_mb": sample.used_mb, "usage_percent": sample.usage_percent}
+                for sample in samples
+            ],
+            "min_usage_percent": None,
+            "max_usage_percent": None,
+            "avg_usage_percent": None,
+            "used_mb_per_minute": None
+        }
+        if not samples:
+            return trend
+        
+        usages = [sample.usage_percent for sample in samples]
+        trend["min_usage_percent"] = min(usages)
+        trend["max_usage_percent"] = max(usages)
+        trend["avg_usage_percent"] = sum(usages) / len(usages)
         
-        return devices
+        if len(samples) > 1:
+            start = samples[0].timestamp
+            xs = [sample.timestamp - start for sample in samples]
+            ys = [sample.used_mb for sample in samples]
+            mean_x = sum(xs) / len(xs)
+            mean_y = sum(ys) / len(ys)
+            variance = sum((x - mean_x) ** 2 for x in xs)
+            if variance > 0:
+                slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
+                trend["used_mb_per_minute"] = round(slope * 60, 2)
+        
+        return trend
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get sampler statistics.
+        
+        Returns:
+            Dictionary with backend, sampler state and switch decisions
+        """
+        return {
+            "backend": self.backend.name,
+            "available": self.backend.available,
+            "sampler_running": self._thread is not None and self._thread.is_alive(),
+            "sample_interval": self.sample_interval,
+            "samples_taken": self.samples_taken,
+            "snapshot_age": time.time() - self._snapshot.timestamp if self._snapshot.timestamp else None,
+            "switch_policy": self.switch_policy,
+            "switch_decisions": dict(self.decisions)
+        }
+    
+    def get_all_devices_info(self) -> Dict[int, VRAMInfo]:
+        """Get VRAM info for all available devices."""
+        if not self.backend.available:
+            return {}
+        return dict(self.get_snapshot().devices)
     
     def log_vram_status(self, device_id: int = 0) -> None:
         """Log current VRAM status for debugging."""
@@ -265,7 +504,7 @@ def get_vram_usage() -> float:
 
 
 def check_vram_before_switch(model_name: str, estimated_mb: int) -> bool:
-    """Check VRAM before model switch with user confirmation."""
+    """Check VRAM before model switch (True if the model fits)."""
     monitor = VRAMMonitor()
     return monitor.check_before_model_switch(model_name, estimated_mb)
 
@@ -286,10 +525,9 @@ if __name__ == "__main__":
             print(f"Used VRAM: {info.used_mb:,} MB ({info.usage_percent:.1%})")
             print(f"Free VRAM: {info.free_mb:,} MB")
         
-        # Test warning dialog (uncomment to test)
-        # result = monitor.check_before_model_switch("qwen3-coder:30b-q4", 20000)
-        # print(f"\nUser decision: {'Proceed' if result else 'Cancel'}")
-        
+        decision = monitor.evaluate_model_switch("qwen3-coder:30b-q4", 20000)
+        print(f"\nSwitch decision for qwen3-coder:30b-q4: {decision.value}")
+    
     else:
         print("VRAM monitoring not available")
-        print("Install pynvml: pip install pynvml")
\ No newline at end of file
+        print("Install pynvml: pip install pynvml")
@@ -4,9 +4,9 @@ Automatically enhances knowledge base when needed
 """
 
 import asyncio
-import aiohttp
 import logging
 from typing import Optional, Dict
+from shared.http import create_client
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +14,7 @@ class WebEnhancer:
     def __init__(self, web_scraper_url: str = "http://localhost:8005"):
         self.web_scraper_url = web_scraper_url
         self.enhancement_threshold = 0.5  # Confidence threshold for enhancement
+        self.client = create_client(timeout=300.0)
         
     async def should_enhance_knowledge(self, query: str, confidence: float, sources: list) -> bool:
         """Determine if knowledge base should be enhanced for this query"""
@@ -31,18 +32,17 @@ class WebEnhancer:
     async def enhance_knowledge_for_query(self, query: str) -> Optional[Dict]:
         """Automatically enhance knowledge base for a specific query"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.web_scraper_url}/auto_enhance_query",
-                    params={"query": query}
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        logger.info(f"Knowledge enhancement result: {result}")
-                        return result
-                    else:
-                        logger.warning(f"Enhancement failed with status {response.status}")
-                        return None
+            response = await self.client.post(
+                f"{self.web_scraper_url}/auto_enhance_query",
+                params={"query": query}
+            )
+            if response.status_code == 200:
+                result = response.json()
+                logger.info(f"Knowledge enhancement result: {result}")
+                return result
+            else:
+                logger.warning(f"Enhancement failed with status {response.status_code}")
+                return None
                         
         except Exception as e:
             logger.error(f"Web enhancement failed: {e}")
@@ -57,18 +57,17 @@ class WebEnhancer:
                 "source_types": ["wiki", "stackoverflow"]
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.web_scraper_url}/search_and_learn",
-                    json=payload
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        logger.info(f"Web learning completed: {result['sources_uploaded']} sources added")
-                        return result
-                    else:
-                        logger.warning(f"Web learning failed with status {response.status}")
-                        return None
+            response = await self.client.post(
+                f"{self.web_scraper_url}/search_and_learn",
+                json=payload
+            )
+            if response.status_code == 200:
+                result = response.json()
+                logger.info(f"Web learning completed: {result['sources_uploaded']} sources added")
+                return result
+            else:
+                logger.warning(f"Web learning failed with status {response.status_code}")
+                return None
                         
         except Exception as e:
             logger.error(f"Web learning failed: {e}")
@@ -0,0 +1,140 @@
+"""
+Chunk manifest for RAG Knowledge Vault.
+Records which content-hashed chunks are embedded under which embedding model.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_PAGE = 500
+
+
+class ChunkManifest:
+    """
+    Persistent record of embedded chunks.
+    
+    Chunk ids are derived from the chunk content (see ChunkProcessor), so
+    an id that is recorded here under the current embedding model and is
+    still present in the vector store does not need to be embedded again.
+    Changing the embedding model makes every chunk count as new.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize chunk manifest.
+        
+        Args:
+            path: SQLite file (in-memory database if None)
+        """
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path) if self.path else ":memory:", check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS chunk_manifest (
+                    chunk_id TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    embedded_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_chunk_manifest_source ON chunk_manifest(source)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+    
+    def lookup(self, chunk_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        Look up the embedding model of chunks.
+        
+        Args:
+            chunk_ids: Chunk ids to look up
+        
+        Returns:
+            Mapping of recorded chunk id to embedding model (unknown ids are missing)
+        """
+        chunk_ids = list(chunk_ids)
+        models: Dict[str, str] = {}
+        with self._lock:
+            conn = self._get_connection()
+            for start in range(0, len(chunk_ids), _LOOKUP_PAGE):
+                page = chunk_ids[start:start + _LOOKUP_PAGE]
+                placeholders = ",".join("?" * len(page))
+                models.update(conn.execute(
+                    f"SELECT chunk_id, model FROM chunk_manifest WHERE chunk_id IN ({placeholders})", page
+                ).fetchall())
+        return models
+    
+    def record(self, chunks: List[Tuple[str, str, str]], model: str):
+        """
+        Record chunks as embedded (replacing older records of the same id).
+        
+        Args:
+            chunks: (chunk id, source, content hash) tuples
+            model: Embedding model the chunks were embedded with
+        """
+        if not chunks:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._get_connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO chunk_manifest (chunk_id, source, content_hash, model, embedded_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(chunk_id, source, content_hash, model, now) for chunk_id, source, content_hash in chunks]
+            )
+            conn.commit()
+    
+    def remove(self, chunk_ids: List[str]):
+        """Forget chunks that were deleted from the vector store."""
+        if not chunk_ids:
+            return
+        with self._lock:
+            conn = self._get_connection()
+            conn.executemany("DELETE FROM chunk_manifest WHERE chunk_id = ?", [(i,) for i in chunk_ids])
+            conn.commit()
+    
+    def clear(self):
+        """Forget all chunks (after a vector store reset)."""
+        with self._lock:
+            conn = self._get_connection()
+            conn.execute("DELETE FROM chunk_manifest")
+            conn.commit()
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get manifest statistics.
+        
+        Returns:
+            Dictionary with chunk counts per embedding model
+        """
+        with self._lock:
+            conn = self._get_connection()
+            per_model = dict(conn.execute("SELECT model, COUNT(*) FROM chunk_manifest GROUP BY model").fetchall())
+            sources = conn.execute("SELECT COUNT(DISTINCT source) FROM chunk_manifest").fetchone()[0]
+        return {
+            "chunks": sum(per_model.values()),
+            "sources": sources,
+            "chunks_per_model": per_model,
+            "path": str(self.path) if self.path else None
+        }
+    
+    def close(self):
+        """Close the SQLite connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -3,6 +3,7 @@ Chunk processor for RAG Knowledge Vault.
 Splits documents into 500-token chunks using langchain text splitters.
 """
 
+import hashlib
 import logging
 from typing import List, Dict, Any
 from dataclasses import dataclass
@@ -55,10 +56,28 @@ class ChunkProcessor:
             ]
         )
     
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """
+        Hash chunk content for its id and the embedding manifest.
+        
+        Args:
+            text: Chunk content (stripped)
+            
+        Returns:
+            SHA-256 hex digest
+        """
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
     def process_document(self, document: Document) -> List[DocumentChunk]:
         """
         Split document into chunks.
         
+        Chunk ids are "<source>_<content hash prefix>", so re-ingesting an
+        unchanged document yields the same ids and an edited document only
+        new ids for the chunks that changed. Repeated identical chunks of
+        a document are kept once.
+        
         Args:
             document: Document to process
             
@@ -76,6 +95,7 @@ class ChunkProcessor:
                 raise RuntimeError("Document could not be split into chunks")
             
             chunks = []
+            seen_ids = set()
             for i, chunk_text in enumerate(text_chunks):
                 # Skip empty chunks
                 if not chunk_text.strip():
@@ -84,8 +104,12 @@ class ChunkProcessor:
                 # Estimate token count (rough approximation)
                 token_count = self._estimate_token_count(chunk_text)
                 
-                # Create chunk ID
-                chunk_id = f"{document.source}_{i:04d}"
+                # Create chunk ID from the content
+                content_hash = self.content_hash(chunk_text.strip())
+                chunk_id = f"{document.source}_{content_hash[:16]}"
+                if chunk_id in seen_ids:
+                    continue
+                seen_ids.add(chunk_id)
                 
                 # Create chunk metadata
                 chunk_metadata = {
@@ -93,6 +117,7 @@ class ChunkProcessor:
                     'chunk_index': i,
                     'total_chunks': len(text_chunks),
                     'chunk_id': chunk_id,
+                    'content_hash': content_hash,
                     'original_document_size': document.size_bytes
                 }
                 
@@ -0,0 +1,310 @@
+"""
+Query embedding cache for RAG Knowledge Vault.
+Avoids re-embedding repeated search queries.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache for query embeddings.
+    
+    Keys are SHA-256 hashes of (model, whitespace-normalized text), so a model
+    change never returns stale vectors. Vectors are kept as float32 arrays in
+    a bounded in-memory LRU and, optionally, as float32 blobs in SQLite so
+    they survive restarts. The disk row count is read once when the database
+    opens and tracked from then on, so writes do not scan the table. Disk
+    reads use their own read-only connection so they never wait behind a
+    write. Callers on the event loop should use get_from_memory and run
+    get/get_many/put/put_many in a worker thread.
+    """
+    
+    def __init__(self, max_entries: int = 1024, disk_path: Optional[str] = None,
+                 max_disk_entries: int = 50000):
+        """
+        Initialize embedding cache.
+        
+        Args:
+            max_entries: Maximum number of vectors kept in memory
+            disk_path: Optional SQLite file for the persistent tier
+            max_disk_entries: Maximum number of vectors kept on disk
+        """
+        self.max_entries = max_entries
+        self.disk_path = Path(disk_path) if disk_path else None
+        self.max_disk_entries = max_disk_entries
+        
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # _lock guards the memory tier and counters, _write_lock the writer connection
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._read_lock = threading.Lock()
+        self._read_conn: Optional[sqlite3.Connection] = None
+        self._disk_entries = 0
+        
+        # Statistics
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """
+        Build the cache key for a text embedded with a model.
+        
+        Args:
+            model: Embedding model name
+            text: Text to embed
+        
+        Returns:
+            Hex digest identifying (model, normalized text)
+        """
+        normalized = " ".join(text.split())
+        return hashlib.sha256(f"{model}\x00{normalized}".encode("utf-8")).hexdigest()
+    
+    def _open_database(self) -> sqlite3.Connection:
+        """Open a connection to the disk tier, creating the schema if needed."""
+        self.disk_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.disk_path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS query_embeddings (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_query_embeddings_created ON query_embeddings(created_at)")
+        conn.commit()
+        return conn
+    
+    def _get_connection(self) -> Optional[sqlite3.Connection]:
+        """Open the writer connection on first use (caller holds _write_lock)."""
+        if self.disk_path is None:
+            return None
+        
+        if self._conn is None:
+            conn = self._open_database()
+            self._disk_entries = conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+            self._conn = conn
+        return self._conn
+    
+    def _get_read_connection(self) -> Optional[sqlite3.Connection]:
+        """Open the read-only disk connection on first use (caller holds _read_lock)."""
+        if self.disk_path is None:
+            return None
+        
+        if self._read_conn is None:
+            conn = self._open_database()
+            conn.execute("PRAGMA query_only=ON")
+            self._read_conn = conn
+        return self._read_conn
+    
+    def _remember(self, key: str, vector: np.ndarray):
+        """Insert into the in-memory LRU, evicting the least recently used."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    
+    def get_from_memory(self, model: str, text: str) -> Optional[List[float]]:
+        """
+        Look up an embedding in the in-memory tier only.
+        
+        Safe to call on the event loop. A miss is not counted, the caller is
+        expected to follow up with get in a worker thread.
+        
+        Args:
+            model: Embedding model name
+            text: Query text
+        
+        Returns:
+            Embedding vector or None if not held in memory
+        """
+        key = self.make_key(model, text)
+        
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is None:
+                return None
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return vector.tolist()
+    
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """
+        Look up a cached embedding.
+        
+        Args:
+            model: Embedding model name
+            text: Query text
+        
+        Returns:
+            Embedding vector or None on a miss
+        """
+        key = self.make_key(model, text)
+        
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return vector.tolist()
+        
+        with self._read_lock:
+            try:
+                conn = self._get_read_connection()
+                row = conn.execute(
+                    "SELECT vector FROM query_embeddings WHERE cache_key = ?", (key,)
+                ).fetchone() if conn else None
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache disk lookup failed: {e}")
+                row = None
+        
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            
+            vector = np.frombuffer(row[0], dtype=np.float32).copy()
+            self._remember(key, vector)
+            self.hits += 1
+            self.disk_hits += 1
+            return vector.tolist()
+    
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look up several cached embeddings.
+        
+        Args:
+            model: Embedding model name
+            texts: Query texts
+        
+        Returns:
+            Embedding vectors aligned with texts (None on a miss)
+        """
+        return [self.get(model, text) for text in texts]
+    
+    def put(self, model: str, text: str, embedding: List[float]):
+        """
+        Store an embedding.
+        
+        Args:
+            model: Embedding model name
+            text: Query text
+            embedding: Embedding vector
+        """
+        self.put_many(model, [(text, embedding)])
+    
+    def put_many(self, model: str, items: List[Tuple[str, List[float]]]):
+        """
+        Store several embeddings in one disk transaction.
+        
+        Args:
+            model: Embedding model name
+            items: (query text, embedding vector) pairs
+        """
+        rows = []
+        for text, embedding in items:
+            key = self.make_key(model, text)
+            rows.append((key, np.asarray(embedding, dtype=np.float32)))
+        
+        with self._lock:
+            for key, vector in rows:
+                self._remember(key, vector)
+        
+        with self._write_lock:
+            try:
+                conn = self._get_connection()
+                if conn is None:
+                    return
+                
+                now = time.time()
+                added = 0
+                for key, vector in rows:
+                    exists = conn.execute(
+                        "SELECT 1 FROM query_embeddings WHERE cache_key = ?", (key,)
+                    ).fetchone() is not None
+                    conn.execute(
+                        "INSERT OR REPLACE INTO query_embeddings (cache_key, model, vector, created_at) VALUES (?, ?, ?, ?)",
+                        (key, model, vector.tobytes(), now)
+                    )
+                    added += 0 if exists else 1
+                
+                overflow = self._disk_entries + added - self.max_disk_entries
+                if overflow > 0:
+                    cursor = conn.execute(
+                        "DELETE FROM query_embeddings WHERE cache_key IN "
+                        "(SELECT cache_key FROM query_embeddings ORDER BY created_at ASC LIMIT ?)",
+                        (overflow,)
+                    )
+                    added -= cursor.rowcount
+                conn.commit()
+                self._disk_entries += added
+            except sqlite3.Error as e:
+                if self._conn is not None:
+                    self._conn.rollback()
+                logger.warning(f"Embedding cache disk write failed: {e}")
+    
+    def clear(self):
+        """Drop all cached embeddings from both tiers."""
+        with self._lock:
+            self._memory.clear()
+        with self._write_lock:
+            conn = self._get_connection()
+            if conn is not None:
+                conn.execute("DELETE FROM query_embeddings")
+                conn.commit()
+                self._disk_entries = 0
+    
+    def close(self):
+        """Close the disk tier."""
+        with self._read_lock:
+            if self._read_conn is not None:
+                self._read_conn.close()
+                self._read_conn = None
+        with self._write_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Dictionary with hit/miss counters and sizes
+        """
+        if self.disk_path is not None and self._conn is None:
+            # The disk row count is read when the writer connection opens
+            with self._write_lock:
+                self._get_connection()
+        
+        lookups = self.hits + self.misses
+        memory_bytes = sum(vector.nbytes for vector in self._memory.values())
+        
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "memory_bytes": memory_bytes,
+            "disk_enabled": self.disk_path is not None,
+            "disk_entries": self._disk_entries,
+            "disk_path": str(self.disk_path) if self.disk_path else None
+        }
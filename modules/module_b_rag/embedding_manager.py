@@ -5,6 +5,8 @@ Generates normalized embeddings using nomic-embed-text via Ollama.
 
 import asyncio
 import logging
+from collections import Counter
+from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
 import ollama
 from ollama import AsyncClient
@@ -13,6 +15,18 @@ import numpy as np
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class BatchEmbeddingResult:
+    """Result of a batch embedding run, aligned with the input texts."""
+    embeddings: List[Optional[List[float]]]
+    errors: Dict[int, str] = field(default_factory=dict)
+    
+    @property
+    def succeeded(self) -> int:
+        """Number of texts that were embedded."""
+        return sum(1 for embedding in self.embeddings if embedding is not None)
+
+
 class EmbeddingManager:
     """Manages embedding generation using Ollama with nomic-embed-text model."""
     
@@ -31,11 +45,16 @@ class EmbeddingManager:
         self.base_url = f"http://{host}:{port}"
         self.client = AsyncClient(host=self.base_url)
         self._model_available = None
+        self._batch_endpoint_available = None  # Unknown until the first /api/embed call
     
-    async def health_check(self) -> bool:
+    async def health_check(self, pull_missing: bool = True) -> bool:
         """
         Check if embedding service is available.
         
+        Args:
+            pull_missing: Pull the embedding model if Ollama does not have it
+                (background probes only look)
+        
         Returns:
             True if service is available and model is loaded
         """
@@ -47,7 +66,7 @@ class EmbeddingManager:
             # Check if our embedding model is available
             model_available = any(self.model in model_name for model_name in available_models)
             
-            if not model_available:
+            if not model_available and pull_missing:
                 logger.warning(f"Embedding model '{self.model}' not found. Available models: {available_models}")
                 # Try to pull the model
                 try:
@@ -91,15 +110,7 @@ class EmbeddingManager:
                 raise RuntimeError("Embedding service not available")
             
             # Generate embedding using Ollama
-            response = await self.client.embeddings(
-                model=self.model,
-                prompt=text
-            )
-            
-            embedding = response['embedding']
-            
-            if not embedding or not isinstance(embedding, list):
-                raise RuntimeError("Invalid embedding response from Ollama")
+            embedding = await self._request_embedding(text)
             
             # Normalize embedding to unit length for better similarity calculation
             normalized_embedding = self._normalize_embedding(embedding)
@@ -111,52 +122,177 @@ class EmbeddingManager:
             logger.error(f"Embedding generation failed for text '{text[:50]}...': {e}")
             raise RuntimeError(f"Embedding generation failed: {str(e)}")
     
-    async def generate_embeddings_batch(self, texts: List[str], batch_size: int = 10) -> List[List[float]]:
+    async def generate_embeddings_batch(
+        self,
+        texts: List[str],
+        batch_size: int = 32,
+        max_concurrency: int = 4
+    ) -> List[Optional[List[float]]]:
         """
         Generate embeddings for multiple texts in batches.
         
         Args:
             texts: List of texts to embed
-            batch_size: Number of texts to process in each batch
+            batch_size: Number of texts sent per /api/embed request
+            max_concurrency: Maximum number of requests in flight
+            
+        Returns:
+            List of normalized embedding vectors aligned with texts;
+            entries for texts that could not be embedded are None
+            (see embed_batch for the per-item error messages)
+        """
+        result = await self.embed_batch(texts, batch_size=batch_size, max_concurrency=max_concurrency)
+        return result.embeddings
+    
+    async def embed_batch(
+        self,
+        texts: List[str],
+        batch_size: int = 32,
+        max_concurrency: int = 4
+    ) -> BatchEmbeddingResult:
+        """
+        Embed many texts with as few round trips as possible.
+        
+        Texts are sent in groups of batch_size to Ollama's multi-input
+        /api/embed endpoint. If a group fails (or the server predates
+        /api/embed), its texts are embedded one by one instead. At most
+        max_concurrency requests are in flight at any time.
+        
+        Args:
+            texts: List of texts to embed
+            batch_size: Number of texts sent per /api/embed request
+            max_concurrency: Maximum number of requests in flight
+            
+        Returns:
+            BatchEmbeddingResult with embeddings aligned to texts and
+            error messages keyed by text index
+        """
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        errors: Dict[int, str] = {}
+        
+        if not texts:
+            return BatchEmbeddingResult(embeddings=embeddings, errors=errors)
+        
+        pending = []
+        for index, text in enumerate(texts):
+            if text and text.strip():
+                pending.append(index)
+            else:
+                errors[index] = "Cannot generate embedding for empty text"
+        
+        if pending:
+            if self._model_available is None:
+                await self.health_check()
+            
+            if not self._model_available:
+                for index in pending:
+                    errors[index] = "Embedding service not available"
+                pending = []
+        
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        raw: Dict[int, List[float]] = {}
+        
+        async def embed_single(index: int):
+            async with semaphore:
+                try:
+                    raw[index] = await self._request_embedding(texts[index])
+                except Exception as e:
+                    errors[index] = str(e)
+        
+        async def embed_group(indices: List[int]):
+            if self._batch_endpoint_available is not False:
+                try:
+                    async with semaphore:
+                        vectors = await self._request_embeddings([texts[i] for i in indices])
+                    raw.update(zip(indices, vectors))
+                    return
+                except Exception as e:
+                    logger.warning(f"Batch embedding of {len(indices)} texts failed, falling back to single requests: {e}")
+            
+            await asyncio.gather(*(embed_single(index) for index in indices))
+        
+        groups = [pending[i:i + batch_size] for i in range(0, len(pending), max(1, batch_size))]
+        await asyncio.gather(*(embed_group(group) for group in groups))
+        
+        if raw:
+            # Validate dimensions per item: the most common dimension wins, only
+            # the vectors that disagree with it fail
+            dimensions = Counter(len(vector) for vector in raw.values())
+            dimension = dimensions.most_common(1)[0][0]
+            indices = []
+            for index in sorted(raw):
+                if len(raw[index]) == dimension:
+                    indices.append(index)
+                else:
+                    errors[index] = f"Inconsistent embedding dimension: got {len(raw[index])}, expected {dimension}"
+            
+            try:
+                normalized = self._normalize_embeddings([raw[i] for i in indices])
+                for index, vector in zip(indices, normalized):
+                    embeddings[index] = vector
+            except ValueError as e:
+                for index in indices:
+                    errors[index] = f"Invalid embedding: {e}"
+        
+        for index, message in sorted(errors.items()):
+            logger.error(f"Failed to embed text {index} in batch: {message}")
+        
+        logger.info(f"Generated {len(texts) - len(errors)}/{len(texts)} embeddings in {len(groups)} batches")
+        return BatchEmbeddingResult(embeddings=embeddings, errors=errors)
+    
+    async def _request_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Request raw embeddings for several texts via /api/embed.
+        
+        Args:
+            texts: Non-empty texts to embed
             
         Returns:
-            List of embedding vectors
+            Raw (unnormalized) embedding vectors in input order
             
         Raises:
-            RuntimeError: If batch processing fails
+            RuntimeError: If the response does not contain one vector per text
         """
         try:
-            if not texts:
-                return []
+            response = await self.client.embed(model=self.model, input=texts)
+        except ollama.ResponseError as e:
+            if e.status_code == 404:
+                # Ollama < 0.3 has no /api/embed; stop trying it
+                logger.warning("Ollama /api/embed not available, using single-text embeddings")
+                self._batch_endpoint_available = False
+            raise
+        
+        vectors = response.get('embeddings')
+        if not isinstance(vectors, list) or len(vectors) != len(texts):
+            raise RuntimeError("Invalid batch embedding response from Ollama")
+        
+        self._batch_endpoint_available = True
+        return vectors
+    
+    async def _request_embedding(self, text: str) -> List[float]:
+        """
+        Request a raw embedding for a single text via /api/embeddings.
+        
+        Args:
+            text: Non-empty text to embed
             
-            embeddings = []
-            
-            # Process in batches to avoid overwhelming the service
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i + batch_size]
-                batch_embeddings = []
-                
-                for text in batch:
-                    try:
-                        embedding = await self.generate_embedding(text)
-                        batch_embeddings.append(embedding)
-                    except Exception as e:
-                        logger.error(f"Failed to embed text in batch: {e}")
-                        # Use zero vector as fallback
-                        batch_embeddings.append([0.0] * 768)  # Assuming 768-dim embeddings
-                
-                embeddings.extend(batch_embeddings)
-                
-                # Small delay between batches to be nice to the service
-                if i + batch_size < len(texts):
-                    await asyncio.sleep(0.1)
-            
-            logger.info(f"Generated {len(embeddings)} embeddings in batches")
-            return embeddings
+        Returns:
+            Raw (unnormalized) embedding vector
             
-        except Exception as e:
-            logger.error(f"Batch embedding generation failed: {e}")
-            raise RuntimeError(f"Batch embedding generation failed: {str(e)}")
+        Raises:
+            RuntimeError: If the response is invalid
+        """
+        response = await self.client.embeddings(
+            model=self.model,
+            prompt=text
+        )
+        
+        embedding = response['embedding']
+        
+        if not embedding or not isinstance(embedding, list):
+            raise RuntimeError("Invalid embedding response from Ollama")
+        
+        return embedding
     
     async def get_embedding_dimension(self) -> int:
         """
@@ -213,6 +349,31 @@ class EmbeddingManager:
             # Return original embedding as fallback
             return embedding
     
+    def _normalize_embeddings(self, embeddings: List[List[float]]) -> List[List[float]]:
+        """
+        Normalize many embedding vectors to unit length in one pass.
+        
+        Args:
+            embeddings: Raw embedding vectors of equal dimension
+            
+        Returns:
+            Normalized embedding vectors (zero vectors are returned unchanged)
+            
+        Raises:
+            ValueError: If the vectors do not share one dimension
+        """
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2:
+            raise ValueError("embeddings must form a 2D matrix")
+        
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        zero_rows = norms[:, 0] == 0
+        if zero_rows.any():
+            logger.warning(f"{int(zero_rows.sum())} zero-norm embeddings detected, returning them unchanged")
+            norms[zero_rows] = 1.0
+        
+        return (matrix / norms).tolist()
+    
     def get_model_info(self) -> Dict[str, Any]:
         """
         Get information about the embedding model.
@@ -0,0 +1,634 @@
+"""
+Ingestion daemon for RAG Knowledge Vault.
+Watches local documentation trees and feeds changed files into the ingestion pipeline.
+"""
+
+import asyncio
+import base64
+import fnmatch
+import gzip
+import logging
+import os
+import re
+import sqlite3
+import stat as stat_module
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+    WATCHDOG_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+DEFAULT_DIRECTORIES = ["/usr/share/man", "/usr/share/doc", "knowledge_docs", "/etc"]
+DEFAULT_EXCLUDES = [
+    "/etc/shadow*", "/etc/gshadow*", "/etc/ssh/*_key", "/etc/ssl/private/*", "*.key", "*.pem",
+    "/usr/share/doc/*/copyright", "/usr/share/doc/*/changelog*"
+]
+
+# Man page sources: man1/ls.1.gz, de/man8/ss.8, ...
+_MAN_PAGE_RE = re.compile(r"/man[0-9n][^/]*/[^/]+\.[0-9n][^/.]*(\.gz)?$")
+_OVERSTRIKE_RE = re.compile(r".\x08")
+_TEXT_MACROS = {"SH", "SS", "B", "I", "BR", "RB", "BI", "IB", "IR", "RI", "SM", "TP", "IP", "Nm", "Nd", "Sh", "Ss"}
+_ROFF_ESCAPE_RE = re.compile(r"\\f[BIRP1-4]|\\f\(..|\\&|\\\(..|\\[*s][-+]?\d?|\\[|^{}]|\\$")
+
+
+class WorkQueue:
+    """
+    Persistent queue of files waiting for (re-)ingestion.
+    
+    Pending work and the last ingested state (mtime, size) of every file
+    live in SQLite, so queued changes survive a restart and a rescan
+    after a restart only enqueues files that really changed. A new event
+    for a queued file replaces its entry and pushes its due time back,
+    which debounces editors and package managers that write a file in
+    several steps.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize work queue.
+        
+        Args:
+            path: SQLite file (in-memory database if None)
+        """
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path) if self.path else ":memory:", check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pending (
+                    path TEXT PRIMARY KEY,
+                    action TEXT NOT NULL,
+                    due REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_pending_due ON pending(due)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    mtime_ns INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+    
+    def enqueue(self, paths: Iterable[str], action: str = "upsert", delay: float = 0.0) -> int:
+        """
+        Queue files for ingestion ("upsert") or removal ("delete").
+        
+        Args:
+            paths: Absolute file paths
+            action: "upsert" or "delete"
+            delay: Seconds before the work is due (debounce)
+        
+        Returns:
+            Number of paths queued
+        """
+        due = time.time() + delay
+        rows = [(path, action, due) for path in paths]
+        if not rows:
+            return 0
+        with self._lock:
+            conn = self._get_connection()
+            conn.executemany(
+                "INSERT INTO pending (path, action, due, attempts) VALUES (?, ?, ?, 0) "
+                "ON CONFLICT(path) DO UPDATE SET action = excluded.action, due = excluded.due, attempts = 0",
+                rows
+            )
+            conn.commit()
+        return len(rows)
+    
+    def ready(self, limit: int) -> List[Tuple[str, str, float, int]]:
+        """
+        Get work that is due.
+        
+        Args:
+            limit: Maximum number of entries
+        
+        Returns:
+            (path, action, due, attempts) tuples, oldest first
+        """
+        with self._lock:
+            return self._get_connection().execute(
+                "SELECT path, action, due, attempts FROM pending WHERE due <= ? ORDER BY due LIMIT ?",
+                (time.time(), limit)
+            ).fetchall()
+    
+    def complete(self, path: str, due: float, state: Optional[Tuple[int, int]], status: str = "ingested"):
+        """
+        Finish a queue entry and remember the file state.
+        
+        The entry stays queued if a newer event arrived while it was processed.
+        
+        Args:
+            path: File path
+            due: Due time the entry had when it was taken
+            state: (mtime_ns, size) of the processed file, None if it was deleted
+            status: "ingested", "skipped" or "failed"
+        """
+        with self._lock:
+            conn = self._get_connection()
+            conn.execute("DELETE FROM pending WHERE path = ? AND due = ?", (path, due))
+            if state is None:
+                conn.execute("DELETE FROM files WHERE path = ?", (path,))
+            else:
+                conn.execute(
+                    "INSERT OR REPLACE INTO files (path, mtime_ns, size, status, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (path, state[0], state[1], status, time.time())
+                )
+            conn.commit()
+    
+    def retry(self, path: str, due: float, error: str, delay: float):
+        """Reschedule a failed entry (unless a newer event replaced it)."""
+        with self._lock:
+            conn = self._get_connection()
+            conn.execute(
+                "UPDATE pending SET due = ?, attempts = attempts + 1, last_error = ? WHERE path = ? AND due = ?",
+                (time.time() + delay, error, path, due)
+            )
+            conn.commit()
+    
+    def file_states(self, paths: Optional[Iterable[str]] = None) -> Dict[str, Tuple[int, int, str]]:
+        """Last processed (mtime_ns, size, status) per known file, restricted to paths if given."""
+        with self._lock:
+            conn = self._get_connection()
+            if paths is None:
+                rows = conn.execute("SELECT path, mtime_ns, size, status FROM files").fetchall()
+            else:
+                paths, rows = list(paths), []
+                for start in range(0, len(paths), 500):
+                    chunk = paths[start:start + 500]
+                    rows += conn.execute(
+                        f"SELECT path, mtime_ns, size, status FROM files WHERE path IN ({', '.join('?' * len(chunk))})",
+                        chunk
+                    ).fetchall()
+            return {path: (mtime_ns, size, status) for path, mtime_ns, size, status in rows}
+    
+    def pending_paths(self) -> set:
+        """Paths currently queued."""
+        with self._lock:
+            return {row[0] for row in self._get_connection().execute("SELECT path FROM pending")}
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get queue statistics.
+        
+        Returns:
+            Dictionary with pending work and known files per status
+        """
+        with self._lock:
+            conn = self._get_connection()
+            pending = conn.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+            retrying = conn.execute("SELECT COUNT(*) FROM pending WHERE attempts > 0").fetchone()[0]
+            files = dict(conn.execute("SELECT status, COUNT(*) FROM files GROUP BY status").fetchall())
+        return {
+            "pending": pending,
+            "retrying": retrying,
+            "files": files,
+            "path": str(self.path) if self.path else None
+        }
+    
+    def close(self):
+        """Close the SQLite connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class SkipFile(Exception):
+    """A file that is not ingested (binary, too large, unreadable)."""
+
+
+class _WatchHandler(FileSystemEventHandler):
+    """Forwards watchdog (inotify) events to the daemon, from the observer thread."""
+    
+    def __init__(self, daemon: "IngestionDaemon"):
+        self.daemon = daemon
+    
+    def on_any_event(self, event):
+        if event.event_type in ("opened", "closed_no_write"):
+            return
+        if event.is_directory and event.event_type not in ("created", "deleted", "moved"):
+            # A directory is "modified" whenever an entry in it changes; the entry
+            # has its own event, so walking the tree here would re-queue all of it
+            return
+        paths = [(event.src_path, event.event_type in ("deleted", "moved"))]
+        if event.event_type == "moved":
+            paths.append((event.dest_path, False))
+        for path, removed in paths:
+            if event.is_directory:
+                self.daemon.enqueue_tree(path, removed)
+            else:
+                self.daemon.enqueue_file(path, removed)
+
+
+class IngestionDaemon:
+    """
+    Keeps the knowledge base in sync with local documentation trees.
+    
+    Changes are detected with inotify (through the optional watchdog
+    package) or, without it, by rescanning the trees every poll_interval.
+    Both paths only queue work; a single worker task takes due entries
+    from the persistent WorkQueue, skips files whose (mtime, size) still
+    matches the last processed state, renders the rest to text (man pages
+    through `man -l`, gzip-compressed docs are decompressed) and submits them in
+    batches to the IngestionPipeline, whose chunk manifest re-embeds only
+    the chunks that changed. Deleted files are removed from the vector
+    store. On start the trees are rescanned, so changes made while the
+    module was down are picked up as well.
+    """
+    
+    def __init__(self, pipeline, directories: Optional[List[str]] = None, queue_path: Optional[str] = None,
+                 exclude: Optional[List[str]] = None, debounce: float = 2.0, poll_interval: float = 300.0,
+                 batch_size: int = 16, max_file_size_mb: float = 5, max_attempts: int = 5,
+                 use_inotify: bool = True):
+        """
+        Initialize ingestion daemon.
+        
+        Args:
+            pipeline: IngestionPipeline the files are fed into
+            directories: Trees to watch (relative paths are resolved against the project root)
+            queue_path: SQLite file of the work queue (in-memory if None)
+            exclude: fnmatch patterns of absolute paths that are never ingested
+            debounce: Seconds without further events before a file is ingested
+            poll_interval: Seconds between rescans without inotify
+            batch_size: Files per ingestion job
+            max_file_size_mb: Larger files are skipped
+            max_attempts: Failed ingestions before a file is left alone until it changes
+            use_inotify: Use watchdog if it is installed
+        """
+        self.pipeline = pipeline
+        self.directories = [self._resolve(d) for d in (directories if directories is not None else DEFAULT_DIRECTORIES)]
+        self.queue = WorkQueue(str(self._resolve(queue_path)) if queue_path else None)
+        self.exclude = list(exclude if exclude is not None else DEFAULT_EXCLUDES)
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_file_size = int(max_file_size_mb * 1024 * 1024)
+        self.max_attempts = max_attempts
+        self.use_inotify = use_inotify and WATCHDOG_AVAILABLE
+        
+        self._task: Optional[asyncio.Task] = None
+        self._observer = None
+        self._last_scan = 0.0
+        
+        # Statistics
+        self.ingested = 0
+        self.unchanged = 0
+        self.deleted = 0
+        self.skipped = 0
+        self.failed = 0
+        self.scans = 0
+    
+    @classmethod
+    def from_config(cls, pipeline, settings: Optional[Dict[str, Any]]) -> "IngestionDaemon":
+        """
+        Create the daemon from the config.yaml `ingestion:` section.
+        
+        Args:
+            pipeline: IngestionPipeline the files are fed into
+            settings: Dict with directories, exclude, debounce, poll_interval, ...
+        
+        Returns:
+            IngestionDaemon (not started)
+        """
+        settings = settings or {}
+        return cls(
+            pipeline,
+            directories=settings.get("directories"),
+            queue_path=settings.get("queue_path", "data/ingestion_queue.db"),
+            exclude=settings.get("exclude"),
+            debounce=float(settings.get("debounce", 2.0)),
+            poll_interval=float(settings.get("poll_interval", 300.0)),
+            batch_size=int(settings.get("batch_size", 16)),
+            max_file_size_mb=float(settings.get("max_file_size_mb", 5)),
+            max_attempts=int(settings.get("max_attempts", 5))
+        )
+    
+    @staticmethod
+    def _resolve(path: str) -> Path:
+        path = Path(path)
+        return path if path.is_absolute() else PROJECT_ROOT / path
+    
+    @property
+    def running(self) -> bool:
+        """True while the worker task runs."""
+        return self._task is not None and not self._task.done()
+    
+    def _watched(self, path: str) -> bool:
+        if any(fnmatch.fnmatch(path, pattern) for pattern in self.exclude):
+            return False
+        return any(path == str(root) or path.startswith(f"{root}{os.sep}") for root in self.directories)
+    
+    def enqueue_file(self, path: str, removed: bool = False):
+        """Queue one changed or removed file (called from watcher threads)."""
+        if self._watched(path):
+            self.queue.enqueue([path], "delete" if removed else "upsert", delay=self.debounce)
+    
+    def enqueue_tree(self, path: str, removed: bool = False):
+        """Queue every file below a directory that appeared or disappeared."""
+        if removed:
+            prefix = f"{path}{os.sep}"
+            self.queue.enqueue([p for p in self.queue.file_states() if p.startswith(prefix)], "delete", self.debounce)
+        else:
+            self.queue.enqueue([p for p, _ in self._walk(Path(path)) if self._watched(p)], "upsert", self.debounce)
+    
+    def _walk(self, root: Path) -> Iterable[Tuple[str, os.stat_result]]:
+        """Regular files below root (symlinks are not followed)."""
+        for dirpath, dirnames, filenames in os.walk(root, onerror=lambda e: None):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path, follow_symlinks=False)
+                except OSError:
+                    continue
+                if stat_module.S_ISREG(stat.st_mode):
+                    yield path, stat
+    
+    def scan(self) -> int:
+        """
+        Compare the watched trees with the last ingested state and queue the differences (blocking).
+        
+        Returns:
+            Number of files queued
+        """
+        states = self.queue.file_states()
+        pending = self.queue.pending_paths()
+        changed, seen = [], set()
+        for root in self.directories:
+            if not root.is_dir():
+                continue
+            for path, stat in self._walk(root):
+                if not self._watched(path):
+                    continue
+                seen.add(path)
+                state = states.get(path)
+                if path not in pending and (state is None or state[:2] != (stat.st_mtime_ns, stat.st_size)):
+                    changed.append(path)
+        
+        removed = [path for path in states if path not in seen and path not in pending]
+        self._last_scan = time.time()
+        self.scans += 1
+        queued = self.queue.enqueue(changed, "upsert") + self.queue.enqueue(removed, "delete")
+        if queued:
+            logger.info(f"Ingestion scan queued {len(changed)} changed and {len(removed)} removed files")
+        return queued
+    
+    def load_text(self, path: str) -> str:
+        """
+        Read a file as plain text (blocking).
+        
+        Args:
+            path: File path
+        
+        Returns:
+            Text content
+        
+        Raises:
+            SkipFile: If the file is binary, empty, too large or unreadable
+        """
+        try:
+            opener = gzip.open if path.endswith(".gz") else open
+            with opener(path, "rb") as f:
+                data = f.read(self.max_file_size + 1)
+        except (OSError, EOFError) as e:
+            raise SkipFile(f"unreadable: {e}")
+        if len(data) > self.max_file_size:
+            raise SkipFile("too large")
+        if b"\x00" in data[:8192]:
+            raise SkipFile("binary")
+        
+        if _MAN_PAGE_RE.search(path):
+            text = self._render_man_page(path, data)
+        else:
+            try:
+                text = data.decode("utf-8")
+            except UnicodeDecodeError:
+                text = data.decode("latin-1")
+        if not text.strip():
+            raise SkipFile("empty")
+        return text
+    
+    @staticmethod
+    def _render_man_page(path: str, source: bytes) -> str:
+        """Format a man page with man(1); strip the roff markup if man is not available."""
+        try:
+            result = subprocess.run(
+                ["man", "-l", "-P", "cat", path], capture_output=True, timeout=30,
+                env={**os.environ, "MANWIDTH": "100", "MAN_KEEP_FORMATTING": ""}
+            )
+            if result.returncode == 0 and result.stdout.strip():
+                return _OVERSTRIKE_RE.sub("", result.stdout.decode("utf-8", errors="replace"))
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        
+        lines = []
+        skipping = None  # end marker of a macro definition or conditional block
+        for line in source.decode("utf-8", errors="replace").splitlines():
+            if skipping is not None:
+                if (line.startswith("..") if skipping == ".." else skipping in line):
+                    skipping = None
+                continue
+            if not line.startswith((".", "'")):
+                lines.append(_ROFF_ESCAPE_RE.sub("", line).replace("\\-", "-"))
+                continue
+            name, _, args = line[1:].strip().partition(" ")
+            if name in _TEXT_MACROS:
+                # Section titles and bold/italic words carry text
+                lines.append(_ROFF_ESCAPE_RE.sub("", args.replace('"', "")).replace("\\-", "-"))
+            elif name in ("de", "de1", "am"):
+                skipping = ".."
+            elif "\\{" in line and "\\}" not in line:
+                skipping = "\\}"
+        return "\n".join(line for line in lines if line.strip())
+    
+    async def process_ready(self) -> int:
+        """
+        Ingest or delete one batch of due files.
+        
+        Returns:
+            Number of queue entries processed
+        """
+        entries = await asyncio.to_thread(self.queue.ready, self.batch_size)
+        if not entries:
+            return 0
+        
+        known = await asyncio.to_thread(
+            self.queue.file_states, [path for path, action, _, _ in entries if action == "upsert"]
+        )
+        loaded = await asyncio.to_thread(self._load_batch, entries, known)
+        files, file_metadata, submitted = [], [], []
+        for (path, action, due, attempts), (state, text, skip_reason) in zip(entries, loaded):
+            if action == "delete" or state is None:
+                self.deleted += 1 if await self._delete(path) else 0
+                await asyncio.to_thread(self.queue.complete, path, due, None)
+            elif text is None and skip_reason is None:
+                # Unchanged since it was last processed, keep its status
+                self.unchanged += 1
+                await asyncio.to_thread(self.queue.complete, path, due, state, known[path][2])
+            elif skip_reason is not None:
+                logger.debug(f"Skipping {path}: {skip_reason}")
+                self.skipped += 1
+                await self._delete(path)
+                await asyncio.to_thread(self.queue.complete, path, due, state, "skipped")
+            else:
+                files.append(base64.b64encode(text.encode("utf-8")).decode("ascii"))
+                file_metadata.append({
+                    "source": path,
+                    "file_path": path,
+                    "doc_type": "man" if _MAN_PAGE_RE.search(path) else "file"
+                })
+                submitted.append((path, due, attempts, state))
+        
+        if files:
+            job = self.pipeline.submit(files, {"type": "txt", "origin": "watch"}, file_metadata=file_metadata)
+            job = await self.pipeline.wait(job.job_id)
+            failed = set(job.failed_file_indices)
+            for index, (path, due, attempts, state) in enumerate(submitted):
+                if index not in failed:
+                    self.ingested += 1
+                    await asyncio.to_thread(self.queue.complete, path, due, state)
+                elif attempts + 1 >= self.max_attempts:
+                    # Leave it alone until the file changes again
+                    self.failed += 1
+                    logger.warning(f"Giving up on {path} after {attempts + 1} attempts")
+                    await asyncio.to_thread(self.queue.complete, path, due, state, "failed")
+                else:
+                    error = "; ".join(e for e in job.errors if e.startswith(f"File {index+1}")) or "ingestion failed"
+                    await asyncio.to_thread(self.queue.retry, path, due, error, min(3600.0, 30.0 * 2 ** attempts))
+        
+        return len(entries)
+    
+    def _load_batch(self, entries, known: Dict[str, Tuple[int, int, str]]
+                    ) -> List[Tuple[Optional[Tuple[int, int]], Optional[str], Optional[str]]]:
+        """
+        Stat and read the files of a batch (blocking); (state, text, skip reason) per entry.
+        
+        Files whose state matches known are not read; their text and skip reason are None.
+        """
+        loaded = []
+        for path, action, _, _ in entries:
+            if action == "delete":
+                loaded.append((None, None, None))
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                loaded.append((None, None, None))  # Gone meanwhile
+                continue
+            state = (stat.st_mtime_ns, stat.st_size)
+            if path in known and known[path][:2] == state:
+                loaded.append((state, None, None))
+                continue
+            try:
+                loaded.append((state, self.load_text(path), None))
+            except SkipFile as e:
+                loaded.append((state, None, str(e)))
+        return loaded
+    
+    async def _delete(self, path: str) -> bool:
+        try:
+            return await self.pipeline.delete_source(path) > 0
+        except Exception as e:
+            logger.error(f"Failed to remove chunks of {path}: {e}")
+            return False
+    
+    def _start_observer(self) -> bool:
+        """Watch the trees with inotify; False if that is not possible (watch limit, missing module)."""
+        if not self.use_inotify:
+            return False
+        observer = Observer()
+        handler = _WatchHandler(self)
+        try:
+            for root in self.directories:
+                if root.is_dir():
+                    observer.schedule(handler, str(root), recursive=True)
+            observer.start()
+        except OSError as e:
+            logger.warning(f"inotify watch failed ({e}), falling back to polling every {self.poll_interval}s")
+            return False
+        self._observer = observer
+        return True
+    
+    async def _run(self):
+        """Worker loop: initial scan, then process due work and rescan when polling."""
+        inotify = await asyncio.to_thread(self._start_observer)
+        logger.info(
+            f"Ingestion daemon watching {len(self.directories)} directories "
+            f"({'inotify' if inotify else f'polling every {self.poll_interval}s'})"
+        )
+        await asyncio.to_thread(self.scan)
+        
+        while True:
+            try:
+                if await self.process_ready():
+                    continue
+                if not inotify and time.time() - self._last_scan >= self.poll_interval:
+                    await asyncio.to_thread(self.scan)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ingestion daemon iteration failed: {e}")
+            await asyncio.sleep(min(1.0, self.debounce / 2) or 0.1)
+    
+    def start(self):
+        """Start watching (module startup)."""
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop watching; queued work stays in the queue for the next start."""
+        if self._observer is not None:
+            observer, self._observer = self._observer, None
+            observer.stop()
+            await asyncio.to_thread(observer.join, 5)
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get daemon statistics.
+        
+        Returns:
+            Dictionary with watch mode, counters and queue state
+        """
+        return {
+            "running": self.running,
+            "mode": "inotify" if self._observer is not None else "polling",
+            "directories": [str(root) for root in self.directories],
+            "ingested": self.ingested,
+            "unchanged": self.unchanged,
+            "deleted": self.deleted,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "scans": self.scans,
+            "last_scan": self._last_scan or None,
+            "queue": self.queue.get_statistics()
+        }
@@ -0,0 +1,411 @@
+"""
+Ingestion pipeline for RAG Knowledge Vault.
+Runs decode, chunking, embedding and storage as overlapping stages.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from modules.module_b_rag.chunk_manifest import ChunkManifest
+from modules.module_b_rag.chunk_processor import DocumentChunk
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output
+_DONE = object()
+
+
+@dataclass
+class IngestionJob:
+    """Progress and result of one upload."""
+    job_id: str
+    total_files: int
+    status: str = "queued"  # queued, running, completed, failed
+    decoded_files: int = 0
+    chunked_files: int = 0
+    processed_files: int = 0  # files with at least one stored chunk
+    failed_files: int = 0
+    total_chunks: int = 0
+    embedded_chunks: int = 0
+    stored_chunks: int = 0
+    failed_chunks: int = 0
+    unchanged_chunks: int = 0  # already embedded under the current model (skipped)
+    deleted_chunks: int = 0  # vanished from a re-ingested document
+    failed_file_indices: List[int] = field(default_factory=list)  # files not (completely) stored
+    errors: List[str] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    
+    @property
+    def done(self) -> bool:
+        """True once the job has finished (successfully or not)."""
+        return self.status in ("completed", "failed")
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize job state for the /jobs endpoint."""
+        data = asdict(self)
+        end = self.finished_at or time.time()
+        data["elapsed_seconds"] = round(end - self.started_at, 3) if self.started_at else 0.0
+        return data
+
+
+class IngestionPipeline:
+    """
+    Pipelined document ingestion.
+    
+    Each upload runs four stages connected by bounded queues:
+    decode (base64/PDF extraction) -> chunk -> batched embed -> batched store.
+    Blocking work (PDF parsing, text splitting, ChromaDB writes) runs in
+    worker threads so the event loop stays responsive, and each stage can
+    work on the next item while the following stage is still busy.
+    
+    With a chunk manifest, ingestion is incremental: chunks whose
+    content-hashed id is stored and recorded under the current embedding
+    model are skipped, and chunks that disappeared from a re-ingested
+    document (uploaded with an explicit "source") are deleted once the
+    new version is stored completely.
+    """
+    
+    def __init__(
+        self,
+        document_loader,
+        chunk_processor,
+        embedding_manager,
+        vector_store,
+        queue_size: int = 4,
+        embed_batch_size: int = 32,
+        flush_size: int = 256,
+        max_jobs: int = 100,
+        manifest: Optional[ChunkManifest] = None
+    ):
+        """
+        Initialize ingestion pipeline.
+        
+        Args:
+            document_loader: DocumentLoader used for decoding
+            chunk_processor: ChunkProcessor used for chunking
+            embedding_manager: EmbeddingManager used for batched embedding
+            vector_store: VectorStore receiving add_chunks_batch writes
+            queue_size: Capacity of each inter-stage queue
+            embed_batch_size: Chunks per embedding request
+            flush_size: Chunks buffered before a vector store write
+            max_jobs: Number of finished jobs kept for /jobs lookups
+            manifest: Record of embedded chunks for incremental ingestion
+                (every chunk is embedded if None)
+        """
+        self.document_loader = document_loader
+        self.chunk_processor = chunk_processor
+        self.embedding_manager = embedding_manager
+        self.vector_store = vector_store
+        self.queue_size = queue_size
+        self.embed_batch_size = embed_batch_size
+        self.flush_size = flush_size
+        self.max_jobs = max_jobs
+        self.manifest = manifest
+        
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+    
+    def submit(self, files: List[str], metadata: Dict[str, Any],
+               file_metadata: Optional[List[Dict[str, Any]]] = None) -> IngestionJob:
+        """
+        Start ingesting base64 encoded files in the background.
+        
+        Args:
+            files: Base64 encoded file contents
+            metadata: Metadata shared by all files of the upload
+            file_metadata: Optional per-file metadata (e.g. "source"), aligned with files
+        
+        Returns:
+            The IngestionJob tracking this upload
+        """
+        job = IngestionJob(job_id=uuid.uuid4().hex, total_files=len(files))
+        self._jobs[job.job_id] = job
+        self._prune_jobs()
+        
+        task = asyncio.create_task(self._run(job, files, metadata, file_metadata))
+        self._tasks[job.job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.job_id, None))
+        
+        logger.info(f"Submitted ingestion job {job.job_id} with {len(files)} files")
+        return job
+    
+    async def wait(self, job_id: str) -> IngestionJob:
+        """
+        Wait until a job has finished.
+        
+        Args:
+            job_id: Job identifier
+        
+        Returns:
+            The finished IngestionJob
+        
+        Raises:
+            KeyError: If the job is unknown
+        """
+        # Keep the job itself, newer submissions may prune it while we wait
+        job = self._jobs[job_id]
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.shield(task)
+        return job
+    
+    def get_job(self, job_id: str) -> Optional[IngestionJob]:
+        """Look up a job by id."""
+        return self._jobs.get(job_id)
+    
+    def _prune_jobs(self):
+        """Forget the oldest finished jobs beyond max_jobs."""
+        while len(self._jobs) > self.max_jobs:
+            oldest_id = next((job_id for job_id, job in self._jobs.items() if job.done), None)
+            if oldest_id is None:
+                break
+            del self._jobs[oldest_id]
+    
+    async def delete_source(self, source: str) -> int:
+        """
+        Remove all chunks of a document that no longer exists.
+        
+        Args:
+            source: Source identifier of the document
+        
+        Returns:
+            Number of chunks deleted
+        """
+        def delete() -> int:
+            chunk_ids = self.vector_store.get_ids_by_source(source)
+            deleted = self.vector_store.delete_chunks(chunk_ids)
+            if self.manifest is not None:
+                self.manifest.remove(chunk_ids)
+            return deleted
+        
+        return await asyncio.to_thread(delete)
+    
+    async def _run(self, job: IngestionJob, files: List[str], metadata: Dict[str, Any],
+                   file_metadata: Optional[List[Dict[str, Any]]] = None):
+        """Run all stages for one job."""
+        job.status = "running"
+        job.started_at = time.time()
+        
+        documents: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        chunk_batches: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        embedded: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        stored_per_file: Dict[int, int] = {}
+        failed_files: Set[int] = set()  # files with chunks that were not stored
+        current_ids: Set[str] = set()  # chunk ids of all documents in this job
+        vanished: Dict[int, List[str]] = {}
+        
+        stages = [
+            asyncio.create_task(self._decode_stage(job, files, metadata, file_metadata, documents, failed_files)),
+            asyncio.create_task(self._chunk_stage(job, documents, chunk_batches, current_ids, vanished, failed_files)),
+            asyncio.create_task(self._embed_stage(job, chunk_batches, embedded, failed_files)),
+            asyncio.create_task(self._store_stage(job, embedded, stored_per_file, failed_files))
+        ]
+        
+        try:
+            await asyncio.gather(*stages)
+            if vanished:
+                await asyncio.to_thread(self._delete_vanished, job, vanished, current_ids, failed_files)
+            job.status = "completed" if job.processed_files > 0 else "failed"
+        except Exception as e:
+            # A stage died: cancel the others so none blocks on a full queue
+            for stage in stages:
+                stage.cancel()
+            logger.error(f"Ingestion job {job.job_id} failed: {e}")
+            job.errors.append(f"Pipeline error: {e}")
+            job.status = "failed"
+        finally:
+            job.failed_file_indices = list(range(len(files))) if job.status == "failed" else sorted(failed_files)
+            job.finished_at = time.time()
+        
+        logger.info(
+            f"Ingestion job {job.job_id} {job.status}: {job.processed_files}/{job.total_files} files, "
+            f"{job.stored_chunks} chunks stored, {job.unchanged_chunks} unchanged, {job.deleted_chunks} deleted "
+            f"in {job.finished_at - job.started_at:.2f}s"
+        )
+    
+    async def _decode_stage(self, job: IngestionJob, files: List[str], metadata: Dict[str, Any],
+                            per_file_metadata: Optional[List[Dict[str, Any]]], out: asyncio.Queue,
+                            failed_files: Set[int]):
+        """Decode base64 payloads and extract text (PDF parsing off the loop)."""
+        for i, file_content in enumerate(files):
+            file_metadata = metadata.copy()
+            if per_file_metadata:
+                file_metadata.update(per_file_metadata[i])
+            file_metadata.update({
+                "file_index": i,
+                "upload_timestamp": time.time()
+            })
+            
+            try:
+                document = await asyncio.to_thread(
+                    self.document_loader.load_from_base64, file_content, file_metadata
+                )
+            except Exception as e:
+                job.failed_files += 1
+                failed_files.add(i)
+                job.errors.append(f"File {i+1}: {e}")
+                logger.error(f"Failed to load file {i+1}: {e}")
+                continue
+            
+            job.decoded_files += 1
+            await out.put((i, document))
+        
+        await out.put(_DONE)
+    
+    async def _chunk_stage(self, job: IngestionJob, inp: asyncio.Queue, out: asyncio.Queue,
+                           current_ids: Set[str], vanished: Dict[int, List[str]], failed_files: Set[int]):
+        """Split documents into chunks and forward the ones to embed in embedding batches."""
+        while (item := await inp.get()) is not _DONE:
+            file_index, document = item
+            
+            try:
+                chunks = await asyncio.to_thread(self.chunk_processor.process_document, document)
+                total = len(chunks)
+                if self.manifest is not None:
+                    chunks, stale_ids = await asyncio.to_thread(self._plan_delta, document, chunks, current_ids)
+                    # Only a document uploaded under an explicit name replaces its previous version
+                    if stale_ids and "source" in document.metadata:
+                        vanished[file_index] = stale_ids
+            except Exception as e:
+                job.failed_files += 1
+                failed_files.add(file_index)
+                job.errors.append(f"File {file_index+1}: {e}")
+                logger.error(f"Failed to chunk file {file_index+1}: {e}")
+                continue
+            
+            job.chunked_files += 1
+            job.total_chunks += total
+            job.unchanged_chunks += total - len(chunks)
+            if not chunks:
+                # Nothing new: the stored version is already up to date
+                job.processed_files += 1
+            
+            for start in range(0, len(chunks), self.embed_batch_size):
+                await out.put((file_index, chunks[start:start + self.embed_batch_size]))
+        
+        await out.put(_DONE)
+    
+    def _plan_delta(self, document, chunks: List[DocumentChunk],
+                    current_ids: Set[str]) -> Tuple[List[DocumentChunk], List[str]]:
+        """
+        Decide which chunks of a document need embedding (blocking, runs in a thread).
+        
+        Args:
+            document: The chunked document
+            chunks: Its chunks (content-hashed ids)
+            current_ids: Chunk ids already planned in this job; updated
+        
+        Returns:
+            (chunks to embed, stored ids of the source that are no longer part of it)
+        """
+        model = self.embedding_manager.model
+        new_chunks = [chunk for chunk in chunks if chunk.chunk_id not in current_ids]
+        current_ids.update(chunk.chunk_id for chunk in chunks)
+        
+        stored_ids = set(self.vector_store.get_ids_by_source(document.source))
+        recorded = self.manifest.lookup(chunk.chunk_id for chunk in new_chunks if chunk.chunk_id in stored_ids)
+        to_embed = [chunk for chunk in new_chunks if recorded.get(chunk.chunk_id) != model]
+        stale_ids = sorted(stored_ids - {chunk.chunk_id for chunk in chunks})
+        
+        if len(to_embed) < len(chunks) or stale_ids:
+            logger.info(
+                f"Re-ingesting '{document.source}': {len(to_embed)}/{len(chunks)} chunks to embed, "
+                f"{len(stale_ids)} vanished"
+            )
+        return to_embed, stale_ids
+    
+    def _delete_vanished(self, job: IngestionJob, vanished: Dict[int, List[str]], current_ids: Set[str],
+                         failed_files: Set[int]):
+        """Delete chunks that disappeared from re-ingested documents (blocking, runs in a thread)."""
+        for file_index, stale_ids in vanished.items():
+            if file_index in failed_files:
+                # Keep the old version searchable until the new one is stored completely
+                job.errors.append(f"File {file_index+1}: kept {len(stale_ids)} outdated chunks, new version incomplete")
+                continue
+            stale_ids = [chunk_id for chunk_id in stale_ids if chunk_id not in current_ids]
+            try:
+                job.deleted_chunks += self.vector_store.delete_chunks(stale_ids)
+                self.manifest.remove(stale_ids)
+            except Exception as e:
+                job.errors.append(f"File {file_index+1}: deleting outdated chunks failed: {e}")
+                logger.error(f"Failed to delete outdated chunks for job {job.job_id}: {e}")
+    
+    async def _embed_stage(self, job: IngestionJob, inp: asyncio.Queue, out: asyncio.Queue,
+                           failed_files: Set[int]):
+        """Embed chunk batches; failed chunks are counted, not stored."""
+        while (item := await inp.get()) is not _DONE:
+            file_index, chunks = item
+            
+            result = await self.embedding_manager.embed_batch(
+                [chunk.content for chunk in chunks],
+                batch_size=self.embed_batch_size
+            )
+            
+            embedded = [
+                (file_index, chunk, embedding)
+                for chunk, embedding in zip(chunks, result.embeddings)
+                if embedding is not None
+            ]
+            job.embedded_chunks += len(embedded)
+            job.failed_chunks += len(result.errors)
+            if result.errors:
+                failed_files.add(file_index)
+            for index, message in result.errors.items():
+                job.errors.append(f"File {file_index+1}, chunk {chunks[index].chunk_id}: {message}")
+            
+            if embedded:
+                await out.put(embedded)
+        
+        await out.put(_DONE)
+    
+    async def _store_stage(self, job: IngestionJob, inp: asyncio.Queue, stored_per_file: Dict[int, int],
+                           failed_files: Set[int]):
+        """Buffer embedded chunks and write them to the vector store in large batches."""
+        buffer: List[Tuple[int, DocumentChunk, List[float]]] = []
+        
+        while (item := await inp.get()) is not _DONE:
+            buffer.extend(item)
+            if len(buffer) >= self.flush_size:
+                await self._flush(job, buffer, stored_per_file, failed_files)
+                buffer = []
+        
+        if buffer:
+            await self._flush(job, buffer, stored_per_file, failed_files)
+    
+    def _write(self, chunks: List[DocumentChunk], embeddings: List[List[float]]):
+        """Store chunks and record them in the manifest (blocking, runs in a thread)."""
+        self.vector_store.add_chunks_batch(chunks, embeddings)
+        if self.manifest is not None:
+            self.manifest.record(
+                [(chunk.chunk_id, chunk.source, chunk.metadata.get("content_hash", "")) for chunk in chunks],
+                self.embedding_manager.model
+            )
+    
+    async def _flush(self, job: IngestionJob, buffer: List[Tuple[int, DocumentChunk, List[float]]],
+                     stored_per_file: Dict[int, int], failed_files: Set[int]):
+        """Write one batch of chunks to the vector store."""
+        try:
+            await asyncio.to_thread(
+                self._write,
+                [chunk for _, chunk, _ in buffer],
+                [embedding for _, _, embedding in buffer]
+            )
+        except Exception as e:
+            failed_files.update(file_index for file_index, _, _ in buffer)
+            job.failed_chunks += len(buffer)
+            job.errors.append(f"Vector store write of {len(buffer)} chunks failed: {e}")
+            logger.error(f"Vector store write failed for job {job.job_id}: {e}")
+            return
+        
+        job.stored_chunks += len(buffer)
+        for file_index, _, _ in buffer:
+            if stored_per_file.get(file_index, 0) == 0:
+                job.processed_files += 1
+            stored_per_file[file_index] = stored_per_file.get(file_index, 0) + 1
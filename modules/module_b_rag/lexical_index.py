@@ -0,0 +1,268 @@
+"""
+Lexical index for RAG Knowledge Vault.
+BM25 inverted index over chunk text for exact command, flag and unit name lookups.
+"""
+
+import json
+import logging
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Words with their flag dashes and inner punctuation: ss, -tulpn, --vacuum-time,
+# nginx.service, /etc/fstab, ext4
+_TOKEN_RE = re.compile(r"-{0,2}[\w/][\w.\-/:@+]*")
+_PART_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into index terms.
+    
+    Compound tokens are kept whole and additionally split into their word
+    parts, so "--vacuum-time" matches both the exact flag and prose about
+    vacuum time.
+    
+    Args:
+        text: Text to tokenize
+    
+    Returns:
+        List of lowercase terms (with repetitions)
+    """
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        token = token.rstrip(".:/-")
+        if not token:
+            continue
+        terms.append(token)
+        parts = _PART_RE.findall(token)
+        if len(parts) > 1 or (parts and parts[0] != token):
+            terms.extend(parts)
+    return terms
+
+
+class LexicalIndex:
+    """
+    Incrementally maintained BM25 index of document chunks.
+    
+    Postings live in memory (term -> {chunk id: term frequency}); each
+    chunk's term counts are also written to SQLite so the index is
+    rebuilt from disk on restart instead of re-tokenizing the corpus.
+    Adding or removing a chunk touches only its own terms.
+    """
+    
+    def __init__(self, path: Optional[str] = None, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize lexical index.
+        
+        Args:
+            path: SQLite file for persistence (in-memory only if None)
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization
+        """
+        self.path = Path(path) if path else None
+        self.k1 = k1
+        self.b = b
+        
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._sources: Dict[str, str] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        
+        if self.path is not None:
+            self._load()
+    
+    def __len__(self) -> int:
+        return len(self._lengths)
+    
+    def _get_connection(self) -> Optional[sqlite3.Connection]:
+        if self.path is None:
+            return None
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS lexical_chunks (
+                    chunk_id TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    terms TEXT NOT NULL,
+                    length INTEGER NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_lexical_chunks_source ON lexical_chunks(source)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+    
+    def _load(self):
+        """Rebuild the in-memory postings from the SQLite file."""
+        try:
+            conn = self._get_connection()
+            for chunk_id, source, terms, length in conn.execute(
+                    "SELECT chunk_id, source, terms, length FROM lexical_chunks"):
+                self._index(chunk_id, source, json.loads(terms), length)
+            if self._lengths:
+                logger.info(f"Loaded lexical index with {len(self._lengths)} chunks from {self.path}")
+        except Exception as e:
+            logger.warning(f"Lexical index could not be loaded, starting empty: {e}")
+    
+    def _index(self, chunk_id: str, source: str, counts: Dict[str, int], length: int):
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[chunk_id] = tf
+        self._lengths[chunk_id] = length
+        self._sources[chunk_id] = source
+        self._total_length += length
+    
+    def _unindex(self, chunk_id: str, counts: Iterable[str]):
+        for term in counts:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(chunk_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(chunk_id, 0)
+        self._sources.pop(chunk_id, None)
+    
+    def add_batch(self, chunks: List[Tuple[str, str, str]]):
+        """
+        Index chunks (replacing existing entries with the same id).
+        
+        Args:
+            chunks: (chunk id, source, content) tuples
+        """
+        rows = []
+        with self._lock:
+            for chunk_id, source, content in chunks:
+                terms = tokenize(content)
+                counts = dict(Counter(terms))
+                if chunk_id in self._lengths:
+                    self._unindex(chunk_id, self._terms_of(chunk_id))
+                self._index(chunk_id, source, counts, len(terms))
+                rows.append((chunk_id, source, json.dumps(counts), len(terms)))
+            
+            conn = self._get_connection()
+            if conn is not None and rows:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO lexical_chunks (chunk_id, source, terms, length) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+                conn.commit()
+    
+    def _terms_of(self, chunk_id: str) -> List[str]:
+        """Terms of an indexed chunk (from disk if persisted, else by scanning postings)."""
+        conn = self._get_connection()
+        if conn is not None:
+            row = conn.execute("SELECT terms FROM lexical_chunks WHERE chunk_id = ?", (chunk_id,)).fetchone()
+            if row:
+                return list(json.loads(row[0]))
+        return [term for term, postings in self._postings.items() if chunk_id in postings]
+    
+    def remove(self, chunk_ids: List[str]) -> int:
+        """
+        Remove chunks from the index.
+        
+        Args:
+            chunk_ids: Ids to remove
+        
+        Returns:
+            Number of chunks removed
+        """
+        removed = 0
+        with self._lock:
+            for chunk_id in chunk_ids:
+                if chunk_id in self._lengths:
+                    self._unindex(chunk_id, self._terms_of(chunk_id))
+                    removed += 1
+            conn = self._get_connection()
+            if conn is not None and chunk_ids:
+                conn.executemany("DELETE FROM lexical_chunks WHERE chunk_id = ?", [(i,) for i in chunk_ids])
+                conn.commit()
+        return removed
+    
+    def remove_source(self, source: str) -> int:
+        """Remove all chunks of a source; returns the number removed."""
+        return self.remove([chunk_id for chunk_id, s in list(self._sources.items()) if s == source])
+    
+    def clear(self):
+        """Drop the whole index."""
+        with self._lock:
+            self._postings.clear()
+            self._lengths.clear()
+            self._sources.clear()
+            self._total_length = 0
+            conn = self._get_connection()
+            if conn is not None:
+                conn.execute("DELETE FROM lexical_chunks")
+                conn.commit()
+    
+    def search(self, query: str, top_k: int = 10, source: Optional[str] = None,
+               min_coverage: float = 0.5) -> List[Tuple[str, float]]:
+        """
+        Rank chunks by BM25 against the query.
+        
+        Args:
+            query: Query text
+            top_k: Maximum number of hits
+            source: Only return chunks of this source
+            min_coverage: Minimum share of the query's IDF weight a chunk has
+                to match; keeps chunks that only share common words out
+        
+        Returns:
+            (chunk id, BM25 score) tuples, best first
+        """
+        query_terms = set(tokenize(query))
+        with self._lock:
+            n = len(self._lengths)
+            if not n or not query_terms:
+                return []
+            avg_length = self._total_length / n
+            
+            idf = {}
+            for term in query_terms:
+                df = len(self._postings.get(term, ()))
+                idf[term] = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            total_idf = sum(idf.values()) or 1.0
+            
+            scores: Dict[str, float] = {}
+            matched: Dict[str, float] = {}
+            for term in query_terms:
+                for chunk_id, tf in self._postings.get(term, {}).items():
+                    if source is not None and self._sources.get(chunk_id) != source:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[chunk_id] / avg_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf[term] * tf * (self.k1 + 1) / (tf + norm)
+                    matched[chunk_id] = matched.get(chunk_id, 0.0) + idf[term]
+        
+        hits = [(chunk_id, score) for chunk_id, score in scores.items()
+                if matched[chunk_id] / total_idf >= min_coverage]
+        hits.sort(key=lambda hit: hit[1], reverse=True)
+        return hits[:top_k]
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get index statistics.
+        
+        Returns:
+            Dictionary with chunk and term counts
+        """
+        return {
+            "chunks": len(self._lengths),
+            "terms": len(self._postings),
+            "avg_chunk_terms": self._total_length / len(self._lengths) if self._lengths else 0.0,
+            "path": str(self.path) if self.path else None
+        }
+    
+    def close(self):
+        """Close the SQLite connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
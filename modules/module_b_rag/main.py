@@ -4,6 +4,7 @@ Document processing, embedding generation, and semantic search using ChromaDB.
 """
 
 import os
+import asyncio
 import logging
 from pathlib import Path
 from typing import List, Dict, Any, Optional
@@ -11,11 +12,19 @@ from fastapi import FastAPI, HTTPException, UploadFile, File
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from shared.models import HealthStatus
+from shared.config import ConfigManager
+from shared.health import get_health_registry
 from modules.module_b_rag.document_loader import DocumentLoader
 from modules.module_b_rag.chunk_processor import ChunkProcessor
 from modules.module_b_rag.embedding_manager import EmbeddingManager
 from modules.module_b_rag.vector_store import VectorStore
 from modules.module_b_rag.retriever import Retriever
+from modules.module_b_rag.embedding_cache import EmbeddingCache
+from modules.module_b_rag.ingestion_pipeline import IngestionPipeline
+from modules.module_b_rag.chunk_manifest import ChunkManifest
+from modules.module_b_rag.ingestion_daemon import IngestionDaemon
+from modules.module_b_rag.rerank_service import get_rerank_service
+from modules.module_b_rag.query_rewriter import QueryRewriter
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -41,13 +50,36 @@ document_loader = DocumentLoader()
 chunk_processor = ChunkProcessor()
 embedding_manager = EmbeddingManager()
 vector_store = VectorStore(str(CHROMADB_DIR))
-retriever = Retriever(vector_store, embedding_manager)
+retriever = Retriever(
+    vector_store,
+    embedding_manager,
+    EmbeddingCache(max_entries=1024, disk_path=str(DATA_DIR / "query_embedding_cache.db"))
+)
+chunk_manifest = ChunkManifest(str(DATA_DIR / "chunk_manifest.db"))
+ingestion_pipeline = IngestionPipeline(
+    document_loader, chunk_processor, embedding_manager, vector_store, manifest=chunk_manifest
+)
+rerank_service = get_rerank_service()
+query_rewriter = QueryRewriter()
+system_config = ConfigManager().load_config()
+ingestion_daemon = IngestionDaemon.from_config(ingestion_pipeline, system_config.ingestion)
+
+# Candidates retrieved per requested result when reranking
+RERANK_CANDIDATE_FACTOR = 4
+RERANK_MAX_CANDIDATES = 50
+
+# Dependency health, probed in the background once the app has started
+health_registry = get_health_registry()
+health_registry.configure(system_config.health)
+health_registry.register("ollama", lambda: embedding_manager.health_check(pull_missing=False))
+health_registry.register("vector_store", lambda: asyncio.to_thread(vector_store.health_check))
 
 
 class UploadRequest(BaseModel):
     """Request model for document upload."""
     files: List[str] = Field(..., description="Base64 encoded file contents")
     metadata: Dict[str, Any] = Field(default_factory=dict, description="File metadata")
+    wait: bool = Field(default=True, description="Wait for ingestion to finish instead of returning the job id immediately")
 
 
 class UploadResponse(BaseModel):
@@ -56,6 +88,9 @@ class UploadResponse(BaseModel):
     processed_files: int = Field(..., description="Number of files processed")
     total_chunks: int = Field(..., description="Total chunks created")
     message: str = Field(..., description="Status message")
+    job_id: Optional[str] = Field(default=None, description="Ingestion job id for /jobs/{job_id}")
+    unchanged_chunks: int = Field(default=0, description="Chunks already embedded under the current model (skipped)")
+    deleted_chunks: int = Field(default=0, description="Outdated chunks removed from re-uploaded documents")
 
 
 class SearchRequest(BaseModel):
@@ -63,6 +98,9 @@ class SearchRequest(BaseModel):
     query: str = Field(..., description="Search query")
     top_k: int = Field(default=3, description="Number of results to return")
     threshold: float = Field(default=0.6, description="Similarity threshold")
+    rerank: bool = Field(default=False, description="Rerank retrieved candidates with the cross-encoder")
+    multi_query: bool = Field(default=False, description="Also search with rewritten variants (e.g. German terms translated)")
+    max_variants: int = Field(default=3, ge=1, le=6, description="Maximum number of query variants including the original")
 
 
 class SearchSnippet(BaseModel):
@@ -79,17 +117,35 @@ class SearchResponse(BaseModel):
     query: str = Field(..., description="Original query")
     total_results: int = Field(..., description="Total number of results")
     processing_time: float = Field(..., description="Search processing time")
+    stage_timings: Dict[str, float] = Field(default_factory=dict, description="Seconds per search stage (rewrite, embed, retrieve, rerank)")
+    query_variants: List[str] = Field(default_factory=list, description="Query variants searched (multi-query mode)")
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Start background health probing and, if enabled, the directory watch."""
+    health_registry.start()
+    if system_config.ingestion.get("enabled", False):
+        ingestion_daemon.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background health probing, the directory watch and the rerank worker."""
+    await health_registry.stop()
+    await ingestion_daemon.stop()
+    await asyncio.to_thread(rerank_service.close)
 
 
 @app.get("/health", response_model=HealthStatus)
 async def health_check():
-    """Health check endpoint with component status."""
+    """Health check endpoint with component status (cached by the health registry)."""
     try:
         # Check if ChromaDB is accessible
-        vector_store_status = vector_store.health_check()
+        vector_store_status = await health_registry.check("vector_store")
         
         # Check if Ollama embedding service is available
-        embedding_status = await embedding_manager.health_check()
+        embedding_status = await health_registry.check("ollama")
         
         if vector_store_status and embedding_status:
             return HealthStatus(status="ok", version="1.0.0")
@@ -124,42 +180,21 @@ async def upload_documents(request: UploadRequest):
                 detail="Maximum 5 files allowed per upload"
             )
         
-        processed_files = 0
-        total_chunks = 0
+        # Decode, chunk, embed and store run as overlapping pipeline stages
+        job = ingestion_pipeline.submit(request.files, request.metadata)
         
-        for i, file_content in enumerate(request.files):
-            try:
-                # Extract metadata for this file
-                file_metadata = request.metadata.copy()
-                file_metadata.update({
-                    "file_index": i,
-                    "upload_timestamp": str(Path().cwd())
-                })
-                
-                # Load and validate document
-                document = document_loader.load_from_base64(
-                    file_content, 
-                    file_metadata
-                )
-                
-                # Process into chunks
-                chunks = chunk_processor.process_document(document)
-                
-                # Generate embeddings and store
-                for chunk in chunks:
-                    embedding = await embedding_manager.generate_embedding(chunk.content)
-                    vector_store.add_chunk(chunk, embedding)
-                
-                processed_files += 1
-                total_chunks += len(chunks)
-                
-                logger.info(f"Processed file {i+1}: {len(chunks)} chunks created")
-                
-            except Exception as e:
-                logger.error(f"Failed to process file {i+1}: {e}")
-                continue
+        if not request.wait:
+            return UploadResponse(
+                status="accepted",
+                processed_files=0,
+                total_chunks=0,
+                message=f"Upload queued as job {job.job_id}",
+                job_id=job.job_id
+            )
+        
+        job = await ingestion_pipeline.wait(job.job_id)
         
-        if processed_files == 0:
+        if job.processed_files == 0:
             raise HTTPException(
                 status_code=400,
                 detail="No files could be processed successfully"
@@ -167,9 +202,15 @@ async def upload_documents(request: UploadRequest):
         
         return UploadResponse(
             status="uploaded",
-            processed_files=processed_files,
-            total_chunks=total_chunks,
-            message=f"Successfully processed {processed_files} files into {total_chunks} chunks"
+            processed_files=job.processed_files,
+            total_chunks=job.stored_chunks,
+            message=(
+                f"Successfully processed {job.processed_files} files into {job.stored_chunks} new chunks "
+                f"({job.unchanged_chunks} unchanged, {job.deleted_chunks} outdated removed)"
+            ),
+            job_id=job.job_id,
+            unchanged_chunks=job.unchanged_chunks,
+            deleted_chunks=job.deleted_chunks
         )
         
     except HTTPException:
@@ -182,6 +223,30 @@ async def upload_documents(request: UploadRequest):
         )
 
 
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Report progress of an ingestion job.
+    
+    Args:
+        job_id: Job id returned by /upload
+        
+    Returns:
+        Job state with per-stage counters
+        
+    Raises:
+        HTTPException: If the job is unknown
+    """
+    job = ingestion_pipeline.get_job(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Job {job_id} not found"
+        )
+    
+    return job.to_dict()
+
+
 @app.post("/search", response_model=SearchResponse)
 async def search_documents(request: SearchRequest):
     """
@@ -212,14 +277,38 @@ async def search_documents(request: SearchRequest):
                 detail="Query too long (max 1000 characters)"
             )
         
-        # Perform semantic search
-        results = await retriever.search(
-            query=request.query,
-            top_k=request.top_k,
-            threshold=request.threshold
-        )
+        # Perform semantic search (more candidates if they get reranked)
+        stage_timings: Dict[str, float] = {}
+        candidates = request.top_k
+        if request.rerank:
+            candidates = min(max(request.top_k * RERANK_CANDIDATE_FACTOR, request.top_k), RERANK_MAX_CANDIDATES)
+        variants = []
+        if request.multi_query:
+            rewrite_start = time.time()
+            variants = await query_rewriter.generate_variants(request.query, max_variants=request.max_variants)
+            stage_timings["rewrite"] = round(time.time() - rewrite_start, 4)
+            results = await retriever.multi_query_search(
+                query=request.query,
+                variants=variants,
+                top_k=candidates,
+                threshold=request.threshold,
+                stage_timings=stage_timings
+            )
+        else:
+            results = await retriever.search(
+                query=request.query,
+                top_k=candidates,
+                threshold=request.threshold,
+                stage_timings=stage_timings
+            )
+        
+        if request.rerank and results:
+            rerank_start = time.time()
+            results = await rerank_service.rerank(request.query, results, top_k=request.top_k)
+            stage_timings["rerank"] = round(time.time() - rerank_start, 4)
         
         processing_time = time.time() - start_time
+        stage_timings["total"] = round(processing_time, 4)
         
         # Convert results to response format
         snippets = [
@@ -227,7 +316,8 @@ async def search_documents(request: SearchRequest):
                 content=result["content"],
                 source=result["source"],
                 score=result["score"],
-                metadata=result.get("metadata", {})
+                metadata={**result.get("metadata", {}), "rerank_score": result["rerank_score"]}
+                if "rerank_score" in result else result.get("metadata", {})
             )
             for result in results
         ]
@@ -238,7 +328,9 @@ async def search_documents(request: SearchRequest):
             snippets=snippets,
             query=request.query,
             total_results=len(snippets),
-            processing_time=processing_time
+            processing_time=processing_time,
+            stage_timings=stage_timings,
+            query_variants=[variant["query"] for variant in variants]
         )
         
     except HTTPException:
@@ -255,8 +347,8 @@ async def search_documents(request: SearchRequest):
 async def get_status():
     """Get detailed module status information."""
     try:
-        vector_store_status = vector_store.health_check()
-        embedding_status = await embedding_manager.health_check()
+        vector_store_status = await health_registry.check("vector_store")
+        embedding_status = await health_registry.check("ollama")
         
         # Get collection statistics
         stats = vector_store.get_statistics()
@@ -275,9 +367,14 @@ async def get_status():
                 "embedding_service": {
                     "available": embedding_status,
                     "model": "nomic-embed-text"
-                }
+                },
+                "query_embedding_cache": retriever.embedding_cache.get_statistics(),
+                "chunk_manifest": chunk_manifest.get_statistics(),
+                "reranker": rerank_service.get_statistics(),
+                "ingestion_daemon": ingestion_daemon.get_statistics()
             },
-            "endpoints": ["/health", "/upload", "/search", "/status"],
+            "health": health_registry.get_status(),
+            "endpoints": ["/health", "/upload", "/jobs/{job_id}", "/search", "/status"],
             "limits": {
                 "max_files_per_upload": 5,
                 "max_total_size_mb": 30,
@@ -102,7 +102,16 @@ class QueryRewriter:
                 "weight": 1.0
             })
             
-            # 2. Expanded query (if enabled)
+            # 2. German terms translated to English (the docs are mostly English)
+            translated_query = self._translate_german(normalized_query)
+            if translated_query != normalized_query:
+                variations.append({
+                    "query": translated_query,
+                    "type": "translated",
+                    "weight": 0.9
+                })
+            
+            # 3. Expanded query (if enabled)
             if expand_terms:
                 expanded_query = self._expand_terms(normalized_query)
                 if expanded_query != normalized_query:
@@ -112,7 +121,7 @@ class QueryRewriter:
                         "weight": 0.8
                     })
             
-            # 3. Context-enhanced query
+            # 4. Context-enhanced query
             if context:
                 context_query = self._add_context(normalized_query, context)
                 variations.append({
@@ -121,7 +130,7 @@ class QueryRewriter:
                     "weight": 0.9
                 })
             
-            # 4. Synonym variations
+            # 5. Synonym variations
             synonym_queries = self._generate_synonyms(normalized_query)
             for syn_query in synonym_queries[:2]:  # Limit to 2 synonym variations
                 variations.append({
@@ -130,7 +139,7 @@ class QueryRewriter:
                     "weight": 0.7
                 })
             
-            # 5. Mathematical query enhancement (if applicable)
+            # 6. Mathematical query enhancement (if applicable)
             if self._is_mathematical_query(query):
                 math_query = self._enhance_mathematical_query(normalized_query)
                 if math_query != normalized_query:
@@ -202,12 +211,66 @@ class QueryRewriter:
             for expansion_dict in [self.linux_expansions, self.concept_expansions, 
                                  self.math_expansions, self.german_english]:
                 if word in expansion_dict:
-                    # Add the first expansion term
-                    expanded_terms.append(expansion_dict[word][0])
+                    # Add the first expansion term (German mappings are single words)
+                    expansion = expansion_dict[word]
+                    expanded_terms.append(expansion if isinstance(expansion, str) else expansion[0])
                     break
         
         return ' '.join(expanded_terms)
     
+    def _translate_german(self, query: str) -> str:
+        """
+        Replace known German terms with their English counterpart.
+        
+        Compounds and inflections of a known term keep the whole word,
+        e.g. "festplattenbelegung" becomes "disk festplattenbelegung".
+        """
+        translated = []
+        for word in query.split():
+            if word in self.german_english:
+                translated.append(self.german_english[word])
+                continue
+            prefix = next((german for german in self.german_english
+                           if word.startswith(german) and len(word) > len(german)), None)
+            if prefix:
+                translated.append(f"{self.german_english[prefix]} {word}")
+            else:
+                translated.append(word)
+        return ' '.join(translated)
+    
+    async def generate_variants(self, query: str, max_variants: int = 3,
+                                context: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Build the query variants for multi-query retrieval.
+        
+        The original query always comes first (unnormalized, so umlauts
+        reach the embedding model); rewrites that only differ in
+        normalization are dropped.
+        
+        Args:
+            query: Original query
+            max_variants: Maximum number of variants including the original
+            context: Optional context to consider
+        
+        Returns:
+            List of {"query", "type", "weight"} dicts, best first
+        """
+        rewrite = await self.rewrite_query(query, context)
+        variants = [{"query": query.strip(), "type": "original", "weight": 1.0}]
+        seen = {self._normalize_query(query)}
+        
+        rewrites = [v for v in rewrite["variations"] if v["type"] not in ("normalized", "original")]
+        rewrites.sort(key=lambda v: v["weight"], reverse=True)
+        for variation in rewrites:
+            if len(variants) >= max_variants:
+                break
+            if variation["query"] in seen:
+                continue
+            seen.add(variation["query"])
+            variants.append({**variation, "weight": min(variation["weight"], 1.0)})
+        
+        return variants
+    
     def _add_context(self, query: str, context: str) -> str:
         """Add context to the query."""
         # Simple context addition - can be made more sophisticated
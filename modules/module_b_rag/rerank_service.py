@@ -0,0 +1,263 @@
+"""
+Rerank service for RAG Knowledge Vault.
+Micro-batches cross-encoder scoring of concurrent searches on a worker thread.
+"""
+
+import asyncio
+import hashlib
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+
+from modules.module_b_rag.reranker import Reranker
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _RerankJob:
+    """Pairs of one request waiting for the worker thread."""
+    pairs: List[Tuple[str, str]]
+    future: asyncio.Future
+    loop: asyncio.AbstractEventLoop
+
+
+class RerankService:
+    """
+    Asynchronous front end of a Reranker.
+    
+    Requests put their (query, chunk) pairs on a queue and await a future.
+    A single daemon thread collects pairs from concurrent requests until
+    max_batch_size pairs are waiting or max_wait has passed since the first
+    one, scores them in one predict call and resolves the futures through
+    their event loop. The event loop never runs the model, and the model
+    is only loaded on the first rerank request.
+    
+    Scores are cached per (query hash, chunk id), so a repeated search only
+    scores chunks it has not seen for that query yet.
+    """
+    
+    def __init__(self, reranker: Optional[Reranker] = None, max_batch_size: int = 64,
+                 max_wait: float = 0.005, cache_size: int = 10000):
+        """
+        Initialize rerank service (the worker thread starts on first use).
+        
+        Args:
+            reranker: Reranker to score with (default cross-encoder if None)
+            max_batch_size: Maximum number of pairs per predict call
+            max_wait: Seconds to wait for more requests after the first one
+            cache_size: Maximum number of cached (query, chunk) scores
+        """
+        self.reranker = reranker or Reranker()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.cache_size = cache_size
+        
+        self._queue: "queue.Queue[Optional[_RerankJob]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
+        # Statistics
+        self.requests = 0
+        self.batches = 0
+        self.scored_pairs = 0
+        self.cache_hits = 0
+        self.fallbacks = 0
+        self.max_batch_seen = 0
+    
+    @staticmethod
+    def cache_key(query: str, candidate: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        Build the score cache key of a candidate for a query.
+        
+        Args:
+            query: Search query
+            candidate: Search hit (keyed by its chunk id, or its content if it has none)
+        
+        Returns:
+            (query hash, chunk id) tuple
+        """
+        query_hash = hashlib.sha256(" ".join(query.split()).encode("utf-8")).hexdigest()[:16]
+        chunk_id = candidate.get("id") or hashlib.sha256(candidate["content"].encode("utf-8")).hexdigest()[:16]
+        return query_hash, chunk_id
+    
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="rerank-worker", daemon=True)
+                self._worker.start()
+    
+    async def score(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        """
+        Score (query, document) pairs in the next micro-batch.
+        
+        Args:
+            pairs: Pairs to score
+        
+        Returns:
+            One cross-encoder score per pair
+        
+        Raises:
+            RuntimeError: If the model is not available
+        """
+        if not pairs:
+            return []
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._ensure_worker()
+        self._queue.put(_RerankJob(pairs=list(pairs), future=future, loop=loop))
+        return await future
+    
+    async def rerank(self, query: str, candidates: List[Dict[str, Any]], top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Rerank search hits with the cross-encoder.
+        
+        Args:
+            query: Search query
+            candidates: Search hits with 'content' (and 'id' for caching)
+            top_k: Number of results to return
+        
+        Returns:
+            Best candidates (copies) with 'rerank_score' and 'original_score'
+        """
+        self.requests += 1
+        candidates = [candidate for candidate in candidates if candidate.get("content", "").strip()]
+        if not candidates:
+            return []
+        
+        keys = [self.cache_key(query, candidate) for candidate in candidates]
+        scores: List[Optional[float]] = []
+        with self._cache_lock:
+            for key in keys:
+                score = self._cache.get(key)
+                if score is not None:
+                    self._cache.move_to_end(key)
+                    self.cache_hits += 1
+                scores.append(score)
+        
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            try:
+                if not self.reranker.available:
+                    raise RuntimeError("Reranker model not available")
+                new_scores = await self.score([(query, candidates[i]["content"]) for i in missing])
+            except RuntimeError as e:
+                # No cross-encoder: keep the retrieval ranking rather than
+                # dropping hits on a word-overlap cutoff
+                logger.debug(f"Reranker unavailable, keeping retrieval order: {e}")
+                self.fallbacks += 1
+                return candidates[:top_k]
+            
+            with self._cache_lock:
+                for i, score in zip(missing, new_scores):
+                    scores[i] = score
+                    self._cache[keys[i]] = score
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        
+        return self.reranker.apply_scores(candidates, scores, top_k)
+    
+    def _collect_batch(self, first: _RerankJob) -> List[_RerankJob]:
+        """Gather jobs arriving within max_wait of the first one, up to max_batch_size pairs."""
+        jobs = [first]
+        size = len(first.pairs)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if job is None:
+                # Shutdown sentinel: finish this batch, then stop
+                self._queue.put(None)
+                break
+            jobs.append(job)
+            size += len(job.pairs)
+        return jobs
+    
+    def _run(self):
+        """Worker thread loop."""
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            jobs = [job for job in self._collect_batch(first) if not job.future.done()]
+            if not jobs:
+                continue
+            
+            pairs = [pair for job in jobs for pair in job.pairs]
+            try:
+                scores = self.reranker.predict(pairs)
+                error = None
+            except Exception as e:
+                scores, error = None, e
+            
+            self.batches += 1
+            self.scored_pairs += len(pairs)
+            self.max_batch_seen = max(self.max_batch_seen, len(pairs))
+            
+            offset = 0
+            for job in jobs:
+                if error is not None:
+                    result = RuntimeError(str(error))
+                else:
+                    result = scores[offset:offset + len(job.pairs)]
+                offset += len(job.pairs)
+                job.loop.call_soon_threadsafe(self._resolve, job.future, result)
+    
+    @staticmethod
+    def _resolve(future: asyncio.Future, result):
+        if future.done():  # Request was cancelled meanwhile
+            return
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get rerank service statistics.
+        
+        Returns:
+            Dictionary with batching and cache counters
+        """
+        return {
+            **self.reranker.get_model_info(),
+            "requests": self.requests,
+            "batches": self.batches,
+            "scored_pairs": self.scored_pairs,
+            "avg_batch_size": self.scored_pairs / self.batches if self.batches else 0.0,
+            "max_batch_size_seen": self.max_batch_seen,
+            "cache_entries": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "fallbacks": self.fallbacks,
+            "queued": self._queue.qsize()
+        }
+    
+    def close(self, timeout: float = 5.0):
+        """Stop the worker thread after the queued batches."""
+        worker = self._worker
+        if worker is not None and worker.is_alive():
+            self._queue.put(None)
+            worker.join(timeout)
+        self._worker = None
+
+
+# Global service instance (the cross-encoder loads on the first rerank request)
+rerank_service = RerankService()
+
+
+def get_rerank_service() -> RerankService:
+    """Get the global rerank service instance."""
+    return rerank_service
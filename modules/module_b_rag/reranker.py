@@ -4,6 +4,7 @@ Cross-encoder reranking using sentence-transformers.
 """
 
 import logging
+import threading
 import time
 from typing import List, Dict, Any, Optional, Tuple
 import asyncio
@@ -19,11 +20,17 @@ except ImportError:
 
 
 class Reranker:
-    """Cross-encoder reranker for improving search result quality."""
+    """
+    Cross-encoder reranker for improving search result quality.
+    
+    The model is loaded on first use (load_model), not at import time.
+    For concurrent searches use RerankService, which batches the pairs of
+    many requests into one predict call on a worker thread.
+    """
     
     def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2", score_cutoff: float = 0.3):
         """
-        Initialize reranker with cross-encoder model.
+        Initialize reranker (the cross-encoder model is loaded lazily).
         
         Args:
             model_name: HuggingFace model name for cross-encoder
@@ -33,18 +40,58 @@ class Reranker:
         self.score_cutoff = score_cutoff
         self.model = None
         self._model_loaded = False
+        self._load_attempted = False
+        self._load_lock = threading.Lock()
         
-        # Try to load model
-        if SENTENCE_TRANSFORMERS_AVAILABLE:
+        if not SENTENCE_TRANSFORMERS_AVAILABLE:
+            logger.warning("sentence-transformers not available. Install with: pip install sentence-transformers")
+    
+    @property
+    def available(self) -> bool:
+        """True if a cross-encoder is loaded or may still be loaded."""
+        return self._model_loaded or (SENTENCE_TRANSFORMERS_AVAILABLE and not self._load_attempted)
+    
+    def load_model(self) -> bool:
+        """
+        Load the cross-encoder model if not done yet (blocking, call from a worker thread).
+        
+        Returns:
+            True if the model is ready
+        """
+        if self._model_loaded:
+            return True
+        with self._load_lock:
+            if self._model_loaded or self._load_attempted:
+                return self._model_loaded
+            self._load_attempted = True
+            if not SENTENCE_TRANSFORMERS_AVAILABLE:
+                return False
             try:
-                self.model = CrossEncoder(model_name)
+                start_time = time.time()
+                self.model = CrossEncoder(self.model_name)
                 self._model_loaded = True
-                logger.info(f"Reranker loaded: {model_name}")
+                logger.info(f"Reranker loaded: {self.model_name} in {time.time() - start_time:.1f}s")
             except Exception as e:
-                logger.error(f"Failed to load reranker model {model_name}: {e}")
+                logger.error(f"Failed to load reranker model {self.model_name}: {e}")
                 self._model_loaded = False
-        else:
-            logger.warning("sentence-transformers not available. Install with: pip install sentence-transformers")
+        return self._model_loaded
+    
+    def predict(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        """
+        Score query-document pairs with the cross-encoder (blocking).
+        
+        Args:
+            pairs: (query, document) pairs
+        
+        Returns:
+            One score per pair
+        
+        Raises:
+            RuntimeError: If the model is not available
+        """
+        if not self.load_model():
+            raise RuntimeError("Reranker model not available")
+        return [float(score) for score in self.model.predict([list(pair) for pair in pairs])]
     
     async def rerank(self, query: str, candidates: List[Dict[str, Any]], top_k: int = 5) -> List[Dict[str, Any]]:
         """
@@ -61,7 +108,7 @@ class Reranker:
         if not candidates:
             return []
         
-        if not self._model_loaded:
+        if not self.available:
             # Fallback to original scoring
             logger.debug("Reranker not available, using fallback scoring")
             return await self._fallback_rerank(query, candidates, top_k)
@@ -70,32 +117,15 @@ class Reranker:
             start_time = time.time()
             
             # Prepare query-document pairs for cross-encoder
-            pairs = []
-            for candidate in candidates:
-                content = candidate.get('content', '')
-                if content.strip():
-                    pairs.append([query, content])
-            
-            if not pairs:
+            candidates = [candidate for candidate in candidates if candidate.get('content', '').strip()]
+            if not candidates:
                 return []
             
-            # Get cross-encoder scores
-            scores = self.model.predict(pairs)
-            
-            # Combine scores with candidates
-            scored_candidates = []
-            for i, (candidate, score) in enumerate(zip(candidates, scores)):
-                if score >= self.score_cutoff:
-                    candidate_copy = candidate.copy()
-                    candidate_copy['rerank_score'] = float(score)
-                    candidate_copy['original_score'] = candidate.get('score', 0.0)
-                    scored_candidates.append(candidate_copy)
-            
-            # Sort by rerank score (descending)
-            scored_candidates.sort(key=lambda x: x['rerank_score'], reverse=True)
-            
-            # Limit to top_k
-            results = scored_candidates[:top_k]
+            # Get cross-encoder scores off the event loop
+            scores = await asyncio.to_thread(
+                self.predict, [(query, candidate['content']) for candidate in candidates]
+            )
+            results = self.apply_scores(candidates, scores, top_k)
             
             rerank_time = time.time() - start_time
             logger.info(f"Reranked {len(candidates)} → {len(results)} results in {rerank_time:.3f}s")
@@ -107,6 +137,30 @@ class Reranker:
             # Fallback to original scoring
             return await self._fallback_rerank(query, candidates, top_k)
     
+    def apply_scores(self, candidates: List[Dict[str, Any]], scores: List[float], top_k: int) -> List[Dict[str, Any]]:
+        """
+        Attach rerank scores, drop candidates below the cutoff and sort.
+        
+        Args:
+            candidates: Candidates aligned with scores
+            scores: Cross-encoder score per candidate
+            top_k: Maximum number of results
+        
+        Returns:
+            Best candidates (copies) with 'rerank_score' and 'original_score'
+        """
+        scored_candidates = []
+        for candidate, score in zip(candidates, scores):
+            if score >= self.score_cutoff:
+                candidate_copy = candidate.copy()
+                candidate_copy['rerank_score'] = float(score)
+                candidate_copy['original_score'] = candidate.get('score', 0.0)
+                scored_candidates.append(candidate_copy)
+        
+        # Sort by rerank score (descending) and limit to top_k
+        scored_candidates.sort(key=lambda x: x['rerank_score'], reverse=True)
+        return scored_candidates[:top_k]
+    
     async def _fallback_rerank(self, query: str, candidates: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
         """
         Fallback reranking using simple text similarity.
@@ -169,7 +223,7 @@ class Reranker:
             "score_cutoff": self.score_cutoff,
             "model_loaded": self._model_loaded,
             "sentence_transformers_available": SENTENCE_TRANSFORMERS_AVAILABLE,
-            "fallback_mode": not self._model_loaded
+            "fallback_mode": not self.available
         }
     
     async def validate_reranking(self, test_queries: List[str], test_documents: List[str]) -> Dict[str, Any]:
@@ -3,31 +3,111 @@ Retriever for RAG Knowledge Vault.
 Performs semantic search and retrieval of relevant document chunks.
 """
 
+import asyncio
 import logging
 import time
+import numpy as np
 from typing import List, Dict, Any, Optional
 from modules.module_b_rag.vector_store import VectorStore
 from modules.module_b_rag.embedding_manager import EmbeddingManager
+from modules.module_b_rag.embedding_cache import EmbeddingCache
 
 logger = logging.getLogger(__name__)
 
 
 class Retriever:
-    """Handles semantic search and retrieval of document chunks."""
+    """
+    Handles semantic search and retrieval of document chunks.
     
-    def __init__(self, vector_store: VectorStore, embedding_manager: EmbeddingManager):
+    Searches are hybrid by default: the vector search and a BM25 search
+    over the chunk text run side by side and their rankings are merged
+    with reciprocal-rank fusion, so exact command, flag and unit names
+    (``ss -tulpn``, ``journalctl --vacuum-time``) are found even when
+    their embedding is not the closest.
+    """
+    
+    def __init__(self, vector_store: VectorStore, embedding_manager: EmbeddingManager,
+                 embedding_cache: Optional[EmbeddingCache] = None, hybrid: bool = True,
+                 rrf_k: int = 60):
         """
         Initialize retriever.
         
         Args:
             vector_store: Vector store instance for data retrieval
             embedding_manager: Embedding manager for query embedding
+            embedding_cache: Cache for query embeddings (in-memory only if omitted)
+            hybrid: Fuse lexical (BM25) hits into every search
+            rrf_k: Reciprocal-rank fusion constant (higher flattens rank differences)
         """
         self.vector_store = vector_store
         self.embedding_manager = embedding_manager
+        self.embedding_cache = embedding_cache or EmbeddingCache()
+        self.hybrid = hybrid
+        self.rrf_k = rrf_k
+    
+    async def embed_query(self, query: str) -> List[float]:
+        """
+        Get the embedding for a query, using the query embedding cache.
+        
+        Args:
+            query: Query text
+            
+        Returns:
+            Normalized embedding vector
+        """
+        model = self.embedding_manager.model
+        
+        embedding = self.embedding_cache.get_from_memory(model, query)
+        if embedding is None:
+            # The disk tier reads SQLite, keep it off the event loop
+            embedding = await asyncio.to_thread(self.embedding_cache.get, model, query)
+        if embedding is not None:
+            return embedding
+        
+        embedding = await self.embedding_manager.generate_embedding(query)
+        # The disk tier writes to SQLite, keep it off the event loop
+        await asyncio.to_thread(self.embedding_cache.put, model, query, embedding)
+        return embedding
+    
+    async def embed_queries(self, queries: List[str]) -> List[Optional[List[float]]]:
+        """
+        Get embeddings for several queries with one batched request for all cache misses.
+        
+        Args:
+            queries: Query texts
+            
+        Returns:
+            Embeddings aligned with queries (None where embedding failed)
+        """
+        model = self.embedding_manager.model
+        embeddings = [self.embedding_cache.get_from_memory(model, query) for query in queries]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        
+        if missing:
+            # The disk tier reads SQLite, keep it off the event loop
+            stored = await asyncio.to_thread(
+                self.embedding_cache.get_many, model, [queries[i] for i in missing]
+            )
+            for i, embedding in zip(missing, stored):
+                embeddings[i] = embedding
+            missing = [i for i in missing if embeddings[i] is None]
+        
+        if missing:
+            result = await self.embedding_manager.embed_batch([queries[i] for i in missing])
+            fresh = []
+            for i, embedding in zip(missing, result.embeddings):
+                if embedding is not None:
+                    embeddings[i] = embedding
+                    fresh.append((queries[i], embedding))
+            if fresh:
+                await asyncio.to_thread(self.embedding_cache.put_many, model, fresh)
+        
+        return embeddings
     
     async def search(self, query: str, top_k: int = 3, threshold: float = 0.6, 
-                    source_filter: Optional[str] = None) -> List[Dict[str, Any]]:
+                    source_filter: Optional[str] = None,
+                    include_embeddings: bool = False,
+                    stage_timings: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
         """
         Perform semantic search for relevant document chunks.
         
@@ -36,6 +116,8 @@ class Retriever:
             top_k: Maximum number of results to return
             threshold: Similarity threshold (0.0 to 1.0)
             source_filter: Optional filter by document source
+            include_embeddings: Also return the stored chunk embeddings
+            stage_timings: Optional dict that receives "embed" and "retrieve" seconds
             
         Returns:
             List of relevant chunks with content, source, and similarity scores
@@ -56,21 +138,51 @@ class Retriever:
             if threshold < 0.0 or threshold > 1.0:
                 threshold = 0.6
             
-            # Generate query embedding
-            query_embedding = await self.embedding_manager.generate_embedding(query)
+            # Generate query embedding (cached for repeated queries)
+            query_embedding = await self.embed_query(query)
+            embed_done = time.time()
             
             # Prepare metadata filter
             where_filter = None
             if source_filter:
                 where_filter = {"source": source_filter}
             
-            # Perform vector search
-            search_results = self.vector_store.search(
-                query_embedding=query_embedding,
-                top_k=top_k,
-                threshold=threshold,
-                where=where_filter
-            )
+            if self.hybrid:
+                # Vector and lexical search in parallel, fused by rank
+                vector_results, lexical_results = await asyncio.gather(
+                    asyncio.to_thread(
+                        self.vector_store.search,
+                        query_embedding=query_embedding,
+                        top_k=top_k * 2,
+                        threshold=threshold,
+                        where=where_filter,
+                        include_embeddings=include_embeddings
+                    ),
+                    asyncio.to_thread(
+                        self.vector_store.lexical_search,
+                        query,
+                        top_k=top_k * 2,
+                        source=source_filter,
+                        include_embeddings=True
+                    )
+                )
+                search_results = self._reciprocal_rank_fusion(
+                    vector_results, lexical_results, top_k, [query_embedding], include_embeddings
+                )
+            else:
+                # Perform vector search
+                search_results = await asyncio.to_thread(
+                    self.vector_store.search,
+                    query_embedding=query_embedding,
+                    top_k=top_k,
+                    threshold=threshold,
+                    where=where_filter,
+                    include_embeddings=include_embeddings
+                )
+            
+            if stage_timings is not None:
+                stage_timings["embed"] = round(embed_done - start_time, 4)
+                stage_timings["retrieve"] = round(time.time() - embed_done, 4)
             
             # Post-process results
             processed_results = []
@@ -81,6 +193,11 @@ class Retriever:
                     "score": result["score"],
                     "metadata": result.get("metadata", {})
                 }
+                if "id" in result:
+                    processed_result["id"] = result["id"]
+                
+                if include_embeddings:
+                    processed_result["embedding"] = result.get("embedding")
                 
                 # Add relevance indicators
                 processed_result["metadata"]["search_query"] = query
@@ -116,36 +233,37 @@ class Retriever:
             # Combine query and context for better search
             enhanced_query = f"{query} {context}".strip()
             
-            # Perform standard search with enhanced query
+            # Perform standard search with enhanced query; keep the stored
+            # chunk embeddings so re-ranking needs no further embedding calls
             results = await self.search(
                 query=enhanced_query,
                 top_k=top_k * 2,  # Get more results for re-ranking
-                threshold=threshold * 0.8  # Lower threshold for initial search
+                threshold=threshold * 0.8,  # Lower threshold for initial search
+                include_embeddings=True
             )
             
             # Re-rank results based on relevance to original query
             if len(results) > top_k:
                 # Generate embedding for original query
-                query_embedding = await self.embedding_manager.generate_embedding(query)
+                query_embedding = await self.embed_query(query)
                 
-                # Re-score results based on original query
-                rescored_results = []
-                for result in results:
-                    content_embedding = await self.embedding_manager.generate_embedding(result["content"])
-                    
-                    # Calculate similarity to original query
-                    similarity_results = await self.embedding_manager.similarity_search_embedding(
-                        query_embedding, [content_embedding], threshold=0.0
-                    )
-                    
-                    if similarity_results:
-                        result["score"] = similarity_results[0]["score"]
-                        result["metadata"]["context_enhanced"] = True
-                        rescored_results.append(result)
+                # Re-score all candidates in one matrix-vector product
+                candidates = [result for result in results if result.get("embedding") is not None]
+                scores = self._cosine_scores(
+                    query_embedding,
+                    [result["embedding"] for result in candidates]
+                )
+                
+                for result, score in zip(candidates, scores):
+                    result["score"] = float(score)
+                    result["metadata"]["context_enhanced"] = True
                 
                 # Sort by new scores and limit results
-                rescored_results.sort(key=lambda x: x["score"], reverse=True)
-                results = rescored_results[:top_k]
+                candidates.sort(key=lambda x: x["score"], reverse=True)
+                results = candidates[:top_k]
+            
+            for result in results:
+                result.pop("embedding", None)
             
             return results
             
@@ -154,6 +272,170 @@ class Retriever:
             # Fallback to regular search
             return await self.search(query, top_k, threshold)
     
+    async def multi_query_search(self, query: str, variants: List[Dict[str, Any]], top_k: int = 3,
+                                 threshold: float = 0.6, source_filter: Optional[str] = None,
+                                 stage_timings: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+        """
+        Search with several rewrites of a query at the cost of about one search.
+        
+        All variants are embedded in one batched request and their vector
+        searches run concurrently. Hits are deduplicated by chunk; a chunk
+        found by several variants keeps its best weighted similarity. With
+        hybrid retrieval the BM25 hits of the original query are fused in
+        by rank afterwards.
+        
+        Args:
+            query: Original query (used for the lexical search)
+            variants: {"query", "type", "weight"} dicts from QueryRewriter.generate_variants
+            top_k: Maximum number of results to return
+            threshold: Similarity threshold (0.0 to 1.0)
+            source_filter: Optional filter by document source
+            stage_timings: Optional dict that receives "embed" and "retrieve" seconds
+            
+        Returns:
+            List of relevant chunks; metadata "query_variants" lists the variant types that found each
+        """
+        if not query.strip():
+            return []
+        if not variants:
+            return await self.search(query, top_k, threshold, source_filter, stage_timings=stage_timings)
+        
+        start_time = time.time()
+        embeddings = await self.embed_queries([variant["query"] for variant in variants])
+        searched = [(variant, embedding) for variant, embedding in zip(variants, embeddings) if embedding is not None]
+        if not searched:
+            raise RuntimeError("Search failed: no query variant could be embedded")
+        embed_done = time.time()
+        
+        where_filter = {"source": source_filter} if source_filter else None
+        searches = [
+            asyncio.to_thread(
+                self.vector_store.search,
+                query_embedding=embedding,
+                top_k=top_k * 2,
+                threshold=threshold,
+                where=where_filter
+            )
+            for _, embedding in searched
+        ]
+        if self.hybrid:
+            searches.append(asyncio.to_thread(self.vector_store.lexical_search, query, top_k=top_k * 2,
+                                              source=source_filter, include_embeddings=True))
+        rankings = await asyncio.gather(*searches)
+        lexical_results = rankings.pop() if self.hybrid else []
+        
+        # Deduplicate and fuse the variant rankings by weighted similarity
+        fused: Dict[Any, Dict[str, Any]] = {}
+        for (variant, _), results in zip(searched, rankings):
+            for result in results:
+                key = result.get("id") or (result["source"], result["content"])
+                weighted = result["score"] * variant.get("weight", 1.0)
+                entry = fused.get(key)
+                if entry is None:
+                    result = {**result, "metadata": {**result.get("metadata", {}), "query_variants": []}}
+                    entry = fused[key] = {"result": result, "weighted": weighted}
+                elif weighted > entry["weighted"]:
+                    entry["result"]["score"] = result["score"]
+                    entry["weighted"] = weighted
+                entry["result"]["metadata"]["query_variants"].append(variant.get("type", "original"))
+        
+        ranked = sorted(fused.values(), key=lambda entry: entry["weighted"], reverse=True)
+        vector_results = [entry["result"] for entry in ranked]
+        if self.hybrid:
+            search_results = self._reciprocal_rank_fusion(
+                vector_results, lexical_results, top_k, [embedding for _, embedding in searched]
+            )
+        else:
+            search_results = vector_results[:top_k]
+        
+        if stage_timings is not None:
+            stage_timings["embed"] = round(embed_done - start_time, 4)
+            stage_timings["retrieve"] = round(time.time() - embed_done, 4)
+        
+        for result in search_results:
+            result["metadata"]["search_query"] = query
+            result["metadata"]["search_timestamp"] = time.time()
+        
+        logger.info(f"Multi-query search: '{query}' x{len(searched)} variants -> {len(search_results)} results "
+                    f"in {time.time() - start_time:.3f}s")
+        return search_results
+    
+    def _reciprocal_rank_fusion(self, vector_results: List[Dict[str, Any]],
+                                lexical_results: List[Dict[str, Any]], top_k: int,
+                                query_embeddings: List[List[float]],
+                                include_embeddings: bool = False) -> List[Dict[str, Any]]:
+        """
+        Merge vector and lexical rankings with reciprocal-rank fusion.
+        
+        Each hit scores sum(1 / (rrf_k + rank)) over the rankings it appears
+        in. Every hit reports its cosine similarity as "score": lexical-only
+        hits are scored against the query embeddings from their stored
+        embedding, so callers sorting by score compare like with like.
+        
+        Args:
+            vector_results: Vector search hits, best first
+            lexical_results: BM25 hits with stored embeddings, best first
+            top_k: Number of fused results to return
+            query_embeddings: Embeddings the vector search ran with (best one counts)
+            include_embeddings: Keep the stored embeddings in the results
+            
+        Returns:
+            Fused hits, best first, with metadata "retrieval" and "rrf_score"
+        """
+        fused: Dict[Any, Dict[str, Any]] = {}
+        for retrieval, results in (("vector", vector_results), ("lexical", lexical_results)):
+            for rank, result in enumerate(results, start=1):
+                key = result.get("id") or (result["source"], result["content"])
+                entry = fused.get(key)
+                if entry is None:
+                    entry = fused[key] = {"result": result, "rrf": 0.0, "retrieval": retrieval}
+                    if retrieval == "lexical":
+                        embedding = result.get("embedding")
+                        result["score"] = max(
+                            float(self._cosine_scores(query_embedding, [embedding])[0])
+                            for query_embedding in query_embeddings
+                        ) if embedding is not None else 0.0
+                else:
+                    entry["retrieval"] = "hybrid"
+                entry["rrf"] += 1.0 / (self.rrf_k + rank)
+        
+        ranked = sorted(fused.values(), key=lambda entry: entry["rrf"], reverse=True)[:top_k]
+        results = []
+        for entry in ranked:
+            result = entry["result"]
+            result.pop("bm25", None)
+            if not include_embeddings:
+                result.pop("embedding", None)
+            result.setdefault("metadata", {})
+            result["metadata"]["retrieval"] = entry["retrieval"]
+            result["metadata"]["rrf_score"] = entry["rrf"]
+            results.append(result)
+        return results
+    
+    @staticmethod
+    def _cosine_scores(query_embedding: List[float], embeddings: List[List[float]]) -> np.ndarray:
+        """
+        Cosine similarity of one query against many embeddings.
+        
+        Args:
+            query_embedding: Query embedding vector
+            embeddings: Candidate embedding vectors
+            
+        Returns:
+            Array of similarity scores aligned with embeddings
+        """
+        if not len(embeddings):
+            return np.zeros(0, dtype=np.float32)
+        
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        query_vec = np.asarray(query_embedding, dtype=np.float32)
+        
+        row_norms = np.linalg.norm(matrix, axis=1)
+        row_norms[row_norms == 0] = 1.0
+        query_norm = np.linalg.norm(query_vec) or 1.0
+        
+        return (matrix @ query_vec) / (row_norms * query_norm)
+    
     async def search_by_source(self, query: str, source: str, top_k: int = 3, 
                               threshold: float = 0.6) -> List[Dict[str, Any]]:
         """
@@ -216,6 +498,7 @@ class Retriever:
                 "embedding_model": embedding_info,
                 "search_capabilities": {
                     "semantic_search": True,
+                    "lexical_search": self.hybrid,
                     "contextual_search": True,
                     "source_filtering": True,
                     "similarity_matching": True
@@ -10,20 +10,29 @@ from typing import List, Dict, Any, Optional
 import chromadb
 from chromadb.config import Settings
 from modules.module_b_rag.chunk_processor import DocumentChunk
+from modules.module_b_rag.lexical_index import LexicalIndex
 
 logger = logging.getLogger(__name__)
 
 
 class VectorStore:
-    """Manages vector storage and retrieval using ChromaDB."""
+    """
+    Manages vector storage and retrieval using ChromaDB.
     
-    def __init__(self, persist_directory: str, collection_name: str = "documents"):
+    Every chunk is also added to a BM25 lexical index, persisted next to
+    the ChromaDB directory, for exact-token lookups (see lexical_search).
+    """
+    
+    def __init__(self, persist_directory: str, collection_name: str = "documents",
+                 lexical_index_path: Optional[str] = None):
         """
         Initialize vector store.
         
         Args:
             persist_directory: Directory for persistent storage
             collection_name: Name of the ChromaDB collection
+            lexical_index_path: SQLite file of the lexical index
+                (default: <persist_directory>_lexical.db)
         """
         self.persist_directory = Path(persist_directory)
         self.collection_name = collection_name
@@ -52,6 +61,28 @@ class VectorStore:
         except Exception as e:
             logger.error(f"Failed to initialize ChromaDB: {e}")
             raise RuntimeError(f"Vector store initialization failed: {str(e)}")
+        
+        if lexical_index_path is None:
+            lexical_index_path = str(self.persist_directory.parent / f"{self.persist_directory.name}_lexical.db")
+        self.lexical_index = LexicalIndex(lexical_index_path)
+        self._backfill_lexical_index()
+    
+    def _backfill_lexical_index(self, page_size: int = 1000):
+        """Index chunks stored before the lexical index existed."""
+        try:
+            total = self.collection.count()
+            if len(self.lexical_index) >= total:
+                return
+            
+            logger.info(f"Building lexical index for {total} stored chunks")
+            for offset in range(0, total, page_size):
+                page = self.collection.get(limit=page_size, offset=offset, include=["documents", "metadatas"])
+                self.lexical_index.add_batch([
+                    (chunk_id, (metadata or {}).get("source", "unknown"), document or "")
+                    for chunk_id, document, metadata in zip(page['ids'], page['documents'], page['metadatas'])
+                ])
+        except Exception as e:
+            logger.warning(f"Lexical index backfill failed: {e}")
     
     def health_check(self) -> bool:
         """
@@ -102,13 +133,14 @@ class VectorStore:
                 if key not in metadata and value is not None:
                     metadata[f"meta_{key}"] = str(value)
             
-            # Add to collection
-            self.collection.add(
+            # Add to collection (replacing a chunk with the same content-hashed id)
+            self.collection.upsert(
                 ids=[chunk_id],
                 embeddings=[embedding],
                 documents=[chunk.content],
                 metadatas=[metadata]
             )
+            self.lexical_index.add_batch([(chunk_id, chunk.source, chunk.content)])
             
             logger.debug(f"Added chunk {chunk_id} to vector store")
             return chunk_id
@@ -164,13 +196,16 @@ class VectorStore:
                 
                 metadatas.append(metadata)
             
-            # Add batch to collection
-            self.collection.add(
+            # Upsert: content-hashed ids re-embedded under a new model replace their old vectors
+            self.collection.upsert(
                 ids=ids,
                 embeddings=embeddings,
                 documents=documents,
                 metadatas=metadatas
             )
+            self.lexical_index.add_batch([
+                (chunk_id, chunk.source, chunk.content) for chunk_id, chunk in zip(ids, chunks)
+            ])
             
             logger.info(f"Added {len(chunks)} chunks to vector store in batch")
             return ids
@@ -180,7 +215,8 @@ class VectorStore:
             raise RuntimeError(f"Vector store batch add failed: {str(e)}")
     
     def search(self, query_embedding: List[float], top_k: int = 3, 
-               threshold: float = 0.6, where: Optional[Dict] = None) -> List[Dict[str, Any]]:
+               threshold: float = 0.6, where: Optional[Dict] = None,
+               include_embeddings: bool = False) -> List[Dict[str, Any]]:
         """
         Search for similar chunks using embedding.
         
@@ -189,17 +225,23 @@ class VectorStore:
             top_k: Number of results to return
             threshold: Similarity threshold (0.0 to 1.0)
             where: Optional metadata filter
+            include_embeddings: Also return each chunk's stored embedding
             
         Returns:
             List of search results with content, metadata, and scores
+            (plus "embedding" if include_embeddings is set)
         """
         try:
+            include = ["documents", "metadatas", "distances"]
+            if include_embeddings:
+                include.append("embeddings")
+            
             # Perform similarity search
             results = self.collection.query(
                 query_embeddings=[query_embedding],
                 n_results=min(top_k * 2, 50),  # Get more results to filter by threshold
                 where=where,
-                include=["documents", "metadatas", "distances"]
+                include=include
             )
             
             if not results['documents'] or not results['documents'][0]:
@@ -210,6 +252,9 @@ class VectorStore:
             documents = results['documents'][0]
             metadatas = results['metadatas'][0]
             distances = results['distances'][0]
+            embeddings = results.get('embeddings') if include_embeddings else None
+            embeddings = embeddings[0] if embeddings is not None else [None] * len(documents)
+            ids = results['ids'][0]
             
             for i, (doc, metadata, distance) in enumerate(zip(documents, metadatas, distances)):
                 # Convert distance to similarity score (ChromaDB uses L2 distance)
@@ -221,25 +266,17 @@ class VectorStore:
                 
                 # Filter by threshold
                 if similarity >= threshold:
-                    # Convert metadata back to appropriate types
-                    processed_metadata = {}
-                    for key, value in metadata.items():
-                        if key.startswith("meta_"):
-                            processed_metadata[key[5:]] = value
-                        elif key in ["chunk_index", "token_count", "content_length"]:
-                            try:
-                                processed_metadata[key] = int(value)
-                            except (ValueError, TypeError):
-                                processed_metadata[key] = value
-                        else:
-                            processed_metadata[key] = value
-                    
-                    search_results.append({
+                    search_result = {
+                        "id": ids[i],
                         "content": doc,
                         "source": metadata.get("source", "unknown"),
                         "score": similarity,
-                        "metadata": processed_metadata
-                    })
+                        "metadata": self._process_metadata(metadata)
+                    }
+                    if include_embeddings:
+                        search_result["embedding"] = embeddings[i]
+                    
+                    search_results.append(search_result)
             
             # Sort by similarity score (descending) and limit results
             search_results.sort(key=lambda x: x["score"], reverse=True)
@@ -252,6 +289,106 @@ class VectorStore:
             logger.error(f"Vector store search failed: {e}")
             return []
     
+    def lexical_search(self, query: str, top_k: int = 3, source: Optional[str] = None,
+                       include_embeddings: bool = False) -> List[Dict[str, Any]]:
+        """
+        Search chunks by BM25 over their text.
+        
+        Args:
+            query: Query text
+            top_k: Number of results to return
+            source: Optional source filter
+            include_embeddings: Also return each chunk's stored embedding
+            
+        Returns:
+            List of search results shaped like search(), with "score" the BM25
+            score normalized to the best hit and "bm25" the raw score
+        """
+        try:
+            hits = self.lexical_index.search(query, top_k=top_k, source=source)
+            if not hits:
+                return []
+            
+            include = ["documents", "metadatas"]
+            if include_embeddings:
+                include.append("embeddings")
+            stored = self.collection.get(ids=[chunk_id for chunk_id, _ in hits], include=include)
+            embeddings = stored.get('embeddings') if include_embeddings else None
+            rows = {
+                chunk_id: (doc, metadata, embeddings[i] if embeddings is not None else None)
+                for i, (chunk_id, doc, metadata) in enumerate(zip(stored['ids'], stored['documents'], stored['metadatas']))
+            }
+            
+            best = hits[0][1] or 1.0
+            results = []
+            for chunk_id, score in hits:
+                if chunk_id not in rows:
+                    continue  # Index entry of a chunk deleted behind our back
+                doc, metadata, embedding = rows[chunk_id]
+                result = {
+                    "id": chunk_id,
+                    "content": doc,
+                    "source": metadata.get("source", "unknown"),
+                    "score": score / best,
+                    "bm25": score,
+                    "metadata": self._process_metadata(metadata)
+                }
+                if include_embeddings:
+                    result["embedding"] = embedding
+                results.append(result)
+            
+            logger.debug(f"Lexical search returned {len(results)} results")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Lexical search failed: {e}")
+            return []
+    
+    @staticmethod
+    def _process_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert stored (string) metadata back to appropriate types."""
+        processed_metadata = {}
+        for key, value in metadata.items():
+            if key.startswith("meta_"):
+                processed_metadata[key[5:]] = value
+            elif key in ["chunk_index", "token_count", "content_length"]:
+                try:
+                    processed_metadata[key] = int(value)
+                except (ValueError, TypeError):
+                    processed_metadata[key] = value
+            else:
+                processed_metadata[key] = value
+        return processed_metadata
+    
+    def get_ids_by_source(self, source: str) -> List[str]:
+        """
+        Get the ids of all stored chunks of a source.
+        
+        Args:
+            source: Source identifier
+            
+        Returns:
+            List of chunk ids
+        """
+        return list(self.collection.get(where={"source": source}, include=[])['ids'])
+    
+    def delete_chunks(self, chunk_ids: List[str]) -> int:
+        """
+        Delete chunks by id.
+        
+        Args:
+            chunk_ids: Ids of the chunks to delete
+            
+        Returns:
+            Number of ids deleted
+        """
+        if not chunk_ids:
+            return 0
+        self.collection.delete(ids=chunk_ids)
+        self.lexical_index.remove(chunk_ids)
+        logger.info(f"Deleted {len(chunk_ids)} chunks from vector store")
+        return len(chunk_ids)
+    
     def delete_by_source(self, source: str) -> int:
         """
         Delete all chunks from a specific source.
@@ -274,6 +411,7 @@ class VectorStore:
             
             # Delete the chunks
             self.collection.delete(ids=results['ids'])
+            self.lexical_index.remove(results['ids'])
             
             deleted_count = len(results['ids'])
             logger.info(f"Deleted {deleted_count} chunks from source '{source}'")
@@ -314,7 +452,8 @@ class VectorStore:
                 "documents": total_count,
                 "unique_sources": len(sources),
                 "file_types": list(file_types),
-                "storage_path": str(self.persist_directory)
+                "storage_path": str(self.persist_directory),
+                "lexical_index": self.lexical_index.get_statistics()
             }
             
         except Exception as e:
@@ -337,6 +476,7 @@ class VectorStore:
         """
         try:
             self.client.reset()
+            self.lexical_index.clear()
             
             # Recreate collection
             self.collection = self.client.get_or_create_collection(
@@ -10,6 +10,8 @@ from fastapi import FastAPI, HTTPException, BackgroundTasks
 from pydantic import BaseModel, Field
 from shared.models import HealthStatus
 from shared.config import ConfigManager, get_module_url
+from shared.http import get_http_pool
+from shared.health import get_health_registry
 from .agent_orchestrator import AgentOrchestrator, ExecutionRequest
 
 # Configure logging
@@ -38,6 +40,10 @@ except Exception as e:
 # Initialize orchestrator
 orchestrator = AgentOrchestrator(module_a_url, module_b_url)
 
+# Module A, B and D health is probed in the background (clients register their probes)
+health_registry = get_health_registry()
+health_registry.configure(config.health)
+
 # Initialize web fetch agent
 from modules.module_c_agents.web_fetch_agent import WebFetchAgent
 web_fetch_agent = WebFetchAgent()
@@ -348,6 +354,8 @@ async def get_status():
             "version": "1.0.0",
             "status": "operational",
             "system_status": system_status,
+            "http_pools": get_http_pool().get_metrics(),
+            "health": health_registry.get_status(),
             "endpoints": [
                 "/health", "/execute_task", "/classify_and_execute", 
                 "/confirm_task", "/suggest_tasks", "/supported_tasks", "/web_fetch", "/status"
@@ -445,11 +453,19 @@ async def web_fetch(request: WebFetchRequest):
         )
 
 
+@app.on_event("startup")
+async def startup_event():
+    """Start background health probing."""
+    health_registry.start()
+
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown."""
     try:
+        await health_registry.stop()
         await orchestrator.cleanup()
+        await get_http_pool().aclose()
         logger.info("Module C shutdown completed")
     except Exception as e:
         logger.error(f"Shutdown cleanup failed: {e}")
@@ -8,6 +8,8 @@ import asyncio
 from typing import Dict, Any, List, Optional
 import httpx
 from dataclasses import dataclass
+from shared.http import create_client
+from shared.health import get_health_registry
 
 logger = logging.getLogger(__name__)
 
@@ -31,13 +33,16 @@ class ModuleClient:
         self.module_b_url = module_b_url.rstrip('/')
         self.timeout = timeout
         self._client = None
-        self._module_a_available = None
-        self._module_b_available = None
+        
+        # Availability is probed in the background and cached by the health registry
+        self.health = get_health_registry()
+        self.health.register_http("core", f"{self.module_a_url}/health", require_ok=True)
+        self.health.register_http("rag", f"{self.module_b_url}/health", require_ok=True)
     
     async def _get_client(self) -> httpx.AsyncClient:
-        """Get or create HTTP client."""
+        """Get or create HTTP client (on the shared connection pool)."""
         if self._client is None:
-            self._client = httpx.AsyncClient(timeout=self.timeout)
+            self._client = create_client(timeout=self.timeout)
         return self._client
     
     async def close(self):
@@ -47,30 +52,12 @@ class ModuleClient:
             self._client = None
     
     async def check_module_a_health(self) -> bool:
-        """Check if Module A is available."""
-        try:
-            client = await self._get_client()
-            response = await client.get(f"{self.module_a_url}/health")
-            is_healthy = response.status_code == 200 and response.json().get("status") == "ok"
-            self._module_a_available = is_healthy
-            return is_healthy
-        except Exception as e:
-            logger.warning(f"Module A health check failed: {e}")
-            self._module_a_available = False
-            return False
+        """Check if Module A is available (cached status)."""
+        return await self.health.check("core")
     
     async def check_module_b_health(self) -> bool:
-        """Check if Module B is available."""
-        try:
-            client = await self._get_client()
-            response = await client.get(f"{self.module_b_url}/health")
-            is_healthy = response.status_code == 200 and response.json().get("status") == "ok"
-            self._module_b_available = is_healthy
-            return is_healthy
-        except Exception as e:
-            logger.warning(f"Module B health check failed: {e}")
-            self._module_b_available = False
-            return False
+        """Check if Module B is available (cached status)."""
+        return await self.health.check("rag")
     
     async def enhance_task_with_ai(self, task_description: str, task_parameters: Dict[str, Any]) -> ModuleResponse:
         """Enhance task execution with AI assistance."""
@@ -78,10 +65,7 @@ class ModuleClient:
         start_time = time.time()
         
         try:
-            if self._module_a_available is None:
-                await self.check_module_a_health()
-            
-            if not self._module_a_available:
+            if not await self.check_module_a_health():
                 return ModuleResponse(
                     success=False,
                     data={},
@@ -106,7 +90,8 @@ class ModuleClient:
                 json={
                     "query": enhanced_query,
                     "top_k": 5,
-                    "threshold": 0.5
+                    "threshold": 0.5,
+                    "priority": "background"
                 }
             )
             
@@ -4,9 +4,10 @@ Integrates with Module D for secure command execution.
 """
 
 import logging
-import httpx
 from typing import Dict, Any, Optional, List
 from dataclasses import dataclass
+from shared.http import create_client
+from shared.health import get_health_registry
 
 logger = logging.getLogger(__name__)
 
@@ -42,7 +43,9 @@ class SafeExecutionClient:
             module_d_url: Base URL for Module D API
         """
         self.module_d_url = module_d_url.rstrip('/')
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.client = create_client(timeout=30.0)
+        self.health = get_health_registry()
+        self.health.register_http("execution", f"{self.module_d_url}/health")
     
     async def __aenter__(self):
         """Async context manager entry."""
@@ -56,15 +59,13 @@ class SafeExecutionClient:
         """
         Check if Module D is available.
         
+        Answered from the health registry's cached probe while background
+        probing runs, probed on demand otherwise.
+        
         Returns:
             True if Module D is healthy, False otherwise
         """
-        try:
-            response = await self.client.get(f"{self.module_d_url}/health")
-            return response.status_code == 200
-        except Exception as e:
-            logger.warning(f"Module D health check failed: {e}")
-            return False
+        return await self.health.check("execution")
     
     async def preview_command(self, command: str, working_directory: Optional[str] = None) -> ExecutionResult:
         """
@@ -64,7 +64,7 @@ class BaseTaskHandler(ABC):
         """
         results = []
         
-        # Check if Module D is available
+        # Check if Module D is available (cached, no request per task)
         if not await self.safe_executor.check_health():
             logger.warning("Module D not available, commands will not be executed")
             return results
@@ -4,14 +4,13 @@ Extends existing agent system with web intelligence capabilities
 """
 
 import asyncio
-import aiohttp
-import requests
 import time
 from typing import Dict, List, Optional
 from bs4 import BeautifulSoup
 import logging
 from urllib.parse import urlparse
 import hashlib
+from shared.http import create_client
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +27,7 @@ class WebFetchAgent:
         ]
         self.rate_limit = 2.0  # seconds between requests
         self.last_request_time = {}
+        self.client = create_client(timeout=10.0)
         
     def is_domain_allowed(self, url: str) -> bool:
         """Check if domain is in whitelist"""
@@ -54,26 +54,25 @@ class WebFetchAgent:
             if not self.respect_rate_limit(domain):
                 await asyncio.sleep(self.rate_limit)
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(search_url, timeout=10) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        results = []
-                        
-                        if len(data) >= 4:
-                            titles = data[1]
-                            descriptions = data[2] 
-                            urls = data[3]
-                            
-                            for title, desc, url in zip(titles[:2], descriptions[:2], urls[:2]):
-                                results.append({
-                                    "title": title,
-                                    "url": url,
-                                    "description": desc,
-                                    "source_type": "arch_wiki"
-                                })
-                        
-                        return results
+            response = await self.client.get(search_url)
+            if response.status_code == 200:
+                data = response.json()
+                results = []
+                
+                if len(data) >= 4:
+                    titles = data[1]
+                    descriptions = data[2] 
+                    urls = data[3]
+                    
+                    for title, desc, url in zip(titles[:2], descriptions[:2], urls[:2]):
+                        results.append({
+                            "title": title,
+                            "url": url,
+                            "description": desc,
+                            "source_type": "arch_wiki"
+                        })
+                
+                return results
         except Exception as e:
             logger.error(f"Arch Wiki search failed: {e}")
             return []
@@ -92,13 +91,12 @@ class WebFetchAgent:
             if not self.respect_rate_limit(domain):
                 await asyncio.sleep(self.rate_limit)
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(raw_url, timeout=10) as response:
-                    if response.status == 200:
-                        content = await response.text()
-                        # Basic cleanup of wiki markup
-                        cleaned = self.clean_wiki_content(content)
-                        return cleaned[:5000]  # Limit content size
+            response = await self.client.get(raw_url)
+            if response.status_code == 200:
+                content = response.text
+                # Basic cleanup of wiki markup
+                cleaned = self.clean_wiki_content(content)
+                return cleaned[:5000]  # Limit content size
         except Exception as e:
             logger.error(f"Failed to fetch {url}: {e}")
             return None
@@ -133,22 +131,21 @@ class WebFetchAgent:
             if not self.respect_rate_limit(domain):
                 await asyncio.sleep(self.rate_limit)
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(api_url, params=params, timeout=10) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        results = []
-                        
-                        for item in data.get("items", []):
-                            results.append({
-                                "title": item.get("title", ""),
-                                "url": item.get("link", ""),
-                                "score": item.get("score", 0),
-                                "source_type": "stackoverflow",
-                                "question_id": item.get("question_id")
-                            })
-                        
-                        return results
+            response = await self.client.get(api_url, params=params)
+            if response.status_code == 200:
+                data = response.json()
+                results = []
+                
+                for item in data.get("items", []):
+                    results.append({
+                        "title": item.get("title", ""),
+                        "url": item.get("link", ""),
+                        "score": item.get("score", 0),
+                        "source_type": "stackoverflow",
+                        "question_id": item.get("question_id")
+                    })
+                
+                return results
         except Exception as e:
             logger.error(f"Stack Overflow search failed: {e}")
             return []
@@ -170,7 +167,7 @@ Fetched: {time.ctime()}
 """
             
             files = {'files': (filename, formatted_content, 'text/plain')}
-            response = requests.post(f"{self.rag_url}/upload", files=files, timeout=30)
+            response = await self.client.post(f"{self.rag_url}/upload", files=files, timeout=30)
             
             return response.status_code == 200
             
@@ -1,41 +1,80 @@
 """
 Cache Manager for Module E: Hybrid Intelligence Gateway
-Manages caching of external API responses in Module B.
+Caches external API responses in a local exact-key store.
+
+Entries live in a SQLite database (persistent across restarts) with a small
+in-memory LRU in front of it, so repeated escalations are answered without
+any HTTP round trip or embedding call.
 """
 
 import logging
 import hashlib
 import json
-from typing import Dict, Any, Optional, List
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
-import httpx
 from external_api_client import ExternalResponse
 
 logger = logging.getLogger(__name__)
 
+# Relative database paths are resolved here, not against the working directory
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
 
 class CacheManager:
     """
     Manages caching of external API responses.
     
-    Integrates with Module B (RAG) to store and retrieve
-    cached responses from external AI services.
+    Lookups are exact matches on the normalized (query, context) hash.
+    The SQLite table is indexed on expiry and last access, so TTL cleanup
+    and LRU eviction are single indexed DELETE statements. The entry count
+    is read once when the database opens and tracked from then on, and
+    hits served by the memory tier are written back as last_access with
+    the next store, so eviction follows the real access order without a
+    database write per hit.
     """
     
-    def __init__(self, module_b_url: str = "http://localhost:8002"):
+    def __init__(
+        self,
+        db_path: str = "data/external_api_cache.db",
+        max_cache_size: int = 1000,
+        default_ttl: timedelta = timedelta(hours=24),
+        memory_cache_size: int = 128
+    ):
         """
         Initialize cache manager.
         
         Args:
-            module_b_url: URL for Module B (RAG) API
+            db_path: Path of the SQLite cache database (relative to the project root)
+            max_cache_size: Maximum number of persisted responses
+            default_ttl: Time-to-live for new entries
+            memory_cache_size: Number of entries kept in the in-memory LRU
         """
-        self.module_b_url = module_b_url.rstrip('/')
-        self.client = httpx.AsyncClient(timeout=30.0)
-        self.cache_collection = "external_api_cache"
+        self.db_path = Path(db_path)
+        if not self.db_path.is_absolute():
+            self.db_path = PROJECT_ROOT / self.db_path
         
         # Cache settings
-        self.default_ttl = timedelta(hours=24)  # 24 hour default TTL
-        self.max_cache_size = 1000  # Maximum cached responses
+        self.default_ttl = default_ttl  # 24 hour default TTL
+        self.max_cache_size = max_cache_size  # Maximum cached responses
+        self.memory_cache_size = memory_cache_size
+        
+        # In-memory LRU front: cache_key -> (entry dict, expires_at)
+        self._memory_cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._entry_count = 0
+        self._pending_touches: Dict[str, float] = {}  # memory-tier hits not yet in last_access
+        
+        # Statistics
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.evictions = 0
     
     async def __aenter__(self):
         """Async context manager entry."""
@@ -43,7 +82,40 @@ class CacheManager:
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
-        await self.client.aclose()
+        self.close()
+    
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """Open the cache database on first use and create the schema."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    cache_key TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache_entries(expires_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache_entries(last_access)")
+            conn.commit()
+            self._entry_count = conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+            self._conn = conn
+            logger.info(f"Initialized response cache at {self.db_path} ({self._entry_count} entries)")
+        return self._conn
     
     def _generate_cache_key(self, query: str, context: Optional[str] = None) -> str:
         """
@@ -52,7 +124,7 @@ class CacheManager:
         Args:
             query: Original query
             context: Optional context
-            
+        
         Returns:
             Cache key string
         """
@@ -66,18 +138,40 @@ class CacheManager:
         
         return f"ext_cache_{cache_key}"
     
-    async def check_module_b_health(self) -> bool:
+    def _remember(self, cache_key: str, entry: Dict[str, Any], expires_at: float):
+        """Insert an entry into the in-memory LRU, evicting the oldest."""
+        self._memory_cache[cache_key] = (entry, expires_at)
+        self._memory_cache.move_to_end(cache_key)
+        while len(self._memory_cache) > self.memory_cache_size:
+            self._memory_cache.popitem(last=False)
+    
+    @staticmethod
+    def _to_response(entry: Dict[str, Any]) -> ExternalResponse:
+        """Reconstruct a cached ExternalResponse."""
+        return ExternalResponse(
+            success=entry['success'],
+            response=entry['response'],
+            source=entry['source'],
+            confidence=entry['confidence'],
+            processing_time=entry['processing_time'],
+            cached=True,
+            error=entry.get('error'),
+            metadata=entry.get('metadata', {})
+        )
+    
+    async def check_cache_health(self) -> bool:
         """
-        Check if Module B is available for caching.
+        Check if the cache database is usable.
         
         Returns:
-            True if Module B is healthy, False otherwise
+            True if the cache store is available, False otherwise
         """
         try:
-            response = await self.client.get(f"{self.module_b_url}/health")
-            return response.status_code == 200
-        except Exception as e:
-            logger.warning(f"Module B health check failed: {e}")
+            with self._lock:
+                self._get_connection().execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error as e:
+            logger.warning(f"Cache health check failed: {e}")
             return False
     
     async def get_cached_response(self, query: str, context: Optional[str] = None) -> Optional[ExternalResponse]:
@@ -87,66 +181,60 @@ class CacheManager:
         Args:
             query: Original query
             context: Optional context
-            
+        
         Returns:
             Cached ExternalResponse if found, None otherwise
         """
         try:
             cache_key = self._generate_cache_key(query, context)
+            now = time.time()
             
-            # Search for cached response in Module B
-            search_payload = {
-                "query": f"cache_key:{cache_key}",
-                "top_k": 1,
-                "threshold": 0.9  # High threshold for exact matches
-            }
-            
-            response = await self.client.post(
-                f"{self.module_b_url}/search",
-                json=search_payload
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                snippets = data.get('snippets', [])
+            with self._lock:
+                cached = self._memory_cache.get(cache_key)
+                if cached is not None:
+                    entry, expires_at = cached
+                    if expires_at > now:
+                        self._memory_cache.move_to_end(cache_key)
+                        self._pending_touches[cache_key] = now
+                        self.hits += 1
+                        self.memory_hits += 1
+                        logger.info(f"Cache hit for query: {query[:50]}...")
+                        return self._to_response(entry)
+                    del self._memory_cache[cache_key]
                 
-                if snippets:
-                    # Parse cached response
-                    cached_content = snippets[0]['content']
-                    
-                    try:
-                        # Extract JSON from cached content
-                        if 'CACHED_RESPONSE:' in cached_content:
-                            json_str = cached_content.split('CACHED_RESPONSE:')[1].strip()
-                            cached_data = json.loads(json_str)
-                            
-                            # Check if cache is still valid
-                            cached_time = datetime.fromisoformat(cached_data['timestamp'])
-                            if datetime.now() - cached_time < self.default_ttl:
-                                
-                                # Reconstruct ExternalResponse
-                                cached_response = ExternalResponse(
-                                    success=cached_data['success'],
-                                    response=cached_data['response'],
-                                    source=cached_data['source'],
-                                    confidence=cached_data['confidence'],
-                                    processing_time=cached_data['processing_time'],
-                                    cached=True,
-                                    error=cached_data.get('error'),
-                                    metadata=cached_data.get('metadata', {})
-                                )
-                                
-                                logger.info(f"Cache hit for query: {query[:50]}...")
-                                return cached_response
-                            else:
-                                logger.info(f"Cache expired for query: {query[:50]}...")
-                        
-                    except (json.JSONDecodeError, KeyError, ValueError) as e:
-                        logger.warning(f"Failed to parse cached response: {e}")
-            
-            return None
+                conn = self._get_connection()
+                row = conn.execute(
+                    "SELECT payload, expires_at FROM cache_entries WHERE cache_key = ?",
+                    (cache_key,)
+                ).fetchone()
+                
+                if row is None:
+                    self.misses += 1
+                    return None
+                
+                payload, expires_at = row
+                if expires_at <= now:
+                    logger.info(f"Cache expired for query: {query[:50]}...")
+                    conn.execute("DELETE FROM cache_entries WHERE cache_key = ?", (cache_key,))
+                    conn.commit()
+                    self._entry_count -= 1
+                    self.misses += 1
+                    return None
+                
+                conn.execute(
+                    "UPDATE cache_entries SET last_access = ? WHERE cache_key = ?",
+                    (now, cache_key)
+                )
+                conn.commit()
+                
+                entry = json.loads(payload)
+                self._remember(cache_key, entry, expires_at)
+                self.hits += 1
             
-        except Exception as e:
+            logger.info(f"Cache hit for query: {query[:50]}...")
+            return self._to_response(entry)
+        
+        except (sqlite3.Error, json.JSONDecodeError, KeyError) as e:
             logger.error(f"Cache retrieval failed: {e}")
             return None
     
@@ -158,19 +246,21 @@ class CacheManager:
             query: Original query
             response: ExternalResponse to cache
             context: Optional context
-            
+        
         Returns:
             True if successfully cached, False otherwise
         """
         try:
             cache_key = self._generate_cache_key(query, context)
+            now = time.time()
+            expires_at = now + self.default_ttl.total_seconds()
             
             # Prepare cache document
-            cache_data = {
+            entry = {
                 "cache_key": cache_key,
                 "query": query,
                 "context": context,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": datetime.fromtimestamp(now).isoformat(),
                 "success": response.success,
                 "response": response.response,
                 "source": response.source,
@@ -179,50 +269,63 @@ class CacheManager:
                 "error": response.error,
                 "metadata": response.metadata or {}
             }
+            payload = json.dumps(entry)
             
-            # Create document content for Module B
-            document_content = f"""External API Cache Entry
-Cache Key: {cache_key}
-Query: {query}
-Context: {context or 'None'}
-Source: {response.source}
-Confidence: {response.confidence}
-Timestamp: {cache_data['timestamp']}
-
-Response:
-{response.response}
-
-CACHED_RESPONSE: {json.dumps(cache_data)}
-"""
-            
-            # Upload to Module B
-            upload_payload = {
-                "content": document_content,
-                "metadata": {
-                    "source": "external_api_cache",
-                    "type": "cache_entry",
-                    "cache_key": cache_key,
-                    "query_hash": hashlib.sha256(query.encode()).hexdigest()[:8],
-                    "timestamp": cache_data['timestamp']
-                }
-            }
+            with self._lock:
+                conn = self._get_connection()
+                exists = conn.execute(
+                    "SELECT 1 FROM cache_entries WHERE cache_key = ?", (cache_key,)
+                ).fetchone() is not None
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO cache_entries
+                        (cache_key, source, payload, size_bytes, created_at, expires_at, last_access)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (cache_key, response.source, payload, len(payload.encode()), now, expires_at, now)
+                )
+                if not exists:
+                    self._entry_count += 1
+                self._flush_touches(conn)
+                self._enforce_max_size(conn)
+                conn.commit()
+                self._remember(cache_key, entry, expires_at)
             
-            response = await self.client.post(
-                f"{self.module_b_url}/upload_content",
-                json=upload_payload
-            )
-            
-            if response.status_code == 200:
-                logger.info(f"Cached response for query: {query[:50]}...")
-                return True
-            else:
-                logger.error(f"Failed to cache response: {response.status_code}")
-                return False
-                
-        except Exception as e:
+            logger.info(f"Cached response for query: {query[:50]}...")
+            return True
+        
+        except (sqlite3.Error, TypeError, ValueError) as e:
             logger.error(f"Cache storage failed: {e}")
             return False
     
+    def _flush_touches(self, conn: sqlite3.Connection):
+        """Write last_access of memory-tier hits to the database."""
+        if self._pending_touches:
+            conn.executemany(
+                "UPDATE cache_entries SET last_access = MAX(last_access, ?) WHERE cache_key = ?",
+                [(accessed, cache_key) for cache_key, accessed in self._pending_touches.items()]
+            )
+            self._pending_touches.clear()
+    
+    def _enforce_max_size(self, conn: sqlite3.Connection):
+        """Evict least recently used entries beyond max_cache_size."""
+        overflow = self._entry_count - self.max_cache_size
+        if overflow <= 0:
+            return
+        
+        evicted = conn.execute(
+            "SELECT cache_key FROM cache_entries ORDER BY last_access ASC LIMIT ?",
+            (overflow,)
+        ).fetchall()
+        conn.executemany("DELETE FROM cache_entries WHERE cache_key = ?", evicted)
+        
+        for (cache_key,) in evicted:
+            self._memory_cache.pop(cache_key, None)
+            self._pending_touches.pop(cache_key, None)
+        self._entry_count -= len(evicted)
+        self.evictions += len(evicted)
+        logger.info(f"Evicted {len(evicted)} least recently used cache entries")
+    
     async def clear_expired_cache(self) -> int:
         """
         Clear expired cache entries.
@@ -231,48 +334,21 @@ CACHED_RESPONSE: {json.dumps(cache_data)}
             Number of entries cleared
         """
         try:
-            # Search for all cache entries
-            search_payload = {
-                "query": "External API Cache Entry",
-                "top_k": self.max_cache_size,
-                "threshold": 0.5
-            }
-            
-            response = await self.client.post(
-                f"{self.module_b_url}/search",
-                json=search_payload
-            )
-            
-            if response.status_code != 200:
-                return 0
-            
-            data = response.json()
-            snippets = data.get('snippets', [])
-            
-            expired_count = 0
-            cutoff_time = datetime.now() - self.default_ttl
-            
-            for snippet in snippets:
-                try:
-                    content = snippet['content']
-                    if 'CACHED_RESPONSE:' in content:
-                        json_str = content.split('CACHED_RESPONSE:')[1].strip()
-                        cached_data = json.loads(json_str)
-                        
-                        cached_time = datetime.fromisoformat(cached_data['timestamp'])
-                        if cached_time < cutoff_time:
-                            # This entry is expired
-                            expired_count += 1
-                            # Note: Actual deletion would require Module B delete API
-                            
-                except Exception as e:
-                    logger.warning(f"Failed to check cache entry expiration: {e}")
-                    continue
+            now = time.time()
+            with self._lock:
+                conn = self._get_connection()
+                cursor = conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+                conn.commit()
+                expired_count = cursor.rowcount
+                self._entry_count -= expired_count
+                
+                for cache_key in [k for k, (_, exp) in self._memory_cache.items() if exp <= now]:
+                    del self._memory_cache[cache_key]
             
-            logger.info(f"Found {expired_count} expired cache entries")
+            logger.info(f"Cleared {expired_count} expired cache entries")
             return expired_count
-            
-        except Exception as e:
+        
+        except sqlite3.Error as e:
             logger.error(f"Cache cleanup failed: {e}")
             return 0
     
@@ -284,65 +360,46 @@ CACHED_RESPONSE: {json.dumps(cache_data)}
             Dictionary with cache statistics
         """
         try:
-            # Search for all cache entries
-            search_payload = {
-                "query": "External API Cache Entry",
-                "top_k": self.max_cache_size,
-                "threshold": 0.5
-            }
-            
-            response = await self.client.post(
-                f"{self.module_b_url}/search",
-                json=search_payload
-            )
+            now = time.time()
+            with self._lock:
+                conn = self._get_connection()
+                total, valid, size_bytes, oldest, newest = conn.execute(
+                    """
+                    SELECT COUNT(*),
+                           COALESCE(SUM(expires_at > ?), 0),
+                           COALESCE(SUM(size_bytes), 0),
+                           MIN(created_at),
+                           MAX(created_at)
+                    FROM cache_entries
+                    """,
+                    (now,)
+                ).fetchone()
+                sources = dict(conn.execute(
+                    "SELECT source, COUNT(*) FROM cache_entries GROUP BY source"
+                ).fetchall())
+                memory_entries = len(self._memory_cache)
             
-            if response.status_code != 200:
-                return {"error": "Failed to retrieve cache statistics"}
+            lookups = self.hits + self.misses
             
-            data = response.json()
-            snippets = data.get('snippets', [])
-            
-            stats = {
-                "total_entries": len(snippets),
-                "valid_entries": 0,
-                "expired_entries": 0,
-                "sources": {},
-                "oldest_entry": None,
-                "newest_entry": None
+            return {
+                "total_entries": total,
+                "valid_entries": valid,
+                "expired_entries": total - valid,
+                "max_cache_size": self.max_cache_size,
+                "memory_entries": memory_entries,
+                "size_bytes": size_bytes,
+                "sources": sources,
+                "oldest_entry": datetime.fromtimestamp(oldest).isoformat() if oldest else None,
+                "newest_entry": datetime.fromtimestamp(newest).isoformat() if newest else None,
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "storage_path": str(self.db_path)
             }
-            
-            cutoff_time = datetime.now() - self.default_ttl
-            entry_times = []
-            
-            for snippet in snippets:
-                try:
-                    content = snippet['content']
-                    if 'CACHED_RESPONSE:' in content:
-                        json_str = content.split('CACHED_RESPONSE:')[1].strip()
-                        cached_data = json.loads(json_str)
-                        
-                        cached_time = datetime.fromisoformat(cached_data['timestamp'])
-                        entry_times.append(cached_time)
-                        
-                        source = cached_data.get('source', 'unknown')
-                        stats['sources'][source] = stats['sources'].get(source, 0) + 1
-                        
-                        if cached_time >= cutoff_time:
-                            stats['valid_entries'] += 1
-                        else:
-                            stats['expired_entries'] += 1
-                            
-                except Exception as e:
-                    logger.warning(f"Failed to parse cache entry for stats: {e}")
-                    continue
-            
-            if entry_times:
-                stats['oldest_entry'] = min(entry_times).isoformat()
-                stats['newest_entry'] = max(entry_times).isoformat()
-            
-            return stats
-            
-        except Exception as e:
+        
+        except sqlite3.Error as e:
             logger.error(f"Failed to get cache statistics: {e}")
             return {"error": str(e)}
 
@@ -358,4 +415,4 @@ async def get_cached_response(query: str, context: Optional[str] = None) -> Opti
 
 async def store_response(query: str, response: ExternalResponse, context: Optional[str] = None) -> bool:
     """Convenience function for cache storage."""
-    return await cache_manager.store_response(query, response, context)
\ No newline at end of file
+    return await cache_manager.store_response(query, response, context)
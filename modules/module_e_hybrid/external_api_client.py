@@ -6,10 +6,16 @@ Manages communication with external AI services like Grok.
 import logging
 import asyncio
 import json
+import os
+import sys
 from typing import Dict, Any, Optional, List
 from dataclasses import dataclass
 from datetime import datetime
-import httpx
+
+# Module E runs from its own directory; the shared HTTP pool lives in the project root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from shared.http import create_client
 
 logger = logging.getLogger(__name__)
 
@@ -43,7 +49,7 @@ class ExternalAPIClient:
             config: Configuration dictionary with API settings
         """
         self.config = config or {}
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.client = create_client(timeout=30.0)
         
         # API configurations
         self.grok_config = self.config.get('grok', {})
@@ -79,8 +79,8 @@ async def health_check():
         # Check internet connectivity
         internet_available = await external_api_client.check_internet_connectivity()
         
-        # Check Module B connectivity for caching
-        cache_available = await cache_manager.check_module_b_health()
+        # Check local response cache
+        cache_available = await cache_manager.check_cache_health()
         
         return HealthStatus(
             status="ok",
@@ -111,7 +111,7 @@ async def get_status():
         
         # Check external service availability
         internet_available = await external_api_client.check_internet_connectivity()
-        cache_available = await cache_manager.check_module_b_health()
+        cache_available = await cache_manager.check_cache_health()
         
         return {
             "module": "Hybrid Intelligence Gateway",
@@ -317,7 +317,7 @@ async def clear_expired_cache():
         cleared_count = await cache_manager.clear_expired_cache()
         return {
             "success": True,
-            "message": f"Found {cleared_count} expired cache entries",
+            "message": f"Cleared {cleared_count} expired cache entries",
             "cleared_count": cleared_count
         }
     except Exception as e:
@@ -9,14 +9,16 @@ import json
 import time
 import logging
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable, Iterator, Tuple
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 # Add project root to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from shared.config import ConfigManager
+from shared.http import get_http_pool
 from modules.module_f_ui.voice_handler import VoiceHandler
 from modules.module_f_ui.session_manager import SessionManager
 
@@ -24,6 +26,10 @@ from modules.module_f_ui.session_manager import SessionManager
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# The sidebar reuses the last system status for this many seconds across reruns
+STATUS_CACHE_TTL = 10.0
+STATUS_TIMEOUT = 3.0
+
 # Page configuration
 st.set_page_config(
     page_title="Linux Superhelfer",
@@ -59,7 +65,7 @@ class ModuleOrchestrator:
         """Check health status of a specific module."""
         try:
             url = f"{self.modules[module_name]}/health"
-            response = requests.get(url, timeout=5)
+            response = get_http_pool().session(url).get(url, timeout=STATUS_TIMEOUT)
             
             if response.status_code == 200:
                 return {
@@ -78,30 +84,56 @@ class ModuleOrchestrator:
                 'error': str(e)
             }
     
-    def get_system_status(self) -> Dict[str, Any]:
-        """Get comprehensive system status."""
-        status = {}
+    def get_system_status(self, max_age: float = STATUS_CACHE_TTL) -> Dict[str, Any]:
+        """
+        Get comprehensive system status.
+        
+        Modules are checked in parallel and the result is kept in the
+        Streamlit session, so reruns within max_age do not hit the backends.
         
-        for module_name in self.modules.keys():
-            status[module_name] = self.check_module_health(module_name)
+        Args:
+            max_age: Seconds a cached status may be reused (0 forces a fresh check)
+        """
+        cached = st.session_state.get('system_status')
+        if cached and time.time() - cached[0] < max_age:
+            return cached[1]
         
-        # Check router status specifically
+        with ThreadPoolExecutor(max_workers=len(self.modules) + 1) as executor:
+            futures = {name: executor.submit(self.check_module_health, name) for name in self.modules}
+            router_future = executor.submit(self._check_router_status)
+            status = {name: future.result() for name, future in futures.items()}
+            status['router'] = router_future.result()
+        
+        st.session_state.system_status = (time.time(), status)
+        return status
+    
+    def _check_router_status(self) -> Dict[str, Any]:
+        """Check the router status of the Core Intelligence Engine."""
         try:
-            response = requests.get(f"{self.modules['core']}/router_status", timeout=5)
+            response = get_http_pool().session(self.modules['core']).get(
+                f"{self.modules['core']}/router_status", timeout=STATUS_TIMEOUT
+            )
             if response.status_code == 200:
-                status['router'] = {
+                return {
                     'status': 'healthy',
                     'data': response.json()
                 }
-            else:
-                status['router'] = {'status': 'unhealthy'}
-        except:
-            status['router'] = {'status': 'offline'}
+            return {'status': 'unhealthy'}
+        except Exception:
+            return {'status': 'offline'}
+    
+    def send_query(self, query: str, use_context: bool = True,
+                   on_token: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Send query to Core Intelligence with intelligent routing.
+        
+        If on_token is given, the query is sent to the streaming endpoint and
+        on_token is called with the accumulated response text after every
+        received token, so the caller can render the answer incrementally.
+        """
+        if on_token is not None:
+            return self._send_query_streaming(query, use_context, on_token)
         
-        return status
-    
-    def send_query(self, query: str, use_context: bool = True) -> Dict[str, Any]:
-        """Send query to Core Intelligence with intelligent routing."""
         try:
             # Prepare payload with session_id
             payload = {
@@ -112,7 +144,7 @@ class ModuleOrchestrator:
             
             # Send to intelligent routing endpoint
             start_time = time.time()
-            response = requests.post(
+            response = get_http_pool().session(self.modules['core']).post(
                 f"{self.modules['core']}/infer",
                 json=payload,
                 timeout=300  # 5 minutes for very complex code generation
@@ -120,32 +152,7 @@ class ModuleOrchestrator:
             response_time = time.time() - start_time
             
             if response.status_code == 200:
-                data = response.json()
-                
-                # Update session_id if returned from API
-                returned_session_id = data.get('session_id')
-                if returned_session_id:
-                    st.session_state.session_id = returned_session_id
-                
-                # Extract routing information
-                routing_info = data.get('routing_info', {})
-                
-                return {
-                    'success': True,
-                    'response': data.get('response', ''),
-                    'confidence': data.get('confidence', 0),
-                    'model_used': data.get('model_used', 'unknown'),
-                    'response_time': response_time,
-                    'context_used': data.get('context_used', False),
-                    'sources': data.get('sources', []),
-                    'session_id': returned_session_id,
-                    'routing_info': {
-                        'selected_model': routing_info.get('selected_model', 'unknown'),
-                        'reasoning': routing_info.get('reasoning', 'N/A'),
-                        'complexity_score': routing_info.get('complexity_score', 0),
-                        'vram_check_passed': routing_info.get('vram_check_passed', True)
-                    }
-                }
+                return self._build_query_result(response.json(), response_time)
             else:
                 return {
                     'success': False,
@@ -160,6 +167,127 @@ class ModuleOrchestrator:
                 'response_time': time.time() - start_time if 'start_time' in locals() else 0
             }
     
+    def _build_query_result(self, data: Dict[str, Any], response_time: float) -> Dict[str, Any]:
+        """Convert an /infer response payload into the UI result format."""
+        # Update session_id if returned from API
+        returned_session_id = data.get('session_id')
+        if returned_session_id:
+            st.session_state.session_id = returned_session_id
+        
+        # Extract routing information
+        routing_info = data.get('routing_info') or {}
+        
+        return {
+            'success': True,
+            'response': data.get('response', ''),
+            'confidence': data.get('confidence', 0),
+            'model_used': data.get('model_used', 'unknown'),
+            'response_time': response_time,
+            'context_used': data.get('context_used', False),
+            'sources': data.get('sources', []),
+            'session_id': returned_session_id,
+            'routing_info': {
+                'selected_model': routing_info.get('selected_model', 'unknown'),
+                'reasoning': routing_info.get('reasoning', 'N/A'),
+                'complexity_score': routing_info.get('complexity_score', 0),
+                'vram_check_passed': routing_info.get('vram_check_passed', True)
+            }
+        }
+    
+    @staticmethod
+    def _iter_sse_events(response: requests.Response) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Parse a Server-Sent Events stream into (event, data) pairs."""
+        event_name = 'message'
+        data_lines = []
+        
+        for line in response.iter_lines(decode_unicode=True):
+            if line is None:
+                continue
+            if line == '':
+                if data_lines:
+                    yield event_name, json.loads('\n'.join(data_lines))
+                event_name = 'message'
+                data_lines = []
+            elif line.startswith('event:'):
+                event_name = line[len('event:'):].strip()
+            elif line.startswith('data:'):
+                data_lines.append(line[len('data:'):].strip())
+        
+        if data_lines:
+            yield event_name, json.loads('\n'.join(data_lines))
+    
+    def _send_query_streaming(self, query: str, use_context: bool,
+                              on_token: Callable[[str], None]) -> Dict[str, Any]:
+        """Send query to the streaming endpoint and render tokens as they arrive."""
+        start_time = time.time()
+        first_token_time = None
+        partial_response = ""
+        
+        try:
+            payload = {
+                "query": query,
+                "enable_context_search": use_context,
+                "session_id": st.session_state.session_id
+            }
+            
+            with get_http_pool().session(self.modules['core']).post(
+                f"{self.modules['core']}/infer_stream",
+                json=payload,
+                stream=True,
+                timeout=(5, 300)  # Connect timeout, max wait between chunks
+            ) as response:
+                if response.status_code != 200:
+                    return {
+                        'success': False,
+                        'error': f"HTTP {response.status_code}: {response.text}",
+                        'response_time': time.time() - start_time
+                    }
+                
+                for event, data in self._iter_sse_events(response):
+                    if event == 'routing':
+                        returned_session_id = data.get('session_id')
+                        if returned_session_id:
+                            st.session_state.session_id = returned_session_id
+                    
+                    elif event == 'token':
+                        if first_token_time is None:
+                            first_token_time = time.time() - start_time
+                        partial_response += data.get('token', '')
+                        on_token(partial_response)
+                    
+                    elif event == 'replace':
+                        # Answer of the routed model replaces the fast draft
+                        partial_response = data.get('response', '')
+                        on_token(partial_response)
+                    
+                    elif event == 'done':
+                        result = self._build_query_result(data, time.time() - start_time)
+                        result['time_to_first_token'] = first_token_time
+                        return result
+                    
+                    elif event == 'error':
+                        return {
+                            'success': False,
+                            'error': data.get('detail', 'Streaming failed'),
+                            'response': partial_response,
+                            'response_time': time.time() - start_time
+                        }
+            
+            return {
+                'success': False,
+                'error': "Stream ended before the response was complete",
+                'response': partial_response,
+                'response_time': time.time() - start_time
+            }
+        
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'response': partial_response,
+                'response_time': time.time() - start_time
+            }
+    
     def search_knowledge(self, query: str, top_k: int = 3) -> Dict[str, Any]:
         """Search knowledge base directly."""
         try:
@@ -169,7 +297,7 @@ class ModuleOrchestrator:
                 "threshold": 0.6
             }
             
-            response = requests.post(
+            response = get_http_pool().session(self.modules['knowledge']).post(
                 f"{self.modules['knowledge']}/search",
                 json=payload,
                 timeout=10
@@ -402,7 +530,7 @@ def main():
     # Show system info if requested
     if st.session_state.get('show_system_info', False):
         with st.expander("📊 Detailed System Information", expanded=True):
-            status = orchestrator.get_system_status()
+            status = orchestrator.get_system_status(max_age=0)
             st.json(status)
         st.session_state.show_system_info = False
     
@@ -436,17 +564,24 @@ def main():
         
         # Process query and get response
         with st.chat_message("assistant"):
-            with st.spinner("🤔 Thinking... (Intelligent routing in progress)"):
-                result = orchestrator.send_query(prompt, use_context)
+            # Render tokens as they arrive instead of waiting behind a spinner
+            response_placeholder = st.empty()
+            response_placeholder.markdown("🤔 Thinking... (Intelligent routing in progress)")
+            result = orchestrator.send_query(
+                prompt,
+                use_context,
+                on_token=lambda text: response_placeholder.markdown(text + "▌")
+            )
             
             if result['success']:
                 response = result['response']
-                st.write(response)
+                response_placeholder.markdown(response)
                 
                 # Log response with session manager
                 orchestrator.session_manager.log_response(response, {
                     'session_id': result.get('session_id', st.session_state.session_id),
                     'response_time': result.get('response_time', 0),
+                    'time_to_first_token': result.get('time_to_first_token'),
                     'confidence': result.get('confidence', 0),
                     'model_used': result.get('model_used', 'unknown'),
                     'context_used': result.get('context_used', False),
@@ -493,6 +628,10 @@ def main():
                             st.text(f"Reasoning: {routing_info.get('reasoning', 'N/A')}")
             else:
                 error_message = f"❌ Error: {result['error']}"
+                if result.get('response'):
+                    response_placeholder.markdown(result['response'])
+                else:
+                    response_placeholder.empty()
                 st.error(error_message)
                 
                 # Log error with session manager
@@ -3,13 +3,19 @@ Module Orchestrator for Module F
 Handles request routing and communication with all backend modules.
 """
 
-import httpx
 import asyncio
+import os
+import sys
 from typing import Dict, Any, Optional, List
 from dataclasses import dataclass
 from config_manager import config_manager
 import time
 
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from shared.http import create_client
+
 
 @dataclass
 class QueryResponse:
@@ -25,7 +31,8 @@ class ModuleOrchestrator:
     """Orchestrates requests across all backend modules."""
     
     def __init__(self):
-        self.client = httpx.AsyncClient(timeout=180.0)  # 3 minutes for 70B model
+        # 3 minutes for 70B model
+        self.client = create_client(timeout=180.0)
         self.config = config_manager
     
     async def health_check_all(self) -> Dict[str, bool]:
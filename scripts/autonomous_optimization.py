@@ -6,7 +6,6 @@ Runs continuous tests and optimizations while user is away.
 
 import asyncio
 import json
-import time
 import logging
 import random
 import requests
@@ -143,70 +142,73 @@ class AutonomousOptimizer:
         """Run comprehensive test suite."""
         logger.info("🧪 Running Linux expertise test suite...")
         
-        # Test each category
+        # Test 2-3 random queries from each category
+        test_cases = []
         for category, queries in self.linux_test_queries.items():
-            logger.info(f"Testing {category} queries...")
-            
-            # Test 2-3 random queries from each category
-            test_queries = random.sample(queries, min(3, len(queries)))
-            
-            for query in test_queries:
-                await self._test_single_query(query, category)
-                
-                # Small delay between tests
-                await asyncio.sleep(2)
-    
-    async def _test_single_query(self, query: str, category: str):
-        """Test a single query and record results."""
+            for query in random.sample(queries, min(3, len(queries))):
+                test_cases.append((query, category))
+        
         try:
-            start_time = time.time()
-            
-            # Send query to system
+            # One batch: Module A groups the queries by model, so each model is loaded once
             response = requests.post(
-                'http://localhost:8001/infer',
-                json={'query': query},
-                timeout=120
+                'http://localhost:8001/infer_batch',
+                json={'queries': [{'query': query} for query, _ in test_cases], 'priority': 'batch'},  # Yield to interactive users
+                stream=True,
+                timeout=600
             )
             
-            end_time = time.time()
-            response_time = end_time - start_time
+            if response.status_code != 200:
+                logger.error(f"❌ Batch failed: {response.status_code}")
+                return
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Record test result
-                result = {
-                    'timestamp': datetime.now().isoformat(),
-                    'query': query[:100] + '...' if len(query) > 100 else query,
-                    'category': category,
-                    'expected_model': self.expected_routing[category],
-                    'actual_model': data.get('routing_info', {}).get('selected_model', 'unknown'),
-                    'complexity_score': data.get('routing_info', {}).get('complexity_score', 0),
-                    'confidence': data.get('confidence', 0),
-                    'response_time': response_time,
-                    'success': True,
-                    'model_used': data.get('model_used', 'unknown')
-                }
-                
-                # Check if routing was correct
-                routing_correct = result['actual_model'] == result['expected_model']
-                result['routing_correct'] = routing_correct
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get('done'):
+                    logger.info(f"Batch finished in {data['processing_time']:.2f}s, model order: {data['model_order']}")
+                    continue
                 
-                self.test_results.append(result)
-                self._update_metrics(result)
-                
-                # Log result
-                status = "✅" if routing_correct else "⚠️"
-                logger.info(f"{status} {category}: {result['actual_model']} model, "
-                          f"confidence: {result['confidence']:.3f}, "
-                          f"time: {response_time:.2f}s")
-                
-            else:
-                logger.error(f"❌ Query failed: {response.status_code}")
+                query, category = test_cases[data['index']]
+                if 'error' in data:
+                    logger.error(f"❌ Query failed: {data['status_code']} {data['error']}")
+                else:
+                    self._record_test_result(query, category, data)
                 
         except Exception as e:
             logger.error(f"❌ Test error: {e}")
     
+    def _record_test_result(self, query: str, category: str, data: Dict[str, Any]):
+        """Record the result of a single test query."""
+        response_time = data.get('processing_time', 0)
+        
+        # Record test result
+        result = {
+            'timestamp': datetime.now().isoformat(),
+            'query': query[:100] + '...' if len(query) > 100 else query,
+            'category': category,
+            'expected_model': self.expected_routing[category],
+            'actual_model': (data.get('routing_info') or {}).get('selected_model', 'unknown'),
+            'complexity_score': (data.get('routing_info') or {}).get('complexity_score', 0),
+            'confidence': data.get('confidence', 0),
+            'response_time': response_time,
+            'success': True,
+            'model_used': data.get('model_used', 'unknown')
+        }
+        
+        # Check if routing was correct
+        routing_correct = result['actual_model'] == result['expected_model']
+        result['routing_correct'] = routing_correct
+        
+        self.test_results.append(result)
+        self._update_metrics(result)
+        
+        # Log result
+        status = "✅" if routing_correct else "⚠️"
+        logger.info(f"{status} {category}: {result['actual_model']} model, "
+                  f"confidence: {result['confidence']:.3f}, "
+                  f"time: {response_time:.2f}s")
+    
     def _update_metrics(self, result: Dict[str, Any]):
         """Update optimization metrics."""
         self.optimization_metrics['total_tests'] += 1
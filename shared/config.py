@@ -40,7 +40,25 @@ class ConfigManager:
             "voice_enabled": False,
             "auto_escalation": True,
             "safe_mode": True,
-            "confidence_threshold": 0.5
+            "confidence_threshold": 0.5,
+            "speculative_routing": False,
+            "speculative_confidence_threshold": 0.8,
+            "session_kv_cache": True,
+            "session_kv_max_tokens": 4096,
+            "num_ctx": 4096,
+            "prompt_token_budget": 1500,
+            "response_token_reserve": 1024,
+            "vram_backend": "auto",
+            "vram_sample_interval": 2.0,
+            "vram_switch_policy": "fallback",
+            "vram_queue_timeout": 30.0,
+            "session_store": "memory",
+            "session_store_path": "data/module_a_sessions.db",
+            "session_redis_url": "redis://localhost:6379/0",
+            "session_timeout": 3600,
+            "session_max_sessions": 10000,
+            "session_max_bytes": 67108864,
+            "batch_max_concurrency": 4
         }
         
         default_ollama = {
@@ -0,0 +1,362 @@
+"""
+Shared health registry for Linux Superhelfer modules.
+Probes dependencies in the background, caches their status and guards calls with circuit breakers.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Awaitable, Callable, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+Probe = Callable[[], Awaitable[bool]]
+
+
+class CircuitState(Enum):
+    """Circuit breaker states."""
+    CLOSED = "closed"        # Calls pass
+    OPEN = "open"            # Calls fail fast
+    HALF_OPEN = "half_open"  # One trial call decides
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker of one dependency.
+    
+    After failure_threshold consecutive failures the circuit opens and
+    calls are rejected without touching the network. Once reset_timeout
+    has passed a single trial call is let through; its outcome closes or
+    re-opens the circuit. A successful background probe closes it as well.
+    """
+    
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        """
+        Initialize circuit breaker.
+        
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds before a trial call is allowed
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+    
+    @property
+    def is_open(self) -> bool:
+        """True while calls are rejected (without consuming a trial call)."""
+        if self.state is CircuitState.CLOSED:
+            return False
+        return time.monotonic() - self.opened_at < self.reset_timeout
+    
+    def allow_request(self) -> bool:
+        """
+        Decide whether a call may go out.
+        
+        Returns:
+            True if the call may proceed, False if it should fail fast
+        """
+        if not self.is_open:
+            if self.state is not CircuitState.CLOSED:
+                # Trial call; a lost trial (cancelled call) gets replaced after reset_timeout
+                self.state = CircuitState.HALF_OPEN
+                self.opened_at = time.monotonic()
+            return True
+        self.rejected += 1
+        return False
+    
+    def record_success(self):
+        """Record a successful call or probe."""
+        self.consecutive_failures = 0
+        if self.state is not CircuitState.CLOSED:
+            logger.info("Circuit closed after successful call")
+        self.state = CircuitState.CLOSED
+    
+    def record_failure(self):
+        """Record a failed call or probe."""
+        self.consecutive_failures += 1
+        if self.state is CircuitState.HALF_OPEN or (
+                self.state is CircuitState.CLOSED and self.consecutive_failures >= self.failure_threshold):
+            self.state = CircuitState.OPEN
+            self.opened_at = time.monotonic()
+            self.trips += 1
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "trips": self.trips,
+            "rejected": self.rejected
+        }
+
+
+@dataclass
+class HealthCheck:
+    """A registered dependency and its last probe result."""
+    name: str
+    probe: Probe
+    interval: float
+    breaker: CircuitBreaker
+    healthy: Optional[bool] = None  # None until the first probe
+    last_checked: Optional[float] = None
+    latency: float = 0.0
+    last_error: Optional[str] = None
+    probes: int = 0
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+
+class HealthRegistry:
+    """
+    Process-wide registry of dependency health.
+    
+    Each registered dependency is probed on its own interval by a
+    background task. Health endpoints and request paths read the cached
+    result instead of probing themselves, so a dead dependency costs one
+    probe per interval rather than one timeout per request. Every
+    dependency has a circuit breaker, fed by the probes and by real
+    calls (the shared HTTP pool reports its outcomes per upstream), which
+    lets callers fail fast while it is open.
+    
+    Without background probing (started by the module's startup event)
+    check() probes on demand, as the modules did before.
+    """
+    
+    def __init__(self, interval: float = 15.0, timeout: float = 5.0,
+                 failure_threshold: int = 3, reset_timeout: float = 30.0):
+        """
+        Initialize health registry.
+        
+        Args:
+            interval: Default seconds between probes of a dependency
+            timeout: Seconds before a probe counts as failed
+            failure_threshold: Consecutive failures that open a circuit
+            reset_timeout: Seconds an open circuit rejects calls
+        """
+        self.interval = interval
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._checks: Dict[str, HealthCheck] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._running = False
+    
+    def configure(self, settings: Optional[Dict[str, Any]]):
+        """
+        Apply the config.yaml `health:` section.
+        
+        Args:
+            settings: Dict with interval, timeout, failure_threshold and reset_timeout
+        """
+        settings = settings or {}
+        self.interval = float(settings.get("interval", self.interval))
+        self.timeout = float(settings.get("timeout", self.timeout))
+        self.failure_threshold = int(settings.get("failure_threshold", self.failure_threshold))
+        self.reset_timeout = float(settings.get("reset_timeout", self.reset_timeout))
+        for breaker in self._breakers.values():
+            breaker.failure_threshold = self.failure_threshold
+            breaker.reset_timeout = self.reset_timeout
+    
+    @property
+    def running(self) -> bool:
+        """True while background probing is active."""
+        return self._running
+    
+    def breaker(self, name: str) -> CircuitBreaker:
+        """Get (or create) the circuit breaker of a dependency."""
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = self._breakers.setdefault(name, CircuitBreaker(self.failure_threshold, self.reset_timeout))
+        return breaker
+    
+    def register(self, name: str, probe: Probe, interval: Optional[float] = None):
+        """
+        Register a dependency probe (replaces an earlier probe of the same name).
+        
+        Args:
+            name: Dependency name, e.g. "ollama" or a module name like "rag"
+            probe: Coroutine function returning True if the dependency is healthy
+            interval: Seconds between probes (registry default if None)
+        """
+        existing = self._checks.get(name)
+        check = HealthCheck(name=name, probe=probe, interval=interval or self.interval, breaker=self.breaker(name))
+        if existing:
+            check.healthy, check.last_checked = existing.healthy, existing.last_checked
+            check.task = existing.task
+        self._checks[name] = check
+        if self._running and check.task is None:
+            check.task = asyncio.create_task(self._probe_loop(name))
+    
+    def register_http(self, name: str, url: str, require_ok: bool = False, interval: Optional[float] = None):
+        """
+        Register a dependency that is healthy if GET url answers 200.
+        
+        Probes go through the shared HTTP pool but bypass the open circuit.
+        
+        Args:
+            name: Dependency name (module name to share the pool's breaker)
+            url: Health endpoint URL
+            require_ok: Also require {"status": "ok"} (a degraded module counts as unhealthy)
+            interval: Seconds between probes
+        """
+        async def probe() -> bool:
+            from shared.http import create_client
+            async with create_client(timeout=self.timeout) as client:
+                response = await client.get(url, extensions={"health_probe": True})
+                if response.status_code != 200:
+                    return False
+                return not require_ok or response.json().get("status") == "ok"
+        
+        self.register(name, probe, interval)
+    
+    def is_available(self, name: str) -> bool:
+        """
+        Cached availability of a dependency, answered from memory.
+        
+        Args:
+            name: Dependency name
+        
+        Returns:
+            False if the last probe failed or the circuit is open; True otherwise
+            (including dependencies that were never probed)
+        """
+        check = self._checks.get(name)
+        if check is not None and check.healthy is False:
+            return False
+        return not self.breaker(name).is_open
+    
+    async def check(self, name: str) -> bool:
+        """
+        Availability of a dependency for health endpoints and request paths.
+        
+        Returns the cached status while background probing runs; otherwise
+        (or before the first probe) the dependency is probed now.
+        
+        Args:
+            name: Registered dependency name
+        
+        Returns:
+            True if the dependency is healthy
+        """
+        check = self._checks.get(name)
+        if check is None:
+            return self.is_available(name)
+        if self._running and check.healthy is not None:
+            return self.is_available(name)
+        return await self.probe(name)
+    
+    async def probe(self, name: str) -> bool:
+        """
+        Probe a dependency now and update its status and breaker.
+        
+        Args:
+            name: Registered dependency name
+        
+        Returns:
+            True if the probe succeeded
+        """
+        check = self._checks[name]
+        start = time.monotonic()
+        try:
+            healthy = bool(await asyncio.wait_for(check.probe(), timeout=self.timeout))
+            check.last_error = None if healthy else "probe reported unhealthy"
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            healthy = False
+            check.last_error = f"{type(e).__name__}: {e}"
+        
+        check.latency = time.monotonic() - start
+        check.last_checked = time.time()
+        check.probes += 1
+        if healthy != check.healthy and check.healthy is not None:
+            logger.info(f"Dependency {name} is now {'healthy' if healthy else 'unhealthy'}")
+        check.healthy = healthy
+        if healthy:
+            check.breaker.record_success()
+        else:
+            check.breaker.record_failure()
+        return healthy
+    
+    async def _probe_loop(self, name: str):
+        while True:
+            check = self._checks.get(name)
+            if check is None:
+                return
+            try:
+                await self.probe(name)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Health probe of {name} failed: {e}")
+            await asyncio.sleep(check.interval)
+    
+    def start(self):
+        """Start background probing of all registered dependencies (module startup)."""
+        if self._running:
+            return
+        self._running = True
+        for check in self._checks.values():
+            if check.task is None or check.task.done():
+                check.task = asyncio.create_task(self._probe_loop(check.name))
+        logger.info(f"Health registry probing {len(self._checks)} dependencies every {self.interval}s")
+    
+    async def stop(self):
+        """Stop background probing (module shutdown)."""
+        self._running = False
+        tasks = [check.task for check in self._checks.values() if check.task is not None]
+        for check in self._checks.values():
+            check.task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def status(self, name: str) -> Dict[str, Any]:
+        """
+        Cached status of one dependency.
+        
+        Args:
+            name: Dependency name
+        
+        Returns:
+            Dictionary with health, last probe and circuit breaker state
+        """
+        check = self._checks.get(name)
+        result = {"available": self.is_available(name), "circuit": self.breaker(name).to_dict()}
+        if check is not None:
+            result.update({
+                "healthy": check.healthy,
+                "last_checked": check.last_checked,
+                "latency": check.latency,
+                "last_error": check.last_error,
+                "probes": check.probes,
+                "interval": check.interval
+            })
+        return result
+    
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Cached status of all known dependencies.
+        
+        Returns:
+            Dictionary with probing state and one entry per dependency
+        """
+        names = list(self._checks) + [name for name in self._breakers if name not in self._checks]
+        return {
+            "background_probing": self._running,
+            "dependencies": {name: self.status(name) for name in names}
+        }
+
+
+# Global registry shared by all components in the process
+health_registry = HealthRegistry()
+
+
+def get_health_registry() -> HealthRegistry:
+    """Get the global health registry instance."""
+    return health_registry
@@ -0,0 +1,376 @@
+"""
+Shared HTTP client layer for Linux Superhelfer modules.
+Pooled keep-alive connections per upstream, optional HTTP/2 and retries with jittered backoff.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field, fields
+from typing import Dict, Any, Optional, Tuple
+
+import httpx
+
+from shared.health import HealthRegistry, get_health_registry
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUS_CODES = frozenset({502, 503, 504})
+
+
+class CircuitOpenError(httpx.ConnectError):
+    """Raised without a network call while the upstream's circuit breaker is open."""
+
+
+@dataclass
+class HTTPSettings:
+    """Pool, timeout and retry settings (config.yaml `http:` section)."""
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 5.0
+    timeout: float = 30.0
+    retries: int = 2
+    retry_backoff: float = 0.2  # First retry waits up to this long, doubling per attempt
+    retry_backoff_max: float = 2.0
+    http2: bool = True  # Only used if the h2 package is installed; negotiated via TLS ALPN
+    
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]], base: Optional["HTTPSettings"] = None) -> "HTTPSettings":
+        """Build settings from a config dict, unknown keys are ignored."""
+        values = {f.name: getattr(base, f.name) for f in fields(cls)} if base else {}
+        known = {f.name for f in fields(cls)}
+        values.update({key: value for key, value in (data or {}).items() if key in known})
+        return cls(**values)
+    
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number `attempt` (0-based)."""
+        return random.uniform(0, min(self.retry_backoff_max, self.retry_backoff * (2 ** attempt)))
+
+
+@dataclass
+class UpstreamMetrics:
+    """Request counters of one upstream."""
+    requests: int = 0
+    retries: int = 0
+    failures: int = 0
+    rejected: int = 0  # Failed fast on an open circuit
+    in_flight: int = 0
+    total_seconds: float = 0.0
+    status_codes: Dict[int, int] = field(default_factory=dict)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "in_flight": self.in_flight,
+            "avg_latency": self.total_seconds / self.requests if self.requests else 0.0,
+            "status_codes": dict(self.status_codes)
+        }
+
+
+class _SharedTransport(httpx.AsyncBaseTransport):
+    """
+    Transport handed to every client created by the pool.
+    
+    Looks up the pooled connection transport for the request's upstream
+    and the running event loop, retries failed attempts and records
+    metrics. Calls fail fast while the upstream's circuit breaker is
+    open; health probes (extension "health_probe") bypass it. Closing a
+    client does not close the shared connections.
+    """
+    
+    def __init__(self, pool: "HTTPClientPool"):
+        self._pool = pool
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        upstream = self._pool.upstream_name(request.url)
+        settings = self._pool.settings_for(upstream)
+        transport = self._pool._transport_for(upstream)
+        metrics = self._pool._metrics_for(upstream)
+        probe = request.extensions.get("health_probe", False)
+        breaker = self._pool.health.breaker(upstream)
+        
+        if not probe and not breaker.allow_request():
+            metrics.rejected += 1
+            raise CircuitOpenError(f"Circuit open for {upstream}, not calling {request.url}", request=request)
+        
+        metrics.requests += 1
+        metrics.in_flight += 1
+        start = time.monotonic()
+        attempt = 0
+        try:
+            while True:
+                try:
+                    response = await transport.handle_async_request(request)
+                except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                    # Nothing reached the server, safe to repeat for any method
+                    if attempt >= settings.retries:
+                        raise
+                    logger.debug(f"Retrying {request.method} {request.url} after {type(e).__name__}")
+                except (httpx.ReadError, httpx.RemoteProtocolError) as e:
+                    # Typically a keep-alive connection closed by the server
+                    if attempt >= settings.retries or request.method not in IDEMPOTENT_METHODS:
+                        raise
+                    logger.debug(f"Retrying {request.method} {request.url} after {type(e).__name__}")
+                else:
+                    if (response.status_code in RETRY_STATUS_CODES and request.method in IDEMPOTENT_METHODS
+                            and attempt < settings.retries):
+                        await response.aclose()
+                    else:
+                        metrics.status_codes[response.status_code] = metrics.status_codes.get(response.status_code, 0) + 1
+                        if not probe:
+                            if response.status_code in RETRY_STATUS_CODES:
+                                breaker.record_failure()
+                            else:
+                                breaker.record_success()
+                        return response
+                
+                metrics.retries += 1
+                await asyncio.sleep(settings.backoff(attempt))
+                attempt += 1
+        except Exception as e:
+            metrics.failures += 1
+            if not probe and isinstance(e, httpx.TransportError):
+                breaker.record_failure()
+            raise
+        finally:
+            metrics.in_flight -= 1
+            metrics.total_seconds += time.monotonic() - start
+    
+    async def aclose(self):
+        """Connections belong to the pool, see HTTPClientPool.aclose()."""
+
+
+class HTTPClientPool:
+    """
+    Process-wide HTTP connection pools for inter-module calls.
+    
+    Every upstream (scheme, host and port; configured modules are named
+    after their config key, e.g. "rag") gets one keep-alive connection
+    pool per event loop, shared by all clients from create_client().
+    Clients stay cheap to create and keep their own timeouts and headers,
+    while Module B, D and friends see a handful of reused sockets instead
+    of a new TCP connection per call.
+    
+    Connection errors are retried for every method since nothing reached
+    the server; dropped keep-alive connections and 502/503/504 responses
+    only for idempotent methods. Delays use exponential backoff with full
+    jitter so callers do not retry in lockstep.
+    """
+    
+    def __init__(self, settings: Optional[HTTPSettings] = None, health: Optional[HealthRegistry] = None):
+        """
+        Initialize client pool.
+        
+        Args:
+            settings: Default settings (loaded from config.yaml on first use if None)
+            health: Registry holding the per-upstream circuit breakers (global registry if None)
+        """
+        self.settings = settings
+        self.health = health or get_health_registry()
+        self._upstream_settings: Dict[str, HTTPSettings] = {}
+        self._module_names: Dict[Tuple[str, int], str] = {}
+        self._transports: Dict[Tuple[str, asyncio.AbstractEventLoop], httpx.AsyncHTTPTransport] = {}
+        self._metrics: Dict[str, UpstreamMetrics] = {}
+        self._sessions: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+    
+    def configure(self, config=None):
+        """
+        Load settings and module names from the system configuration.
+        
+        Args:
+            config: SystemConfig (config.yaml is loaded if None)
+        """
+        if config is None:
+            from shared.config import ConfigManager
+            config = ConfigManager().load_config()
+        
+        http_config = dict(getattr(config, "http", None) or {})
+        upstreams = http_config.pop("upstreams", None) or {}
+        self.settings = HTTPSettings.from_dict(http_config)
+        self._upstream_settings = {
+            name: HTTPSettings.from_dict(overrides, base=self.settings) for name, overrides in upstreams.items()
+        }
+        self._module_names = {
+            (module.host, module.port): name for name, module in config.modules.items()
+        }
+        logger.info(f"HTTP client pool configured (http2={self.settings.http2 and HTTP2_AVAILABLE}, "
+                    f"max_connections={self.settings.max_connections})")
+    
+    def settings_for(self, upstream: str) -> HTTPSettings:
+        """Settings of an upstream (its overrides on top of the defaults)."""
+        if self.settings is None:
+            self.configure()
+        return self._upstream_settings.get(upstream, self.settings)
+    
+    def upstream_name(self, url: httpx.URL) -> str:
+        """Pool key of a URL: the module name for configured modules, else host:port."""
+        if self.settings is None:
+            self.configure()
+        host = url.host
+        port = url.port or (443 if url.scheme == "https" else 80)
+        name = self._module_names.get((host, port))
+        if name is None and host in ("127.0.0.1", "::1"):
+            name = self._module_names.get(("localhost", port))
+        return name or f"{host}:{port}"
+    
+    def create_client(self, timeout: Optional[float] = None, base_url: str = "", **kwargs) -> httpx.AsyncClient:
+        """
+        Create an AsyncClient that uses the shared connection pools.
+        
+        Args:
+            timeout: Default request timeout in seconds (config default if None)
+            base_url: Optional base URL for relative request paths
+            **kwargs: Further httpx.AsyncClient arguments (headers, ...)
+        
+        Returns:
+            httpx.AsyncClient; closing it leaves the pooled connections open
+        """
+        if self.settings is None:
+            self.configure()
+        if timeout is None:
+            timeout = self.settings.timeout
+        return httpx.AsyncClient(
+            transport=_SharedTransport(self),
+            timeout=httpx.Timeout(timeout, connect=min(timeout, self.settings.connect_timeout)),
+            base_url=base_url,
+            **kwargs
+        )
+    
+    def session(self, base_url: str):
+        """
+        Get the pooled requests.Session for synchronous callers (Streamlit UI).
+        
+        Args:
+            base_url: Any URL of the upstream
+        
+        Returns:
+            requests.Session with keep-alive pool and connect/status retries
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        upstream = self.upstream_name(httpx.URL(base_url))
+        with self._lock:
+            session = self._sessions.get(upstream)
+            if session is None:
+                settings = self.settings_for(upstream)
+                retry = Retry(
+                    total=settings.retries,
+                    read=0,  # Never repeat a request the server may have processed
+                    backoff_factor=settings.retry_backoff,
+                    backoff_max=settings.retry_backoff_max,
+                    backoff_jitter=settings.retry_backoff,
+                    status_forcelist=sorted(RETRY_STATUS_CODES),
+                    allowed_methods=IDEMPOTENT_METHODS,
+                    raise_on_status=False
+                )
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.max_keepalive_connections,
+                                      max_retries=retry)
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                metrics = self._metrics_for(upstream)
+                
+                def record(response, *args, **kwargs):
+                    metrics.requests += 1
+                    metrics.total_seconds += response.elapsed.total_seconds()
+                    metrics.status_codes[response.status_code] = metrics.status_codes.get(response.status_code, 0) + 1
+                
+                session.hooks["response"].append(record)
+                self._sessions[upstream] = session
+            return session
+    
+    def _transport_for(self, upstream: str) -> httpx.AsyncHTTPTransport:
+        """Pooled connection transport of an upstream on the running event loop."""
+        loop = asyncio.get_running_loop()
+        key = (upstream, loop)
+        transport = self._transports.get(key)
+        if transport is None:
+            settings = self.settings_for(upstream)
+            transport = httpx.AsyncHTTPTransport(
+                http2=settings.http2 and HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=settings.max_connections,
+                    max_keepalive_connections=settings.max_keepalive_connections,
+                    keepalive_expiry=settings.keepalive_expiry
+                )
+            )
+            with self._lock:
+                # Pools of finished event loops (tests, asyncio.run scripts) are unusable
+                for stale in [k for k in self._transports if k[1].is_closed()]:
+                    del self._transports[stale]
+                self._transports[key] = transport
+            logger.debug(f"Created connection pool for {upstream}")
+        return transport
+    
+    def _metrics_for(self, upstream: str) -> UpstreamMetrics:
+        metrics = self._metrics.get(upstream)
+        if metrics is None:
+            with self._lock:
+                metrics = self._metrics.setdefault(upstream, UpstreamMetrics())
+        return metrics
+    
+    async def aclose(self):
+        """Close the connection pools of the running event loop (module shutdown)."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            keys = [key for key in self._transports if key[1] is loop]
+            transports = [self._transports.pop(key) for key in keys]
+        for transport in transports:
+            await transport.aclose()
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get pool metrics per upstream.
+        
+        Returns:
+            Dictionary with request counters and open/idle connection counts
+        """
+        pools: Dict[str, Dict[str, Any]] = {}
+        for upstream, metrics in list(self._metrics.items()):
+            pools[upstream] = {**metrics.to_dict(), "connections": 0, "idle_connections": 0}
+        
+        for (upstream, _), transport in list(self._transports.items()):
+            connections = getattr(getattr(transport, "_pool", None), "connections", [])
+            entry = pools.setdefault(upstream, {**UpstreamMetrics().to_dict(), "connections": 0, "idle_connections": 0})
+            entry["connections"] += len(connections)
+            entry["idle_connections"] += sum(1 for connection in connections if connection.is_idle())
+        
+        for upstream, session in list(self._sessions.items()):
+            adapter = session.get_adapter("http://")
+            pools.setdefault(upstream, {**UpstreamMetrics().to_dict(), "connections": 0, "idle_connections": 0})
+            pools[upstream]["sync_pools"] = len(adapter.poolmanager.pools)
+        
+        return {
+            "http2": bool(self.settings and self.settings.http2 and HTTP2_AVAILABLE),
+            "upstreams": pools
+        }
+
+
+# Global pool shared by all clients in the process
+http_pool = HTTPClientPool()
+
+
+def get_http_pool() -> HTTPClientPool:
+    """Get the global HTTP client pool instance."""
+    return http_pool
+
+
+def create_client(timeout: Optional[float] = None, base_url: str = "", **kwargs) -> httpx.AsyncClient:
+    """Create an AsyncClient on the global connection pools (see HTTPClientPool.create_client)."""
+    return http_pool.create_client(timeout=timeout, base_url=base_url, **kwargs)
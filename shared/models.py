@@ -84,4 +84,7 @@ class SystemConfig(BaseModel):
     """System-wide configuration."""
     modules: Dict[str, ModuleConfig] = Field(..., description="Module configurations")
     features: Dict[str, Any] = Field(default_factory=dict, description="Feature flags")
-    ollama: Dict[str, Any] = Field(default_factory=dict, description="Ollama configuration")
\ No newline at end of file
+    ollama: Dict[str, Any] = Field(default_factory=dict, description="Ollama configuration")
+    http: Dict[str, Any] = Field(default_factory=dict, description="Inter-module HTTP client pool configuration")
+    health: Dict[str, Any] = Field(default_factory=dict, description="Health probing and circuit breaker configuration")
+    ingestion: Dict[str, Any] = Field(default_factory=dict, description="Module B directory watch ingestion configuration")
\ No newline at end of file
@@ -8,7 +8,8 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'modules', 'module_a_core'))
 
-from query_analyzer import QueryAnalyzer, MODEL_HEAVY, MODEL_CODE, MODEL_FAST
+from query_analyzer import QueryAnalyzer
+from routing_engine import MODEL_HEAVY, MODEL_CODE, MODEL_FAST
 
 def test_mathematical_queries():
     """Test mathematical query detection with enhanced patterns."""
@@ -5,6 +5,7 @@ Pytest configuration and fixtures for Linux Superhelfer tests.
 import pytest
 import sys
 from pathlib import Path
+from unittest.mock import AsyncMock, Mock
 
 # Add project root to Python path
 project_root = Path(__file__).parent.parent
@@ -27,4 +28,32 @@ def sample_response():
         confidence=0.9,
         source="core",
         processing_time=0.5
-    )
\ No newline at end of file
+    )
+
+
+@pytest.fixture
+def router():
+    """ModelRouter whose models count as loaded and always pass the VRAM check."""
+    from modules.module_a_core.model_router import ModelRouter
+    from modules.module_a_core.vram_monitor import SwitchDecision
+    router = ModelRouter()
+    router.residency.ensure_loaded = AsyncMock(return_value=True)
+    router.vram_monitor.evaluate_model_switch = Mock(return_value=SwitchDecision.ALLOW)
+    return router
+
+
+@pytest.fixture
+def chat_log(tmp_path):
+    """Redirect the Module A chat interaction log to tmp_path; yields the log file path."""
+    import logging
+    chat_logger = logging.getLogger('chat_interactions')
+    log_path = tmp_path / "chat_interactions.log"
+    handler = logging.FileHandler(log_path)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    original_handlers = chat_logger.handlers[:]
+    chat_logger.handlers = [handler]
+    try:
+        yield log_path
+    finally:
+        chat_logger.handlers = original_handlers
+        handler.close()
@@ -0,0 +1,147 @@
+"""
+Tests for the shared health registry and circuit breakers.
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+from shared.health import CircuitBreaker, CircuitState, HealthRegistry
+from shared.http import CircuitOpenError, HTTPClientPool, HTTPSettings
+
+
+class TestCircuitBreaker:
+    """Test state transitions of a single breaker."""
+    
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.allow_request()
+        
+        breaker.record_failure()
+        assert breaker.state is CircuitState.OPEN
+        assert not breaker.allow_request()
+        assert breaker.to_dict()["rejected"] == 1
+    
+    def test_single_trial_after_reset_timeout(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+        breaker.record_failure()
+        
+        with patch("shared.health.time.monotonic", return_value=time.monotonic() + 31):
+            assert breaker.allow_request()
+            assert breaker.state is CircuitState.HALF_OPEN
+            assert not breaker.allow_request()
+            
+            breaker.record_failure()
+            assert breaker.state is CircuitState.OPEN
+            assert breaker.trips == 2
+    
+    def test_success_closes(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+        breaker.record_failure()
+        breaker.record_success()
+        
+        assert breaker.state is CircuitState.CLOSED
+        assert breaker.allow_request()
+
+
+@pytest.mark.asyncio
+class TestHealthRegistry:
+    """Test cached probing."""
+    
+    async def test_probes_on_demand_without_background_task(self):
+        registry = HealthRegistry()
+        probe = AsyncMock(side_effect=[True, False])
+        registry.register("ollama", probe)
+        
+        assert await registry.check("ollama") is True
+        assert await registry.check("ollama") is False
+        assert probe.await_count == 2
+    
+    async def test_background_probing_answers_from_cache(self):
+        registry = HealthRegistry(interval=60)
+        probe = AsyncMock(return_value=True)
+        registry.register("rag", probe)
+        
+        registry.start()
+        try:
+            await asyncio.sleep(0.01)  # First background probe
+            for _ in range(10):
+                assert await registry.check("rag") is True
+        finally:
+            await registry.stop()
+        
+        assert probe.await_count == 1
+        assert registry.status("rag")["probes"] == 1
+    
+    async def test_failed_probes_open_circuit(self):
+        registry = HealthRegistry(failure_threshold=2)
+        registry.register("execution", AsyncMock(side_effect=ConnectionError("refused")))
+        
+        await registry.probe("execution")
+        await registry.probe("execution")
+        
+        status = registry.status("execution")
+        assert status["available"] is False
+        assert status["circuit"]["state"] == "open"
+        assert status["last_error"] == "ConnectionError: refused"
+    
+    async def test_slow_probe_times_out(self):
+        registry = HealthRegistry(timeout=0.01)
+        
+        async def hanging():
+            await asyncio.sleep(1)
+            return True
+        
+        registry.register("ollama", hanging)
+        assert await registry.probe("ollama") is False
+    
+    async def test_unregistered_dependency_is_available(self):
+        assert await HealthRegistry().check("hybrid") is True
+
+
+@pytest.mark.asyncio
+class TestPoolCircuitBreaker:
+    """Test fail-fast calls through the shared HTTP pool."""
+    
+    def _pool(self, handler, registry):
+        pool = HTTPClientPool(HTTPSettings(retries=0), health=registry)
+        transport = httpx.MockTransport(handler)
+        pool._transport_for = lambda upstream: transport
+        return pool
+    
+    async def test_failing_upstream_fails_fast(self):
+        calls = []
+        
+        def refuse(request):
+            calls.append(request)
+            raise httpx.ConnectError("refused", request=request)
+        
+        registry = HealthRegistry(failure_threshold=2)
+        client = self._pool(refuse, registry).create_client()
+        for _ in range(2):
+            with pytest.raises(httpx.ConnectError):
+                await client.post("http://localhost:8004/execute", json={})
+        
+        with pytest.raises(CircuitOpenError):
+            await client.post("http://localhost:8004/execute", json={})
+        assert len(calls) == 2
+    
+    async def test_probe_bypasses_open_circuit_and_closes_it(self):
+        registry = HealthRegistry(failure_threshold=1)
+        pool = self._pool(lambda request: httpx.Response(200, json={"status": "ok"}), registry)
+        registry.breaker("localhost:8004").record_failure()
+        
+        with patch("shared.http.create_client", pool.create_client):
+            registry.register_http("localhost:8004", "http://localhost:8004/health", require_ok=True)
+            assert await registry.probe("localhost:8004") is True
+        
+        response = await pool.create_client().get("http://localhost:8004/health")
+        assert response.status_code == 200
@@ -0,0 +1,146 @@
+"""
+Tests for the shared HTTP client pool.
+"""
+
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from shared.health import HealthRegistry
+from shared.http import HTTPClientPool, HTTPSettings
+
+
+class Upstream:
+    """MockTransport handler that fails a given number of times before answering 200."""
+    
+    def __init__(self, failures=0, error=None, status_code=503):
+        self.failures = failures
+        self.error = error
+        self.status_code = status_code
+        self.calls = 0
+    
+    def __call__(self, request):
+        self.calls += 1
+        if self.calls <= self.failures:
+            if self.error:
+                raise self.error("failed", request=request)
+            return httpx.Response(self.status_code)
+        return httpx.Response(200, json={"ok": True})
+
+
+def _pool(handler, **settings):
+    pool = HTTPClientPool(HTTPSettings(retry_backoff=0, **settings), health=HealthRegistry())
+    transport = httpx.MockTransport(handler)
+    pool._transport_for = lambda upstream: transport
+    return pool
+
+
+@pytest.mark.asyncio
+class TestRetries:
+    """Test which failures are retried."""
+    
+    async def test_connect_error_retried_for_post(self):
+        upstream = Upstream(failures=2, error=httpx.ConnectError)
+        client = _pool(upstream).create_client()
+        
+        response = await client.post("http://localhost:8002/upload", json={})
+        
+        assert response.status_code == 200
+        assert upstream.calls == 3
+    
+    async def test_gives_up_after_retries(self):
+        upstream = Upstream(failures=5, error=httpx.ConnectError)
+        pool = _pool(upstream, retries=1)
+        
+        with pytest.raises(httpx.ConnectError):
+            await pool.create_client().get("http://localhost:8002/health")
+        
+        assert upstream.calls == 2
+        assert pool.get_metrics()["upstreams"]["localhost:8002"]["failures"] == 1
+    
+    async def test_503_retried_for_get(self):
+        upstream = Upstream(failures=1)
+        response = await _pool(upstream).create_client().get("http://localhost:8002/health")
+        
+        assert response.status_code == 200
+        assert upstream.calls == 2
+    
+    async def test_503_not_retried_for_post(self):
+        upstream = Upstream(failures=1)
+        response = await _pool(upstream).create_client().post("http://localhost:8002/search", json={})
+        
+        assert response.status_code == 503
+        assert upstream.calls == 1
+    
+    async def test_read_error_not_retried_for_post(self):
+        upstream = Upstream(failures=1, error=httpx.ReadError)
+        
+        with pytest.raises(httpx.ReadError):
+            await _pool(upstream).create_client().post("http://localhost:8002/search", json={})
+        assert upstream.calls == 1
+
+
+@pytest.mark.asyncio
+class TestPoolSharing:
+    """Test metrics and client lifecycle."""
+    
+    async def test_metrics_per_upstream(self):
+        pool = _pool(Upstream(failures=1))
+        client = pool.create_client()
+        await client.get("http://localhost:8002/health")
+        await client.get("http://localhost:8001/health")
+        
+        upstreams = pool.get_metrics()["upstreams"]
+        assert upstreams["localhost:8002"]["requests"] == 1
+        assert upstreams["localhost:8002"]["retries"] == 1
+        assert upstreams["localhost:8002"]["status_codes"] == {200: 1}
+        assert upstreams["localhost:8001"]["retries"] == 0
+    
+    async def test_closing_client_keeps_pool_open(self):
+        pool = HTTPClientPool(HTTPSettings())
+        client = pool.create_client()
+        transport = pool._transport_for("rag")
+        await client.aclose()
+        
+        assert pool._transport_for("rag") is transport
+        await pool.aclose()
+        assert pool._transport_for("rag") is not transport
+        await pool.aclose()
+
+
+class TestConfiguration:
+    """Test settings and upstream naming from the system config."""
+    
+    def _configured_pool(self):
+        config = SimpleNamespace(
+            http={"timeout": 20, "upstreams": {"rag": {"max_keepalive_connections": 32}}},
+            modules={
+                "core": SimpleNamespace(host="localhost", port=8001),
+                "rag": SimpleNamespace(host="localhost", port=8002)
+            }
+        )
+        pool = HTTPClientPool()
+        pool.configure(config)
+        return pool
+    
+    def test_module_names(self):
+        pool = self._configured_pool()
+        
+        assert pool.upstream_name(httpx.URL("http://localhost:8002/search")) == "rag"
+        assert pool.upstream_name(httpx.URL("http://127.0.0.1:8001/infer")) == "core"
+        assert pool.upstream_name(httpx.URL("https://wiki.archlinux.org/api.php")) == "wiki.archlinux.org:443"
+    
+    def test_upstream_overrides(self):
+        pool = self._configured_pool()
+        
+        assert pool.settings_for("rag").max_keepalive_connections == 32
+        assert pool.settings_for("rag").timeout == 20
+        assert pool.settings_for("core").max_keepalive_connections == 20
+    
+    def test_sync_session_is_shared(self):
+        pool = self._configured_pool()
+        
+        session = pool.session("http://localhost:8002")
+        assert pool.session("http://localhost:8002/search") is session
+        assert pool.session("http://localhost:8001") is not session
@@ -0,0 +1,144 @@
+"""
+Tests for batch inference (/infer_batch) in Module A.
+"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from modules.module_a_core.main import app, model_router
+from modules.module_a_core.model_router import ModelRouter, ModelType, RoutingResult
+from modules.module_a_core.query_analyzer import QueryAnalysis
+from modules.module_a_core.scheduler import AdmissionRejected, Priority
+
+CODE_QUERY = "Schreibe eine Python-Funktion, die alle Dateien in einem Verzeichnis rekursiv kopiert"
+FAST_QUERY = "Wie zeige ich den freien Speicherplatz an?"
+
+
+class FakeGenerator:
+    """generate_response stand-in that records order and concurrency."""
+    
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    async def __call__(self, query, context=None, analysis=None, priority=Priority.INTERACTIVE, **kwargs):
+        model_type = model_router._select_model_from_analysis(analysis)
+        self.calls.append((model_type, priority))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        
+        routing_result = RoutingResult(
+            selected_model=model_type,
+            model_name=model_router.models[model_type].name,
+            reasoning="test",
+            vram_check_passed=True,
+            user_confirmed=True,
+            analysis=MagicMock(complexity_score=0.1, detected_keywords=[], spec=QueryAnalysis)
+        )
+        return {'response': f"Antwort auf {query[-20:]}", 'model_used': routing_result.model_name,
+                'routing_info': routing_result, 'success': True, 'queue_wait': 0.0}
+
+
+def _records(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+@pytest.fixture
+def client(chat_log):
+    with patch('modules.module_a_core.main.context_integrator.enhance_query_with_context',
+               new_callable=AsyncMock) as mock_enhance:
+        mock_enhance.return_value = {"context_used": False}
+        yield TestClient(app)
+
+
+class TestInferBatchEndpoint:
+    """Test the NDJSON batch endpoint."""
+    
+    def test_results_grouped_by_model(self, client):
+        fake = FakeGenerator()
+        queries = [CODE_QUERY, FAST_QUERY, CODE_QUERY + " mit shutil", FAST_QUERY + " bitte"]
+        
+        with patch.object(model_router, 'generate_response', fake):
+            response = client.post("/infer_batch", json={"queries": [{"query": q} for q in queries]})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        
+        records = _records(response)
+        summary = records[-1]
+        assert summary["done"] is True
+        assert summary["succeeded"] == 4
+        assert sorted(record["index"] for record in records[:-1]) == [0, 1, 2, 3]
+        
+        # Each model runs as one contiguous group
+        models = [model_type for model_type, _ in fake.calls]
+        assert models == sorted(models, key=lambda m: summary["model_order"].index(m.value))
+        assert set(summary["model_order"]) == {"fast", "code"}
+        assert all(priority == Priority.BATCH for _, priority in fake.calls)
+    
+    def test_bounded_concurrency(self, client):
+        fake = FakeGenerator(delay=0.05)
+        
+        with patch.object(model_router, 'generate_response', fake):
+            response = client.post("/infer_batch", json={
+                "queries": [{"query": f"{FAST_QUERY} {i}"} for i in range(6)],
+                "max_concurrency": 2
+            })
+        
+        assert _records(response)[-1]["succeeded"] == 6
+        assert fake.max_in_flight == 2
+    
+    def test_invalid_query_reported_inline(self, client):
+        with patch.object(model_router, 'generate_response', FakeGenerator()):
+            response = client.post("/infer_batch", json={"queries": [{"query": "x"}, {"query": FAST_QUERY}]})
+        
+        records = _records(response)
+        error = next(record for record in records if record.get("index") == 0)
+        assert error["status_code"] == 400
+        assert records[-1]["succeeded"] == 1
+        assert records[-1]["failed"] == 1
+    
+    def test_admission_rejection_is_retried(self, client):
+        fake = FakeGenerator(delay=0)
+        rejected = AsyncMock(side_effect=[AdmissionRejected(ModelType.FAST, 8, 0), None])
+        
+        async def flaky(*args, **kwargs):
+            await rejected()
+            return await fake(*args, **kwargs)
+        
+        with patch.object(model_router, 'generate_response', flaky):
+            response = client.post("/infer_batch", json={"queries": [{"query": FAST_QUERY}]})
+        
+        assert _records(response)[-1]["succeeded"] == 1
+        assert rejected.await_count == 2
+    
+    def test_empty_batch_rejected(self, client):
+        assert client.post("/infer_batch", json={"queries": []}).status_code == 400
+
+
+class TestPlanBatch:
+    """Test grouping of batch queries by target model."""
+    
+    def test_resident_model_first_then_by_vram(self):
+        router = ModelRouter()
+        router.residency.is_resident = lambda name: name == router.models[ModelType.CODE].name
+        analyses = [
+            MagicMock(original_query="a"), MagicMock(original_query="b"),
+            MagicMock(original_query="c"), MagicMock(original_query="d")
+        ]
+        selected = {"a": ModelType.HEAVY, "b": ModelType.FAST, "c": ModelType.CODE, "d": ModelType.FAST}
+        
+        with patch.object(router, '_select_model_from_analysis', lambda analysis: selected[analysis.original_query]):
+            plan = router.plan_batch(["a", "b", "c", "d"], analyses)
+        
+        assert plan == [(ModelType.CODE, [2]), (ModelType.FAST, [1, 3]), (ModelType.HEAVY, [0])]
@@ -0,0 +1,204 @@
+"""
+Tests for the Module B directory watch ingestion daemon.
+"""
+
+import base64
+import gzip
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from modules.module_b_rag.ingestion_daemon import IngestionDaemon, WorkQueue
+
+
+class FakePipeline:
+    """Records submitted files and deleted sources; fails files whose text contains FAIL."""
+    
+    def __init__(self):
+        self.ingested = {}
+        self.deleted = []
+        self.jobs = {}
+    
+    def submit(self, files, metadata, file_metadata=None):
+        failed = []
+        for i, (content, meta) in enumerate(zip(files, file_metadata)):
+            text = base64.b64decode(content).decode("utf-8")
+            if "FAIL" in text:
+                failed.append(i)
+            else:
+                self.ingested[meta["source"]] = text
+        job = SimpleNamespace(job_id=f"job{len(self.jobs)}", failed_file_indices=failed,
+                              errors=[f"File {i+1}: broken" for i in failed])
+        self.jobs[job.job_id] = job
+        return job
+    
+    async def wait(self, job_id):
+        return self.jobs[job_id]
+    
+    async def delete_source(self, source):
+        self.deleted.append(source)
+        return 1
+
+
+def _daemon(tmp_path, pipeline=None, **kwargs):
+    docs = tmp_path / "docs"
+    docs.mkdir(exist_ok=True)
+    kwargs.setdefault("debounce", 0)
+    return IngestionDaemon(
+        pipeline or FakePipeline(), directories=[str(docs)], queue_path=str(tmp_path / "queue.db"),
+        use_inotify=False, **kwargs
+    ), docs
+
+
+async def _drain(daemon):
+    while await daemon.process_ready():
+        pass
+
+
+@pytest.mark.asyncio
+class TestIngestionDaemon:
+    """Test change detection, debouncing and the persistent work queue."""
+    
+    async def test_scan_ingests_new_changed_and_removes_deleted_files(self, tmp_path):
+        daemon, docs = _daemon(tmp_path)
+        (docs / "a.txt").write_text("alpha")
+        (docs / "b.txt").write_text("beta")
+        
+        assert daemon.scan() == 2
+        await _drain(daemon)
+        assert daemon.pipeline.ingested == {str(docs / "a.txt"): "alpha", str(docs / "b.txt"): "beta"}
+        
+        # Unchanged files are not queued again
+        assert daemon.scan() == 0
+        
+        (docs / "a.txt").write_text("alpha v2")
+        (docs / "b.txt").unlink()
+        assert daemon.scan() == 2
+        await _drain(daemon)
+        
+        assert daemon.pipeline.ingested[str(docs / "a.txt")] == "alpha v2"
+        assert daemon.pipeline.deleted == [str(docs / "b.txt")]
+        assert daemon.get_statistics()["queue"]["files"] == {"ingested": 1}
+    
+    async def test_events_are_debounced(self, tmp_path):
+        daemon, docs = _daemon(tmp_path, debounce=0.2)
+        path = docs / "notes.md"
+        path.write_text("draft")
+        
+        daemon.enqueue_file(str(path))
+        daemon.enqueue_file(str(path))
+        assert await daemon.process_ready() == 0
+        
+        time.sleep(0.25)
+        assert await daemon.process_ready() == 1
+        assert list(daemon.pipeline.ingested) == [str(path)]
+    
+    async def test_queue_survives_restart(self, tmp_path):
+        daemon, docs = _daemon(tmp_path)
+        (docs / "a.txt").write_text("alpha")
+        daemon.scan()
+        daemon.queue.close()
+        
+        restarted, _ = _daemon(tmp_path)
+        await _drain(restarted)
+        
+        assert list(restarted.pipeline.ingested) == [str(docs / "a.txt")]
+        assert restarted.scan() == 0
+    
+    async def test_excluded_binary_and_oversized_files_are_not_ingested(self, tmp_path):
+        daemon, docs = _daemon(tmp_path, exclude=["*.key"], max_file_size_mb=0.001)
+        (docs / "server.key").write_text("secret")
+        (docs / "blob.bin").write_bytes(b"\x7fELF\x00\x01")
+        (docs / "big.txt").write_text("x" * 2000)
+        (docs / "ok.txt").write_text("fine")
+        
+        assert daemon.scan() == 3
+        await _drain(daemon)
+        
+        assert list(daemon.pipeline.ingested) == [str(docs / "ok.txt")]
+        assert daemon.skipped == 2
+        assert daemon.scan() == 0
+    
+    async def test_failed_file_is_retried_then_given_up(self, tmp_path):
+        daemon, docs = _daemon(tmp_path, max_attempts=2)
+        (docs / "bad.txt").write_text("FAIL")
+        daemon.scan()
+        
+        await daemon.process_ready()
+        entries = daemon.queue.ready(10)
+        assert entries == []  # Rescheduled with backoff
+        assert daemon.queue.get_statistics()["retrying"] == 1
+        
+        daemon.queue._get_connection().execute("UPDATE pending SET due = 0")
+        await daemon.process_ready()
+        
+        assert daemon.failed == 1
+        assert daemon.queue.get_statistics()["pending"] == 0
+        assert daemon.scan() == 0  # Left alone until it changes
+    
+    async def test_new_file_in_populated_directory_queues_one_entry(self, tmp_path):
+        events = pytest.importorskip("watchdog.events")
+        from modules.module_b_rag.ingestion_daemon import _WatchHandler
+        
+        daemon, docs = _daemon(tmp_path)
+        for i in range(50):
+            (docs / f"page{i}.txt").write_text(f"page {i}")
+        daemon.scan()
+        await _drain(daemon)
+        
+        new = docs / "new.txt"
+        new.write_text("new page")
+        handler = _WatchHandler(daemon)
+        # What inotify reports for creating one file
+        handler.dispatch(events.FileCreatedEvent(str(new)))
+        handler.dispatch(events.DirModifiedEvent(str(docs)))
+        handler.dispatch(events.FileModifiedEvent(str(new)))
+        handler.dispatch(events.FileClosedEvent(str(new)))
+        
+        assert daemon.queue.pending_paths() == {str(new)}
+    
+    async def test_unchanged_queued_file_is_not_read_again(self, tmp_path):
+        daemon, docs = _daemon(tmp_path)
+        path = docs / "a.txt"
+        path.write_text("alpha")
+        daemon.scan()
+        await _drain(daemon)
+        
+        daemon.enqueue_file(str(path))
+        daemon.load_text = None  # Any read would fail
+        await _drain(daemon)
+        
+        assert daemon.unchanged == 1
+        assert len(daemon.pipeline.jobs) == 1
+        assert daemon.get_statistics()["queue"] == {
+            "pending": 0, "retrying": 0, "files": {"ingested": 1}, "path": str(tmp_path / "queue.db")
+        }
+    
+    async def test_gzip_man_page_is_rendered_to_text(self, tmp_path):
+        daemon, docs = _daemon(tmp_path)
+        man_dir = docs / "man1"
+        man_dir.mkdir()
+        with gzip.open(man_dir / "demo.1.gz", "wb") as f:
+            f.write(b'.TH DEMO 1\n.SH NAME\ndemo \\- print a \\fBdemo\\fR\n')
+        
+        text = daemon.load_text(str(man_dir / "demo.1.gz"))
+        
+        assert "demo" in text and "\\f" not in text and ".SH" not in text
+
+
+class TestWorkQueue:
+    """Test queue entries replaced by newer events."""
+    
+    def test_newer_event_is_kept_when_old_entry_completes(self, tmp_path):
+        queue = WorkQueue(str(tmp_path / "queue.db"))
+        queue.enqueue(["/docs/a.txt"])
+        (path, _, due, _), = queue.ready(10)
+        
+        time.sleep(0.01)
+        queue.enqueue(["/docs/a.txt"])
+        queue.complete(path, due, (1, 1))
+        
+        assert queue.pending_paths() == {"/docs/a.txt"}
+        assert os.path.exists(tmp_path / "queue.db")
@@ -0,0 +1,185 @@
+"""
+Tests for per-session KV-cache reuse (Module A).
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from ollama import AsyncClient
+
+from modules.module_a_core.kv_cache import SessionKVCache, SessionPrompt
+from modules.module_a_core.model_router import ModelType
+
+
+class FakeGenerateServer:
+    """/api/generate stand-in that extends the context token array like Ollama."""
+    
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.requests = []
+    
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.requests.append(body)
+        await asyncio.sleep(self.delay)
+        
+        previous = body.get("context") or []
+        context = list(previous) + list(range(len(previous), len(previous) + len(body["prompt"].split()) + 2))
+        payload = {"model": body["model"], "response": "antwort", "done": True, "context": context,
+                   "prompt_eval_count": len(body["prompt"].split())}
+        
+        if body.get("stream"):
+            lines = [json.dumps({"model": body["model"], "response": "antwort", "done": False}),
+                     json.dumps(payload)]
+            return httpx.Response(200, content="\n".join(lines).encode())
+        return httpx.Response(200, json=payload)
+
+
+class TestSessionKVCache:
+    """Test the cache bookkeeping."""
+    
+    def test_hit_for_same_model(self):
+        cache = SessionKVCache()
+        cache.put("s1", "qwen", [1, 2, 3])
+        
+        assert cache.get("s1", "qwen") == [1, 2, 3]
+        assert cache.get_statistics()["hits"] == 1
+    
+    def test_model_switch_drops_entry(self):
+        cache = SessionKVCache()
+        cache.put("s1", "qwen", [1, 2, 3])
+        
+        assert cache.get("s1", "llama") is None
+        assert cache.get("s1", "qwen") is None
+        assert cache.get_statistics()["model_switches"] == 1
+    
+    def test_oversized_context_falls_back(self):
+        cache = SessionKVCache(max_tokens=2)
+        cache.put("s1", "qwen", [1])
+        cache.put("s1", "qwen", [1, 2, 3])
+        
+        assert cache.get("s1", "qwen") is None
+        assert cache.get_statistics()["oversized"] == 1
+    
+    def test_missing_tokens_invalidate(self):
+        cache = SessionKVCache()
+        cache.put("s1", "qwen", [1, 2])
+        cache.record(SessionPrompt("s1", "frage"), "qwen", {'response': "ok"})
+        
+        assert cache.get("s1", "qwen") is None
+    
+    def test_lru_eviction(self):
+        cache = SessionKVCache(max_sessions=2)
+        cache.put("a", "qwen", [1])
+        cache.put("b", "qwen", [1])
+        cache.get("a", "qwen")
+        cache.put("c", "qwen", [1])
+        
+        assert cache.get("b", "qwen") is None
+        assert cache.get("a", "qwen") == [1]
+        assert cache.get_statistics()["evictions"] == 1
+    
+    def test_prepare_without_session(self):
+        assert SessionKVCache().prepare(None, "qwen", "full prompt") == ("full prompt", None)
+
+
+class TestRouterSessionReuse:
+    """Test session-aware generation against a fake Ollama server."""
+    
+    @pytest.fixture
+    def server(self):
+        return FakeGenerateServer()
+    
+    @pytest.fixture
+    def router(self, router, server):
+        for client in router.ollama_clients.values():
+            client.client = AsyncClient(host="http://fake-ollama:11434", transport=httpx.MockTransport(server.handle))
+        return router
+    
+    @pytest.mark.asyncio
+    async def test_follow_up_turn_sends_only_new_tokens(self, router, server):
+        first = await router.generate_response(
+            "wie liste ich dateien?", force_model=ModelType.CODE,
+            session=SessionPrompt("s1", "wie liste ich dateien?")
+        )
+        second = await router.generate_response(
+            "Context from previous conversation: ...\n\nCurrent query: und versteckte?",
+            force_model=ModelType.CODE,
+            session=SessionPrompt("s1", "und versteckte?")
+        )
+        
+        assert first['kv_cache_hit'] is False
+        assert second['kv_cache_hit'] is True
+        assert 'context_tokens' not in second
+        
+        cold, warm = server.requests
+        assert not cold.get("context")
+        assert "system administrator" in cold["prompt"]
+        assert warm["context"] == list(range(len(warm["context"])))
+        assert warm["prompt"] == "Question: und versteckte?\n\nAnswer:"
+    
+    @pytest.mark.asyncio
+    async def test_model_change_rebuilds_from_transcript(self, router, server):
+        await router.generate_response("erste frage", force_model=ModelType.CODE, session=SessionPrompt("s1", "erste frage"))
+        result = await router.generate_response(
+            "transkript + zweite frage", force_model=ModelType.FAST, session=SessionPrompt("s1", "zweite frage")
+        )
+        
+        assert result['kv_cache_hit'] is False
+        assert not server.requests[-1].get("context")
+        assert "transkript + zweite frage" in server.requests[-1]["prompt"]
+        assert router.kv_cache.get_statistics()["model_switches"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_streaming_turn_reuses_context(self, router, server):
+        await router.generate_response("erste frage", force_model=ModelType.CODE, session=SessionPrompt("s1", "erste frage"))
+        
+        events = [
+            event async for event in router.generate_response_stream(
+                "transkript", force_model=ModelType.CODE, session=SessionPrompt("s1", "zweite frage")
+            )
+        ]
+        
+        result = events[-1]['result']
+        assert result['kv_cache_hit'] is True
+        assert 'context_tokens' not in result
+        assert server.requests[-1]["context"]
+        assert router.kv_cache.get("s1", router.models[ModelType.CODE].name) is not None
+    
+    @pytest.mark.asyncio
+    async def test_first_turns_of_different_sessions_share_one_call(self, router, server):
+        server.delay = 0.05
+        first, second = await asyncio.gather(
+            router.generate_response("wie liste ich dateien?", force_model=ModelType.CODE,
+                                     session=SessionPrompt("s1", "wie liste ich dateien?")),
+            router.generate_response("wie liste ich dateien?", force_model=ModelType.CODE,
+                                     session=SessionPrompt("s2", "wie liste ich dateien?"))
+        )
+        
+        assert len(server.requests) == 1
+        assert first['response'] == second['response'] == "antwort"
+        assert second.get('coalesced') is True
+    
+    @pytest.mark.asyncio
+    async def test_sessions_continuing_from_cached_context_are_not_shared(self, router, server):
+        for session_id in ("s1", "s2"):
+            await router.generate_response("erste frage", force_model=ModelType.CODE,
+                                           session=SessionPrompt(session_id, "erste frage"))
+        server.delay = 0.05
+        
+        await asyncio.gather(*[
+            router.generate_response("transkript", force_model=ModelType.CODE, session=SessionPrompt(session_id, "weiter"))
+            for session_id in ("s1", "s2")
+        ])
+        
+        assert len(server.requests) == 4
+        assert all(request["context"] for request in server.requests[2:])
+    
+    @pytest.mark.asyncio
+    async def test_without_session_nothing_is_cached(self, router, server):
+        result = await router.generate_response("frage", force_model=ModelType.CODE)
+        
+        assert 'context_tokens' not in result
+        assert router.kv_cache.get_statistics()["sessions"] == 0
@@ -0,0 +1,115 @@
+"""
+Tests for the Module B lexical (BM25) index and hybrid fusion.
+"""
+
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from modules.module_b_rag.lexical_index import LexicalIndex, tokenize
+
+CHUNKS = [
+    ("ss_0000", "ss.8", "ss -tulpn zeigt alle lauschenden TCP und UDP Sockets mit Prozess an"),
+    ("netstat_0000", "netstat.8", "netstat is a legacy tool to show network connections and listening sockets"),
+    ("journal_0000", "journalctl.1", "journalctl --vacuum-time=2weeks removes archived journal files older than two weeks"),
+    ("journal_0001", "journalctl.1", "journalctl -u nginx.service shows the log of one unit"),
+    ("prose_0000", "guide.md", "Networking on Linux: sockets, ports and connections explained for beginners"),
+]
+
+
+def _index(path=None):
+    index = LexicalIndex(path)
+    index.add_batch([(chunk_id, source, content) for chunk_id, source, content in CHUNKS])
+    return index
+
+
+class TestTokenize:
+    """Test term extraction for Linux commands."""
+    
+    def test_keeps_flags_and_unit_names(self):
+        terms = tokenize("journalctl --vacuum-time=2weeks -u nginx.service")
+        
+        assert "--vacuum-time=2weeks" not in terms  # "=" splits
+        assert "--vacuum-time" in terms
+        assert "vacuum" in terms and "time" in terms
+        assert "nginx.service" in terms and "nginx" in terms
+        assert "-u" in terms
+    
+    def test_trailing_punctuation_is_dropped(self):
+        assert tokenize("Use ss.") == ["use", "ss"]
+
+
+class TestLexicalIndex:
+    """Test BM25 ranking and incremental maintenance."""
+    
+    def test_exact_command_ranks_first(self):
+        hits = _index().search("ss -tulpn", top_k=3)
+        
+        assert hits[0][0] == "ss_0000"
+    
+    def test_flag_lookup(self):
+        hits = _index().search("journalctl --vacuum-time", top_k=3)
+        
+        assert hits[0][0] == "journal_0000"
+    
+    def test_common_words_alone_do_not_match(self):
+        assert _index().search("wie zeige ich das an", top_k=3) == []
+    
+    def test_source_filter(self):
+        hits = _index().search("journalctl", top_k=5, source="journalctl.1")
+        
+        assert {chunk_id for chunk_id, _ in hits} == {"journal_0000", "journal_0001"}
+    
+    def test_remove_and_replace(self):
+        index = _index()
+        assert index.remove_source("ss.8") == 1
+        assert index.search("ss -tulpn") == []
+        
+        index.add_batch([("journal_0001", "journalctl.1", "journalctl -f follows the journal")])
+        assert index.search("nginx.service") == []
+        assert len(index) == 4
+    
+    def test_persists_across_restart(self, tmp_path):
+        path = str(tmp_path / "chromadb_lexical.db")
+        first = _index(path)
+        first.remove(["netstat_0000"])
+        first.close()
+        
+        second = LexicalIndex(path)
+        assert len(second) == 4
+        assert second.search("ss -tulpn")[0][0] == "ss_0000"
+        assert second.get_statistics()["chunks"] == 4
+
+
+class TestHybridFusion:
+    """Test reciprocal-rank fusion in Retriever.search."""
+    
+    @pytest.mark.asyncio
+    async def test_lexical_hit_fused_into_top_k(self):
+        pytest.importorskip("chromadb")
+        from modules.module_b_rag.retriever import Retriever
+        
+        embedding_manager = Mock(model="nomic-embed-text")
+        embedding_manager.generate_embedding = AsyncMock(return_value=[1.0, 0.0])
+        vector_store = Mock()
+        vector_store.search.return_value = [
+            {"id": f"prose_{i}", "content": f"prose {i}", "source": "guide.md", "score": 0.8 - i * 0.01, "metadata": {}}
+            for i in range(6)
+        ]
+        vector_store.lexical_search.return_value = [
+            {"id": "ss_0000", "content": "ss -tulpn", "source": "ss.8", "score": 1.0, "bm25": 7.2,
+             "embedding": [0.6, 0.8], "metadata": {}},
+            {"id": "prose_3", "content": "prose 3", "source": "guide.md", "score": 0.4, "bm25": 2.9,
+             "embedding": [0.77, 0.1], "metadata": {}}
+        ]
+        
+        results = await Retriever(vector_store, embedding_manager).search("ss -tulpn", top_k=3, threshold=0.6)
+        
+        # prose_3 is in both rankings; ss_0000 ties with prose_0 and comes second on insertion order
+        assert [r["id"] for r in results] == ["prose_3", "prose_0", "ss_0000"]
+        by_id = {r["id"]: r for r in results}
+        assert by_id["ss_0000"]["metadata"]["retrieval"] == "lexical"
+        # Lexical-only hits report their cosine similarity, not the BM25 score
+        assert by_id["ss_0000"]["score"] == pytest.approx(0.6)
+        assert "embedding" not in by_id["ss_0000"]
+        assert by_id["prose_3"]["metadata"]["retrieval"] == "hybrid"
@@ -0,0 +1,174 @@
+"""
+Tests for the model residency manager (Module A), run against a fake Ollama server.
+"""
+
+import asyncio
+import json
+import time
+from unittest.mock import Mock
+
+import httpx
+import pytest
+from ollama import AsyncClient
+
+from modules.module_a_core.model_router import ModelRouter, ModelType
+from modules.module_a_core.vram_monitor import SwitchDecision
+from modules.module_a_core.residency_manager import ModelResidencyManager
+
+
+class FakeOllamaServer:
+    """Minimal /api/generate and /api/ps implementation tracking loaded models."""
+    
+    def __init__(self, load_delay: float = 0.0):
+        self.load_delay = load_delay
+        self.loaded = {}
+        self.requests = []
+    
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/ps":
+            models = [{"name": name, "model": name, "size_vram": 2 * 1024 * 1024 * 1024} for name in self.loaded]
+            return httpx.Response(200, json={"models": models})
+        
+        body = json.loads(request.content)
+        self.requests.append(body)
+        name = body["model"]
+        
+        if body.get("keep_alive") == 0:
+            self.loaded.pop(name, None)
+        else:
+            if name not in self.loaded:
+                await asyncio.sleep(self.load_delay)
+            self.loaded[name] = body.get("keep_alive")
+        
+        return httpx.Response(200, json={"model": name, "response": "", "done": True})
+    
+    def client(self) -> AsyncClient:
+        return AsyncClient(host="http://fake-ollama:11434", transport=httpx.MockTransport(self.handle))
+
+
+@pytest.fixture
+def server():
+    return FakeOllamaServer()
+
+
+@pytest.fixture
+def manager(server):
+    return ModelResidencyManager(server.client(), {"llama3.2:3b": 0, "qwen3-coder-30b-local": 600})
+
+
+class TestModelResidencyManager:
+    """Test loading, pinning and unloading."""
+    
+    def test_keep_alive_values(self, manager):
+        assert manager.keep_alive_for("llama3.2:3b") == -1
+        assert manager.keep_alive_for("qwen3-coder-30b-local") == "600s"
+        assert manager.keep_alive_for("unmanaged") is None
+    
+    @pytest.mark.asyncio
+    async def test_ensure_loaded_uses_keep_alive(self, manager, server):
+        assert await manager.ensure_loaded("qwen3-coder-30b-local") is True
+        
+        assert manager.is_resident("qwen3-coder-30b-local")
+        assert server.loaded == {"qwen3-coder-30b-local": "600s"}
+        assert manager.cold_loads == 1
+        
+        # Already resident: no further request
+        await manager.ensure_loaded("qwen3-coder-30b-local")
+        assert len(server.requests) == 1
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_loads_share_one_request(self, manager, server):
+        server.load_delay = 0.05
+        
+        results = await asyncio.gather(*[manager.ensure_loaded("qwen3-coder-30b-local") for _ in range(5)])
+        
+        assert results == [True] * 5
+        assert len(server.requests) == 1
+    
+    @pytest.mark.asyncio
+    async def test_unload_idle_skips_pinned(self, manager, server):
+        await manager.ensure_loaded("llama3.2:3b")
+        await manager.ensure_loaded("qwen3-coder-30b-local")
+        
+        unloaded = await manager.unload_idle(now=time.time() + 601)
+        
+        assert unloaded == ["qwen3-coder-30b-local"]
+        assert (server.requests[-1]["model"], server.requests[-1]["keep_alive"]) == ("qwen3-coder-30b-local", 0)
+        assert list(server.loaded) == ["llama3.2:3b"]
+        assert manager.resident_models() == ["llama3.2:3b"]
+    
+    @pytest.mark.asyncio
+    async def test_recently_used_model_stays(self, manager):
+        await manager.ensure_loaded("qwen3-coder-30b-local")
+        assert await manager.unload_idle(now=time.time() + 60) == []
+    
+    @pytest.mark.asyncio
+    async def test_refresh_syncs_with_ollama(self, manager, server):
+        await manager.ensure_loaded("qwen3-coder-30b-local")
+        server.loaded = {"qwen3-coder-30b-local:latest": "600s", "llama3.2:3b": -1}
+        
+        await manager.refresh()
+        assert set(manager.resident_models()) == {"qwen3-coder-30b-local", "llama3.2:3b"}
+        assert manager.get_status()["resident_models"]["llama3.2:3b"]["size_vram_mb"] == 2048
+        
+        # Ollama expired the model on its own
+        server.loaded = {}
+        await manager.refresh()
+        assert manager.resident_models() == []
+    
+    @pytest.mark.asyncio
+    async def test_failed_load(self):
+        async def refuse(request):
+            raise httpx.ConnectError("connection refused")
+        
+        manager = ModelResidencyManager(
+            AsyncClient(host="http://fake-ollama:11434", transport=httpx.MockTransport(refuse)),
+            {"llama3.1:70b": 300}
+        )
+        
+        assert await manager.ensure_loaded("llama3.1:70b") is False
+        assert not manager.is_resident("llama3.1:70b")
+        assert manager.failed_loads == 1
+
+
+class TestRouterResidency:
+    """Test residency integration in ModelRouter."""
+    
+    @pytest.fixture
+    def router(self, server):
+        router = ModelRouter()
+        router.residency.client = server.client()
+        router.vram_monitor.evaluate_model_switch = Mock(return_value=SwitchDecision.FALLBACK)
+        return router
+    
+    def test_clients_use_residency_keep_alive(self, router):
+        assert router.ollama_clients[ModelType.FAST].keep_alive == -1
+        assert router.ollama_clients[ModelType.HEAVY].keep_alive == "300s"
+    
+    @pytest.mark.asyncio
+    async def test_resident_model_skips_vram_check(self, router):
+        router.residency.touch(router.models[ModelType.HEAVY].name)
+        
+        result = await router.route_query("test", force_model=ModelType.HEAVY)
+        
+        assert result.selected_model == ModelType.HEAVY
+        router.vram_monitor.evaluate_model_switch.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_cold_model_still_checks_vram(self, router):
+        result = await router.route_query("test", force_model=ModelType.HEAVY)
+        
+        router.vram_monitor.evaluate_model_switch.assert_called_once()
+        assert result.selected_model == ModelType.FAST
+    
+    @pytest.mark.asyncio
+    async def test_start_preloads_fast_model(self, router, server):
+        await router.start()
+        await asyncio.sleep(0)  # let the background warm-up start its load
+        await asyncio.gather(*router.residency._loading.values())
+        
+        assert server.loaded == {"llama3.2:3b": -1}
+        assert router.residency.is_resident("llama3.2:3b")
+        
+        await router.stop()
+        assert router._cleanup_task is None
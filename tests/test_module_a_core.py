@@ -12,7 +12,7 @@ from pathlib import Path
 # Add modules to path
 sys.path.append(str(Path(__file__).parent.parent / "modules"))
 
-from modules.module_a_core.main import app
+from modules.module_a_core.main import app, model_router
 from modules.module_a_core.ollama_client import OllamaClient, QueryProcessor
 from modules.module_a_core.confidence import ConfidenceCalculator
 
@@ -89,6 +89,26 @@ class TestOllamaClient:
             assert 'Test context' in prompt
             assert 'Test query' in prompt
     
+    @pytest.mark.asyncio
+    async def test_generate_response_stream(self, ollama_client):
+        """Test streaming generation yields tokens and a final summary chunk."""
+        async def fake_stream():
+            yield {'response': 'Use ', 'done': False}
+            yield {'response': 'df -h', 'done': False}
+            yield {'response': '', 'done': True, 'prompt_eval_count': 12, 'eval_count': 2}
+
+        with patch.object(ollama_client.client, 'generate', new_callable=AsyncMock) as mock_generate:
+            mock_generate.return_value = fake_stream()
+
+            chunks = [chunk async for chunk in ollama_client.generate_response_stream("How to check disk usage?")]
+
+            assert mock_generate.call_args[1]['stream'] is True
+            assert [c['token'] for c in chunks if not c['done']] == ['Use ', 'df -h']
+            assert chunks[-1]['done'] is True
+            assert chunks[-1]['response'] == 'Use df -h'
+            assert chunks[-1]['model_used'] == 'llama3.1:8b'
+            assert chunks[-1]['response_tokens'] == 2
+
     def test_prepare_prompt_without_context(self, ollama_client):
         """Test prompt preparation without context."""
         prompt = ollama_client._prepare_prompt("How to check disk usage?")
@@ -220,7 +240,7 @@ class TestAPIEndpoints:
     """Test cases for FastAPI endpoints."""
     
     @pytest.fixture
-    def client(self):
+    def client(self, chat_log):
         return TestClient(app)
     
     def test_health_endpoint(self, client):
@@ -251,13 +271,13 @@ class TestAPIEndpoints:
             'model_used': 'llama3.1:8b',
             'prompt_tokens': 50,
             'response_tokens': 20,
-            'total_duration': 1500000000
+            'total_duration': 1500000000,
+            'success': True
         }
         
-        with patch('modules.module_a_core.main.ollama_client.is_available') as mock_available, \
-             patch('modules.module_a_core.main.ollama_client.generate_response') as mock_generate:
-            
-            mock_available.return_value = True
+        # /infer generates through the model router, not the legacy single client
+        with patch('modules.module_a_core.main.model_router.generate_response',
+                   new_callable=AsyncMock) as mock_generate:
             mock_generate.return_value = mock_generation_result
             
             response = client.post("/infer", json={
@@ -266,6 +286,7 @@ class TestAPIEndpoints:
             })
             
             assert response.status_code == 200
+            assert "Linux administration" in mock_generate.call_args.args[0]
             data = response.json()
             assert data["response"] == "Use df -h to check disk usage"
             assert "confidence" in data
@@ -284,11 +305,13 @@ class TestAPIEndpoints:
     
     def test_infer_endpoint_ollama_unavailable(self, client):
         """Test inference when Ollama is unavailable."""
-        with patch('modules.module_a_core.main.ollama_client.is_available') as mock_available:
-            mock_available.return_value = False
+        # Every routed client fails to reach Ollama
+        with patch.object(OllamaClient, 'generate_response', new_callable=AsyncMock) as mock_generate:
+            mock_generate.side_effect = Exception("LLM service unavailable")
             
             response = client.post("/infer", json={
-                "query": "How to check disk usage?"
+                "query": "How to check disk usage?",
+                "enable_context_search": False
             })
             
             assert response.status_code == 503
@@ -296,8 +319,9 @@ class TestAPIEndpoints:
     
     def test_status_endpoint(self, client):
         """Test status endpoint."""
-        with patch('modules.module_a_core.main.ollama_client.is_available') as mock_available:
-            mock_available.return_value = True
+        # Status is read from the health registry for Ollama and the knowledge base
+        with patch('modules.module_a_core.main.health_registry.check', new_callable=AsyncMock) as mock_check:
+            mock_check.return_value = True
             
             response = client.get("/status")
             assert response.status_code == 200
@@ -308,6 +332,68 @@ class TestAPIEndpoints:
             assert "ollama" in data
             assert "endpoints" in data
 
+    def test_status_lists_every_route(self, client):
+        """Test the status endpoint advertises every registered API route."""
+        response = client.get("/status")
+        
+        routes = {route.path for route in app.routes if getattr(route, "include_in_schema", False)}
+        assert set(response.json()["endpoints"]) == routes
+
+    def test_infer_stream_endpoint(self, client):
+        """Test streaming inference emits routing, token and done events in order."""
+        from modules.module_a_core.model_router import ModelType, RoutingResult
+        from modules.module_a_core.query_analyzer import QueryAnalysis
+
+        routing_result = RoutingResult(
+            selected_model=ModelType.FAST,
+            model_name="llama3.2:3b",
+            reasoning="test",
+            vram_check_passed=True,
+            user_confirmed=True,
+            analysis=MagicMock(complexity_score=0.1, detected_keywords=["df"], spec=QueryAnalysis)
+        )
+
+        async def fake_stream(query, context=None, **kwargs):
+            yield {'type': 'routing', 'routing_info': routing_result}
+            yield {'type': 'token', 'token': 'Use '}
+            yield {'type': 'token', 'token': 'df -h'}
+            yield {'type': 'done', 'result': {
+                'response': 'Use df -h', 'model_used': 'llama3.2:3b',
+                'routing_info': routing_result, 'success': True
+            }}
+
+        with patch('modules.module_a_core.main.model_router.generate_response_stream', fake_stream), \
+             patch('modules.module_a_core.main.context_integrator.enhance_query_with_context',
+                   new_callable=AsyncMock) as mock_enhance:
+            mock_enhance.return_value = {"context_used": False}
+
+            response = client.post("/infer_stream", json={"query": "How to check disk usage?"})
+
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            events = [line.split(": ", 1)[1] for line in response.text.splitlines() if line.startswith("event: ")]
+            assert events == ["routing", "token", "token", "done"]
+            assert '"response": "Use df -h"' in response.text
+
+
+    def test_infer_stream_without_precomputed_analysis(self, client):
+        """Test streaming still starts when the concurrent analysis stage returned None."""
+        async def fake_stream(query, context=None, **kwargs):
+            yield {'type': 'done', 'result': {'response': 'ok', 'model_used': 'llama3.2:3b', 'success': True}}
+
+        with patch('modules.module_a_core.main._analysis_stage', new_callable=AsyncMock) as mock_analysis, \
+             patch('modules.module_a_core.main.model_router.generate_response_stream', fake_stream), \
+             patch('modules.module_a_core.main.model_router.select_model',
+                   wraps=model_router.select_model) as mock_select:
+            mock_analysis.return_value = None
+
+            response = client.post("/infer_stream", json={
+                "query": "How to check disk usage?", "enable_context_search": False
+            })
+
+            assert response.status_code == 200
+            assert mock_select.call_args.args[1] is None
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
@@ -207,18 +207,62 @@ class TestEmbeddingManager:
     
     @pytest.mark.asyncio
     async def test_generate_embeddings_batch_mock(self):
-        """Test batch embedding generation."""
+        """Test batch embedding generation via /api/embed."""
         texts = ["Text 1", "Text 2", "Text 3"]
-        mock_embedding = [0.1] * 768
+        mock_embedding = [3.0, 4.0] + [0.0] * 766
         
-        with patch.object(self.embedding_manager, 'generate_embedding') as mock_generate:
-            mock_generate.return_value = mock_embedding
+        with patch.object(self.embedding_manager.client, 'embed', new_callable=AsyncMock) as mock_embed:
+            mock_embed.return_value = {'embeddings': [mock_embedding] * 2}
+            self.embedding_manager._model_available = True
             
-            results = await self.embedding_manager.generate_embeddings_batch(texts)
+            results = await self.embedding_manager.generate_embeddings_batch(texts, batch_size=2)
             
             assert len(results) == 3
-            assert all(len(emb) == 768 for emb in results)
-            assert mock_generate.call_count == 3
+            assert all(len(emb) == 768 for emb in results[:2])
+            assert results[0][:2] == pytest.approx([0.6, 0.8])
+            assert mock_embed.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_embed_batch_reports_failures_per_item(self):
+        """Failed texts are reported individually instead of zero vectors."""
+        texts = ["good", "", "bad"]
+        
+        async def fake_embeddings(model, prompt):
+            if prompt == "bad":
+                raise RuntimeError("model crashed")
+            return {'embedding': [1.0, 0.0]}
+        
+        with patch.object(self.embedding_manager.client, 'embed', new_callable=AsyncMock) as mock_embed, \
+             patch.object(self.embedding_manager.client, 'embeddings', side_effect=fake_embeddings) as mock_single:
+            mock_embed.side_effect = RuntimeError("batch failed")
+            self.embedding_manager._model_available = True
+            
+            result = await self.embedding_manager.embed_batch(texts)
+            
+            assert result.embeddings[0] == [1.0, 0.0]
+            assert result.embeddings[1] is None
+            assert result.embeddings[2] is None
+            assert set(result.errors) == {1, 2}
+            assert "model crashed" in result.errors[2]
+            assert result.succeeded == 1
+            assert mock_single.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_embed_batch_rejects_only_mismatched_dimensions(self):
+        """A vector with a stray dimension fails alone, the rest are kept."""
+        texts = ["a", "b", "c"]
+        
+        with patch.object(self.embedding_manager.client, 'embed', new_callable=AsyncMock) as mock_embed:
+            mock_embed.return_value = {'embeddings': [[3.0, 4.0], [1.0, 0.0, 0.0], [0.0, 2.0]]}
+            self.embedding_manager._model_available = True
+            
+            result = await self.embedding_manager.embed_batch(texts)
+            
+            assert result.embeddings[0] == pytest.approx([0.6, 0.8])
+            assert result.embeddings[1] is None
+            assert result.embeddings[2] == pytest.approx([0.0, 1.0])
+            assert set(result.errors) == {1}
+            assert "got 3, expected 2" in result.errors[1]
     
     def test_get_model_info(self):
         """Test model information retrieval."""
@@ -312,4 +356,334 @@ def test_sample_fixtures(sample_text_document, sample_metadata):
     
     # Decode and check content
     decoded = base64.b64decode(sample_text_document).decode('utf-8')
-    assert 'Linux System Administration' in decoded
\ No newline at end of file
+    assert 'Linux System Administration' in decoded
+
+class TestIngestionPipeline:
+    """Test the pipelined /upload ingestion."""
+    
+    def setup_method(self):
+        """Set up pipeline with fake embedding service and vector store."""
+        from modules.module_b_rag.document_loader import DocumentLoader as PipelineLoader
+        from modules.module_b_rag.chunk_processor import ChunkProcessor as PipelineChunker
+        from modules.module_b_rag.embedding_manager import BatchEmbeddingResult
+        from modules.module_b_rag.ingestion_pipeline import IngestionPipeline
+        
+        async def fake_embed_batch(texts, batch_size=32):
+            embeddings = [None if "FAIL" in text else [1.0, 0.0] for text in texts]
+            errors = {i: "boom" for i, emb in enumerate(embeddings) if emb is None}
+            return BatchEmbeddingResult(embeddings=embeddings, errors=errors)
+        
+        self.embedding_manager = Mock()
+        self.embedding_manager.embed_batch = AsyncMock(side_effect=fake_embed_batch)
+        self.vector_store = Mock()
+        self.vector_store.add_chunks_batch.side_effect = lambda chunks, embeddings: [c.chunk_id for c in chunks]
+        
+        self.pipeline = IngestionPipeline(
+            PipelineLoader(),
+            PipelineChunker(chunk_size=20, chunk_overlap=0),
+            self.embedding_manager,
+            self.vector_store,
+            queue_size=1,
+            embed_batch_size=4,
+            flush_size=6
+        )
+    
+    @staticmethod
+    def _encode(text: str) -> str:
+        return base64.b64encode(text.encode('utf-8')).decode('utf-8')
+    
+    @pytest.mark.asyncio
+    async def test_pipeline_stores_in_batches(self):
+        """Chunks are embedded in batches and flushed in large writes."""
+        text = "\n\n".join(f"Paragraph {i}: " + "linux " * 10 for i in range(10))
+        files = [self._encode(text), self._encode(text)]
+        
+        job = self.pipeline.submit(files, {"source": "guide.txt", "type": "txt"})
+        job = await self.pipeline.wait(job.job_id)
+        
+        assert job.status == "completed"
+        assert job.processed_files == 2
+        assert job.total_chunks == 20
+        assert job.stored_chunks == 20
+        assert job.failed_chunks == 0
+        # 20 chunks in embedding batches of 4 (per file) and flush_size=6 -> 3 writes instead of 20
+        assert self.vector_store.add_chunks_batch.call_count == 3
+        assert self.embedding_manager.embed_batch.call_count == 6
+        assert self.pipeline.get_job(job.job_id).to_dict()["stored_chunks"] == 20
+    
+    @pytest.mark.asyncio
+    async def test_pipeline_reports_failures(self):
+        """Bad files and failed chunks are reported without stopping the job."""
+        files = [
+            "not base64!!!",
+            self._encode("FAIL " * 10 + "\n\n" + "good text " * 10)
+        ]
+        
+        job = self.pipeline.submit(files, {"source": "mixed.txt", "type": "txt"})
+        job = await self.pipeline.wait(job.job_id)
+        
+        assert job.status == "completed"
+        assert job.failed_files == 1
+        assert job.processed_files == 1
+        assert job.failed_chunks >= 1
+        assert job.stored_chunks >= 1
+        assert any("boom" in error for error in job.errors)
+    
+    @pytest.mark.asyncio
+    async def test_wait_survives_pruning_of_its_job(self):
+        """A job pruned by newer submissions while a caller waits is still returned."""
+        self.pipeline.max_jobs = 1
+        job = self.pipeline.submit([self._encode("first document " * 10)], {"source": "a.txt", "type": "txt"})
+        run = self.pipeline._tasks[job.job_id]
+        
+        async def run_then_submit_more():
+            await run
+            self.pipeline.submit([self._encode("second document " * 10)], {"source": "b.txt", "type": "txt"})
+        
+        self.pipeline._tasks[job.job_id] = asyncio.create_task(run_then_submit_more())
+        finished = await self.pipeline.wait(job.job_id)
+        
+        assert finished is job
+        assert finished.status == "completed"
+        assert self.pipeline.get_job(job.job_id) is None
+
+
+class FakeVectorStore:
+    """In-memory stand-in for the ChromaDB vector store."""
+    
+    def __init__(self):
+        self.chunks = {}
+        self.writes = 0
+    
+    def add_chunks_batch(self, chunks, embeddings):
+        self.writes += 1
+        for chunk in chunks:
+            self.chunks[chunk.chunk_id] = chunk
+        return [chunk.chunk_id for chunk in chunks]
+    
+    def get_ids_by_source(self, source):
+        return [chunk_id for chunk_id, chunk in self.chunks.items() if chunk.source == source]
+    
+    def delete_chunks(self, chunk_ids):
+        for chunk_id in chunk_ids:
+            self.chunks.pop(chunk_id, None)
+        return len(chunk_ids)
+
+
+class TestIncrementalIngestion:
+    """Test content-hash chunk ids and manifest-based re-ingestion."""
+    
+    def setup_method(self):
+        """Set up pipeline with a manifest and an in-memory vector store."""
+        from modules.module_b_rag.chunk_manifest import ChunkManifest
+        from modules.module_b_rag.document_loader import DocumentLoader as PipelineLoader
+        from modules.module_b_rag.chunk_processor import ChunkProcessor as PipelineChunker
+        from modules.module_b_rag.embedding_manager import BatchEmbeddingResult
+        from modules.module_b_rag.ingestion_pipeline import IngestionPipeline
+        
+        async def fake_embed_batch(texts, batch_size=32):
+            return BatchEmbeddingResult(embeddings=[[1.0, 0.0] for _ in texts], errors={})
+        
+        self.embedding_manager = Mock(model="nomic-embed-text")
+        self.embedding_manager.embed_batch = AsyncMock(side_effect=fake_embed_batch)
+        self.vector_store = FakeVectorStore()
+        self.manifest = ChunkManifest()
+        self.pipeline = IngestionPipeline(
+            PipelineLoader(),
+            PipelineChunker(chunk_size=20, chunk_overlap=0),
+            self.embedding_manager,
+            self.vector_store,
+            manifest=self.manifest
+        )
+    
+    @staticmethod
+    def _document(paragraphs):
+        text = "\n\n".join(f"Paragraph {p}: " + "linux " * 10 for p in paragraphs)
+        return base64.b64encode(text.encode('utf-8')).decode('utf-8')
+    
+    async def _upload(self, paragraphs, source="ss.8"):
+        job = self.pipeline.submit([self._document(paragraphs)], {"source": source, "type": "txt"})
+        return await self.pipeline.wait(job.job_id)
+    
+    def _embedded_count(self):
+        return sum(len(call.args[0]) for call in self.embedding_manager.embed_batch.call_args_list)
+    
+    def test_chunk_ids_follow_content(self):
+        """Same text gives the same ids; repeated chunks are kept once."""
+        chunker = ChunkProcessor(chunk_size=20, chunk_overlap=0)
+        text = "Paragraph A: " + "linux " * 10 + "\n\n" + "Paragraph B: " + "linux " * 10
+        
+        first = chunker.process_text(text, source="guide.md")
+        again = chunker.process_text(text, source="guide.md")
+        repeated = chunker.process_text(text + "\n\n" + text, source="guide.md")
+        
+        assert [c.chunk_id for c in first] == [c.chunk_id for c in again]
+        assert first[0].chunk_id.startswith("guide.md_")
+        assert first[0].metadata['content_hash'] == ChunkProcessor.content_hash(first[0].content)
+        assert [c.chunk_id for c in repeated] == [c.chunk_id for c in first]
+    
+    @pytest.mark.asyncio
+    async def test_reupload_embeds_nothing(self):
+        """Uploading the same document twice embeds it once."""
+        await self._upload(range(5))
+        job = await self._upload(range(5))
+        
+        assert job.status == "completed"
+        assert job.processed_files == 1
+        assert job.unchanged_chunks == 5
+        assert job.stored_chunks == 0
+        assert self._embedded_count() == 5
+        assert len(self.vector_store.chunks) == 5
+    
+    @pytest.mark.asyncio
+    async def test_changed_document_embeds_delta_and_deletes_vanished(self):
+        """Only new chunks are embedded; removed paragraphs disappear."""
+        await self._upload([0, 1, 2, 3])
+        job = await self._upload([0, 1, 4])
+        
+        assert job.unchanged_chunks == 2
+        assert job.stored_chunks == 1
+        assert job.deleted_chunks == 2
+        assert self._embedded_count() == 5
+        assert sorted(c.content.split(":")[0] for c in self.vector_store.chunks.values()) == [
+            "Paragraph 0", "Paragraph 1", "Paragraph 4"
+        ]
+        assert self.manifest.get_statistics()["chunks"] == 3
+    
+    @pytest.mark.asyncio
+    async def test_model_change_reembeds(self):
+        """Chunks recorded under another embedding model are embedded again."""
+        await self._upload(range(3))
+        self.embedding_manager.model = "mxbai-embed-large"
+        job = await self._upload(range(3))
+        
+        assert job.stored_chunks == 3
+        assert job.unchanged_chunks == 0
+        assert self.manifest.get_statistics()["chunks_per_model"] == {"mxbai-embed-large": 3}
+    
+    @pytest.mark.asyncio
+    async def test_other_sources_untouched(self):
+        """Re-ingesting one document never deletes chunks of another."""
+        await self._upload(range(3), source="ss.8")
+        await self._upload([7], source="ip.8")
+        
+        assert len(self.vector_store.get_ids_by_source("ss.8")) == 3
+
+
+class TestEmbeddingCache:
+    """Test the query embedding cache."""
+    
+    def test_memory_lru_and_normalized_keys(self):
+        """Whitespace variants hit the same entry; LRU evicts the oldest."""
+        from modules.module_b_rag.embedding_cache import EmbeddingCache
+        
+        cache = EmbeddingCache(max_entries=2)
+        cache.put("nomic-embed-text", "disk usage", [0.6, 0.8])
+        
+        assert cache.get("nomic-embed-text", "  disk   usage ") == pytest.approx([0.6, 0.8])
+        assert cache.get("other-model", "disk usage") is None
+        
+        cache.put("nomic-embed-text", "b", [1.0, 0.0])
+        cache.put("nomic-embed-text", "c", [0.0, 1.0])
+        
+        assert cache.get("nomic-embed-text", "disk usage") is None
+        
+        stats = cache.get_statistics()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+        assert stats["memory_entries"] == 2
+        assert stats["memory_bytes"] == 2 * 2 * 4  # float32
+    
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """Vectors stored on disk are found by a fresh cache instance."""
+        from modules.module_b_rag.embedding_cache import EmbeddingCache
+        
+        db_path = str(tmp_path / "embeddings.db")
+        first = EmbeddingCache(disk_path=db_path)
+        first.put("nomic-embed-text", "how to list files", [0.1, 0.2, 0.3])
+        first.close()
+        
+        second = EmbeddingCache(disk_path=db_path)
+        result = second.get("nomic-embed-text", "how to list files")
+        second.close()
+        
+        assert result == pytest.approx([0.1, 0.2, 0.3])
+        assert second.get_statistics()["disk_hits"] == 1
+    
+    def test_disk_tier_tracks_row_count(self, tmp_path):
+        """The disk bound holds across restarts without recounting on every write."""
+        from modules.module_b_rag.embedding_cache import EmbeddingCache
+        
+        db_path = str(tmp_path / "embeddings.db")
+        first = EmbeddingCache(disk_path=db_path, max_disk_entries=3)
+        first.put_many("nomic-embed-text", [("a", [1.0]), ("b", [2.0])])
+        first.put("nomic-embed-text", "a", [3.0])
+        assert first.get_statistics()["disk_entries"] == 2
+        first.close()
+        
+        second = EmbeddingCache(disk_path=db_path, max_disk_entries=3)
+        second.put_many("nomic-embed-text", [("c", [4.0]), ("d", [5.0])])
+        assert second.get_statistics()["disk_entries"] == 3
+        second.close()
+        
+        third = EmbeddingCache(disk_path=db_path, max_disk_entries=3)
+        assert third.get("nomic-embed-text", "d") == pytest.approx([5.0])
+        assert third.get_statistics()["disk_entries"] == 3
+        third.close()
+    
+    def test_disk_lookup_does_not_wait_for_writes(self, tmp_path):
+        """A disk-tier read completes while a write holds the writer connection."""
+        import threading
+        from modules.module_b_rag.embedding_cache import EmbeddingCache
+        
+        db_path = str(tmp_path / "embeddings.db")
+        first = EmbeddingCache(disk_path=db_path)
+        first.put("nomic-embed-text", "free memory", [0.5, 0.5])
+        first.close()
+        
+        cache = EmbeddingCache(disk_path=db_path)
+        assert cache.get_from_memory("nomic-embed-text", "free memory") is None
+        
+        result = []
+        with cache._write_lock:
+            reader = threading.Thread(
+                target=lambda: result.append(cache.get("nomic-embed-text", "free memory"))
+            )
+            reader.start()
+            reader.join(timeout=5)
+            assert not reader.is_alive()
+        cache.close()
+        
+        assert result == [pytest.approx([0.5, 0.5])]
+
+
+class TestRetrieverContextSearch:
+    """Test contextual search re-ranking."""
+    
+    @pytest.mark.asyncio
+    async def test_search_with_context_uses_stored_embeddings(self):
+        """Re-ranking uses stored chunk embeddings: at most two embed calls."""
+        pytest.importorskip("chromadb")
+        from modules.module_b_rag.retriever import Retriever
+        
+        embedding_manager = Mock()
+        embedding_manager.model = "nomic-embed-text"
+        embedding_manager.generate_embedding = AsyncMock(side_effect=[[1.0, 0.0], [0.0, 1.0]])
+        
+        vector_store = Mock()
+        vector_store.search.return_value = [
+            {"content": f"chunk {i}", "source": "doc", "score": 0.9, "metadata": {},
+             "embedding": [float(i), 1.0]}
+            for i in range(6)
+        ]
+        vector_store.lexical_search.return_value = []
+        
+        retriever = Retriever(vector_store, embedding_manager)
+        results = await retriever.search_with_context("query", "context", top_k=3)
+        
+        assert embedding_manager.generate_embedding.call_count == 2
+        assert vector_store.search.call_args.kwargs["include_embeddings"] is True
+        # Query [0, 1] favours chunks with small first component
+        assert [r["content"] for r in results] == ["chunk 0", "chunk 1", "chunk 2"]
+        assert results[0]["score"] == pytest.approx(1.0)
+        assert all("embedding" not in r for r in results)
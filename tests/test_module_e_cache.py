@@ -0,0 +1,159 @@
+"""
+Tests for Module E response cache.
+"""
+
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+
+# Module E uses flat imports (run from its own directory)
+sys.path.insert(0, str(Path(__file__).parent.parent / "modules" / "module_e_hybrid"))
+
+from cache_manager import CacheManager
+from external_api_client import ExternalResponse
+
+
+def make_response(text: str = "Use df -h", source: str = "grok") -> ExternalResponse:
+    return ExternalResponse(
+        success=True,
+        response=text,
+        source=source,
+        confidence=0.9,
+        processing_time=1.2,
+        metadata={"model": "grok-beta"}
+    )
+
+
+@pytest.fixture
+def cache(tmp_path):
+    manager = CacheManager(db_path=str(tmp_path / "cache.db"), max_cache_size=3, memory_cache_size=2)
+    yield manager
+    manager.close()
+
+
+class TestCacheManager:
+    """Test the exact-key response cache."""
+    
+    @pytest.mark.asyncio
+    async def test_store_and_hit(self, cache):
+        assert await cache.get_cached_response("Wie prüfe ich Speicher?") is None
+        assert await cache.store_response("Wie prüfe ich Speicher?", make_response())
+        
+        cached = await cache.get_cached_response("  wie prüfe ich speicher?  ")
+        
+        assert cached is not None
+        assert cached.cached is True
+        assert cached.response == "Use df -h"
+        assert cached.metadata == {"model": "grok-beta"}
+    
+    @pytest.mark.asyncio
+    async def test_context_is_part_of_key(self, cache):
+        await cache.store_response("query", make_response(), context="ctx A")
+        
+        assert await cache.get_cached_response("query", context="ctx A") is not None
+        assert await cache.get_cached_response("query", context="ctx B") is None
+    
+    @pytest.mark.asyncio
+    async def test_persists_across_instances(self, tmp_path):
+        db_path = str(tmp_path / "cache.db")
+        first = CacheManager(db_path=db_path)
+        await first.store_response("persist me", make_response("stored"))
+        first.close()
+        
+        second = CacheManager(db_path=db_path)
+        cached = await second.get_cached_response("persist me")
+        second.close()
+        
+        assert cached is not None
+        assert cached.response == "stored"
+    
+    @pytest.mark.asyncio
+    async def test_ttl_expiry_and_clear(self, cache):
+        cache.default_ttl = timedelta(seconds=-1)
+        await cache.store_response("old", make_response())
+        await cache.store_response("older", make_response())
+        cache.default_ttl = timedelta(hours=1)
+        await cache.store_response("fresh", make_response())
+        
+        assert await cache.get_cached_response("old") is None
+        assert await cache.clear_expired_cache() == 1
+        assert await cache.get_cached_response("fresh") is not None
+        
+        stats = await cache.get_cache_statistics()
+        assert stats["total_entries"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_max_cache_size_evicts_lru(self, cache):
+        for i in range(3):
+            await cache.store_response(f"query {i}", make_response())
+        
+        # Touch query 0 via the database so it becomes most recently used
+        cache._memory_cache.clear()
+        assert await cache.get_cached_response("query 0") is not None
+        
+        await cache.store_response("query 3", make_response())
+        cache._memory_cache.clear()
+        
+        assert await cache.get_cached_response("query 0") is not None
+        assert await cache.get_cached_response("query 1") is None
+        
+        stats = await cache.get_cache_statistics()
+        assert stats["total_entries"] == 3
+        assert stats["evictions"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_memory_hits_count_for_lru_eviction(self, cache):
+        for i in range(3):
+            await cache.store_response(f"query {i}", make_response())
+        
+        # query 0 is served from the memory tier only
+        cache._memory_cache.clear()
+        await cache.get_cached_response("query 0")
+        assert await cache.get_cached_response("query 0") is not None
+        assert cache.memory_hits == 1
+        
+        await cache.store_response("query 3", make_response())
+        cache._memory_cache.clear()
+        
+        assert await cache.get_cached_response("query 0") is not None
+        assert await cache.get_cached_response("query 1") is None
+    
+    @pytest.mark.asyncio
+    async def test_entry_count_is_tracked_without_counting(self, tmp_path):
+        db_path = str(tmp_path / "cache.db")
+        first = CacheManager(db_path=db_path, max_cache_size=3)
+        for i in range(2):
+            await first.store_response(f"query {i}", make_response())
+        await first.store_response("query 0", make_response("updated"))
+        first.close()
+        
+        second = CacheManager(db_path=db_path, max_cache_size=3)
+        await second.store_response("query 2", make_response())
+        await second.store_response("query 3", make_response())
+        
+        stats = await second.get_cache_statistics()
+        second.close()
+        assert stats["total_entries"] == 3
+        assert stats["evictions"] == 1
+    
+    def test_relative_path_resolves_against_project_root(self):
+        manager = CacheManager(db_path="data/external_api_cache.db")
+        
+        assert manager.db_path == Path(__file__).resolve().parent.parent / "data" / "external_api_cache.db"
+    
+    @pytest.mark.asyncio
+    async def test_statistics(self, cache):
+        await cache.store_response("a", make_response(source="grok"))
+        await cache.get_cached_response("a")
+        await cache.get_cached_response("missing")
+        
+        stats = await cache.get_cache_statistics()
+        
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["size_bytes"] > 0
+        assert stats["sources"] == {"grok": 1}
+        assert await cache.check_cache_health()
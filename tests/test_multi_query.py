@@ -0,0 +1,96 @@
+"""
+Tests for multi-query retrieval with QueryRewriter variants.
+"""
+
+import time
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from modules.module_b_rag.query_rewriter import QueryRewriter
+
+
+@pytest.mark.asyncio
+class TestQueryVariants:
+    """Test variant generation for multi-query retrieval."""
+    
+    async def test_german_terms_translated(self):
+        variants = await QueryRewriter().generate_variants("Welcher Befehl zeigt die Festplattenbelegung an?")
+        
+        assert variants[0] == {"query": "Welcher Befehl zeigt die Festplattenbelegung an?", "type": "original", "weight": 1.0}
+        assert variants[1]["type"] == "translated"
+        assert "command" in variants[1]["query"].split()
+        assert "disk" in variants[1]["query"].split()
+    
+    async def test_limited_and_unique(self):
+        variants = await QueryRewriter().generate_variants("show and find files with ls", max_variants=2)
+        
+        assert len(variants) == 2
+        assert len({variant["query"] for variant in variants}) == 2
+    
+    async def test_no_rewrite_keeps_only_original(self):
+        variants = await QueryRewriter().generate_variants("Hallo Welt")
+        
+        assert [variant["type"] for variant in variants] == ["original"]
+    
+    def test_expansion_of_german_term_uses_whole_word(self):
+        assert QueryRewriter()._expand_terms("datei loeschen") == "datei file loeschen"
+
+
+def _retriever(vector_results):
+    pytest.importorskip("chromadb")
+    from modules.module_b_rag.embedding_manager import BatchEmbeddingResult
+    from modules.module_b_rag.retriever import Retriever
+    
+    embedding_manager = Mock(model="nomic-embed-text")
+    embedding_manager.embed_batch = AsyncMock(side_effect=lambda texts: BatchEmbeddingResult(
+        embeddings=[[float(i), 1.0] for i in range(len(texts))], errors={}))
+    
+    def search(query_embedding, **kwargs):
+        time.sleep(0.05)
+        return vector_results[int(query_embedding[0])]
+    
+    vector_store = Mock()
+    vector_store.search.side_effect = search
+    vector_store.lexical_search.return_value = []
+    return Retriever(vector_store, embedding_manager, hybrid=False)
+
+
+@pytest.mark.asyncio
+class TestMultiQuerySearch:
+    """Test batched embedding, concurrent search and fusion."""
+    
+    async def test_variants_embedded_once_searched_concurrently_and_deduplicated(self):
+        hit = lambda chunk_id, score: {"id": chunk_id, "content": chunk_id, "source": "doc.md", "score": score, "metadata": {}}
+        retriever = _retriever([
+            [hit("a", 0.70), hit("b", 0.65)],
+            [hit("c", 0.90), hit("a", 0.80)],
+            [hit("a", 0.95)]
+        ])
+        variants = [
+            {"query": "Festplatte voll", "type": "original", "weight": 1.0},
+            {"query": "disk festplatte voll", "type": "translated", "weight": 0.9},
+            {"query": "festplatte voll space", "type": "expanded", "weight": 0.5}
+        ]
+        timings = {}
+        
+        start = time.time()
+        results = await retriever.multi_query_search("Festplatte voll", variants, top_k=3, stage_timings=timings)
+        elapsed = time.time() - start
+        
+        retriever.embedding_manager.embed_batch.assert_awaited_once()
+        assert elapsed < 0.14  # Three 50ms searches in parallel
+        # c: 0.9*0.9=0.81, a: max(0.7, 0.72, 0.475)=0.72 (score 0.8 from "translated"), b: 0.65
+        assert [r["id"] for r in results] == ["c", "a", "b"]
+        assert results[1]["score"] == 0.80
+        assert results[1]["metadata"]["query_variants"] == ["original", "translated", "expanded"]
+        assert set(timings) == {"embed", "retrieve"}
+    
+    async def test_cached_variants_are_not_embedded_again(self):
+        retriever = _retriever([[], []])
+        variants = [{"query": "q0", "type": "original", "weight": 1.0}, {"query": "q1", "type": "synonym", "weight": 0.7}]
+        
+        await retriever.multi_query_search("q0", variants)
+        await retriever.multi_query_search("q0", variants)
+        
+        assert retriever.embedding_manager.embed_batch.await_count == 1
@@ -0,0 +1,111 @@
+"""
+Tests for the token-budgeted prompt composer (Module A).
+"""
+
+from modules.module_a_core.knowledge_client import ContextIntegrator
+from modules.module_a_core.prompt_composer import (
+    PromptComposer, TRUNCATION_MARKER, TokenEstimator, estimate_tokens, truncate_to_tokens
+)
+from modules.module_a_core.session_manager import SessionManager
+
+
+def _session_context(turns: int = 2) -> str:
+    manager = SessionManager()
+    session_id = manager.create_session()
+    for i in range(turns):
+        manager.add_conversation_turn(session_id, f"frage {i} zu systemctl", f"antwort {i}", "llama3.2:3b", 0.1, "fast")
+    return manager.get_context_for_query(session_id, "next")
+
+
+class TestPromptComposer:
+    """Test prompt composition and budgeting."""
+    
+    def test_query_only(self):
+        composed = PromptComposer().compose("wie starte ich nginx neu?")
+        assert composed.prompt == "wie starte ich nginx neu?"
+        assert composed.sections == []
+    
+    def test_rag_only_matches_context_integrator(self):
+        integrator = ContextIntegrator(knowledge_client=None)
+        composed = PromptComposer().compose("restart nginx", rag_context="[Source: a.md]\nuse systemctl")
+        assert composed.prompt == integrator._create_context_enhanced_prompt("restart nginx", "[Source: a.md]\nuse systemctl")
+        assert composed.sections == ["rag"]
+    
+    def test_session_only_matches_session_manager(self):
+        manager = SessionManager()
+        session_id = manager.create_session()
+        manager.add_conversation_turn(session_id, "was ist nginx?", "ein webserver", "llama3.2:3b", 0.1, "fast")
+        
+        composed = PromptComposer().compose(
+            "und apache?", session_context=manager.get_context_for_query(session_id, "und apache?")
+        )
+        assert composed.prompt == manager.enhance_query_with_context(session_id, "und apache?")
+        assert composed.sections == ["session"]
+    
+    def test_session_and_rag_are_both_kept_in_fixed_order(self):
+        history = _session_context()
+        composed = PromptComposer().compose("restart nginx", session_context=history, rag_context="use systemctl")
+        
+        assert composed.sections == ["rag", "session"]
+        prompt = composed.prompt
+        assert prompt.index("RELEVANT DOCUMENTATION:") < prompt.index("Context from previous conversation:")
+        assert prompt.index("Context from previous conversation:") < prompt.index("USER QUERY: restart nginx")
+    
+    def test_explicit_context_replaces_rag(self):
+        composed = PromptComposer().compose("restart nginx", rag_context="ignored", explicit_context="nginx 1.24")
+        assert composed.prompt == "restart nginx\n\nContext: nginx 1.24"
+        assert composed.sections == ["explicit"]
+    
+    def test_budget_is_respected(self):
+        composer = PromptComposer(token_budget=120)
+        docs = "\n".join(f"doc line {i} " + "word " * 10 for i in range(40))
+        history = "\n".join(f"Previous Q: q{i} " + "word " * 10 for i in range(40))
+        
+        composed = composer.compose("restart nginx now", session_context=history, rag_context=docs)
+        
+        assert composed.estimated_tokens <= 120
+        assert composed.truncated_sections == ["rag", "session"]
+        assert composed.prompt.count(TRUNCATION_MARKER) == 2
+        assert "USER QUERY: restart nginx now" in composed.prompt
+    
+    def test_unused_budget_flows_to_other_section(self):
+        composer = PromptComposer(token_budget=200, doc_share=0.5)
+        docs = "word " * 500
+        composed = composer.compose("q", session_context="Previous Q: a", rag_context=docs)
+        
+        assert composed.truncated_sections == ["rag"]
+        # Documentation may use everything the three-word history leaves over
+        assert composed.estimated_tokens > 150
+    
+    def test_section_dropped_without_budget(self):
+        composed = PromptComposer(token_budget=5).compose("restart nginx", session_context="Previous Q: a b c")
+        assert composed.prompt == "restart nginx"
+        assert composed.dropped_sections == ["session"]
+    
+    def test_deterministic(self):
+        composer = PromptComposer(token_budget=80)
+        history = _session_context(5)
+        first = composer.compose("restart nginx", session_context=history, rag_context="docs " * 100)
+        second = composer.compose("restart nginx", session_context=history, rag_context="docs " * 100)
+        assert first == second
+
+
+class TestTruncation:
+    """Test token truncation helper."""
+    
+    def test_fits_unchanged(self):
+        assert truncate_to_tokens("a b c", 4) == "a b c"
+    
+    def test_keeps_whole_lines_then_partial(self):
+        estimator = TokenEstimator(tokens_per_word=1.0)
+        text = "one two\nthree four five six seven eight\nnine ten eleven twelve"
+        truncated = truncate_to_tokens(text, 4 + estimate_tokens(TRUNCATION_MARKER, estimator), estimator)
+        assert truncated == f"one two\nthree four\n{TRUNCATION_MARKER}"
+    
+    def test_calibrated_estimator_shrinks_budget_in_words(self):
+        estimator = TokenEstimator(tokens_per_word=2.0)
+        composed = PromptComposer(token_budget=300, estimator=estimator).compose("q", rag_context="word " * 200)
+        
+        assert composed.truncated_sections == ["rag"]
+        assert len(composed.prompt.split()) <= 150
+        assert composed.estimated_tokens == estimator.count(composed.prompt) <= 300
@@ -0,0 +1,155 @@
+"""
+Tests for single-flight request coalescing (Module A).
+"""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from modules.module_a_core.model_router import ModelType
+from modules.module_a_core.request_coalescer import RequestCoalescer, normalize_prompt
+
+
+def _counting_work(calls, result="ok", delay=0.02, error=None):
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return result
+    return work
+
+
+class TestRequestCoalescer:
+    """Test the single-flight primitive."""
+    
+    def test_normalize_prompt(self):
+        assert normalize_prompt("  Welcher Befehl\nzeigt  offene Ports ") == "welcher befehl zeigt offene ports"
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_calls_share_one_execution(self):
+        coalescer = RequestCoalescer()
+        calls = []
+        
+        results = await asyncio.gather(*[coalescer.run("key", _counting_work(calls)) for _ in range(4)])
+        
+        assert len(calls) == 1
+        assert [result for result, _ in results] == ["ok"] * 4
+        assert [shared for _, shared in results] == [False, True, True, True]
+        stats = coalescer.get_statistics()
+        assert stats["executions"] == 1
+        assert stats["coalesced_requests"] == 3
+        assert stats["max_waiters"] == 4
+        assert stats["in_flight"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_different_keys_run_separately(self):
+        coalescer = RequestCoalescer()
+        calls = []
+        
+        await asyncio.gather(coalescer.run("a", _counting_work(calls)), coalescer.run("b", _counting_work(calls)))
+        
+        assert len(calls) == 2
+    
+    @pytest.mark.asyncio
+    async def test_sequential_calls_are_not_cached(self):
+        coalescer = RequestCoalescer()
+        calls = []
+        
+        await coalescer.run("key", _counting_work(calls))
+        await coalescer.run("key", _counting_work(calls))
+        
+        assert len(calls) == 2
+    
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_waiter(self):
+        coalescer = RequestCoalescer()
+        calls = []
+        work = _counting_work(calls, error=RuntimeError("boom"))
+        
+        results = await asyncio.gather(coalescer.run("key", work), coalescer.run("key", work), return_exceptions=True)
+        
+        assert len(calls) == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_cancel_followers(self):
+        coalescer = RequestCoalescer()
+        calls = []
+        
+        leader = asyncio.create_task(coalescer.run("key", _counting_work(calls, delay=0.05)))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(coalescer.run("key", _counting_work(calls, delay=0.05)))
+        await asyncio.sleep(0)
+        leader.cancel()
+        
+        assert await follower == ("ok", True)
+        assert len(calls) == 1
+    
+    @pytest.mark.asyncio
+    async def test_work_is_cancelled_when_all_waiters_leave(self):
+        coalescer = RequestCoalescer()
+        started, cancelled = asyncio.Event(), asyncio.Event()
+        
+        async def work():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        
+        waiters = [asyncio.create_task(coalescer.run("key", work)) for _ in range(2)]
+        await started.wait()
+        waiters[0].cancel()
+        await asyncio.sleep(0)
+        assert not cancelled.is_set()  # One caller still waits
+        
+        waiters[1].cancel()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        
+        assert coalescer.get_statistics()["in_flight"] == 0
+        assert coalescer.get_statistics()["abandoned"] == 1
+        # A new caller starts fresh work instead of joining the cancelled task
+        assert await coalescer.run("key", _counting_work([])) == ("ok", False)
+
+
+class TestRouterCoalescing:
+    """Test coalescing in ModelRouter.generate_response."""
+    
+    @pytest.mark.asyncio
+    async def test_identical_requests_share_generation(self, router):
+        async def generate(query, context=None, **kwargs):
+            await asyncio.sleep(0.02)
+            return {'response': "ss -tulpn", 'model_used': "llama3.2:3b"}
+        
+        client = router.ollama_clients[ModelType.FAST]
+        client.generate_response = AsyncMock(side_effect=generate)
+        
+        first, second = await asyncio.gather(
+            router.generate_response("welcher befehl zeigt offene ports", force_model=ModelType.FAST),
+            router.generate_response("Welcher Befehl zeigt  offene Ports", force_model=ModelType.FAST)
+        )
+        
+        assert client.generate_response.await_count == 1
+        assert first['response'] == second['response'] == "ss -tulpn"
+        assert 'coalesced' not in first
+        assert second['coalesced'] is True
+        assert second['routing_info'] is not first['routing_info']
+    
+    @pytest.mark.asyncio
+    async def test_different_models_are_not_coalesced(self, router):
+        for model_type in (ModelType.FAST, ModelType.CODE):
+            router.ollama_clients[model_type].generate_response = AsyncMock(
+                return_value={'response': "ok", 'model_used': router.models[model_type].name}
+            )
+        
+        await asyncio.gather(
+            router.generate_response("offene ports", force_model=ModelType.FAST),
+            router.generate_response("offene ports", force_model=ModelType.CODE)
+        )
+        
+        assert router.ollama_clients[ModelType.FAST].generate_response.await_count == 1
+        assert router.ollama_clients[ModelType.CODE].generate_response.await_count == 1
+        assert router.coalescer.get_statistics()["coalesced_requests"] == 0
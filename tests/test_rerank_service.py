@@ -0,0 +1,133 @@
+"""
+Tests for the Module B micro-batching rerank service.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from modules.module_b_rag.reranker import Reranker
+from modules.module_b_rag.rerank_service import RerankService
+
+
+class FakeCrossEncoder:
+    """Scores a pair by how often the query's first word occurs in the document."""
+    
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+        self.threads = set()
+    
+    def predict(self, pairs):
+        self.batches.append(len(pairs))
+        self.threads.add(threading.get_ident())
+        time.sleep(self.delay)
+        return [document.count(query.split()[0]) for query, document in pairs]
+
+
+def _reranker(model):
+    reranker = Reranker(score_cutoff=0.0)
+    reranker.model = model
+    reranker._model_loaded = True
+    return reranker
+
+
+def _candidates(prefix, n=4):
+    return [
+        {"id": f"{prefix}_{i:04d}", "content": f"{prefix} " * i + "text", "source": "doc.md", "score": 0.9 - i * 0.1}
+        for i in range(n)
+    ]
+
+
+@pytest.mark.asyncio
+class TestRerankService:
+    """Test batching, caching and fallback behaviour."""
+    
+    async def test_concurrent_requests_share_one_batch(self):
+        model = FakeCrossEncoder(delay=0.01)
+        service = RerankService(_reranker(model), max_wait=0.05)
+        try:
+            results = await asyncio.gather(
+                service.rerank("ssh config", _candidates("ssh"), top_k=2),
+                service.rerank("nginx logs", _candidates("nginx"), top_k=2)
+            )
+        finally:
+            service.close()
+        
+        assert model.batches == [8]
+        assert [r["id"] for r in results[0]] == ["ssh_0003", "ssh_0002"]
+        assert [r["id"] for r in results[1]] == ["nginx_0003", "nginx_0002"]
+        assert results[0][0]["rerank_score"] == 3.0
+        assert results[0][0]["original_score"] == pytest.approx(0.6)
+        assert threading.get_ident() not in model.threads
+    
+    async def test_batch_size_limit(self):
+        model = FakeCrossEncoder()
+        service = RerankService(_reranker(model), max_batch_size=4, max_wait=0.05)
+        try:
+            await asyncio.gather(*[service.rerank(f"q{i} x", _candidates("x")) for i in range(3)])
+        finally:
+            service.close()
+        
+        assert all(size <= 4 for size in model.batches)
+        assert sum(model.batches) == 12
+    
+    async def test_scores_cached_per_query_and_chunk(self):
+        model = FakeCrossEncoder()
+        service = RerankService(_reranker(model), max_wait=0)
+        try:
+            await service.rerank("ssh config", _candidates("ssh"))
+            await service.rerank("ssh  config", _candidates("ssh", n=5))
+        finally:
+            service.close()
+        
+        # Only the new chunk is scored on the second call
+        assert model.batches == [4, 1]
+        assert service.get_statistics()["cache_hits"] == 4
+    
+    async def test_event_loop_keeps_running_during_predict(self):
+        service = RerankService(_reranker(FakeCrossEncoder(delay=0.2)), max_wait=0)
+        ticks = 0
+        
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        
+        task = asyncio.create_task(ticker())
+        try:
+            await service.rerank("ssh", _candidates("ssh"))
+        finally:
+            task.cancel()
+            service.close()
+        
+        assert ticks >= 5
+    
+    async def test_missing_model_keeps_retrieval_order(self):
+        reranker = Reranker()
+        reranker._load_attempted = True  # Model failed to load
+        service = RerankService(reranker, max_wait=0)
+        try:
+            results = await service.rerank("ssh", _candidates("ssh"), top_k=2)
+        finally:
+            service.close()
+        
+        assert [r["id"] for r in results] == ["ssh_0000", "ssh_0001"]
+        assert service.get_statistics()["fallbacks"] == 1
+
+
+@pytest.mark.asyncio
+class TestReranker:
+    """Test the reranker's own scoring path."""
+    
+    async def test_scores_stay_aligned_when_empty_content_is_skipped(self):
+        model = FakeCrossEncoder()
+        candidates = [{"id": "empty", "content": "  ", "score": 0.9}] + _candidates("ssh", n=2)
+        
+        results = await _reranker(model).rerank("ssh", candidates, top_k=3)
+        
+        assert [r["id"] for r in results] == ["ssh_0001", "ssh_0000"]
+        assert results[0]["rerank_score"] == 1.0
@@ -0,0 +1,79 @@
+"""
+Tests for the precompiled routing engine (Module A).
+
+The golden file tests/data/routing_golden.json was recorded from the former
+regex cascades in QueryAnalyzer and ModelRouter; the engine must reproduce it
+exactly.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from modules.module_a_core.query_analyzer import QueryAnalyzer
+from modules.module_a_core.model_router import ModelRouter, ModelType
+from modules.module_a_core.routing_engine import PatternFamily, route_query
+
+GOLDEN_PATH = Path(__file__).parent / "data" / "routing_golden.json"
+GOLDEN = json.loads(GOLDEN_PATH.read_text(encoding="utf-8"))
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    return QueryAnalyzer()
+
+
+@pytest.fixture(scope="module")
+def router():
+    # Only the pure selection logic is exercised; skip Ollama/VRAM setup
+    return object.__new__(ModelRouter)
+
+
+class TestPatternFamily:
+    """Test the merged-regex pattern family."""
+
+    def test_search_matches_any_pattern(self):
+        family = PatternFamily("demo", [r"^ls(\s|$)", r"gleichung\w*"])
+        assert family.search("ls -la")
+        assert family.search("löse das gleichungssystem")
+        assert not family.search("hallo welt")
+
+    def test_hits_preserve_declaration_order(self):
+        family = PatternFamily("demo", [r"b+", r"a+", r"c+"])
+        assert family.hits("aabb") == [r"b+", r"a+"]
+        assert family.hits("xyz") == []
+        assert family.count("abc") == 3
+
+    def test_hits_across_multiple_texts(self):
+        family = PatternFamily("demo", [r"größe", r"grosse"])
+        assert family.hits("größe", "grosse") == [r"größe", r"grosse"]
+
+
+class TestGoldenEquivalence:
+    """The engine must route exactly like the former cascades."""
+
+    @pytest.mark.parametrize("entry", GOLDEN, ids=lambda e: e["query"][:40])
+    def test_analyzer_matches_golden(self, analyzer, entry):
+        analysis = analyzer.analyze_query(entry["query"])
+
+        assert analysis.route_model == entry["route_model"]
+        assert analysis.needs_code_model == entry["needs_code_model"]
+        assert analysis.complexity_score == entry["complexity_score"]
+        assert analysis.detected_keywords == entry["detected_keywords"]
+        assert analysis.token_count == entry["token_count"]
+        assert analysis.reasoning == entry["reasoning"]
+        assert analysis.debug_info == entry["debug_info"]
+
+    @pytest.mark.parametrize("entry", GOLDEN, ids=lambda e: e["query"][:40])
+    def test_router_matches_golden(self, analyzer, router, entry):
+        analysis = analyzer.analyze_query(entry["query"])
+
+        assert router._select_model_from_analysis(analysis) == ModelType(entry["selected_model"])
+
+    def test_route_query_does_not_share_debug_state(self):
+        _, first = route_query("Welcher Befehl zeigt Dateien?", 4, True, False, 0.0)
+        _, second = route_query("Löse x + y = 10", 5, False, False, 0.3)
+
+        assert first == {'route_reason': 'fast_basic_command'}
+        assert second['route_reason'] == 'heavy_math_detection_enhanced'
@@ -0,0 +1,84 @@
+"""
+Tests for the routing decision memo (Module A).
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from modules.module_a_core.model_router import ModelRouter, ModelType
+from modules.module_a_core.query_analyzer import QueryAnalyzer
+from modules.module_a_core.routing_memo import RoutingMemo
+
+
+@pytest.fixture
+def memo():
+    return RoutingMemo(max_entries=2)
+
+
+@pytest.fixture
+def analyzer(memo):
+    return QueryAnalyzer(memo=memo)
+
+
+class TestRoutingMemo:
+    """Test memoized query analysis."""
+    
+    def test_repeated_query_is_analyzed_once(self, analyzer, memo):
+        with patch.object(analyzer, "_analyze", wraps=analyzer._analyze) as analyze:
+            first = analyzer.analyze_query("Zeige mir alle laufenden Prozesse mit ps")
+            second = analyzer.analyze_query("Zeige mir alle laufenden Prozesse mit ps")
+        
+        assert analyze.call_count == 1
+        assert second == first
+        assert second is not first
+        assert memo.get_statistics()["hits"] == 1
+        assert memo.get_statistics()["misses"] == 1
+    
+    def test_memo_hit_matches_fresh_analysis(self, analyzer):
+        query = "Berechne die optimale Puffergröße für 1000 Requests pro Sekunde"
+        analyzer.analyze_query(query)
+        
+        assert analyzer.analyze_query(query) == QueryAnalyzer(memo=RoutingMemo())._analyze(query)
+    
+    def test_lru_bound(self, analyzer, memo):
+        for query in ("ls -la", "df -h", "du -sh"):
+            analyzer.analyze_query(query)
+        
+        assert memo.get_statistics()["entries"] == 2
+        assert memo.get_analysis("ls -la") is None
+    
+    def test_invalidate_clears_entries(self, analyzer, memo):
+        analyzer.analyze_query("ls -la")
+        memo.invalidate()
+        
+        assert memo.get_analysis("ls -la") is None
+        assert memo.get_statistics()["invalidations"] == 1
+    
+    def test_result_from_before_invalidation_is_not_stored(self, analyzer, memo):
+        generation = memo.generation
+        analysis = analyzer._analyze("ls -la")
+        memo.invalidate()
+        memo.put_analysis("ls -la", analysis, generation)
+        
+        assert memo.get_statistics()["entries"] == 0
+
+
+class TestRouterModelMemo:
+    """Test memoized model selection in ModelRouter."""
+    
+    def test_model_selection_is_memoized(self):
+        router = ModelRouter()
+        memo = router.query_analyzer.memo
+        memo.invalidate()
+        model_hits = memo.get_statistics()["model_hits"]
+        
+        analysis = router.query_analyzer.analyze_query("Wie kann ich eine Python-Funktion schreiben, die Dateien kopiert?")
+        with patch("modules.module_a_core.model_router.select_model", return_value="code") as select:
+            first = router._select_model_from_analysis(analysis)
+            second = router._select_model_from_analysis(analysis)
+        
+        assert first == second == ModelType.CODE
+        assert select.call_count == 1
+        assert memo.get_statistics()["model_hits"] == model_hits + 1
+        memo.invalidate()
@@ -0,0 +1,143 @@
+"""
+Tests for per-model admission control and priority scheduling (Module A).
+"""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from modules.module_a_core.model_router import ModelType
+from modules.module_a_core.scheduler import ModelScheduler, SchedulerLimits, Priority, AdmissionRejected
+
+
+def _scheduler(**limits):
+    return ModelScheduler({"heavy": SchedulerLimits(**limits)})
+
+
+async def _hold(scheduler, priority, order, release: asyncio.Event, name: str):
+    async with scheduler.slot("heavy", priority):
+        order.append(name)
+        await release.wait()
+
+
+class TestModelScheduler:
+    """Test slots, priorities and rejection."""
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self):
+        scheduler = _scheduler(max_concurrency=2, max_background=2)
+        order, release = [], asyncio.Event()
+        
+        tasks = [asyncio.create_task(_hold(scheduler, Priority.INTERACTIVE, order, release, str(i))) for i in range(3)]
+        await asyncio.sleep(0.01)
+        
+        assert order == ["0", "1"]
+        stats = scheduler.get_statistics()["heavy"]
+        assert stats["active"] == 2
+        assert stats["queued"]["interactive"] == 1
+        
+        release.set()
+        await asyncio.gather(*tasks)
+        assert order == ["0", "1", "2"]
+        assert scheduler.get_statistics()["heavy"]["active"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_interactive_served_before_batch(self):
+        scheduler = _scheduler(max_concurrency=1)
+        order, release = [], asyncio.Event()
+        
+        blocker = asyncio.create_task(_hold(scheduler, Priority.INTERACTIVE, order, release, "blocker"))
+        await asyncio.sleep(0)
+        batch = asyncio.create_task(_hold(scheduler, Priority.BATCH, order, release, "batch"))
+        background = asyncio.create_task(_hold(scheduler, Priority.BACKGROUND, order, release, "background"))
+        interactive = asyncio.create_task(_hold(scheduler, Priority.INTERACTIVE, order, release, "interactive"))
+        await asyncio.sleep(0.01)
+        
+        release.set()
+        await asyncio.gather(blocker, batch, background, interactive)
+        assert order == ["blocker", "interactive", "background", "batch"]
+    
+    @pytest.mark.asyncio
+    async def test_background_limit_keeps_slot_for_interactive(self):
+        scheduler = _scheduler(max_concurrency=2, max_background=1)
+        order, release = [], asyncio.Event()
+        
+        first = asyncio.create_task(_hold(scheduler, Priority.BACKGROUND, order, release, "bg1"))
+        second = asyncio.create_task(_hold(scheduler, Priority.BACKGROUND, order, release, "bg2"))
+        await asyncio.sleep(0.01)
+        assert order == ["bg1"]
+        
+        interactive = asyncio.create_task(_hold(scheduler, Priority.INTERACTIVE, order, release, "interactive"))
+        await asyncio.sleep(0.01)
+        assert order == ["bg1", "interactive"]
+        
+        release.set()
+        await asyncio.gather(first, second, interactive)
+        assert order[-1] == "bg2"
+    
+    @pytest.mark.asyncio
+    async def test_full_queue_is_rejected_with_retry_after(self):
+        scheduler = _scheduler(max_concurrency=1, max_background_queue=1)
+        order, release = [], asyncio.Event()
+        
+        running = asyncio.create_task(_hold(scheduler, Priority.BATCH, order, release, "running"))
+        queued = asyncio.create_task(_hold(scheduler, Priority.BATCH, order, release, "queued"))
+        await asyncio.sleep(0.01)
+        
+        with pytest.raises(AdmissionRejected) as exc_info:
+            await scheduler.acquire("heavy", Priority.BATCH)
+        assert exc_info.value.queue_depth == 1
+        assert exc_info.value.retry_after >= 1
+        assert scheduler.get_statistics()["heavy"]["rejected"] == 1
+        
+        # Interactive requests have their own queue budget
+        scheduler.check_admission("heavy", Priority.INTERACTIVE)
+        
+        release.set()
+        await asyncio.gather(running, queued)
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self):
+        scheduler = _scheduler(max_concurrency=1)
+        order, release = [], asyncio.Event()
+        
+        running = asyncio.create_task(_hold(scheduler, Priority.INTERACTIVE, order, release, "running"))
+        cancelled = asyncio.create_task(_hold(scheduler, Priority.INTERACTIVE, order, release, "cancelled"))
+        waiting = asyncio.create_task(_hold(scheduler, Priority.INTERACTIVE, order, release, "waiting"))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        
+        release.set()
+        await asyncio.gather(running, waiting)
+        assert order == ["running", "waiting"]
+        stats = scheduler.get_statistics()["heavy"]
+        assert stats["active"] == 0
+        assert stats["queued"]["interactive"] == 0
+
+
+class TestRouterScheduling:
+    """Test scheduler integration in ModelRouter."""
+    
+    def test_limits_from_model_config(self, router):
+        stats = router.scheduler.get_statistics()
+        assert stats["fast"]["max_concurrency"] == 4
+        assert stats["heavy"]["max_concurrency"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_queue_wait_reported(self, router):
+        async def generate(query, context=None, **kwargs):
+            await asyncio.sleep(0.05)
+            return {'response': query, 'model_used': "llama3.1:70b"}
+        
+        router.ollama_clients[ModelType.HEAVY].generate_response = AsyncMock(side_effect=generate)
+        
+        first, second = await asyncio.gather(
+            router.generate_response("erste frage", force_model=ModelType.HEAVY),
+            router.generate_response("zweite frage", force_model=ModelType.HEAVY, priority=Priority.BACKGROUND)
+        )
+        
+        assert first['queue_wait'] < 0.04
+        assert second['queue_wait'] >= 0.04
+        assert router.scheduler.get_statistics()["heavy"]["admitted"] == 2
@@ -0,0 +1,134 @@
+"""
+Tests for the rolling session context (Module A).
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from modules.module_a_core.prompt_composer import PromptComposer, TRUNCATION_MARKER, TokenEstimator
+from modules.module_a_core.session_context import RollingContext
+from modules.module_a_core.session_manager import SessionManager
+from modules.module_a_core.session_store import SQLiteSessionStore
+
+
+def _add_turns(manager, session_id, count, response="antwort", response_tokens=None):
+    for i in range(count):
+        manager.add_conversation_turn(session_id, f"frage {i}", response, "fast", 0.1, "simple", response_tokens)
+
+
+class TestRollingContext:
+    """Test budgeting and caching of a single rolling context."""
+    
+    def test_keeps_most_recent_turns(self):
+        rolling = RollingContext(max_turns=2)
+        for i in range(4):
+            rolling.add_turn(f"frage {i}", "antwort")
+        
+        assert rolling.turn_count == 2
+        assert rolling.text == "Previous Q: frage 2\nPrevious A: antwort\nPrevious Q: frage 3\nPrevious A: antwort"
+    
+    def test_evicts_oldest_turns_to_fit_budget(self):
+        rolling = RollingContext(token_budget=30, tokens_per_word=1.0)
+        for i in range(5):
+            rolling.add_turn(f"frage {i}", "eins zwei drei vier fünf")
+        
+        # 11 tokens per turn
+        assert rolling.tokens <= 30
+        assert rolling.turn_count == 2
+        assert "frage 4" in rolling.text
+    
+    def test_single_oversized_turn_is_cut_once_by_the_composer(self):
+        estimator = TokenEstimator(tokens_per_word=1.0)
+        rolling = RollingContext(token_budget=60, estimator=estimator)
+        rolling.add_turn("wort " * 100, "antwort")
+        
+        # The latest turn is kept whole; only the composer truncates, against its budget
+        assert rolling.turn_count == 1
+        assert TRUNCATION_MARKER not in rolling.text
+        
+        composed = PromptComposer(token_budget=60, estimator=estimator).compose("frage", session_context=rolling.text)
+        assert composed.truncated_sections == ["session"]
+        assert composed.prompt.count(TRUNCATION_MARKER) == 1
+        assert composed.estimated_tokens <= 60
+    
+    def test_prompt_eval_count_calibrates_shared_estimator(self):
+        estimator = TokenEstimator(tokens_per_word=1.0)
+        rolling = RollingContext(estimator=estimator)
+        rolling.add_turn("frage", "antwort")
+        words = len(rolling.text.split())
+        
+        estimator.calibrate("ein zwei drei vier fünf sechs sieben acht neun zehn", 30)
+        
+        assert rolling.tokens_per_word == pytest.approx(1.6)
+        assert rolling.tokens == rolling.count_tokens(rolling.text) == estimator.count_words(words)
+    
+    def test_prompt_cache_counts_are_ignored(self):
+        estimator = TokenEstimator(tokens_per_word=1.3)
+        estimator.calibrate("ein zwei drei vier fünf sechs sieben acht neun zehn", 4)
+        
+        assert estimator.tokens_per_word == 1.3
+    
+    def test_text_is_cached(self):
+        rolling = RollingContext()
+        rolling.add_turn("frage", "antwort")
+        
+        assert rolling.text is rolling.text
+
+
+class TestSessionManagerContext:
+    """Test incremental maintenance in SessionManager."""
+    
+    def test_matches_previous_format(self):
+        manager = SessionManager()
+        session_id = manager.create_session()
+        manager.add_conversation_turn(session_id, "wie nutze ich docker?", "x" * 300, "fast", 0.1, "simple")
+        
+        context, turns = manager.get_context_with_turns(session_id)
+        assert turns == 1
+        assert context == (
+            "Conversation topics: containerization\n"
+            "Previous Q: wie nutze ich docker?\n"
+            f"Previous A: {'x' * 200}..."
+        )
+    
+    def test_context_is_not_rebuilt_per_request(self):
+        manager = SessionManager()
+        session_id = manager.create_session()
+        _add_turns(manager, session_id, 3)
+        manager.get_context_for_query(session_id, "a")
+        
+        with patch("modules.module_a_core.session_manager.RollingContext") as rebuilt:
+            _add_turns(manager, session_id, 2)
+            for _ in range(3):
+                context, turns = manager.get_context_with_turns(session_id)
+        
+        rebuilt.assert_not_called()
+        assert turns == 5
+        assert "frage 1" in context
+    
+    def test_respects_max_context_length_in_tokens(self):
+        manager = SessionManager(max_context_length=50)
+        manager.token_estimator.calibrate("wort " * 20, 40)
+        session_id = manager.create_session()
+        _add_turns(manager, session_id, 5, response="wort " * 10)
+        manager.get_context_for_query(session_id, "a")
+        
+        rolling = manager._contexts[session_id]
+        assert rolling.estimator is manager.token_estimator
+        assert rolling.tokens_per_word > 1.3
+        assert rolling.tokens <= 50
+    
+    def test_other_worker_turn_triggers_rebuild(self, tmp_path):
+        path = str(tmp_path / "sessions.db")
+        worker_a = SessionManager(store=SQLiteSessionStore(path=path))
+        worker_b = SessionManager(store=SQLiteSessionStore(path=path))
+        session_id = worker_a.create_session()
+        _add_turns(worker_a, session_id, 1)
+        worker_a.get_context_for_query(session_id, "a")
+        
+        worker_b.add_conversation_turn(session_id, "von b", "antwort", "fast", 0.1, "simple")
+        context, turns = worker_a.get_context_with_turns(session_id)
+        
+        assert turns == 2
+        assert "Previous Q: von b" in context
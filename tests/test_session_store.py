@@ -0,0 +1,235 @@
+"""
+Tests for the Module A session stores.
+"""
+
+import fnmatch
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from modules.module_a_core.session_manager import SessionManager
+from modules.module_a_core.session_store import (
+    MemorySessionStore, SQLiteSessionStore, RedisSessionStore, create_session_store
+)
+
+
+class LocalRedis:
+    """Redis-compatible stand-in (get/set with EX/delete/scan_iter) with real key expiry."""
+    
+    def __init__(self):
+        self.data = {}
+    
+    def _live(self, key):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del self.data[key]
+            return None
+        return entry
+    
+    def get(self, key):
+        entry = self._live(key)
+        return entry[0].encode() if entry else None
+    
+    def set(self, key, value, ex=None):
+        self.data[key] = (value, time.time() + ex if ex else None)
+        return True
+    
+    def delete(self, key):
+        return 1 if self.data.pop(key, None) is not None else 0
+    
+    def scan_iter(self, match="*"):
+        return [key for key in list(self.data) if self._live(key) and fnmatch.fnmatch(key, match)]
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = MemorySessionStore(ttl=60)
+    elif request.param == "sqlite":
+        store = SQLiteSessionStore(path=str(tmp_path / "sessions.db"), ttl=60)
+    else:
+        store = RedisSessionStore(LocalRedis(), ttl=60)
+    yield store
+    store.close()
+
+
+class TestSessionStores:
+    """Behaviour shared by all backends."""
+    
+    def test_turns_are_persisted(self, store):
+        manager = SessionManager(store=store)
+        session_id = manager.create_session()
+        manager.add_conversation_turn(session_id, "wie nutze ich docker?", "so", "fast", 0.2, "simple")
+        
+        session = manager.get_session(session_id)
+        assert [turn.query for turn in session.turns] == ["wie nutze ich docker?"]
+        assert session.topic_context == ["containerization"]
+    
+    def test_expired_session_is_gone(self, store):
+        manager = SessionManager(store=store)
+        session_id = manager.create_session()
+        session = manager.get_session(session_id)
+        session.last_activity = time.time() - 120
+        manager.save_session(session)
+        
+        assert manager.get_session(session_id) is None
+    
+    def test_delete(self, store):
+        manager = SessionManager(store=store)
+        session_id = manager.create_session()
+        
+        assert store.delete(session_id) is True
+        assert manager.get_session(session_id) is None
+
+
+class TestMemorySessionStore:
+    """Test bounds and heap expiry of the in-memory store."""
+    
+    def test_lru_eviction_by_count(self):
+        manager = SessionManager(store=MemorySessionStore(max_sessions=2))
+        first, second = manager.create_session(), manager.create_session()
+        manager.get_session(first)
+        third = manager.create_session()
+        
+        assert manager.get_session(second) is None
+        assert manager.get_session(first) is not None
+        assert manager.get_session(third) is not None
+        assert manager.get_store_statistics()["evictions"] == 1
+    
+    def test_eviction_by_bytes(self):
+        store = MemorySessionStore(max_bytes=2000)
+        manager = SessionManager(store=store)
+        first = manager.create_session()
+        second = manager.create_session()
+        manager.add_conversation_turn(second, "frage", "x" * 1500, "fast", 0.1, "simple")
+        
+        assert manager.get_session(first) is None
+        assert store.get_statistics()["bytes"] <= 2000
+    
+    def test_expire_only_pops_expired_entries(self):
+        store = MemorySessionStore(ttl=10)
+        manager = SessionManager(store=store)
+        old = manager.create_session()
+        new = manager.create_session()
+        session = store.get(old)
+        session.last_activity -= 20
+        store.put(session)
+        
+        assert store.expire() == [old]
+        assert store.get(new) is not None
+        assert manager.cleanup_expired_sessions() == 0
+    
+    def test_touched_session_outlives_its_old_heap_entry(self):
+        store = MemorySessionStore(ttl=10)
+        manager = SessionManager(store=store)
+        session_id = manager.create_session()
+        manager.add_conversation_turn(session_id, "frage", "antwort", "fast", 0.1, "simple")
+        
+        assert store.expire(now=time.time() + 5) == []
+        assert store.expire(now=time.time() + 11) == [session_id]
+
+
+class TestPersistentSessionStores:
+    """Test sharing and restart survival."""
+    
+    def test_sqlite_survives_restart(self, tmp_path):
+        path = str(tmp_path / "sessions.db")
+        first = SessionManager(store=SQLiteSessionStore(path=path))
+        session_id = first.create_session()
+        first.add_conversation_turn(session_id, "ls -la", "listet dateien", "fast", 0.1, "simple")
+        first.store.close()
+        
+        restarted = SessionManager(store=SQLiteSessionStore(path=path))
+        assert "Previous Q: ls -la" in restarted.get_context_for_query(session_id, "und versteckte?")
+    
+    def test_sqlite_shared_between_workers(self, tmp_path):
+        path = str(tmp_path / "sessions.db")
+        worker_a = SessionManager(store=SQLiteSessionStore(path=path))
+        worker_b = SessionManager(store=SQLiteSessionStore(path=path))
+        session_id = worker_a.create_session()
+        
+        worker_b.add_conversation_turn(session_id, "erste", "a", "fast", 0.1, "simple")
+        worker_a.add_conversation_turn(session_id, "zweite", "b", "fast", 0.1, "simple")
+        
+        assert [turn.query for turn in worker_b.get_session(session_id).turns] == ["erste", "zweite"]
+    
+    def test_sqlite_relative_path_anchored_at_project_root(self, tmp_path, monkeypatch):
+        from modules.module_a_core import session_store
+        monkeypatch.setattr(session_store, "PROJECT_ROOT", tmp_path)
+        (tmp_path / "cwd").mkdir()
+        monkeypatch.chdir(tmp_path / "cwd")
+        
+        store = SQLiteSessionStore(path="data/module_a_sessions.db")
+        store.close()
+        
+        assert store.path == str(tmp_path / "data" / "module_a_sessions.db")
+        assert (tmp_path / "data" / "module_a_sessions.db").exists()
+    
+    def test_sqlite_bounded(self, tmp_path):
+        store = SQLiteSessionStore(path=str(tmp_path / "sessions.db"), max_sessions=2, trim_interval=1)
+        manager = SessionManager(store=store)
+        ids = [manager.create_session() for _ in range(3)]
+        
+        assert len(store) == 2
+        assert manager.get_session(ids[0]) is None
+    
+    def test_sqlite_trims_every_interval_puts(self, tmp_path):
+        store = SQLiteSessionStore(path=str(tmp_path / "sessions.db"), max_sessions=2, trim_interval=4)
+        manager = SessionManager(store=store)
+        ids = [manager.create_session() for _ in range(3)]
+        
+        assert len(store) == 3  # Not trimmed yet
+        
+        ids.append(manager.create_session())
+        assert len(store) == 2
+        assert [manager.get_session(i) is not None for i in ids] == [False, False, True, True]
+    
+    def test_sqlite_bounded_by_bytes(self, tmp_path):
+        store = SQLiteSessionStore(path=str(tmp_path / "sessions.db"), max_bytes=1000, trim_interval=1)
+        manager = SessionManager(store=store)
+        ids = []
+        for _ in range(3):
+            ids.append(manager.create_session())
+            manager.add_conversation_turn(ids[-1], "frage", "ä" * 200, "fast", 0.1, "simple")
+        
+        # One turn makes a session ~750 bytes of UTF-8 JSON, only the latest fits
+        assert len(store) == 1
+        assert manager.get_session(ids[-1]) is not None
+        assert store.get_statistics()["evictions"] == 2
+    
+    def test_redis_uses_key_expiry(self):
+        client = LocalRedis()
+        manager = SessionManager(store=RedisSessionStore(client, ttl=60))
+        session_id = manager.create_session()
+        
+        key = f"superhelfer:session:{session_id}"
+        assert client.data[key][1] == pytest.approx(time.time() + 60, abs=2)
+        assert len(manager.store) == 1
+    
+    def test_factory(self, tmp_path):
+        assert isinstance(create_session_store("file", path=str(tmp_path / "s.db")), SQLiteSessionStore)
+        assert isinstance(create_session_store("memory"), MemorySessionStore)
+        with pytest.raises(ValueError):
+            create_session_store("postgres")
+    
+    def test_factory_falls_back_when_redis_is_unreachable(self, monkeypatch):
+        class ConnectionError(Exception):
+            pass
+        
+        class UnreachableRedis:
+            @classmethod
+            def from_url(cls, url, **kwargs):
+                return cls()
+            
+            def ping(self):
+                raise ConnectionError("Connection refused")
+        
+        fake_redis = SimpleNamespace(
+            Redis=UnreachableRedis,
+            exceptions=SimpleNamespace(ConnectionError=ConnectionError, TimeoutError=TimeoutError)
+        )
+        monkeypatch.setitem(sys.modules, "redis", fake_redis)
+        
+        assert isinstance(create_session_store("redis"), MemorySessionStore)
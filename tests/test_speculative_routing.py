@@ -0,0 +1,145 @@
+"""
+Tests for speculative FAST-draft generation in the model router (Module A).
+"""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from modules.module_a_core.model_router import ModelType
+
+
+def _result(text: str, model: str):
+    return {'response': text, 'model_used': model, 'prompt_tokens': 1, 'response_tokens': 1, 'total_duration': 0}
+
+
+def _slow_heavy(router, delay: float = 0.2, fail: bool = False):
+    """Install a slow HEAVY client and return a dict recording its fate."""
+    state = {"started": False, "cancelled": False}
+    
+    async def generate(query, context=None):
+        state["started"] = True
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+        if fail:
+            raise RuntimeError("LLM generation timed out - please try again")
+        return _result("Ausführliche Antwort des großen Modells", "llama3.1:70b")
+    
+    router.ollama_clients[ModelType.HEAVY].generate_response = generate
+    return state
+
+
+class TestSpeculativeGeneration:
+    """Test speculative generate_response."""
+    
+    @pytest.mark.asyncio
+    async def test_confident_draft_cancels_routed_model(self, router):
+        state = _slow_heavy(router)
+        router.ollama_clients[ModelType.FAST].generate_response = AsyncMock(
+            return_value=_result("Nutze `ss -tulpn` um offene Ports anzuzeigen.", "llama3.2:3b")
+        )
+        router.speculative_confidence_threshold = 0.0
+        
+        result = await router.generate_response("offene ports?", force_model=ModelType.HEAVY, speculative=True)
+        await asyncio.sleep(0)
+        
+        assert result['success'] is True
+        assert result['model_used'] == "llama3.2:3b"
+        assert result['speculative']['draft_accepted'] is True
+        assert state["started"] and state["cancelled"]
+        assert router.speculative_stats["draft_accepted"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_routed_answer_replaces_weak_draft(self, router):
+        _slow_heavy(router, delay=0.05)
+        router.ollama_clients[ModelType.FAST].generate_response = AsyncMock(
+            return_value=_result("Weiß nicht.", "llama3.2:3b")
+        )
+        router.speculative_confidence_threshold = 1.01
+        
+        result = await router.generate_response("beweise satz", force_model=ModelType.HEAVY, speculative=True)
+        
+        assert result['model_used'] == "llama3.1:70b"
+        assert result['speculative']['draft_accepted'] is False
+        assert result['speculative']['draft_response'] == "Weiß nicht."
+        assert router.speculative_stats["routed_used"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_draft_is_fallback_when_routed_model_fails(self, router):
+        _slow_heavy(router, delay=0.01, fail=True)
+        router.ollama_clients[ModelType.FAST].generate_response = AsyncMock(
+            return_value=_result("Kurze Antwort.", "llama3.2:3b")
+        )
+        router.speculative_confidence_threshold = 1.01
+        
+        result = await router.generate_response("beweise satz", force_model=ModelType.HEAVY, speculative=True)
+        
+        assert result['success'] is True
+        assert result['fallback_used'] is True
+        assert result['model_used'] == "llama3.2:3b"
+        assert router.speculative_stats["routed_failed"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_fast_route_is_not_speculative(self, router):
+        router.ollama_clients[ModelType.FAST].generate_response = AsyncMock(
+            return_value=_result("Hallo!", "llama3.2:3b")
+        )
+        
+        result = await router.generate_response("hallo", force_model=ModelType.FAST, speculative=True)
+        
+        assert 'speculative' not in result
+        assert router.speculative_stats["runs"] == 0
+
+
+class TestSpeculativeStreaming:
+    """Test speculative generate_response_stream."""
+    
+    @pytest.mark.asyncio
+    async def test_draft_tokens_then_replace(self, router):
+        _slow_heavy(router, delay=0.01)
+        
+        async def fast_stream(query, context=None):
+            yield {'token': 'Weiß ', 'done': False}
+            yield {'token': 'nicht.', 'done': False}
+            yield {'token': '', 'done': True, **_result("Weiß nicht.", "llama3.2:3b")}
+        
+        router.ollama_clients[ModelType.FAST].generate_response_stream = fast_stream
+        router.speculative_confidence_threshold = 1.01
+        
+        events = [
+            event async for event in router.generate_response_stream(
+                "beweise satz", force_model=ModelType.HEAVY, speculative=True
+            )
+        ]
+        
+        assert [event['type'] for event in events] == ['routing', 'token', 'token', 'replace', 'done']
+        assert all(event['draft'] for event in events if event['type'] == 'token')
+        assert events[3]['response'] == "Ausführliche Antwort des großen Modells"
+        assert events[-1]['result']['speculative']['draft_response'] == "Weiß nicht."
+    
+    @pytest.mark.asyncio
+    async def test_confident_draft_stream_ends_without_replace(self, router):
+        state = _slow_heavy(router)
+        
+        async def fast_stream(query, context=None):
+            yield {'token': 'ss -tulpn', 'done': False}
+            yield {'token': '', 'done': True, **_result("ss -tulpn", "llama3.2:3b")}
+        
+        router.ollama_clients[ModelType.FAST].generate_response_stream = fast_stream
+        router.speculative_confidence_threshold = 0.0
+        
+        events = [
+            event async for event in router.generate_response_stream(
+                "offene ports", force_model=ModelType.HEAVY, speculative=True
+            )
+        ]
+        await asyncio.sleep(0)
+        
+        assert [event['type'] for event in events] == ['routing', 'token', 'done']
+        assert events[-1]['result']['speculative']['draft_accepted'] is True
+        # Cancelled before or during its generation
+        assert not state["started"] or state["cancelled"]
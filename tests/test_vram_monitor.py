@@ -0,0 +1,148 @@
+"""
+Tests for the VRAM sampler and model switch policy (Module A).
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+
+from modules.module_a_core.model_router import ModelRouter, ModelType
+from modules.module_a_core.vram_monitor import VRAMMonitor, FakeVRAMBackend, VRAMBackend, SwitchDecision
+
+
+def _monitor(used_mb: int = 0, policy: str = "fallback", **kwargs) -> VRAMMonitor:
+    return VRAMMonitor(backend=FakeVRAMBackend(total_mb=24000, used_mb=used_mb), switch_policy=policy, **kwargs)
+
+
+class TestVRAMSampling:
+    """Test snapshots and history."""
+    
+    def test_reads_come_from_snapshot(self):
+        monitor = _monitor(used_mb=6000)
+        monitor.sample()
+        monitor.backend.used_mb = 12000
+        
+        # Fresh snapshot is reused instead of reading the backend again
+        assert monitor.get_usage_percentage() == pytest.approx(0.25)
+        assert monitor.get_vram_info().free_mb == 18000
+    
+    def test_stale_snapshot_is_resampled_without_sampler(self):
+        monitor = _monitor(used_mb=6000, sample_interval=0.01)
+        monitor.sample()
+        monitor.backend.used_mb = 12000
+        time.sleep(0.03)
+        
+        assert monitor.get_usage_percentage() == pytest.approx(0.5)
+    
+    def test_background_sampler_fills_history(self):
+        monitor = _monitor(used_mb=1000, sample_interval=0.01, history_size=5)
+        monitor.start()
+        try:
+            time.sleep(0.1)
+        finally:
+            monitor.stop()
+        
+        history = monitor.get_history()
+        assert len(history) == 5
+        assert all(sample.used_mb == 1000 for sample in history)
+        assert monitor.get_statistics()["sampler_running"] is False
+    
+    def test_trend_slope(self):
+        monitor = _monitor()
+        for used_mb in (1000, 2000, 3000):
+            monitor.backend.used_mb = used_mb
+            monitor.sample()
+        
+        trend = monitor.get_trend()
+        assert [sample["used_mb"] for sample in trend["samples"]] == [1000, 2000, 3000]
+        assert trend["max_usage_percent"] == pytest.approx(0.125)
+        assert trend["used_mb_per_minute"] > 0
+    
+    def test_no_backend(self):
+        monitor = VRAMMonitor(backend=VRAMBackend())
+        monitor.start()
+        
+        assert monitor.pynvml_available is False
+        assert monitor.get_vram_info() is None
+        assert monitor.evaluate_model_switch("llama3.1:70b", 40000) == SwitchDecision.ALLOW
+        assert monitor.get_trend()["samples"] == []
+
+
+class TestSwitchPolicy:
+    """Test non-interactive model switch decisions."""
+    
+    def test_low_usage_allows(self):
+        assert _monitor(used_mb=1000).evaluate_model_switch("qwen", 20000) == SwitchDecision.ALLOW
+    
+    def test_high_usage_that_fits_allows(self):
+        assert _monitor(used_mb=20000).evaluate_model_switch("llama3.2:3b", 2000) == SwitchDecision.ALLOW
+    
+    @pytest.mark.parametrize("policy", ["fallback", "queue", "reject"])
+    def test_insufficient_vram_follows_policy(self, policy):
+        monitor = _monitor(used_mb=20000, policy=policy)
+        
+        assert monitor.evaluate_model_switch("qwen", 20000) == SwitchDecision(policy)
+        assert monitor.check_before_model_switch("qwen", 20000) is False
+    
+    def test_unknown_policy(self):
+        with pytest.raises(ValueError):
+            _monitor(policy="ask")
+    
+    @pytest.mark.asyncio
+    async def test_wait_for_vram(self):
+        monitor = _monitor(used_mb=20000, sample_interval=0.01)
+        
+        async def free_vram():
+            await asyncio.sleep(0.03)
+            monitor.backend.used_mb = 0
+        
+        asyncio.create_task(free_vram())
+        assert await monitor.wait_for_vram("qwen", 20000, timeout=1.0) == SwitchDecision.ALLOW
+        assert await _monitor(used_mb=20000, sample_interval=0.01).wait_for_vram("qwen", 20000, timeout=0.05) == SwitchDecision.FALLBACK
+
+
+class TestRouterVRAMPolicy:
+    """Test the switch policy in ModelRouter.route_query."""
+    
+    def _router(self, monitor):
+        router = ModelRouter(vram_monitor=monitor)
+        router.residency.unload_idle = AsyncMock(return_value=[])
+        return router
+    
+    @pytest.mark.asyncio
+    async def test_fallback(self):
+        router = self._router(_monitor(used_mb=23000))
+        
+        result = await router.route_query("test", force_model=ModelType.HEAVY)
+        
+        assert result.selected_model == ModelType.FAST
+        assert result.user_confirmed is True
+        assert result.vram_check_passed is False
+    
+    @pytest.mark.asyncio
+    async def test_reject_aborts_request(self):
+        router = self._router(_monitor(used_mb=23000, policy="reject"))
+        
+        result = await router.generate_response("test", force_model=ModelType.HEAVY)
+        
+        assert result['success'] is False
+        assert result['routing_info'].user_confirmed is False
+    
+    @pytest.mark.asyncio
+    async def test_queue_waits_after_unloading_idle_models(self):
+        monitor = _monitor(used_mb=23000, policy="queue", sample_interval=0.01, queue_timeout=1.0)
+        router = self._router(monitor)
+        
+        async def unload_idle():
+            monitor.backend.used_mb = 0
+            return ["qwen3-coder-30b-local"]
+        
+        router.residency.unload_idle = AsyncMock(side_effect=unload_idle)
+        
+        result = await router.route_query("test", force_model=ModelType.CODE)
+        
+        assert result.selected_model == ModelType.CODE
+        assert result.vram_check_passed is True
+        assert "waited for VRAM" in result.reasoning